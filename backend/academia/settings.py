@@ -101,6 +101,9 @@ CORS_ALLOW_HEADERS = [
 
 CORS_ALLOW_METHODS = ["DELETE", "GET", "OPTIONS", "PATCH", "POST", "PUT"]
 
+# Pagination headers of list endpoints (e.g. /estudiantes) readable from the frontend
+CORS_EXPOSE_HEADERS = ["x-next-cursor", "x-total-count", "x-total-count-estimated", "etag"]
+
 CSRF_TRUSTED_ORIGINS = env.list(
     "CSRF_TRUSTED_ORIGINS",
     default=[
@@ -284,6 +287,21 @@ CACHES = {
 
 # Analytics cache TTL (seconds)
 ANALYTICS_CACHE_SECONDS = env.int('ANALYTICS_CACHE_SECONDS', default=300)
+# TTL for endpoints with depends_on: writes invalidate them, so it can be long.
+ANALYTICS_CACHE_TRACKED_SECONDS = env.int('ANALYTICS_CACHE_TRACKED_SECONDS', default=21600)
+# Stale-while-revalidate: expired entries are still served for this long while one worker recomputes.
+ANALYTICS_CACHE_GRACE_SECONDS = env.int('ANALYTICS_CACHE_GRACE_SECONDS', default=300)
+# Recompute lock TTL and how long other workers wait for a cold key before computing it themselves.
+ANALYTICS_CACHE_LOCK_SECONDS = env.int('ANALYTICS_CACHE_LOCK_SECONDS', default=60)
+ANALYTICS_CACHE_LOCK_WAIT_SECONDS = env.int('ANALYTICS_CACHE_LOCK_WAIT_SECONDS', default=15)
+# warm_analytics: pass interval in --loop mode, how soon before expiry an entry is refreshed, and threads.
+ANALYTICS_WARM_INTERVAL_SECONDS = env.int('ANALYTICS_WARM_INTERVAL_SECONDS', default=300)
+ANALYTICS_WARM_MARGIN_SECONDS = env.int('ANALYTICS_WARM_MARGIN_SECONDS', default=900)
+ANALYTICS_WARM_WORKERS = env.int('ANALYTICS_WARM_WORKERS', default=4)
+# procesar_exportaciones: artifact lifetime, pass interval in --loop mode, and how long a job may stay in progress.
+EXPORT_JOB_TTL_SECONDS = env.int('EXPORT_JOB_TTL_SECONDS', default=86400)
+EXPORT_WORKER_INTERVAL_SECONDS = env.int('EXPORT_WORKER_INTERVAL_SECONDS', default=5)
+EXPORT_JOB_TIMEOUT_SECONDS = env.int('EXPORT_JOB_TIMEOUT_SECONDS', default=1800)
 
 # Logging Configuration
 LOGGING = {
@@ -344,6 +362,33 @@ CFP_EMAIL_USE_TLS = env.bool('CFP_EMAIL_USE_TLS', default=True)
 CFP_EMAIL_USE_SSL = env.bool('CFP_EMAIL_USE_SSL', default=False)
 CFP_EMAIL_HOST_USER = env('CFP_EMAIL_HOST_USER', default=EMAIL_HOST_USER)
 CFP_EMAIL_HOST_PASSWORD = env('CFP_EMAIL_HOST_PASSWORD', default=EMAIL_HOST_PASSWORD)
+# Backend class for the CFP account (the SMTP settings above are passed to it).
+CFP_EMAIL_BACKEND = env('CFP_EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+# SMTP socket timeout, so a stuck server cannot block the mail worker.
+EMAIL_TIMEOUT = env.int('EMAIL_TIMEOUT', default=30)
+# Gmail API: the cached OAuth token is refreshed this many seconds before it expires.
+GMAIL_TOKEN_REFRESH_MARGIN_SECONDS = env.int('GMAIL_TOKEN_REFRESH_MARGIN_SECONDS', default=300)
+
+# run_mail_worker (outbox): --loop interval, messages per batch, send rate cap,
+# retries (delay doubles from the base up to the max) and how long a batch may stay claimed.
+MAIL_WORKER_INTERVAL_SECONDS = env.int('MAIL_WORKER_INTERVAL_SECONDS', default=5)
+MAIL_WORKER_BATCH_SIZE = env.int('MAIL_WORKER_BATCH_SIZE', default=50)
+MAIL_WORKER_RATE_PER_MINUTE = env.int('MAIL_WORKER_RATE_PER_MINUTE', default=60)
+# Token bucket capacity (messages that may go out back to back before the rate applies)
+# and SMTP sessions sending in parallel per account (keep it <= MAIL_SMTP_POOL_SIZE).
+MAIL_WORKER_BURST = env.int('MAIL_WORKER_BURST', default=10)
+MAIL_WORKER_CONCURRENCY = env.int('MAIL_WORKER_CONCURRENCY', default=2)
+MAIL_MAX_ATTEMPTS = env.int('MAIL_MAX_ATTEMPTS', default=6)
+MAIL_RETRY_BASE_SECONDS = env.int('MAIL_RETRY_BASE_SECONDS', default=60)
+MAIL_RETRY_MAX_SECONDS = env.int('MAIL_RETRY_MAX_SECONDS', default=3600)
+MAIL_SENDING_TIMEOUT_SECONDS = env.int('MAIL_SENDING_TIMEOUT_SECONDS', default=900)
+# SMTP connection pool (per process): idle sessions kept per account, how long an idle
+# session is reused, and messages per session before reconnecting (providers cap long sessions).
+MAIL_SMTP_POOL_SIZE = env.int('MAIL_SMTP_POOL_SIZE', default=4)
+MAIL_SMTP_IDLE_SECONDS = env.int('MAIL_SMTP_IDLE_SECONDS', default=120)
+MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION = env.int('MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION', default=100)
+# Attachment bytes kept in memory per process (the same few resource PDFs go to every recipient).
+MAIL_ATTACHMENT_CACHE_BYTES = env.int('MAIL_ATTACHMENT_CACHE_BYTES', default=32 * 1024 * 1024)
 
 # URL del frontend para enlaces en emails
 FRONTEND_URL = env('FRONTEND_URL', default='https://cfp.lucasoviedodev.org')
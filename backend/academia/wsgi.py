@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "academia.settings")
 
 application = get_wsgi_application()
+
+
+# Índice en memoria del autocompletado: se arma al arrancar el worker, en un
+# hilo de fondo que después lo reconstruye cuando hace falta, para que ninguna
+# consulta pague la carga.
+from core.services.lookup_estudiantes_service import LookupEstudiantesService  # noqa: E402
+
+LookupEstudiantesService.solicitar_reconstruccion()
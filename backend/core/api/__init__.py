@@ -21,6 +21,7 @@ from .autorizaciones import router as autorizaciones_router
 from .nivelacion import router as nivelacion_router
 from .preinscripcion_terciario import router as preinscripcion_terciario_router
 from .videojuegos import router as videojuegos_router
+from .exportaciones import router as exportaciones_router
 
 
 
@@ -47,4 +48,5 @@ __all__ = [
     "nivelacion_router",
     "preinscripcion_terciario_router",
     "videojuegos_router",
+    "exportaciones_router",
 ]
@@ -1,20 +1,26 @@
-from datetime import timedelta
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Q, Sum
 from django.db.models.functions import TruncMonth, TruncWeek
 from django.utils.dateparse import parse_date
 from ninja import Router
 from ninja.errors import HttpError
-from core.api.permissions import require_authenticated_group
-from core.utils.cache_analytics import cache_analytics
+from core.api.permissions import require_admin, require_authenticated_group
+from core.services.grafico_cursos_service import GraficoCursosService
+from core.services.riesgo_abandono_service import RiesgoAbandonoService
+from core.utils.cache_analytics import cache_analytics, metricas_cache
 
-from core.models import Inscripcion, Asistencia, Nota, Estudiante, Cohorte, Bloque, Examen, Programa
+from core.models import Inscripcion, AsistenciaDiaria, CuboInscripcion, Nota, Estudiante, Cohorte, Bloque, Programa, ProgresoBloque, ProgresoPrograma
 
 router = Router(tags=["analytics"])
 
 
+def _tasa(presentes, total):
+    """Proporción presentes/total del resumen diario (equivale al Avg("presente") de los registros)."""
+    return float(presentes / total) if total else 0.0
+
+
 @router.get("/inscriptos", response=list)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Inscripcion", "Cohorte", "Programa"))
 def inscriptos(request):
     qs = Inscripcion.objects.values("cohorte__programa__codigo", "cohorte__nombre").annotate(inscriptos=Count("id"))
     return list(qs)
@@ -22,19 +28,26 @@ def inscriptos(request):
 
 @router.get("/asistencia-promedio", response=list)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Asistencia", "Modulo"))
 def asistencia_promedio(request):
     qs = (
-        Asistencia.objects.values("modulo__id", "modulo__nombre")
-        .annotate(asistencia_promedio=Avg("presente"))
+        AsistenciaDiaria.objects.values("modulo__id", "modulo__nombre")
+        .annotate(presentes=Sum("presentes"), total=Sum("total"))
         .order_by("modulo__id")
     )
-    return list(qs)
+    return [
+        {
+            "modulo__id": item["modulo__id"],
+            "modulo__nombre": item["modulo__nombre"],
+            "asistencia_promedio": _tasa(item["presentes"], item["total"]),
+        }
+        for item in qs
+    ]
 
 
 @router.get("/aprobacion-por-examen", response=list)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Nota", "Examen"))
 def aprobacion_por_examen(request):
     qs = (
         Nota.objects.values("examen__modulo__id", "examen__tipo_examen")
@@ -46,7 +59,7 @@ def aprobacion_por_examen(request):
 
 @router.get("/equivalencias", response=list)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Nota", "Examen"))
 def equivalencias(request):
     qs = Nota.objects.filter(es_equivalencia=True).values("examen__modulo__id").annotate(count=Count("id"))
     return list(qs)
@@ -54,7 +67,7 @@ def equivalencias(request):
 
 @router.get("/enrollments", response=dict)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Inscripcion",))
 def analytics_enrollments(
     request,
     programa_id: int = None,
@@ -64,39 +77,36 @@ def analytics_enrollments(
     date_to: str = None,
     group_by: str = "month",
 ):
-    qs = Inscripcion.objects.all()
+    # Lee el cubo de inscripciones: fecha y mes de alta son columnas indexadas.
+    qs = CuboInscripcion.objects.all()
     if programa_id:
-        qs = qs.filter(cohorte__programa_id=programa_id)
+        qs = qs.filter(programa_id=programa_id)
     if bloque_id:
-        qs = qs.filter(modulo__bloque_id=bloque_id)
+        qs = qs.filter(bloque_id=bloque_id)
     if cohorte_id:
         qs = qs.filter(cohorte_id=cohorte_id)
     if date_from:
         df = parse_date(date_from)
         if df:
-            qs = qs.filter(created_at__date__gte=df)
+            qs = qs.filter(fecha__gte=df)
     if date_to:
         dt = parse_date(date_to)
         if dt:
-            qs = qs.filter(created_at__date__lte=dt)
+            qs = qs.filter(fecha__lte=dt)
 
+    total = qs.aggregate(total=Sum("inscripciones"))["total"] or 0
     if group_by.lower() == "month":
-        data = (
-            qs.annotate(period=TruncMonth("created_at"))
-            .values("period")
-            .annotate(count=Count("id"))
-            .order_by("period")
-        )
-        series = [{"period": item["period"].date().isoformat(), "count": item["count"]} for item in data]
+        data = qs.values("mes").annotate(count=Sum("inscripciones")).order_by("mes")
+        series = [{"period": item["mes"].isoformat(), "count": item["count"]} for item in data]
     else:
-        series = [{"period": None, "count": qs.count()}]
+        series = [{"period": None, "count": total}]
 
-    return {"total": qs.count(), "series": series}
+    return {"total": total, "series": series}
 
 
 @router.get("/attendance", response=dict)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Asistencia", "Cohorte", "Modulo", "Bloque"))
 def analytics_attendance(
     request,
     programa_id: int = None,
@@ -106,7 +116,8 @@ def analytics_attendance(
     date_to: str = None,
     group_by: str = "module",
 ):
-    qs = Asistencia.objects.all()
+    # Lee el resumen diario (AsistenciaDiaria), no los registros individuales.
+    qs = AsistenciaDiaria.objects.all()
     if modulo_id:
         qs = qs.filter(modulo_id=modulo_id)
     if cohorte_id:
@@ -126,19 +137,19 @@ def analytics_attendance(
         if dt:
             qs = qs.filter(fecha__lte=dt)
 
-    overall = qs.aggregate(total=Count("id"), presentes=Count("id", filter=Q(presente=True)), rate=Avg("presente"))
+    overall = qs.aggregate(total=Sum("total"), presentes=Sum("presentes"))
 
     if group_by == "module":
         data = (
             qs.values("modulo__id", "modulo__nombre")
-            .annotate(rate=Avg("presente"), total=Count("id"))
+            .annotate(presentes=Sum("presentes"), total=Sum("total"))
             .order_by("modulo__id")
         )
         series = [
             {
                 "modulo_id": item["modulo__id"],
                 "modulo_nombre": item["modulo__nombre"],
-                "rate": float(item["rate"] or 0),
+                "rate": _tasa(item["presentes"], item["total"]),
                 "total": item["total"],
             }
             for item in data
@@ -147,13 +158,13 @@ def analytics_attendance(
         data = (
             qs.annotate(period=TruncWeek("fecha"))
             .values("period")
-            .annotate(rate=Avg("presente"), total=Count("id"))
+            .annotate(presentes=Sum("presentes"), total=Sum("total"))
             .order_by("period")
         )
         series = [
             {
-                "period": item["period"].date().isoformat(),
-                "rate": float(item["rate"] or 0),
+                "period": item["period"].isoformat(),
+                "rate": _tasa(item["presentes"], item["total"]),
                 "total": item["total"],
             }
             for item in data
@@ -163,9 +174,9 @@ def analytics_attendance(
 
     return {
         "overall": {
-            "total": overall.get("total", 0),
-            "presentes": overall.get("presentes", 0),
-            "rate": float(overall.get("rate") or 0),
+            "total": overall["total"] or 0,
+            "presentes": overall["presentes"] or 0,
+            "rate": _tasa(overall["presentes"], overall["total"]),
         },
         "series": series,
     }
@@ -173,7 +184,7 @@ def analytics_attendance(
 
 @router.get("/grades", response=dict)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Nota", "Cohorte", "Examen", "Modulo", "Bloque"))
 def analytics_grades(
     request,
     programa_id: int = None,
@@ -229,8 +240,19 @@ def analytics_grades(
 
 @router.get("/dropout", response=dict)
 @require_authenticated_group
-@cache_analytics()
-def analytics_dropout(request, programa_id: int = None, cohorte_id: int = None, date_from: str = None, date_to: str = None, rule: str = "A", lookback_weeks: int = 3):
+@cache_analytics(depends_on=("Inscripcion", "Asistencia", "Estudiante"))
+def analytics_dropout(
+    request,
+    programa_id: int = None,
+    cohorte_id: int = None,
+    date_from: str = None,
+    date_to: str = None,
+    rule: str = "A",
+    lookback_weeks: int = 3,
+    page: int = 1,
+    page_size: int = 50,
+    sort: str = "-risk",
+):
     rule = (rule or "A").upper()
     qs = Inscripcion.objects.select_related("estudiante", "cohorte__programa")
     if programa_id:
@@ -248,25 +270,26 @@ def analytics_dropout(request, programa_id: int = None, cohorte_id: int = None,
 
     total_insc = qs.count()
     if rule == "B":
-        threshold = (parse_date(date_to) or None)
-        if threshold is None:
+        # Motor de riesgo: índice semanal por estudiante + puntaje vectorizado.
+        if sort not in ("-risk", "risk"):
+            raise HttpError(400, "sort inválido. Opciones: -risk, risk.")
+        page = max(page, 1)
+        page_size = min(max(page_size, 1), 500)
+        referencia = parse_date(date_to) if date_to else None
+        if referencia is None:
             from django.utils import timezone
-            threshold = timezone.localdate()
-        threshold = threshold - timedelta(weeks=lookback_weeks)
-        active_student_ids = (
-            Asistencia.objects.filter(fecha__gte=threshold, estudiante_id__in=qs.values_list("estudiante_id", flat=True))
-            .values_list("estudiante_id", flat=True)
-            .distinct()
+            referencia = timezone.localdate()
+        resultado = RiesgoAbandonoService.puntajes(qs, referencia, lookback_weeks, programa_id=programa_id)
+        dropout_count, risk_students = RiesgoAbandonoService.pagina_en_riesgo(
+            resultado, page, page_size, descendente=sort == "-risk"
         )
-        risk_ids = set(qs.values_list("estudiante_id", flat=True)) - set(active_student_ids)
-        dropout_count = len(risk_ids)
         rate = (dropout_count / total_insc) if total_insc else 0
-        risk_students = list(Estudiante.objects.filter(id__in=risk_ids).values("id", "apellido", "nombre", "dni")[:50])
         return {
             "rule": "B",
             "lookback_weeks": lookback_weeks,
             "overall": {"total_inscripciones": total_insc, "dropout": dropout_count, "rate": float(rate)},
             "at_risk": risk_students,
+            "pagination": {"page": page, "page_size": page_size, "total": dropout_count},
             "series": [],
         }
 
@@ -305,7 +328,7 @@ def analytics_dropout(request, programa_id: int = None, cohorte_id: int = None,
 
 @router.get("/graduates", response=dict)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Inscripcion", "Nota", "Estudiante", "Cohorte", "Programa", "Bloque", "Modulo"))
 def analytics_graduates(request, programa_id: int = None, bloque_id: int = None, cohorte_id: int = None):
     programa = None
     if cohorte_id and not programa_id:
@@ -342,31 +365,21 @@ def analytics_graduates(request, programa_id: int = None, bloque_id: int = None,
     total_bloques = len(bloques_req)
     graduates_ids = []
     if bloque_id and total_estudiantes > 0:
-        finals_types = [Examen.FINAL_VIRTUAL, Examen.FINAL_SINC, Examen.EQUIVALENCIA]
-        aprobados_ids = (
-            Nota.objects.filter(
+        graduates_ids = list(
+            ProgresoBloque.objects.filter(
+                bloque_id=bloque_id,
                 aprobado=True,
-                examen__tipo_examen__in=finals_types,
-                examen__bloque_id=bloque_id,
                 estudiante__in=estudiantes_qs,
-            )
-            .values_list("estudiante_id", flat=True)
-            .distinct()
+            ).values_list("estudiante_id", flat=True)
         )
-        graduates_ids = list(aprobados_ids)
     elif programa_id and len(bloques_req) > 0 and total_estudiantes > 0:
-        finals_types = [Examen.FINAL_VIRTUAL, Examen.FINAL_SINC, Examen.EQUIVALENCIA]
-        aprobados_por_est = (
-            Nota.objects.filter(
-                aprobado=True,
-                examen__tipo_examen__in=finals_types,
-                examen__bloque_id__in=bloques_req,
+        graduates_ids = list(
+            ProgresoPrograma.objects.filter(
+                programa_id=programa_id,
+                completo=True,
                 estudiante__in=estudiantes_qs,
-            )
-            .values("estudiante_id")
-            .annotate(bloques_aprobados=Count("examen__bloque", distinct=True))
+            ).values_list("estudiante_id", flat=True)
         )
-        graduates_ids = [r["estudiante_id"] for r in aprobados_por_est if r["bloques_aprobados"] >= total_bloques]
     else:
         graduates_ids = list(
             inscripciones_qs.filter(estado=Inscripcion.EGRESADO).values_list("estudiante_id", flat=True).distinct()
@@ -395,7 +408,7 @@ def analytics_graduates(request, programa_id: int = None, bloque_id: int = None,
 
 @router.get("/courses-graph", response=dict)
 @require_authenticated_group
-@cache_analytics()
+@cache_analytics(depends_on=("Cohorte", "Inscripcion", "Estudiante", "Programa", "Bloque", "Modulo", "Examen", "BloqueDeFechas", "SemanaConfig"))
 def courses_graph(
     request,
     programa_id: int,
@@ -408,157 +421,15 @@ def courses_graph(
     except Programa.DoesNotExist:
         raise HttpError(404, "Programa no encontrado")
 
-    cohortes_qs = (
-        Cohorte.objects.filter(programa=programa)
-        .select_related("bloque_fechas")
-        .prefetch_related("bloque_fechas__semanas_config")
-        .annotate(
-            estudiantes_total=Count("inscripciones__estudiante_id", distinct=True),
-            estatus_regular=Count(
-                "inscripciones__estudiante_id",
-                filter=Q(inscripciones__estudiante__estatus="Regular"),
-                distinct=True,
-            ),
-            estatus_libre=Count(
-                "inscripciones__estudiante_id",
-                filter=Q(inscripciones__estudiante__estatus="Libre"),
-                distinct=True,
-            ),
-            estatus_baja=Count(
-                "inscripciones__estudiante_id",
-                filter=Q(inscripciones__estudiante__estatus="Baja"),
-                distinct=True,
-            ),
-            estado_inscripto=Count(
-                "inscripciones__estudiante_id",
-                filter=Q(inscripciones__estado=Inscripcion.PREINSCRIPTO),
-            ),
-            Total_Activos=Count(
-                "inscripciones",
-                filter=Q(inscripciones__estado=Inscripcion.CURSANDO),
-                distinct=True,
-            ),
-            estado_pausado=Count(
-                "inscripciones__estudiante_id",
-                filter=Q(inscripciones__estado=Inscripcion.PAUSADO),
-                distinct=True,
-            ),
-            estado_egresado=Count(
-                "inscripciones__estudiante_id",
-                filter=Q(inscripciones__estado=Inscripcion.EGRESADO),
-                distinct=True,
-            ),
-        )
-        .order_by("fecha_inicio", "id")
-    )
-    if bloque_id:
-        cohortes_qs = cohortes_qs.filter(bloque_id=bloque_id)
-    if anio:
-        cohortes_qs = cohortes_qs.filter(fecha_inicio__year=anio)
-
-    cohortes_data = []
-    for coh in cohortes_qs:
-        semanas = sorted(coh.bloque_fechas.semanas_config.all(), key=lambda s: s.orden)
-        tipos = {}
-        for s in semanas:
-            tipos[s.tipo] = tipos.get(s.tipo, 0) + 1
-        cohortes_data.append(
-            {
-                "id": coh.id,
-                "nombre": coh.nombre,
-                "fecha_inicio": coh.fecha_inicio.isoformat() if coh.fecha_inicio else None,
-                "fecha_fin": coh.fecha_fin.isoformat() if coh.fecha_fin else None,
-                "bloque_fechas_id": coh.bloque_fechas_id,
-                "bloque_fechas_nombre": coh.bloque_fechas.nombre,
-                "bloque_fechas_descripcion": coh.bloque_fechas.descripcion,
-                "total_semanas": len(semanas),
-                "tipos_semana": tipos,
-                "estudiantes_total": coh.estudiantes_total,
-                "estatus_regular": coh.estatus_regular,
-                "estatus_libre": coh.estatus_libre,
-                "estatus_baja": coh.estatus_baja,
-                "estado_inscripto": coh.estado_inscripto,
-                "estado_activo": coh.estado_activo,
-                "estado_pausado": coh.estado_pausado,
-                "estado_egresado": coh.estado_egresado,
-            }
-        )
-
-    bloques_qs = Bloque.objects.filter(programa=programa)
-    if bloque_id:
-        bloques_qs = bloques_qs.filter(id=bloque_id)
-    bloques = bloques_qs.order_by("id").prefetch_related("modulos")
-    tree = []
-    for blo in bloques:
-        blo_node = {"type": "bloque", "id": blo.id, "nombre": blo.nombre, "children": []}
-        for mod in blo.modulos.all().order_by("id"):
-            blo_node["children"].append(
-                {
-                    "type": "modulo",
-                    "id": mod.id,
-                    "nombre": mod.nombre,
-                    "es_practica": mod.es_practica,
-                    "fecha_inicio": mod.fecha_inicio.isoformat() if mod.fecha_inicio else None,
-                    "fecha_fin": mod.fecha_fin.isoformat() if mod.fecha_fin else None,
-                }
-            )
-        finales_qs = Examen.objects.filter(
-            bloque=blo, tipo_examen__in=[Examen.FINAL_VIRTUAL, Examen.FINAL_SINC, Examen.EQUIVALENCIA]
-        ).order_by("fecha", "id")
-        blo_node["finales"] = [
-            {"id": ex.id, "tipo_examen": ex.tipo_examen, "fecha": ex.fecha.isoformat() if ex.fecha else None, "peso": float(ex.peso)}
-            for ex in finales_qs
-        ]
-        tree.append(blo_node)
+    # Cantidad fija de consultas: ver GraficoCursosService.
+    try:
+        return GraficoCursosService.construir(programa, bloque_id=bloque_id, cohorte_id=cohorte_id, anio=anio)
+    except Cohorte.DoesNotExist:
+        raise HttpError(404, "Cohorte no encontrada para el programa seleccionado")
 
-    cohorte_data = None
-    if cohorte_id:
-        try:
-            coh_qs = Cohorte.objects.select_related("programa", "bloque_fechas").prefetch_related("bloque_fechas__semanas_config").filter(
-                id=cohorte_id, programa_id=programa_id
-            )
-            if bloque_id:
-                coh_qs = coh_qs.filter(bloque_id=bloque_id)
-            if anio:
-                coh_qs = coh_qs.filter(fecha_inicio__year=anio)
-            coh = coh_qs.get()
-            semanas = sorted(coh.bloque_fechas.semanas_config.all(), key=lambda s: s.orden)
-            secuencia = []
-            for semana in semanas:
-                fecha_semana = None
-                if coh.fecha_inicio:
-                    fecha_semana = (coh.fecha_inicio + timedelta(days=(semana.orden - 1) * 7)).isoformat()
-                secuencia.append(
-                    {
-                        "orden": semana.orden,
-                        "tipo": semana.tipo,
-                        "tipo_label": semana.get_tipo_display(),
-                        "fecha": fecha_semana,
-                    }
-                )
-
-            cohorte_stats = next((c for c in cohortes_data if c["id"] == coh.id), None)
-            cohorte_data = {
-                "id": coh.id,
-                "nombre": coh.nombre,
-                "programa_id": coh.programa_id,
-                "fecha_inicio": coh.fecha_inicio.isoformat() if coh.fecha_inicio else None,
-                "fecha_fin": coh.fecha_fin.isoformat() if coh.fecha_fin else None,
-                "bloque_fechas_id": coh.bloque_fechas_id,
-                "bloque_fechas_nombre": coh.bloque_fechas.nombre,
-                "bloque_fechas_descripcion": coh.bloque_fechas.descripcion,
-                "secuencia": secuencia,
-                "stats": cohorte_stats,
-            }
-        except Cohorte.DoesNotExist:
-            raise HttpError(404, "Cohorte no encontrada para el programa seleccionado")
 
-    return {
-        "programa": {"id": programa.id, "codigo": programa.codigo, "nombre": programa.nombre},
-        "bloque_id": bloque_id,
-        "cohorte_id": cohorte_id,
-        "anio": anio,
-        "cohortes": cohortes_data,
-        "cohorte": cohorte_data,
-        "tree": tree,
-    }
+@router.get("/cache-stats", response=dict)
+@require_admin
+def cache_stats(request):
+    """Contadores hit/miss/stale/lock_wait por endpoint (para ajustar TTL y gracia)."""
+    return metricas_cache()
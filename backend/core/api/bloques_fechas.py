@@ -3,6 +3,7 @@ from django.db import transaction
 from django.shortcuts import get_object_or_404
 from ninja import Router, Schema
 from core.api.permissions import require_authenticated_group
+from core.utils.condicional import respuesta_condicional
 
 from core.models import BloqueDeFechas, SemanaConfig
 from core.serializers import BloqueDeFechasSerializer, SemanaConfigSerializer
@@ -30,6 +31,7 @@ class BloqueFechasUpdatePayload(Schema):
 
 @router.get("", response=List[dict])
 @require_authenticated_group
+@respuesta_condicional(tablas=("BloqueDeFechas", "SemanaConfig"))
 def listar_bloques_fechas(request):
     qs = BloqueDeFechas.objects.prefetch_related("semanas_config").order_by("nombre")
     return BloqueDeFechasSerializer(qs, many=True).data
@@ -5,13 +5,21 @@ from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.utils import timezone
 from ninja import Router, Schema, File, UploadedFile
+from ninja.errors import HttpError
 from django.http import HttpResponse
 from core.api.permissions import require_authenticated_group
 from core.models import Estudiante, PreinscripcionTerciario
 from core.serializers import EstudianteSerializer
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
 from core.services.email_service import enviar_correo_bienvenida
+from core.services.cubo_inscripciones_service import CuboInscripcionesService
+from core.services.export_estudiantes_service import ETIQUETAS, ExportEstudiantesService
 from core.services.export_service import ExportService
-from .schemas import EstudianteDetailOut, EstudianteIn, EstudianteListOut
+from core.services.lookup_estudiantes_service import LookupEstudiantesService
+from core.utils.cache_analytics import invalidar_analytics
+from core.utils.condicional import respuesta_condicional
+from core.utils.paginacion import CursorInvalido, contar, pagina_keyset
+from .schemas import EstudianteDetailOut, EstudianteIn, EstudianteListOut, EstudianteLookupOut
 
 class BulkIdsIn(Schema):
     ids: List[int]
@@ -32,10 +40,22 @@ class ExportIn(Schema):
 router = Router(tags=["estudiantes"])
 
 
+# Paginación del listado: tamaño máximo de página y tope del conteo estimado.
+LIMITE_MAXIMO = 500
+TOPE_CONTEO_ESTIMADO = 1000
+ORDEN_LISTADO = ("apellido", "nombre", "id")
+# Con `search`: primero los más relevantes.
+ORDEN_BUSQUEDA = ("-relevancia", "apellido", "nombre", "id")
+# Tablas de las que depende el listado (ETag): filtros por inscripción, trayectos y excluir_terciario.
+TABLAS_LISTADO = ("Estudiante", "Inscripcion", "Cohorte", "Programa", "Bloque", "Modulo", "PreinscripcionTerciario")
+
+
 @router.get("", response=List[EstudianteListOut])
 @require_authenticated_group
+@respuesta_condicional(tablas=TABLAS_LISTADO, extra=lambda request: timezone.localdate())
 def listar_estudiantes(
     request, 
+    response: HttpResponse,
     search: Optional[str] = None, 
     dni: Optional[str] = None, 
     estatus: Optional[str] = None, 
@@ -48,14 +68,25 @@ def listar_estudiantes(
     archived: Optional[bool] = False,
     rango_edad: Optional[str] = None, # "menores", "mayores"
     excluir_terciario: Optional[bool] = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None, # "exact", "estimate"
 ):
-    qs = Estudiante.objects.filter(is_active=not archived).select_related(
-        "nivelacion_digital"
-    ).prefetch_related(
-        "inscripciones__cohorte__programa",
-        "inscripciones__cohorte__bloque",
-        "inscripciones__modulo__bloque",
-    ).order_by("apellido", "nombre")
+    """
+    Listado ordenado por (apellido, nombre, id). Con `search` se usa el
+    índice de búsqueda (sin acentos, por prefijo) y se ordena por relevancia.
+
+    Con `limit` (o `cursor`) devuelve una página por keyset: el header
+    X-Next-Cursor trae el cursor de la página siguiente (ausente en la última).
+    Con `count=exact` agrega X-Total-Count; con `count=estimate` el conteo se
+    corta en TOPE_CONTEO_ESTIMADO y X-Total-Count-Estimated indica si lo superó.
+    Sin `limit` ni `cursor` devuelve el listado completo, como antes.
+    """
+    if count not in (None, "exact", "estimate"):
+        raise HttpError(400, "count debe ser 'exact' o 'estimate'")
+
+    # Trayectos y fecha de alta vienen precalculados en Estudiante: una sola consulta.
+    qs = Estudiante.objects.filter(is_active=not archived)
     if excluir_terciario:
         dni_terciarios = PreinscripcionTerciario.objects.values_list('dni', flat=True)
         qs = qs.exclude(dni__in=dni_terciarios)
@@ -68,13 +99,7 @@ def listar_estudiantes(
     if anio:
         qs = qs.filter(created_at__year=anio)
     if search:
-        qs = qs.filter(
-            Q(apellido__icontains=search)
-            | Q(nombre__icontains=search)
-            | Q(email__icontains=search)
-            | Q(dni__icontains=search)
-            | Q(telefono__icontains=search)
-        )
+        qs = BusquedaEstudiantesService.filtrar(qs, search)
     if programa_id:
         qs = qs.filter(inscripciones__cohorte__programa_id=programa_id).distinct()
     if cohorte_id:
@@ -91,133 +116,52 @@ def listar_estudiantes(
             qs = qs.filter(fecha_nacimiento__gt=date_18)
         elif rango_edad.lower() == "mayores":
             qs = qs.filter(fecha_nacimiento__lte=date_18)
-            
-    return qs
+
+    if count:
+        total, estimado = contar(qs, estimado=count == "estimate", tope=TOPE_CONTEO_ESTIMADO)
+        response["X-Total-Count"] = str(total)
+        response["X-Total-Count-Estimated"] = "true" if estimado else "false"
+
+    orden = ORDEN_BUSQUEDA if search else ORDEN_LISTADO
+    if limit is None and not cursor:
+        return qs.order_by(*orden)
+
+    limit = min(max(limit or 50, 1), LIMITE_MAXIMO)
+    try:
+        filas, siguiente = pagina_keyset(qs, orden, limit, cursor)
+    except CursorInvalido:
+        raise HttpError(400, "Cursor inválido")
+    if siguiente:
+        response["X-Next-Cursor"] = siguiente
+    return filas
+
+
+@router.get("/lookup", response=List[EstudianteLookupOut])
+@require_authenticated_group
+def lookup_estudiantes(request, q: str, limit: int = 10):
+    """
+    Autocompletado por apellido, nombre o DNI (estudiantes activos) para los
+    formularios de notas, asistencia e inscripciones. Se resuelve con el
+    índice en memoria del worker, sin consultar la base.
+    """
+    return LookupEstudiantesService.buscar(q, limit)
 
 
 @router.post("/export/")
 @require_authenticated_group
 def export_estudiantes(request, payload: ExportIn):
     # 1. Filtrar estudiantes (misma lógica que listar)
-    qs = Estudiante.objects.filter(is_active=True).prefetch_related(
-        "inscripciones__modulo__bloque__programa",
-        "inscripciones__cohorte__programa",
-        "notas__examen__modulo__bloque__programa"
-    )
-    if payload.dni:
-        qs = qs.filter(dni__iexact=payload.dni)
-    if payload.estatus:
-        qs = qs.filter(estatus=payload.estatus)
-    if payload.anio:
-        qs = qs.filter(created_at__year=payload.anio)
-    if payload.search:
-        qs = qs.filter(
-            Q(apellido__icontains=payload.search)
-            | Q(nombre__icontains=payload.search)
-            | Q(email__icontains=payload.search)
-            | Q(dni__icontains=payload.search)
-        )
-    
-    if payload.programa_id:
-        qs = qs.filter(inscripciones__cohorte__programa_id=payload.programa_id).distinct()
-    if payload.cohorte_id:
-        qs = qs.filter(inscripciones__cohorte_id=payload.cohorte_id).distinct()
-    if payload.bloque_id:
-        qs = qs.filter(Q(inscripciones__modulo__bloque_id=payload.bloque_id) | Q(inscripciones__cohorte__bloque_id=payload.bloque_id)).distinct()
-    if payload.modulo_id:
-        qs = qs.filter(inscripciones__modulo_id=payload.modulo_id).distinct()
-    
-    if payload.rango_edad:
-        today = timezone.localdate()
-        date_18 = today.replace(year=today.year - 18)
-        if payload.rango_edad.lower() == "menores":
-            qs = qs.filter(fecha_nacimiento__gt=date_18)
-        elif payload.rango_edad.lower() == "mayores":
-            qs = qs.filter(fecha_nacimiento__lte=date_18)
-    
-    # 2. Preparar datos
-    data = []
-    for est in qs:
-        # Calcular materias de forma eficiente (usando los datos prefetcheados)
-        inscripciones_repo = list(est.inscripciones.all())
-        notas_repo = list(est.notas.all())
-
-        # Materias aprobadas: Modulos con nota aprobada
-        aprobadas_set = set()
-        for n in notas_repo:
-            if n.aprobado and n.examen and n.examen.modulo:
-                modulo_obj = n.examen.modulo
-                prog_nom = modulo_obj.bloque.programa.nombre if modulo_obj.bloque and modulo_obj.bloque.programa else ""
-                nombre_completo = f"{prog_nom} - {modulo_obj.nombre}" if prog_nom else modulo_obj.nombre
-                aprobadas_set.add(nombre_completo)
-        aprobadas_list = sorted(list(aprobadas_set))
-        
-        # Materias cursando: Inscripciones en estado CURSANDO
-        cursando_set = set()
-        for i in inscripciones_repo:
-            if i.estado == "CURSANDO" and i.modulo:
-                modulo_obj = i.modulo
-                prog_nom = modulo_obj.bloque.programa.nombre if modulo_obj.bloque and modulo_obj.bloque.programa else ""
-                nombre_completo = f"{prog_nom} - {modulo_obj.nombre}" if prog_nom else modulo_obj.nombre
-                cursando_set.add(nombre_completo)
-        cursando_list = sorted(list(cursando_set))
-        
-        # Materias pendientes: Módulos inscriptos que no están aprobados
-        pendientes = sorted(list(set(cursando_list) - set(aprobadas_set)))
-        
-        # Fecha de inscripción: la más antigua de sus inscripciones o created_at
-        fecha_insc_dt = est.created_at
-        for i in inscripciones_repo:
-            if i.created_at < fecha_insc_dt:
-                fecha_insc_dt = i.created_at
-        fecha_insc = fecha_insc_dt.date().isoformat()
-
-        row = {
-            "id": est.id,
-            "apellido": est.apellido,
-            "nombre": est.nombre,
-            "dni": est.dni,
-            "sexo": est.sexo or "",
-            "email": est.email,
-            "telefono": est.telefono,
-            "ciudad": est.ciudad,
-            "estatus": est.estatus,
-            "fecha_nacimiento": est.fecha_nacimiento.isoformat() if est.fecha_nacimiento else "",
-            "fecha_inscripcion": fecha_insc,
-            "materias_aprobadas": ", ".join(aprobadas_list),
-            "materias_cursando": ", ".join(cursando_list),
-            "materias_pendientes": ", ".join(pendientes),
-        }
-        data.append(row)
-
-    column_labels = {
-        "apellido": "Apellido",
-        "nombre": "Nombre",
-        "dni": "DNI",
-        "sexo": "Sexo",
-        "email": "Email",
-        "telefono": "Teléfono",
-        "ciudad": "Ciudad",
-        "estatus": "Estatus",
-        "fecha_nacimiento": "Fecha Nac.",
-        "fecha_inscripcion": "Fecha Inscripción",
-        "materias_aprobadas": "Módulos Aprobados",
-        "materias_cursando": "Módulos Cursando",
-        "materias_pendientes": "Módulos Pendientes",
-    }
+    qs = ExportEstudiantesService.filtrar(payload.dict())
+
+    # 2. Preparar datos (generador: las filas se arman a medida que se escriben)
+    data = ExportEstudiantesService.filas(qs)
 
     # 3. Generar archivo
     format_type = payload.format.lower()
     if format_type == "pdf":
-        content = ExportService.generate_pdf(data, payload.columns, column_labels)
-        response = HttpResponse(content, content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="estudiantes.pdf"'
-        return response
+        return ExportService.pdf_response(data, payload.columns, ETIQUETAS, "estudiantes.pdf")
     else:
-        content = ExportService.generate_excel(data, payload.columns, column_labels)
-        response = HttpResponse(content, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename="estudiantes.xlsx"'
-        return response
+        return ExportService.excel_response(data, payload.columns, ETIQUETAS, "estudiantes.xlsx")
 
 
 @router.get("/{estudiante_id}", response=EstudianteDetailOut)
@@ -318,6 +262,7 @@ def bulk_approve(request, data: BulkIdsIn):
             estado=Inscripcion.CURSANDO,
             updated_at=timezone.now()
         )
+        CuboInscripcionesService.programar_recalculo(estudiantes_ids)
     return {"updated": updated_count}
 
 
@@ -330,6 +275,8 @@ def bulk_archive(request, data: BulkIdsIn):
             is_active=False,
             archived_at=timezone.now()
         )
+        invalidar_analytics("Estudiante")
+        LookupEstudiantesService.programar_publicacion(data.ids)
     return {"archived": updated_count}
 
 
@@ -342,6 +289,8 @@ def bulk_restore(request, data: BulkIdsIn):
             is_active=True,
             archived_at=None
         )
+        invalidar_analytics("Estudiante")
+        LookupEstudiantesService.programar_publicacion(data.ids)
     return {"restored": updated_count}
 
 
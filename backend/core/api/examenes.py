@@ -7,9 +7,13 @@ from ninja.errors import HttpError
 from core.api.permissions import require_authenticated_group
 
 from core.models import Nota, Asistencia, Examen, Estudiante, Bloque
-from core.serializers import NotaSerializer, AsistenciaSerializer, ExamenSerializer, NotaSlimSerializer, AsistenciaSlimSerializer
+from core.serializers import (
+    NotaSerializer, AsistenciaSerializer, ExamenSerializer, NotaSlimSerializer, AsistenciaSlimSerializer,
+    ASISTENCIA_SLIM_DICCIONARIO, NOTA_SLIM_DICCIONARIO,
+)
 from .schemas import NotaIn, AsistenciaIn, ExamenIn
 from core.services.evaluacion_service import EvaluacionService
+from core.utils.columnar import serializar_filas
 
 router = Router(tags=["examenes-notas"])
 
@@ -24,6 +28,7 @@ def listar_notas(
     aprobado: Optional[bool] = None,
     modulo_id: Optional[int] = None,
     bloque_id: Optional[int] = None,
+    layout: str = "rows",
 ):
     qs = Nota.objects.select_related(
         "examen",
@@ -41,7 +46,7 @@ def listar_notas(
         qs = qs.filter(examen__modulo_id=modulo_id)
     if bloque_id:
         qs = qs.filter(examen__bloque_id=bloque_id)
-    return NotaSlimSerializer(qs, many=True).data
+    return serializar_filas(NotaSlimSerializer, qs, layout, NOTA_SLIM_DICCIONARIO)
 
 
 @router.get("/notas/{nota_id}", response=dict)
@@ -64,6 +69,7 @@ def listar_asistencias(
     bloque_id: Optional[int] = None,
     presente: Optional[bool] = None,
     fecha: Optional[str] = None,
+    layout: str = "rows",
 ):
     qs = Asistencia.objects.select_related("estudiante", "modulo", "modulo__bloque")
     if estudiante_id:
@@ -76,7 +82,7 @@ def listar_asistencias(
         qs = qs.filter(presente=presente)
     if fecha:
         qs = qs.filter(fecha=fecha)
-    return AsistenciaSlimSerializer(qs, many=True).data
+    return serializar_filas(AsistenciaSlimSerializer, qs, layout, ASISTENCIA_SLIM_DICCIONARIO)
 
 
 @router.get("/asistencias/{asistencia_id}", response=dict)
@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import Optional
+
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from ninja import Router, Schema
+from ninja.errors import HttpError
+from pydantic import ValidationError
+
+from core.api.estudiantes import ExportIn
+from core.api.permissions import require_authenticated_group
+from core.models import TrabajoExportacion
+from core.services.exportaciones_service import ExportacionesService
+
+router = Router(tags=["exportaciones"])
+
+
+class HistoricoCursosExportIn(Schema):
+    tipo_dato: str = "notas"
+    programa_id: Optional[int] = None
+    bloque_id: Optional[int] = None
+    cohorte_id: Optional[int] = None
+
+
+# Parámetros aceptados por cada tipo (mismos filtros que el endpoint sincrónico).
+PARAMETROS = {
+    TrabajoExportacion.ESTUDIANTES: ExportIn,
+    TrabajoExportacion.HISTORICO_CURSOS: HistoricoCursosExportIn,
+}
+
+
+class TrabajoIn(Schema):
+    tipo: str
+    parametros: dict = {}
+
+
+class TrabajoOut(Schema):
+    id: int
+    tipo: str
+    estado: str
+    procesadas: int
+    total: Optional[int] = None
+    nombre_archivo: str
+    error: str
+    created_at: datetime
+    finalizado_at: Optional[datetime] = None
+    expira_at: Optional[datetime] = None
+    descarga_url: Optional[str] = None
+
+    @staticmethod
+    def resolve_descarga_url(obj):
+        if obj.estado != TrabajoExportacion.LISTO:
+            return None
+        return f"/api/v2/exportaciones/{obj.id}/descarga"
+
+
+@router.post("", response={200: TrabajoOut, 201: TrabajoOut})
+@require_authenticated_group
+def crear_exportacion(request, payload: TrabajoIn):
+    """
+    Crea un trabajo de exportación (201) o devuelve el vigente con los mismos
+    parámetros (200). El archivo lo genera `procesar_exportaciones`.
+    """
+    esquema = PARAMETROS.get(payload.tipo)
+    if esquema is None:
+        raise HttpError(400, f"Tipo de exportación inválido: {payload.tipo}")
+    try:
+        parametros = esquema(**payload.parametros).dict()
+    except ValidationError as e:
+        raise HttpError(400, f"Parámetros inválidos: {e.errors()}")
+    trabajo, creado = ExportacionesService.crear(payload.tipo, parametros, request.user)
+    return (201 if creado else 200), trabajo
+
+
+@router.get("/{trabajo_id}", response=TrabajoOut)
+@require_authenticated_group
+def estado_exportacion(request, trabajo_id: int):
+    return get_object_or_404(TrabajoExportacion, pk=trabajo_id)
+
+
+@router.get("/{trabajo_id}/descarga")
+@require_authenticated_group
+def descargar_exportacion(request, trabajo_id: int):
+    """Sirve el archivo desde Nginx (X-Accel-Redirect a media protegida)."""
+    trabajo = get_object_or_404(TrabajoExportacion, pk=trabajo_id)
+    if trabajo.estado != TrabajoExportacion.LISTO or not trabajo.archivo:
+        raise HttpError(409, "La exportación no está lista.")
+    if trabajo.expira_at and trabajo.expira_at <= timezone.now():
+        raise HttpError(410, "La exportación venció.")
+
+    response = HttpResponse()
+    response["X-Accel-Redirect"] = f"/protected_media/{trabajo.archivo.name}"
+    # Nginx detecta el tipo de contenido a partir de la extensión.
+    response["Content-Type"] = ""
+    response["X-Content-Type-Options"] = "nosniff"
+    response["Content-Disposition"] = f'attachment; filename="{trabajo.nombre_archivo}"'
+    return response
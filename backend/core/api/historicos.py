@@ -1,13 +1,38 @@
+import csv
+import json
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from itertools import islice
 from typing import List
 from ninja import Router, Schema
-from django.db.models import Q
+from ninja.errors import HttpError
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 
 from core.models import Nota, Asistencia, Inscripcion
 from core.api.permissions import require_authenticated_group
-from core.serializers import NotaSlimSerializer
+from core.serializers import NOTA_SLIM_DICCIONARIO, NotaSlimSerializer
+from core.utils.columnar import es_columnar, respuesta_columnar, serializar_filas
+from core.utils.paginacion import recorrer_keyset
 
 router = Router(tags=["historicos"])
 
+# Filas que se leen por vez de la base al recorrer notas o asistencias.
+HISTORICO_CHUNK_SIZE = 2000
+# Orden de las filas (keyset: por estudiante y fecha, con el id para desempatar).
+ORDEN_HISTORICO = ("orden_apellido", "orden_nombre", "orden_fecha", "id")
+# Las notas sin fecha van primero, como en el ORDER BY original (NULL primero en MySQL).
+FECHA_MINIMA = datetime(1900, 1, 1, tzinfo=dt_timezone.utc)
+# Filas por fragmento en las respuestas ndjson/csv.
+FILAS_POR_FRAGMENTO = 500
+# Columnas que ?layout=columns codifica por diccionario: se repiten en todas
+# las filas de un mismo estudiante o curso.
+HISTORICO_DICCIONARIO = (
+    "Estudiante", "DNI", "Teléfono", "Programa", "Cohorte", "Bloque", "Módulo",
+    "Examen", "Aprobado", "Fecha", "Presente",
+)
+
 
 class HistoricoCursosResponse(Schema):
     headers: List[str]
@@ -23,18 +48,11 @@ def shorten(txt: str) -> str:
               .replace("Cohorte", "Coh.")
 
 
-@router.get("/historico-cursos", response=HistoricoCursosResponse)
-@require_authenticated_group
-def historico_cursos(
-    request,
-    tipo_dato: str = "notas",
-    programa_id: int = None,
-    bloque_id: int = None,
-    cohorte_id: int = None,
-):
-    """Devuelve historial de notas o asistencia con filtros opcionales por programa/bloque/cohorte.
+def historico_cursos_filas(tipo_dato="notas", programa_id=None, bloque_id=None, cohorte_id=None):
+    """Historial de notas o asistencia con filtros opcionales por programa/bloque/cohorte.
 
-    Respuesta: {"headers": [...], "rows": [ {header: valor, ...}, ... ]}
+    Devuelve (headers, rows): rows es un generador de {header: valor}. Lo usan
+    el endpoint y la exportación en segundo plano (ExportacionesService).
     """
     inscripciones_qs = Inscripcion.objects.select_related("cohorte", "cohorte__programa", "modulo", "modulo__bloque")
     if programa_id:
@@ -49,12 +67,14 @@ def historico_cursos(
     # Map para mostrar la cohorte más reciente (ordenando por fecha de inicio descendente)
     student_prog_cohortes_map = {}
     student_modulo_cohortes_map = {}
-    for ins in inscripciones_qs.order_by("-cohorte__fecha_inicio", "-id"):
-        prog_id = ins.cohorte.programa_id
-        if (ins.estudiante_id, prog_id) not in student_prog_cohortes_map:
-            student_prog_cohortes_map[(ins.estudiante_id, prog_id)] = ins.cohorte.nombre
-        if ins.modulo_id and (ins.estudiante_id, ins.modulo_id) not in student_modulo_cohortes_map:
-            student_modulo_cohortes_map[(ins.estudiante_id, ins.modulo_id)] = ins.cohorte.nombre
+    inscripciones = inscripciones_qs.order_by("-cohorte__fecha_inicio", "-id").values_list(
+        "estudiante_id", "cohorte__programa_id", "modulo_id", "cohorte__nombre"
+    )
+    for est_id, prog_id, modulo_id, cohorte_nombre in inscripciones.iterator(chunk_size=HISTORICO_CHUNK_SIZE):
+        if (est_id, prog_id) not in student_prog_cohortes_map:
+            student_prog_cohortes_map[(est_id, prog_id)] = cohorte_nombre
+        if modulo_id and (est_id, modulo_id) not in student_modulo_cohortes_map:
+            student_modulo_cohortes_map[(est_id, modulo_id)] = cohorte_nombre
 
     tipo = (tipo_dato or "notas").lower()
 
@@ -62,7 +82,7 @@ def historico_cursos(
         qs = (
             Asistencia.objects.filter(estudiante_id__in=student_ids)
             .select_related("estudiante", "modulo", "modulo__bloque", "modulo__bloque__programa")
-            .order_by("estudiante__apellido", "estudiante__nombre", "fecha")
+            .annotate(orden_apellido=F("estudiante__apellido"), orden_nombre=F("estudiante__nombre"), orden_fecha=F("fecha"))
         )
         if programa_id:
             qs = qs.filter(modulo__bloque__programa_id=programa_id)
@@ -70,32 +90,7 @@ def historico_cursos(
             qs = qs.filter(modulo__bloque_id=bloque_id)
 
         headers = ["ID", "Estudiante", "DNI", "Teléfono", "Programa", "Cohorte", "Bloque", "Módulo", "Fecha", "Presente"]
-        rows = []
-        for a in qs:
-            modulo_id = a.modulo_id
-            bloque = a.modulo.bloque if a.modulo else None
-            programa = bloque.programa if bloque and bloque.programa else None
-            prog_id = programa.id if programa else None
-            
-            cohorte_nome = ""
-            if modulo_id:
-                cohorte_nome = student_modulo_cohortes_map.get((a.estudiante_id, modulo_id), "")
-            if not cohorte_nome:
-                cohorte_nome = student_prog_cohortes_map.get((a.estudiante_id, prog_id), "")
-            
-            rows.append({
-                "ID": a.id,
-                "Estudiante": f"{a.estudiante.apellido}, {a.estudiante.nombre}",
-                "DNI": a.estudiante.dni,
-                "Teléfono": a.estudiante.telefono or "",
-                "Programa": shorten(programa.nombre if programa else ""),
-                "Cohorte": shorten(cohorte_nome),
-                "Bloque": shorten(bloque.nombre if bloque else ""),
-                "Módulo": shorten(a.modulo.nombre if a.modulo else ""),
-                "Fecha": a.fecha.isoformat() if a.fecha else "",
-                "Presente": "Sí" if a.presente else "No",
-            })
-        return {"headers": headers, "rows": rows}
+        return headers, _filas_asistencia(qs, student_prog_cohortes_map, student_modulo_cohortes_map)
 
     # default: notas
     qs = (
@@ -108,7 +103,11 @@ def historico_cursos(
             "examen__bloque",
             "examen__bloque__programa",
         )
-        .order_by("estudiante__apellido", "estudiante__nombre", "fecha_calificacion")
+        .annotate(
+            orden_apellido=F("estudiante__apellido"),
+            orden_nombre=F("estudiante__nombre"),
+            orden_fecha=Coalesce("fecha_calificacion", Value(FECHA_MINIMA), output_field=DateTimeField()),
+        )
     )
     if programa_id:
         qs = qs.filter(
@@ -120,8 +119,46 @@ def historico_cursos(
         )
 
     headers = ["ID", "Estudiante", "DNI", "Teléfono", "Programa", "Cohorte", "Bloque", "Módulo", "Examen", "Calificación", "Aprobado", "Fecha"]
-    rows = []
-    for n in qs:
+    return headers, _filas_notas(qs, student_prog_cohortes_map, student_modulo_cohortes_map)
+
+
+def _filas(qs):
+    """
+    Filas de `qs` por páginas de keyset de HISTORICO_CHUNK_SIZE: la memoria
+    no crece con el historial (qs.iterator() en MySQL lo traería entero).
+    """
+    return recorrer_keyset(qs, ORDEN_HISTORICO, HISTORICO_CHUNK_SIZE)
+
+
+def _filas_asistencia(qs, student_prog_cohortes_map, student_modulo_cohortes_map):
+    for a in _filas(qs):
+        modulo_id = a.modulo_id
+        bloque = a.modulo.bloque if a.modulo else None
+        programa = bloque.programa if bloque and bloque.programa else None
+        prog_id = programa.id if programa else None
+        
+        cohorte_nome = ""
+        if modulo_id:
+            cohorte_nome = student_modulo_cohortes_map.get((a.estudiante_id, modulo_id), "")
+        if not cohorte_nome:
+            cohorte_nome = student_prog_cohortes_map.get((a.estudiante_id, prog_id), "")
+        
+        yield {
+            "ID": a.id,
+            "Estudiante": f"{a.estudiante.apellido}, {a.estudiante.nombre}",
+            "DNI": a.estudiante.dni,
+            "Teléfono": a.estudiante.telefono or "",
+            "Programa": shorten(programa.nombre if programa else ""),
+            "Cohorte": shorten(cohorte_nome),
+            "Bloque": shorten(bloque.nombre if bloque else ""),
+            "Módulo": shorten(a.modulo.nombre if a.modulo else ""),
+            "Fecha": a.fecha.isoformat() if a.fecha else "",
+            "Presente": "Sí" if a.presente else "No",
+        }
+
+
+def _filas_notas(qs, student_prog_cohortes_map, student_modulo_cohortes_map):
+    for n in _filas(qs):
         bloque = n.examen.bloque or (n.examen.modulo.bloque if n.examen.modulo else None)
         modulo = n.examen.modulo
         modulo_id = modulo.id if modulo else None
@@ -134,7 +171,7 @@ def historico_cursos(
         if not cohorte_nome:
             cohorte_nome = student_prog_cohortes_map.get((n.estudiante_id, prog_id), "")
         
-        rows.append({
+        yield {
             "ID": n.id,
             "Estudiante": f"{n.estudiante.apellido}, {n.estudiante.nombre}",
             "DNI": n.estudiante.dni,
@@ -147,13 +184,76 @@ def historico_cursos(
             "Calificación": float(n.calificacion) if n.calificacion is not None else "",
             "Aprobado": "Sí" if n.aprobado else "No",
             "Fecha": n.fecha_calificacion.date().isoformat() if n.fecha_calificacion else "",
-        })
-    return {"headers": headers, "rows": rows}
+        }
+
+
+def _fragmentos(lineas):
+    """Agrupa las líneas de a FILAS_POR_FRAGMENTO para no escribir fila por fila en el socket."""
+    lineas = iter(lineas)
+    while bloque := list(islice(lineas, FILAS_POR_FRAGMENTO)):
+        yield "".join(bloque)
+
+
+def _lineas_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def _lineas_csv(headers, rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def linea(valores):
+        writer.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    # BOM: Excel abre el CSV como UTF-8 (acentos y eñes).
+    yield "\ufeff" + linea(headers)
+    for row in rows:
+        yield linea([row[h] for h in headers])
+
+
+@router.get("/historico-cursos", response=HistoricoCursosResponse)
+@require_authenticated_group
+def historico_cursos(
+    request,
+    tipo_dato: str = "notas",
+    programa_id: int = None,
+    bloque_id: int = None,
+    cohorte_id: int = None,
+    format: str = "json",
+    layout: str = "rows",
+):
+    """Devuelve historial de notas o asistencia con filtros opcionales por programa/bloque/cohorte.
+
+    Respuesta (format=json): {"headers": [...], "rows": [ {header: valor, ...}, ... ]}
+    Con layout=columns, las filas en columnas (ver core/utils/columnar.py).
+    Con format=ndjson (un objeto por línea) o format=csv la respuesta se
+    transmite a medida que se leen las filas, sin armar la lista completa.
+    """
+    formato = (format or "json").lower()
+    if formato not in ("json", "ndjson", "csv"):
+        raise HttpError(400, "format debe ser json, ndjson o csv.")
+    columnar = es_columnar(layout)
+
+    headers, rows = historico_cursos_filas(tipo_dato, programa_id, bloque_id, cohorte_id)
+    if formato == "ndjson":
+        return StreamingHttpResponse(_fragmentos(_lineas_ndjson(rows)), content_type="application/x-ndjson")
+    if formato == "csv":
+        response = StreamingHttpResponse(_fragmentos(_lineas_csv(headers, rows)), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="historico_{(tipo_dato or "notas").lower()}.csv"'
+        return response
+    if columnar:
+        return respuesta_columnar(rows, headers, HISTORICO_DICCIONARIO)
+    return {"headers": headers, "rows": list(rows)}
 
 
 @router.get("/historico-estudiante", response=list)
 @require_authenticated_group
-def historico_estudiante(request, estudiante_id: int):
+def historico_estudiante(request, estudiante_id: int, layout: str = "rows"):
     """Devuelve todas las notas de un estudiante con datos del examen/módulo/bloque."""
     qs = (
         Nota.objects.select_related(
@@ -166,4 +266,4 @@ def historico_estudiante(request, estudiante_id: int):
         .filter(estudiante_id=estudiante_id)
         .order_by("-fecha_calificacion", "-created_at")
     )
-    return NotaSlimSerializer(qs, many=True).data
+    return serializar_filas(NotaSlimSerializer, qs, layout, NOTA_SLIM_DICCIONARIO)
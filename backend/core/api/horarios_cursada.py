@@ -6,6 +6,7 @@ from ninja import Router
 from ninja.errors import HttpError
 
 from core.api.permissions import require_authenticated_group, require_admin
+from core.utils.condicional import respuesta_condicional
 
 from django.contrib.auth.models import User
 from core.models import HorarioCursada, Cohorte, Bloque, Modulo, Programa
@@ -84,6 +85,7 @@ def _to_out(h: HorarioCursada):
 
 @router.get("/metadata", response=HorariosCursadaMetadataOut)
 @require_authenticated_group
+@respuesta_condicional(tablas=("Programa", "Bloque", "Cohorte", "Modulo", "User"), modelos=(HorarioCursada,))
 def get_metadata(request):
     programas = list(Programa.objects.all().values("id", "codigo", "nombre", "activo", "resolucion_id"))
     bloques = list(Bloque.objects.all().values("id", "nombre", "programa_id"))
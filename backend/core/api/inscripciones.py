@@ -10,6 +10,7 @@ from core.models import Cohorte, Inscripcion, SemanaConfig, Bloque
 from core.serializers import InscripcionSerializer, InscripcionListSerializer
 from .schemas import CohorteOut, InscripcionIn, CohorteIn
 from core.api.permissions import require_authenticated_group
+from core.utils.condicional import respuesta_condicional
 
 router = Router(tags=["inscripciones"])
 
@@ -32,6 +33,7 @@ def _validar_bloque_programa(request: HttpRequest, programa_id: int, bloque_id:
 # COHORTES - must be defined before /{inscripcion_id} to avoid routing conflict
 @router.get("/cohortes", response=List[CohorteOut])
 @require_authenticated_group
+@respuesta_condicional(tablas=("Cohorte",))
 def listar_cohortes(request, programa_id: Optional[int] = None, bloque_id: Optional[int] = None):
     qs = Cohorte.objects.select_related("programa", "bloque_fechas").order_by("-fecha_inicio")
     if programa_id:
@@ -55,6 +57,7 @@ def listar_cohortes(request, programa_id: Optional[int] = None, bloque_id: Optio
 # INSCRIPCIONES
 @router.get("", response=List[dict])
 @require_authenticated_group
+@respuesta_condicional(tablas=("Inscripcion", "Estudiante", "Cohorte", "Programa", "Bloque", "Modulo"))
 def listar_inscripciones(
     request, 
     cohorte_id: Optional[int] = None, 
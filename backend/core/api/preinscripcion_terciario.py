@@ -1,16 +1,19 @@
 from ninja import Router, Schema
 from ninja.errors import HttpError
 from typing import Optional, List, Any
-import html
+import logging
 import re
-from ..models import PreinscripcionTerciario, Inscripcion, Modulo, Cohorte, Estudiante, ConfiguracionPreinscripcionTerciario
-import threading
-from django.conf import settings
+from ..models import PreinscripcionTerciario, Inscripcion, Modulo, Cohorte, Estudiante, ConfiguracionPreinscripcionTerciario, CorreoSaliente
+from ..services.correo_saliente_service import CorreoSalienteService
+from django.utils import timezone
+from ..utils.condicional import respuesta_condicional
 
 MAX_FILE_SIZE_BYTES = 3 * 1024 * 1024  # 3MB
 ALLOWED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".webp"}
 ALLOWED_CONTENT_TYPES = {"application/pdf", "image/jpeg", "image/png", "image/webp"}
 
+logger = logging.getLogger(__name__)
+
 
 def _validar_archivo(file_obj, field_label: str):
     if not file_obj:
@@ -87,212 +90,105 @@ def _get_cohorte_hd_activa():
     return cohorte
 
 
-def _inscribir_hd(preinscripcion: PreinscripcionTerciario):
-    try:
-        cfg = ConfiguracionPreinscripcionTerciario.get()
-        cohorte = cfg.hd_cohorte
-        if not cohorte:
-            cohorte = _get_cohorte_hd_activa()
-        if not cohorte:
-            return  # No hay cohorte activa ni próxima
-        mod2 = Modulo.objects.get(id=MODULO_HD2_ID)
-
-        # Mapear nivel educativo
-        nivel = "Secundaria Completa"
-        if preinscripcion.finalizo_secundaria == "no":
-            nivel = "Secundaria Incompleta"
-        elif preinscripcion.posee_estudios_superiores:
-            if preinscripcion.estudios_superiores_finalizado:
-                nivel = "Terciaria/Universitaria Completa"
-            else:
-                nivel = "Terciaria/Universitaria Incompleta"
-
-        # Mapear ciudad a partir de localidad
-        ciudad_map = {
-            "ushuaia": "Ushuaia",
-            "rg_sur": "Río Grande",
-            "rg_norte": "Río Grande",
-            "tolhuin": "Tolhuin",
-            "zona_rural": "Zona Rural",
-        }
-        ciudad = ciudad_map.get(preinscripcion.localidad, "")
-
-        fields_to_update = {
-            "apellido": preinscripcion.apellido,
-            "nombre": preinscripcion.nombre,
-            "email": preinscripcion.email,
-            "telefono": (preinscripcion.celular or "")[:10],
-            "domicilio": preinscripcion.domicilio,
-            "fecha_nacimiento": preinscripcion.fecha_nacimiento,
-            "sexo": preinscripcion.sexo,
-            "nacionalidad": preinscripcion.nacionalidad,
-            "cuit": preinscripcion.cuil,
-            "posee_pc": preinscripcion.posee_pc,
-            "posee_conectividad": preinscripcion.posee_internet,
-            "nivel_educativo": nivel,
-            "ciudad": ciudad,
-        }
-
-        # Buscar o crear estudiante por DNI
-        estudiante = Estudiante.objects.filter(dni=preinscripcion.dni).first()
-        if not estudiante:
-            estudiante = Estudiante.objects.create(
-                dni=preinscripcion.dni,
-                estatus="Preinscripto",
-                **fields_to_update
-            )
+def _inscribir_hd(preinscripcion: PreinscripcionTerciario, demora_correo: int = 0) -> bool:
+    """
+    Crea o actualiza el Estudiante de la preinscripción, lo inscribe en
+    Habilidades Digitales 2 y encola el correo de bienvenida. Devuelve False si
+    no hay cohorte de HD a la cual inscribirlo; los errores se propagan para que
+    quien llama pueda deshacer la fila (ver _intentar_inscribir_hd).
+    """
+    cfg = ConfiguracionPreinscripcionTerciario.get()
+    cohorte = cfg.hd_cohorte
+    if not cohorte:
+        cohorte = _get_cohorte_hd_activa()
+    if not cohorte:
+        return False  # No hay cohorte activa ni próxima
+    mod2 = Modulo.objects.get(id=MODULO_HD2_ID)
+
+    # Mapear nivel educativo
+    nivel = "Secundaria Completa"
+    if preinscripcion.finalizo_secundaria == "no":
+        nivel = "Secundaria Incompleta"
+    elif preinscripcion.posee_estudios_superiores:
+        if preinscripcion.estudios_superiores_finalizado:
+            nivel = "Terciaria/Universitaria Completa"
         else:
-            # Actualizar todos los campos
-            for k, v in fields_to_update.items():
-                setattr(estudiante, k, v)
-            estudiante.save()
-
-        # Crear inscripción si no existe
-        inscripcion, created = Inscripcion.objects.get_or_create(
-            estudiante=estudiante,
-            modulo=mod2,
-            cohorte=cohorte,
-            defaults={"estado": "CURSANDO"},
+            nivel = "Terciaria/Universitaria Incompleta"
+
+    # Mapear ciudad a partir de localidad
+    ciudad_map = {
+        "ushuaia": "Ushuaia",
+        "rg_sur": "Río Grande",
+        "rg_norte": "Río Grande",
+        "tolhuin": "Tolhuin",
+        "zona_rural": "Zona Rural",
+    }
+    ciudad = ciudad_map.get(preinscripcion.localidad, "")
+
+    fields_to_update = {
+        "apellido": preinscripcion.apellido,
+        "nombre": preinscripcion.nombre,
+        "email": preinscripcion.email,
+        "telefono": (preinscripcion.celular or "")[:10],
+        "domicilio": preinscripcion.domicilio,
+        "fecha_nacimiento": preinscripcion.fecha_nacimiento,
+        "sexo": preinscripcion.sexo,
+        "nacionalidad": preinscripcion.nacionalidad,
+        "cuit": preinscripcion.cuil,
+        "posee_pc": preinscripcion.posee_pc,
+        "posee_conectividad": preinscripcion.posee_internet,
+        "nivel_educativo": nivel,
+        "ciudad": ciudad,
+    }
+
+    # Buscar o crear estudiante por DNI
+    estudiante = Estudiante.objects.filter(dni=preinscripcion.dni).first()
+    if not estudiante:
+        estudiante = Estudiante.objects.create(
+            dni=preinscripcion.dni,
+            estatus="Preinscripto",
+            **fields_to_update
         )
+    else:
+        # Actualizar todos los campos
+        for k, v in fields_to_update.items():
+            setattr(estudiante, k, v)
+        estudiante.save()
+
+    # Crear inscripción si no existe
+    inscripcion, created = Inscripcion.objects.get_or_create(
+        estudiante=estudiante,
+        modulo=mod2,
+        cohorte=cohorte,
+        defaults={"estado": "CURSANDO"},
+    )
 
-        preinscripcion.hd_inscripcion = inscripcion
-        preinscripcion.save(update_fields=["hd_inscripcion"])
+    preinscripcion.hd_inscripcion = inscripcion
+    preinscripcion.save(update_fields=["hd_inscripcion"])
 
-        # Enviar correo de bienvenida a Moodle / Habilidades Digitales
-        try:
-            from core.services.email_service import enviar_correo_bienvenida_terciario
-            enviar_correo_bienvenida_terciario(preinscripcion)
-        except Exception:
-            pass
-    except Exception as e:
-        pass
+    # Encolar correo de bienvenida a Moodle / Habilidades Digitales
+    from core.services.email_service import enviar_correo_bienvenida_terciario
+    enviar_correo_bienvenida_terciario(preinscripcion, demora_segundos=demora_correo)
+    return True
 
 
-def _inscribir_hd_con_retraso(preinscripcion: PreinscripcionTerciario):
-    import time
+def _intentar_inscribir_hd(preinscripcion: PreinscripcionTerciario, demora_correo: int = 0):
+    """_inscribir_hd para los endpoints: un error no debe hacer fallar la respuesta."""
     try:
-        # Esperar 30 segundos antes de procesar la inscripción y el segundo correo
-        time.sleep(30)
-        _inscribir_hd(preinscripcion)
-    except Exception:
-        pass
+        _inscribir_hd(preinscripcion, demora_correo=demora_correo)
+    except Exception as e:
+        logger.error(f"Error al inscribir en Habilidades Digitales la preinscripción {preinscripcion.id}: {e}")
 
 
 def _enviar_confirmacion(preinscripcion: PreinscripcionTerciario):
     try:
-        from django.core.mail import EmailMessage
-        subject = "Bienvenidos/as a la Tecnicatura — Todo lo que necesitás saber para comenzar"
-        apellido_safe = html.escape(preinscripcion.apellido)
-        nombre_safe = html.escape(preinscripcion.nombre)
-        dni_safe = html.escape(preinscripcion.dni)
-        email_safe = html.escape(preinscripcion.email)
-
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; color: #333333; line-height: 1.6; margin: 0; padding: 0; background-color: #f4f4f5; }}
-                .container {{ max-width: 650px; margin: 0 auto; background-color: #ffffff; overflow: hidden; }}
-                .header {{ background-color: #1a1f4e; color: #ffffff; padding: 25px 20px; text-align: center; border-bottom: 5px solid #f5c518; }}
-                .header h1 {{ margin: 0; font-size: 24px; letter-spacing: 0.5px; }}
-                .header h2 {{ margin: 5px 0 0 0; font-size: 16px; font-weight: normal; color: #b8ccd8; }}
-                .content {{ padding: 30px 35px; }}
-                .highlight-box {{ background-color: #f8fafc; padding: 20px; border-left: 4px solid #f5c518; margin: 25px 0; border-radius: 0 8px 8px 0; }}
-                .highlight-box h3 {{ color: #1a1f4e; margin-top: 0; margin-bottom: 10px; font-size: 18px; }}
-                .btn {{ display: inline-block; padding: 12px 24px; background-color: #1a1f4e; color: #ffffff !important; text-decoration: none; font-weight: bold; border-radius: 8px; margin-top: 10px; }}
-                .date-box {{ background-color: #eef2f7; padding: 15px; border-radius: 8px; text-align: center; margin: 20px 0; font-size: 16px; font-weight: bold; color: #1a1f4e; }}
-                .checklist {{ background-color: #f0fdf4; padding: 20px; border-radius: 8px; border: 1px solid #bbf7d0; margin: 25px 0; }}
-                .checklist h3 {{ color: #166534; margin-top: 0; }}
-                .contacto-box {{ background-color: #f1f5f9; padding: 25px; border-radius: 8px; font-size: 15px; margin-top: 30px; border: 1px solid #e2e8f0; }}
-                .contacto-item {{ margin-bottom: 8px; line-height: 1.5; }}
-                .footer {{ background-color: #0f172a; color: #e2e8f0; text-align: center; padding: 25px 20px; font-size: 15px; font-weight: bold; letter-spacing: 0.5px; }}
-                a {{ color: #0284c7; text-decoration: none; font-weight: 600; }}
-                a:hover {{ text-decoration: underline; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Centro Politécnico Superior</h1>
-                    <h2>Tecnicatura Superior en Ciencia de Datos e Inteligencia Artificial</h2>
-                </div>
-                <div class="content">
-                    <p style="font-size: 17px; margin-top: 0;">Estimado/a <strong>{apellido_safe}, {nombre_safe}</strong>,</p>
-                    <p>¡Bienvenidos/as a esta nueva etapa! Tu preinscripción fue recibida correctamente. Están a punto de comenzar un camino apasionante en el mundo de los datos y la inteligencia artificial, y queremos acompañarlos/as desde el primer paso.</p>
-                    
-                    <p>A continuación les compartimos información importante sobre el curso introductorio y el inicio de la cursada:</p>
-
-                    <div class="highlight-box">
-                        <h3>🎯 INTROTEC</h3>
-                        <p>Es el curso de ingreso <strong>obligatorio y no eliminatorio</strong> de la Tecnicatura — no es un filtro, es un <strong>puente</strong>. Te acompaña en tus primeros pasos en el nivel terciario virtual con contenidos de <strong>inglés técnico y matemática</strong>, y te introduce al campus Moodle y las habilidades digitales necesarias para cursar.</p>
-                        <a href="https://view.genially.com/6a10ecab5a7c072980bbb3a2" target="_blank" class="btn">Mirá la Presentación aquí</a>
-                    </div>
-
-                    <div class="date-box">
-                        📅 Fecha de inicio del INTROTEC: 31/07/2026 a las 19:00 hs.
-                    </div>
-
-                    <div class="highlight-box" style="border-left-color: #0284c7;">
-                        <h3 style="color: #0284c7;">💻 Curso de Habilidades Digitales</h3>
-                        <p>Dentro del INTROTEC encontrarás este curso — <strong>autogestionado y disponible desde este momento</strong>. Recorre Moodle, Herramientas de Google, Inteligencia Artificial y presentaciones. Al completarlo obtenés un certificado oficial del CFP.</p>
-                        <p><em>No es obligatorio, pero es muy recomendable si estás dando tus primeros pasos en el mundo digital. ¡Podés hacerlo en cualquier momento del cuatrimestre!</em></p>
-                        <a href="https://view.genially.com/6a15e9e0cddf7419df1c20d0" target="_blank" class="btn" style="background-color: #0284c7;">Ver Presentación del Curso</a>
-                    </div>
-
-                    <div class="checklist">
-                        <h3>📌 Primeros Pasos</h3>
-                        <p>Para acceder, primero <strong>registrate</strong> en el campus siguiendo los pasos de la <strong>Hoja de Ruta</strong>. Mirá con detenimiento la Hoja de Ruta, allí se explica:</p>
-                        <ul style="color: #166534;">
-                            <li>✅ Registro en el campus.</li>
-                            <li>✅ Fechas importantes.</li>
-                            <li>✅ Equivalencias.</li>
-                            <li>✅ Entrega de documentación.</li>
-                        </ul>
-                        <a href="https://view.genially.com/69fe7b75e3792921111bbaac" target="_blank" style="display: inline-block; margin-top: 10px; font-weight: bold; color: #166534; text-decoration: underline;">👉 Abrir Hoja de Ruta</a>
-                    </div>
-
-                    <div class="contacto-box">
-                        <p style="margin-top: 0; font-weight: bold; color: #1a1f4e;">Ante cualquier inquietud, ¡estamos para ayudarte!</p>
-                        <div class="contacto-item">📍 <strong>Río Grande:</strong> <a href="mailto:Tutoria.cetns.rg@gmail.com">Tutoria.cetns.rg@gmail.com</a></div>
-                        <div class="contacto-item">📍 <strong>Ushuaia:</strong> <a href="mailto:Tutoria.cetns.ush@tdf.edu.ar">Tutoria.cetns.ush@tdf.edu.ar</a></div>
-                        <div class="contacto-item">📍 <strong>Tolhuin:</strong> <a href="mailto:Tutoria.cetns.tol@tdf.edu.ar">Tutoria.cetns.tol@tdf.edu.ar</a></div>
-                    </div>
-                    
-                    <p style="margin-top: 30px; font-size: 14px; color: #64748b; border-top: 1px solid #e2e8f0; padding-top: 15px;">
-                        <em>Datos registrados: Apellido: {apellido_safe} | Nombre: {nombre_safe} | DNI: {dni_safe}</em>
-                    </p>
-                </div>
-                <div class="footer">
-                    Este es un mensaje automático del Centro Politécnico Superior.<br>Por favor, no respondas a este correo.
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        from django.core.mail.backends.smtp import EmailBackend
-        connection = EmailBackend(
-            host=settings.CFP_EMAIL_HOST,
-            port=settings.CFP_EMAIL_PORT,
-            username=settings.CFP_EMAIL_HOST_USER,
-            password=settings.CFP_EMAIL_HOST_PASSWORD,
-            use_tls=settings.CFP_EMAIL_USE_TLS,
-            use_ssl=settings.CFP_EMAIL_USE_SSL,
+        # correo_bienvenida_at se registra cuando el worker lo envía.
+        CorreoSalienteService.encolar_plantilla(
+            CorreoSaliente.CONFIRMACION_TERCIARIO,
+            [preinscripcion.email],
+            {"apellido": preinscripcion.apellido, "nombre": preinscripcion.nombre, "dni": preinscripcion.dni},
+            referencia_id=preinscripcion.id,
         )
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_content,
-            from_email=settings.CFP_FROM_EMAIL,
-            to=[preinscripcion.email],
-            connection=connection,
-        )
-        email.content_subtype = "html"
-        email.send(fail_silently=True)
-        from django.utils import timezone
-        preinscripcion.correo_bienvenida_at = timezone.now()
-        preinscripcion.save(update_fields=['correo_bienvenida_at'])
     except Exception:
         pass
 
@@ -339,6 +235,7 @@ def _cfg_to_dict(cfg):
 
 
 @router.get("/preinscripcion-terciario-config", auth=None)
+@respuesta_condicional(tablas=("ConfiguracionPreinscripcionTerciario", "Cohorte"), extra=lambda request: timezone.localdate())
 def get_config_preinscripcion(request):
     return _cfg_to_dict(ConfiguracionPreinscripcionTerciario.get())
 
@@ -584,12 +481,12 @@ def crear_preinscripcion_terciario(request):
 
     if is_update:
         # Si es una actualización, sincronizar inmediatamente los datos con Estudiante
-        _inscribir_hd(preinscripcion)
+        _intentar_inscribir_hd(preinscripcion)
     else:
-        # Enviar el correo de confirmación de preinscripción inmediatamente
-        threading.Thread(target=_enviar_confirmacion, args=(preinscripcion,)).start()
-        # Inscribir en Habilidades Digitales y enviar el segundo correo con 30 segundos de retraso
-        threading.Thread(target=_inscribir_hd_con_retraso, args=(preinscripcion,)).start()
+        # Los correos se encolan (los envía run_mail_worker): el de confirmación sale
+        # primero y el de bienvenida a Habilidades Digitales 30 segundos después.
+        _enviar_confirmacion(preinscripcion)
+        _intentar_inscribir_hd(preinscripcion, demora_correo=30)
 
     return {"id": preinscripcion.id, "mensaje": "Preinscripción registrada correctamente."}
 
@@ -724,7 +621,7 @@ def actualizar_preinscripcion_terciario(
     p.save()
 
     if estado == "aprobada" and prev_estado != "aprobada" and not p.hd_inscripcion_id:
-        threading.Thread(target=_inscribir_hd, args=(p,)).start()
+        _intentar_inscribir_hd(p)
 
     return {"id": p.id, "mensaje": "Actualizado correctamente."}
 
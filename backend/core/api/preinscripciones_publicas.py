@@ -1,6 +1,5 @@
 import logging
 from datetime import date, timedelta
-import html
 
 logger = logging.getLogger(__name__)
 import json
@@ -12,11 +11,9 @@ from django.utils import timezone
 from ninja import Router, Schema
 from ninja.errors import HttpError
 
-import os
-import threading
-from django.core.mail import EmailMessage
-from django.conf import settings
-from core.models import Cohorte, Estudiante, Inscripcion, Examen, Bloque, Modulo
+from core.models import Cohorte, CorreoSaliente, Estudiante, Inscripcion, Examen, Bloque, Modulo
+from core.services.correo_saliente_service import CorreoSalienteService
+from core.services.plantillas_correo import recurso
 from core.serializers import EstudianteSerializer
 from core.utils.estudiante_normalization import normalize_dni_digits
 
@@ -302,7 +299,7 @@ def listar_oferta_preinscripcion(
 
 def _enviar_confirmacion_preinscripcion(estudiante: Estudiante, cohortes: List[Cohorte]):
     """
-    Envía un email de confirmación con archivos adjuntos basados en los trayectos seleccionados.
+    Encola el email de confirmación con archivos adjuntos basados en los trayectos seleccionados.
     """
     try:
         # Si es del programa Videojuegos, desviar al correo específico de Videojuegos
@@ -320,124 +317,6 @@ def _enviar_confirmacion_preinscripcion(estudiante: Estudiante, cohortes: List[C
         edad = hoy.year - nac.year - ((hoy.month, hoy.day) < (nac.month, nac.day)) if nac else 18
         es_menor = edad < 18
         
-        subject = "Confirmación de Preinscripción - CFP Malvinas Argentinas"
-        if es_menor:
-            subject = "Preinscripcion Programador de Nivel III para menor de edad"
-        
-        trayectos_html = "".join([f"<li><strong>{html.escape(c.programa.nombre)}</strong> ({html.escape(c.bloque.nombre)})</li>" for c in cohortes])
-
-        info_pdf_html = ""
-        if es_menor:
-            info_pdf_html = f"""
-            <div class="info-pdf" style="background-color: #fff7ed; border: 1px solid #ffedd5;">
-                <h3 style="color: #c2410c;">⚠️ ACCIÓN REQUERIDA PARA MENORES</h3>
-                <p style="margin-top: 0;">Al ser menor de edad, para completar tu inscripción es <strong>obligatorio</strong> contar con la autorización digital de tu Padre/Madre o Tutor responsable.</p>
-                <p style="margin-top: 10px; font-weight: bold; color: #9a3412;">
-                    En la brevedad, nos comunicaremos por WhatsApp al número de {html.escape(estudiante.tutor_nombre)} (Padre/Madre o Tutor) para enviar un enlace seguro donde podrá firmar y autorizar tu inscripción digitalmente.
-                </p>
-                <p style="margin-top: 10px; font-size: 13.5px; color: #c2410c;">
-                    <i>En caso de preferir realizar el trámite de forma presencial, el Padre/Madre o Tutor responsable puede acercarse a nuestra oficina del CFP.</i>
-                </p>
-            </div>
-            """
-        else:
-            info_pdf_html = """
-            <div class="info-pdf">
-                <h3>📄 ¡No olvides revisar el PDF adjunto!</h3>
-                <p style="margin-top: 0;">En este correo te hemos adjuntado un documento muy importante con toda la información que necesitas sobre tu cursada. Allí encontrarás:</p>
-                <ul>
-                    <li><strong>🗓️ Horarios de los encuentros sincrónicos:</strong> Para que puedas organizarte y no perderte ninguna clase.</li>
-                    <li><strong>📅 Cronograma de evaluaciones:</strong> Fechas exactas de parciales, finales virtuales y finales sincrónicos.</li>
-                    <li><strong>📋 Requisitos y Correlatividades:</strong> Las condiciones necesarias para poder cursar y aprobar los módulos.</li>
-                    <li><strong>📌 Condiciones de Cursado:</strong> Información detallada sobre el funcionamiento del campus virtual y los periodos de receso.</li>
-                </ul>
-            </div>
-            """
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; color: #333333; line-height: 1.6; margin: 0; padding: 0; background-color: #f4f4f5; }}
-                .container {{ max-width: 600px; margin: 0 auto; background-color: #ffffff; overflow: hidden; }}
-                .header {{ background-color: #0b1c3c; color: #ffffff; padding: 25px 20px; text-align: center; border-bottom: 5px solid #f26b21; }}
-                .header h1 {{ margin: 0; font-size: 24px; letter-spacing: 0.5px; }}
-                .header h2 {{ margin: 5px 0 0 0; font-size: 16px; font-weight: normal; color: #cbd5e1; }}
-                .content {{ padding: 30px 25px; }}
-                .trayectos {{ background-color: #f8fafc; padding: 15px 20px; border-left: 4px solid #f26b21; margin: 25px 0; border-radius: 0 8px 8px 0; }}
-                .trayectos ul {{ margin: 0; padding-left: 20px; }}
-                .trayectos li {{ margin-bottom: 5px; font-size: 15px; color: #0f172a; }}
-                .info-pdf {{ background-color: #e0f2fe; padding: 20px 25px; border-radius: 8px; margin: 25px 0; border: 1px solid #bae6fd; }}
-                .info-pdf h3 {{ margin-top: 0; color: #0284c7; font-size: 18px; margin-bottom: 15px; }}
-                .info-pdf ul {{ padding-left: 20px; margin-bottom: 0; }}
-                .info-pdf li {{ margin-bottom: 10px; font-size: 14.5px; color: #0c4a6e; }}
-                .contacto-box {{ background-color: #f1f5f9; padding: 25px; border-radius: 8px; font-size: 15px; margin-top: 20px; border: 1px solid #e2e8f0; }}
-                .contacto-item {{ margin-bottom: 12px; line-height: 1.5; }}
-                .contacto-item:last-child {{ margin-bottom: 0; }}
-                .footer {{ background-color: #0f172a; color: #94a3b8; text-align: center; padding: 20px; font-size: 12px; }}
-                a {{ color: #0284c7; text-decoration: none; font-weight: 600; }}
-                a:hover {{ text-decoration: underline; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Centro Politécnico Superior</h1>
-                    <h2>Formación Profesional - Malvinas Argentinas</h2>
-                </div>
-                <div class="content">
-                    <p style="font-size: 17px; margin-top: 0;">Hola <strong>{html.escape(estudiante.nombre)}</strong>,</p>
-                    <p>¡Gracias por elegirnos! Hemos recibido correctamente tu preinscripción para los siguientes trayectos de capacitación:</p>
-                    
-                    <div class="trayectos">
-                        <ul>{trayectos_html}</ul>
-                    </div>
-
-                    {info_pdf_html}
-
-                    <p style="font-size: 16px; margin-top: 35px;"><strong>Ante cualquier duda o consulta, recuerda mantenerte comunicado. Aquí tienes todos nuestros canales de contacto oficiales:</strong></p>
-                    
-                    <div class="contacto-box">
-                        <div class="contacto-item">📍 <strong>Dirección:</strong> Monte Independencia 261, Barrio El Mirador (Margen Sur), Río Grande, Tierra del Fuego.</div>
-                        <div class="contacto-item">📱 <strong>WhatsApp:</strong> <a href="https://wa.me/5492964355801">+54 9 2964 35-5801</a></div>
-                        <div class="contacto-item">📞 <strong>Teléfono:</strong> 02964 69-7979</div>
-                        <div class="contacto-item">✉️ <strong>Email:</strong> <a href="mailto:estudiantes.cfp@malvinastdf.edu.ar">estudiantes.cfp@malvinastdf.edu.ar</a></div>
-                        <div class="contacto-item">🌐 <strong>Web:</strong> <a href="https://politecnico.ar">politecnico.ar</a></div>
-                    </div>
-                    
-                    <p style="margin-top: 35px; text-align: center; font-size: 18px; color: #f26b21;"><strong>¡Te deseamos muchos éxitos en esta nueva etapa!</strong></p>
-                </div>
-                <div class="footer">
-                    Este es un mensaje automático del sistema de gestión del CFP.<br>Por favor, no respondas a este correo.
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        from django.core.mail.backends.smtp import EmailBackend
-        connection = EmailBackend(
-            host=settings.CFP_EMAIL_HOST,
-            port=settings.CFP_EMAIL_PORT,
-            username=settings.CFP_EMAIL_HOST_USER,
-            password=settings.CFP_EMAIL_HOST_PASSWORD,
-            use_tls=settings.CFP_EMAIL_USE_TLS,
-            use_ssl=settings.CFP_EMAIL_USE_SSL,
-        )
-
-        email = EmailMessage(
-            subject=subject,
-            body=html_content,
-            from_email=settings.CFP_FROM_EMAIL,
-            to=[estudiante.email],
-            connection=connection,
-        )
-        email.content_subtype = "html"
-        email.encoding = "utf-8"
-
-        resources_dir = os.path.join(settings.BASE_DIR, "core", "resources", "emails")
-        
         # Lógica de adjuntos
         
         # Check what the student enrolled in
@@ -451,19 +330,25 @@ def _enviar_confirmacion_preinscripcion(estudiante: Estudiante, cohortes: List[C
         pdf_paths = []
         
         # Todos reciben las Normas de Convivencia Digital
-        pdf_paths.append(os.path.join(resources_dir, "Normas de Convivencia Digital.pdf"))
+        pdf_paths.append(recurso("Normas de Convivencia Digital.pdf"))
         
         # Archivos de trayectoria (se envían según su elección)
         if tiene_nivel_III:
-            pdf_paths.append(os.path.join(resources_dir, "CODE III 2026.pdf"))
+            pdf_paths.append(recurso("CODE III 2026.pdf"))
         if tiene_otros:
-            pdf_paths.append(os.path.join(resources_dir, "Capacitaciones laborales 2026.pdf"))
-
-        for pdf_path in pdf_paths:
-            if os.path.exists(pdf_path):
-                email.attach_file(pdf_path)
+            pdf_paths.append(recurso("Capacitaciones laborales 2026.pdf"))
 
-        email.send(fail_silently=True)
+        CorreoSalienteService.encolar_plantilla(
+            CorreoSaliente.CONFIRMACION_PREINSCRIPCION,
+            [estudiante.email],
+            {
+                "nombre": estudiante.nombre,
+                "es_menor": es_menor,
+                "tutor_nombre": estudiante.tutor_nombre,
+                "trayectos": [{"programa": c.programa.nombre, "bloque": c.bloque.nombre} for c in cohortes],
+            },
+            adjuntos=pdf_paths,
+        )
 
         # Enviar correo de autodiagnóstico si se inscribió al trayecto Habilidades Digitales (programa_id = 2)
         tiene_habilidades = any(c.programa_id == 2 for c in cohortes)
@@ -711,8 +596,8 @@ def crear_preinscripcion_publica(request):
             )
             inscripciones_creadas.append(created.id)
 
-    # Disparar email en segundo plano
-    threading.Thread(target=_enviar_confirmacion_preinscripcion, args=(estudiante, cohortes)).start()
+    # El email queda en la bandeja de salida; lo envía run_mail_worker
+    _enviar_confirmacion_preinscripcion(estudiante, cohortes)
 
     return PreinscripcionOut(
         ok=True,
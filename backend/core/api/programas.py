@@ -3,6 +3,7 @@ from typing import List, Optional
 from django.shortcuts import get_object_or_404
 from ninja import Router
 from core.api.permissions import require_authenticated_group
+from core.utils.condicional import respuesta_condicional
 
 from core.models import Programa
 from core.serializers import ProgramaSerializer
@@ -13,6 +14,7 @@ router = Router(tags=["programas"])
 
 @router.get("", response=List[ProgramaOut])
 @require_authenticated_group
+@respuesta_condicional(tablas=("Programa",))
 def listar_programas(request, activo: Optional[bool] = None, resolucion_id: Optional[int] = None):
     qs = Programa.objects.all().order_by("codigo")
     if activo is not None:
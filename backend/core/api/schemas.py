@@ -3,6 +3,8 @@ from typing import List, Optional
 
 from ninja import Schema
 
+from core.utils.trayectos import primera_fecha
+
 
 class ResolucionOut(Schema):
     id: int
@@ -257,6 +259,14 @@ class EstudianteOut(Schema):
     barrio: Optional[str] = None
 
 
+class EstudianteLookupOut(Schema):
+    """Resultado del autocompletado (/estudiantes/lookup)."""
+    id: int
+    apellido: str
+    nombre: str
+    dni: str
+
+
 class EstudianteListOut(Schema):
     """Schema liviano para el LISTADO de estudiantes (solo campos de la tabla).
     El detalle completo se sirve con EstudianteDetailOut en /estudiantes/{id}."""
@@ -274,24 +284,12 @@ class EstudianteListOut(Schema):
 
     @staticmethod
     def resolve_created_at(obj):
-        insc_dt = obj.created_at
-        for i in obj.inscripciones.all():
-            if i.created_at and (insc_dt is None or i.created_at < insc_dt):
-                insc_dt = i.created_at
-        return insc_dt
+        # Fecha de alta: la más antigua entre el estudiante y sus inscripciones.
+        return primera_fecha(obj.created_at, obj.fecha_primera_inscripcion)
 
     @staticmethod
     def resolve_trayectos(obj):
-        trayectos = set()
-        for i in obj.inscripciones.all():   # usa el prefetch del endpoint (sin select_related interno)
-            prog = (i.cohorte.programa.nombre or "S/P").strip()
-            bloque_obj = i.modulo.bloque if (i.modulo and i.modulo.bloque) else (i.cohorte.bloque if i.cohorte else None)
-            bloque_nombre = bloque_obj.nombre.strip() if bloque_obj else None
-            if bloque_nombre:
-                trayectos.add(f"{prog} ({bloque_nombre})")
-            else:
-                trayectos.add(prog)
-        return sorted(list(trayectos))
+        return obj.trayectos_resumen   # precalculado (TrayectosService), sin tocar inscripciones
 
 
 class EstudianteDetailOut(EstudianteOut):
@@ -322,18 +320,7 @@ class EstudianteDetailOut(EstudianteOut):
 
     @staticmethod
     def resolve_trayectos(obj):
-        trayectos = set()
-        for i in obj.inscripciones.all():
-            prog = (i.cohorte.programa.nombre or "S/P").strip()
-            # Priorizamos el bloque del módulo, luego el de la cohorte
-            bloque_obj = i.modulo.bloque if (i.modulo and i.modulo.bloque) else (i.cohorte.bloque if i.cohorte else None)
-            bloque_nombre = bloque_obj.nombre.strip() if bloque_obj else None
-            
-            if bloque_nombre:
-                trayectos.add(f"{prog} ({bloque_nombre})")
-            else:
-                trayectos.add(prog)
-        return sorted(list(trayectos))
+        return obj.trayectos_resumen
 
     @staticmethod
     def resolve_nivelacion_digital(obj):
@@ -17,8 +17,12 @@ from core.api.schemas import (
 )
 from core.serializers import (
     InscripcionSerializer, AsistenciaSerializer, NotaSerializer, ExamenSerializer, InscripcionListSerializer,
-    NotaSlimSerializer, AsistenciaSlimSerializer
+    NotaSlimSerializer, AsistenciaSlimSerializer, ASISTENCIA_SLIM_DICCIONARIO, NOTA_SLIM_DICCIONARIO,
 )
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+from core.services.cubo_inscripciones_service import CuboInscripcionesService
+from core.utils.columnar import serializar_filas
+from core.utils.condicional import respuesta_condicional
 from functools import wraps
 
 logger = logging.getLogger(__name__)
@@ -141,6 +145,7 @@ def actualizar_preinscripcion_videojuegos(
                 estado=Inscripcion.CURSANDO,
                 updated_at=timezone.now()
             )
+            CuboInscripcionesService.programar_recalculo([estudiante.id])
             
             # Disparar correo de aceptación VJ con claves de campus
             try:
@@ -158,6 +163,7 @@ def actualizar_preinscripcion_videojuegos(
                 estado=Inscripcion.INACTIVO,
                 updated_at=timezone.now()
             )
+            CuboInscripcionesService.programar_recalculo([estudiante.id])
             
             # Si el estudiante no tiene ningún otro trayecto activo, marcar como Baja
             has_other_active = Inscripcion.objects.filter(
@@ -182,6 +188,7 @@ def actualizar_preinscripcion_videojuegos(
     return estudiante
 
 @router.get("/config", response=VideojuegosConfigOut, auth=None)
+@respuesta_condicional(tablas=("ConfiguracionPreinscripcionVideojuegos",), extra=lambda request: timezone.localdate())
 def get_videojuegos_config(request):
     """
     Devuelve si el formulario de inscripción está habilitado según la configuración manual.
@@ -288,13 +295,7 @@ def listar_alumnos_videojuegos(
     if estatus:
         qs = qs.filter(estatus=estatus)
     if search:
-        qs = qs.filter(
-            Q(apellido__icontains=search)
-            | Q(nombre__icontains=search)
-            | Q(email__icontains=search)
-            | Q(dni__icontains=search)
-            | Q(telefono__icontains=search)
-        )
+        qs = BusquedaEstudiantesService.filtrar(qs, search).order_by("-relevancia", "apellido", "nombre")
     if cohorte_id:
         qs = qs.filter(inscripciones__cohorte_id=cohorte_id).distinct()
 
@@ -507,6 +508,7 @@ def listar_asistencia_videojuegos(
     estudiante_id: Optional[int] = None,
     modulo_id: Optional[int] = None,
     fecha: Optional[str] = None,
+    layout: str = "rows",
 ):
     """
     Lista las asistencias de VJ asegurando aislamiento.
@@ -519,7 +521,7 @@ def listar_asistencia_videojuegos(
         qs = qs.filter(modulo_id=modulo_id)
     if fecha:
         qs = qs.filter(fecha=fecha)
-    return AsistenciaSlimSerializer(qs, many=True).data
+    return serializar_filas(AsistenciaSlimSerializer, qs, layout, ASISTENCIA_SLIM_DICCIONARIO)
 
 
 @router.post("/asistencia", response=dict)
@@ -638,6 +640,7 @@ def listar_notas_videojuegos(
     aprobado: Optional[bool] = None,
     modulo_id: Optional[int] = None,
     bloque_id: Optional[int] = None,
+    layout: str = "rows",
 ):
     """
     Lista las notas de alumnos VJ asegurando aislamiento.
@@ -654,7 +657,7 @@ def listar_notas_videojuegos(
         qs = qs.filter(examen__modulo_id=modulo_id)
     if bloque_id:
         qs = qs.filter(examen__bloque_id=bloque_id)
-    return NotaSlimSerializer(qs, many=True).data
+    return serializar_filas(NotaSlimSerializer, qs, layout, NOTA_SLIM_DICCIONARIO)
 
 
 @router.post("/notas", response=dict)
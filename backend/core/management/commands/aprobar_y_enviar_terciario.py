@@ -1,10 +1,16 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from core.models import PreinscripcionTerciario
 from core.api.preinscripcion_terciario import _inscribir_hd
-import time
+from core.services.correo_saliente_service import CorreoSalienteService
+from core.utils.condicional import invalidar_versiones
 
 class Command(BaseCommand):
-    help = 'Aprobacion masiva de preinscripciones de Terciario con envio de correos cada 30 segundos'
+    help = (
+        'Aprobacion masiva de preinscripciones de Terciario por lotes. Cada lote se aprueba '
+        'e inscribe en una transaccion y encola sus correos (los envia run_mail_worker al ritmo '
+        'del proveedor). Si se corta, volver a correrlo sigue con las que quedaron pendientes.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -13,47 +19,70 @@ class Command(BaseCommand):
             help='Realizar una prueba sin guardar cambios ni enviar correos',
         )
         parser.add_argument(
-            '--delay',
+            '--chunk-size',
             type=int,
-            default=30,
-            help='Retraso en segundos entre cada envio (default: 30)',
+            default=100,
+            help='Preinscripciones por transaccion (default: 100)',
         )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        delay = options['delay']
+        chunk_size = max(1, options['chunk_size'])
 
         # Obtener preinscripciones pendientes
-        pendientes = PreinscripcionTerciario.objects.exclude(estado='aprobada')
-        total = pendientes.count()
-        
+        pendientes = PreinscripcionTerciario.objects.exclude(estado='aprobada').order_by('id')
+        ids = list(pendientes.values_list('id', flat=True))
+        total = len(ids)
+
         self.stdout.write(self.style.WARNING(f"Se encontraron {total} preinscripciones de Terciario pendientes."))
 
         if total == 0:
             self.stdout.write(self.style.SUCCESS("No hay preinscripciones pendientes para procesar."))
             return
 
-        for idx, p in enumerate(pendientes, 1):
-            self.stdout.write(f"[{idx}/{total}] Procesando: {p.apellido}, {p.nombre} (DNI: {p.dni}, Email: {p.email})...")
-            
-            if dry_run:
-                self.stdout.write(self.style.NOTICE(f"[DRY-RUN] Aprobaria a {p.apellido}, {p.nombre} y enviaria correo."))
-            else:
-                try:
-                    # 1. Marcar como aprobada
-                    p.estado = 'aprobada'
-                    p.save(update_fields=['estado'])
-                    
-                    # 2. Inscribir en Moodle / Habilidades Digitales (esto tambien envia el segundo correo)
-                    _inscribir_hd(p)
-                    
-                    self.stdout.write(self.style.SUCCESS(f"Aprobado e inscrito exitosamente."))
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error procesando a {p.apellido}, {p.nombre}: {str(e)}"))
-
-            # Dormir entre envios, excepto en el ultimo
-            if idx < total and not dry_run:
-                self.stdout.write(f"Esperando {delay} segundos antes del siguiente...")
-                time.sleep(delay)
-
-        self.stdout.write(self.style.SUCCESS("Proceso de lote finalizado."))
+        if dry_run:
+            for p in pendientes:
+                self.stdout.write(self.style.NOTICE(f"[DRY-RUN] Aprobaria a {p.apellido}, {p.nombre} (DNI: {p.dni}) y enviaria correo."))
+            return
+
+        aprobadas = 0
+        fallidas = []
+        for inicio in range(0, total, chunk_size):
+            try:
+                with transaction.atomic():
+                    # Se vuelve a filtrar: otra corrida (o el panel) pudo aprobar alguna mientras tanto.
+                    lote = list(pendientes.select_for_update().filter(id__in=ids[inicio:inicio + chunk_size]))
+                    inscriptas = []
+                    fallidas_lote = []
+                    for p in lote:
+                        prev_estado, p.estado = p.estado, 'aprobada'
+                        # Inscribir en Moodle / Habilidades Digitales y encolar el segundo correo.
+                        # Un savepoint por fila: si falla se deshace solo esa fila, que queda
+                        # pendiente para la próxima corrida.
+                        try:
+                            with transaction.atomic():
+                                if not _inscribir_hd(p):
+                                    raise ValueError("no hay cohorte de Habilidades Digitales activa")
+                        except Exception as e:
+                            p.estado = prev_estado
+                            fallidas_lote.append((p, e))
+                            continue
+                        inscriptas.append(p.id)
+                    PreinscripcionTerciario.objects.filter(id__in=inscriptas).update(estado='aprobada')
+                    invalidar_versiones('PreinscripcionTerciario')
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Error en el lote {inicio + 1}-{inicio + chunk_size}: {str(e)}"))
+                continue
+            aprobadas += len(inscriptas)
+            fallidas.extend(fallidas_lote)
+            for p, e in fallidas_lote:
+                self.stdout.write(self.style.ERROR(f"No se aprobó a {p.apellido}, {p.nombre} (DNI: {p.dni}): {e}"))
+            self.stdout.write(
+                f"[{min(inicio + chunk_size, total)}/{total}] Lote aprobado: {len(inscriptas)} preinscripciones "
+                f"(correos de bienvenida encolados), {len(fallidas_lote)} con error."
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] {aprobadas} preinscripciones aprobadas, {len(fallidas)} con error (siguen pendientes); "
+            f"{CorreoSalienteService.resumen_cola()}."
+        ))
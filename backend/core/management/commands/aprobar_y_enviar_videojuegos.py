@@ -1,12 +1,19 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from core.models import Estudiante, Inscripcion
+from core.services.correo_saliente_service import CorreoSalienteService
 from core.services.email_service import enviar_correo_aceptacion_videojuegos
-import time
+from core.services.cubo_inscripciones_service import CuboInscripcionesService
+from core.utils.cache_analytics import invalidar_analytics
 
 class Command(BaseCommand):
-    help = 'Aprobacion masiva de preinscripciones de Videojuegos con envio de correos cada 15 segundos (o delay configurable)'
+    help = (
+        'Aprobacion masiva de preinscripciones de Videojuegos por lotes. Cada lote se aprueba '
+        'en una transaccion y encola sus correos (los envia run_mail_worker al ritmo del '
+        'proveedor). Si se corta, volver a correrlo sigue con los que quedaron pendientes.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -15,73 +22,92 @@ class Command(BaseCommand):
             help='Realizar una prueba sin guardar cambios ni enviar correos',
         )
         parser.add_argument(
-            '--delay',
+            '--chunk-size',
             type=int,
-            default=15,
-            help='Retraso en segundos entre cada envio (default: 15)',
+            default=100,
+            help='Estudiantes por transaccion (default: 100)',
         )
 
-    def handle(self, *args, **options):
-        dry_run = options['dry_run']
-        delay = options['delay']
-
-        # Obtener todos los estudiantes activos con inscripciones en Videojuegos
-        qs = Estudiante.objects.filter(
+    @staticmethod
+    def pendientes():
+        """
+        Estudiantes activos con alguna inscripcion de Videojuegos que no esta
+        inactiva/desaprobada/libre y ninguna cursando/aprobada/egresada.
+        """
+        vj = Inscripcion.objects.filter(cohorte__programa__codigo='VJ')
+        return Estudiante.objects.filter(
             is_active=True,
-            inscripciones__cohorte__programa__codigo='VJ'
-        ).distinct().order_by('apellido', 'nombre')
+            id__in=vj.exclude(
+                estado__in=[Inscripcion.INACTIVO, Inscripcion.DESAPROBADO, Inscripcion.LIBRE]
+            ).values('estudiante_id'),
+        ).exclude(
+            id__in=vj.filter(
+                estado__in=[Inscripcion.CURSANDO, Inscripcion.APROBADO, Inscripcion.EGRESADO]
+            ).values('estudiante_id'),
+        ).order_by('apellido', 'nombre', 'id')
 
-        pendientes = []
-        for est in qs:
-            vj_ins = [i for i in est.inscripciones.all() if i.cohorte.programa.codigo == 'VJ']
-            if vj_ins:
-                # Si no está cursando/aprobado/egresado en ningún módulo de VJ y no todos están inactivos/desaprobados/libres
-                if not any(i.estado in ['CURSANDO', 'APROBADO', 'EGRESADO'] for i in vj_ins) and not all(i.estado in ['INACTIVO', 'DESAPROBADO', 'LIBRE'] for i in vj_ins):
-                    pendientes.append(est)
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        chunk_size = max(1, options['chunk_size'])
 
-        total = len(pendientes)
+        pendientes = self.pendientes()
+        ids = list(pendientes.values_list('id', flat=True))
+        total = len(ids)
         self.stdout.write(self.style.WARNING(f"Se encontraron {total} preinscripciones de Videojuegos pendientes."))
 
         if total == 0:
             self.stdout.write(self.style.SUCCESS("No hay preinscripciones de Videojuegos pendientes para procesar."))
             return
 
-        for idx, est in enumerate(pendientes, 1):
-            self.stdout.write(f"[{idx}/{total}] Procesando: {est.apellido}, {est.nombre} (DNI: {est.dni}, Email: {est.email})...")
-
-            if dry_run:
-                self.stdout.write(self.style.NOTICE(f"[DRY-RUN] Aprobaria a {est.apellido}, {est.nombre} y enviaria correo."))
-            else:
-                try:
-                    with transaction.atomic():
-                        # 1. Cambiar estatus a Regular si era Preinscripto
-                        if est.estatus == "Preinscripto":
-                            est.estatus = "Regular"
-                            est.save(update_fields=["estatus", "updated_at"])
+        if dry_run:
+            for est in pendientes:
+                self.stdout.write(self.style.NOTICE(f"[DRY-RUN] Aprobaria a {est.apellido}, {est.nombre} (DNI: {est.dni}) y enviaria correo."))
+            return
 
-                        # 2. Inscribir en Moodle / Cambiar a CURSANDO las inscripciones preinscriptas de VJ
-                        Inscripcion.objects.filter(
-                            estudiante=est,
-                            cohorte__programa__codigo="VJ",
-                            estado=Inscripcion.PREINSCRIPTO
-                        ).update(
-                            estado=Inscripcion.CURSANDO,
-                            updated_at=timezone.now()
-                        )
+        aprobados = encolados = 0
+        for inicio in range(0, total, chunk_size):
+            try:
+                with transaction.atomic():
+                    # Se vuelve a filtrar: otra corrida (o el panel) pudo aprobar alguno mientras tanto.
+                    lote = list(
+                        self.pendientes().select_for_update()
+                        .filter(id__in=ids[inicio:inicio + chunk_size]).values_list('id', flat=True)
+                    )
+                    ahora = timezone.now()
 
-                    # 3. Enviar correo (fuera de la transacción para no bloquear la BD si hay fallas de red/correo)
-                    success = enviar_correo_aceptacion_videojuegos(est.id)
-                    if success:
-                        self.stdout.write(self.style.SUCCESS(f"Aprobado e invitado a Discord/Campus por correo."))
-                    else:
-                        self.stdout.write(self.style.ERROR(f"Aprobado en base de datos, pero falló el envío del correo."))
+                    # 1. Cambiar estatus a Regular a los que eran Preinscriptos
+                    promovidos = list(
+                        Estudiante.objects.filter(id__in=lote, estatus="Preinscripto").values_list('id', flat=True)
+                    )
+                    Estudiante.objects.filter(id__in=promovidos).update(estatus="Regular", updated_at=ahora)
 
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error procesando a {est.apellido}, {est.nombre}: {str(e)}"))
+                    # 2. Pasar a CURSANDO las inscripciones preinscriptas de VJ (y, como hace la
+                    #    señal activate_inscripciones_on_regular, todas las de los que pasan a Regular)
+                    Inscripcion.objects.filter(
+                        estudiante_id__in=lote,
+                        estado=Inscripcion.PREINSCRIPTO,
+                    ).filter(
+                        Q(cohorte__programa__codigo="VJ") | Q(estudiante_id__in=promovidos)
+                    ).update(
+                        estado=Inscripcion.CURSANDO,
+                        updated_at=ahora
+                    )
+                    # .update() no dispara señales
+                    CuboInscripcionesService.programar_recalculo(lote)
+                    invalidar_analytics("Estudiante")
 
-            # Dormir entre envios, excepto en el ultimo
-            if idx < total and not dry_run:
-                self.stdout.write(f"Esperando {delay} segundos antes del siguiente...")
-                time.sleep(delay)
+                    # 3. Encolar los correos: salen solo si el lote se confirma
+                    encolados_lote = sum(enviar_correo_aceptacion_videojuegos(est_id) for est_id in lote)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Error en el lote {inicio + 1}-{inicio + chunk_size}: {str(e)}"))
+                continue
+            aprobados += len(lote)
+            encolados += encolados_lote
+            self.stdout.write(
+                f"[{min(inicio + chunk_size, total)}/{total}] Lote aprobado: {len(lote)} estudiantes, "
+                f"{encolados_lote} correos de invitación a Discord/Campus encolados."
+            )
 
-        self.stdout.write(self.style.SUCCESS("Proceso de lote finalizado."))
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] {aprobados} estudiantes aprobados, {encolados} correos encolados; {CorreoSalienteService.resumen_cola()}."
+        ))
@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
 
 from core.models import Estudiante
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+from core.services.lookup_estudiantes_service import LookupEstudiantesService
+from core.utils.cache_analytics import invalidar_analytics
 from core.utils.estudiante_normalization import (
     normalize_country_with_other,
     normalize_dni_digits,
@@ -118,6 +121,10 @@ class Command(BaseCommand):
 
         if batch_to_update:
             Estudiante.objects.bulk_update(batch_to_update, update_fields)
+            invalidar_analytics("Estudiante")
+            # bulk_update no dispara señales: apellido/nombre cambiaron de forma.
+            BusquedaEstudiantesService.programar_indexado(est.id for est in batch_to_update)
+            LookupEstudiantesService.programar_publicacion(est.id for est in batch_to_update)
 
         self.stdout.write(
             self.style.SUCCESS(
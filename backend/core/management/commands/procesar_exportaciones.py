@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.services.exportaciones_service import ExportacionesService
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa los trabajos de exportación pendientes (TrabajoExportacion) y borra "
+        "los archivos vencidos. Con --loop queda corriendo como worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Modo worker: revisar la cola cada --interval segundos sin terminar.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=settings.EXPORT_WORKER_INTERVAL_SECONDS,
+            help=f"Segundos de espera con la cola vacía en --loop (default: {settings.EXPORT_WORKER_INTERVAL_SECONDS}).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            borrados = ExportacionesService.limpiar_vencidos()
+            procesados = ExportacionesService.procesar_pendientes()
+            if procesados or borrados or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"[OK] exportaciones: {procesados} procesadas, {borrados} vencidas borradas")
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
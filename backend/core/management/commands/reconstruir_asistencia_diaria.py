@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.services.asistencia_diaria_service import ResumenAsistenciaService
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el resumen diario de asistencia (AsistenciaDiaria)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Tamaño de lote para leer Asistencia y para bulk_create (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        filas = ResumenAsistenciaService.reconstruir(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"[OK] asistencia diaria reconstruida: {filas} filas"))
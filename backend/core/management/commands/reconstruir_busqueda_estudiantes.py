@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el índice de búsqueda de estudiantes (TerminoBusqueda)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Tamaño de lote para bulk_create (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        terminos = BusquedaEstudiantesService.reconstruir(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"[OK] índice de búsqueda reconstruido: {terminos} términos"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.services.cubo_inscripciones_service import CuboInscripcionesService
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el cubo de inscripciones (CuboInscripcion)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Tamaño de lote para bulk_create (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        filas = CuboInscripcionesService.reconstruir(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"[OK] cubo de inscripciones reconstruido: {filas} filas"))
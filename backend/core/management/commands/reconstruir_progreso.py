@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.services.progreso_service import ProgresoService
+from core.utils.cache_analytics import invalidar_analytics
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero la tabla materializada de progreso (ProgresoBloque / ProgresoPrograma)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Tamaño de lote para bulk_create (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        filas_bloque, filas_programa = ProgresoService.reconstruir(batch_size=options["batch_size"])
+        # Egresados y dashboard leen ProgresoPrograma: invalidamos lo que depende de él.
+        invalidar_analytics("Nota", "Inscripcion")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[OK] progreso reconstruido: {filas_bloque} filas de bloque, {filas_programa} filas de programa"
+            )
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.services.trayectos_service import TrayectosService
+
+
+class Command(BaseCommand):
+    help = "Recalcula el resumen de trayectos y la fecha de primera inscripción de todos los estudiantes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Estudiantes por lote (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        estudiantes = TrayectosService.reconstruir(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"[OK] trayectos recalculados: {estudiantes} estudiantes"))
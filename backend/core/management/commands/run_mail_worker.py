@@ -0,0 +1,85 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.services.correo_saliente_service import CorreoSalienteService
+from core.utils.limitador_tasa import LimitadorTasa
+from core.utils.smtp_pool import POOL
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de la bandeja de salida (CorreoSaliente) en lotes, "
+        "reutilizando sesiones SMTP, con ritmo limitado (token bucket), envíos en paralelo y reintentos. Con --loop queda corriendo como worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Modo worker: revisar la cola cada --interval segundos sin terminar.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=settings.MAIL_WORKER_INTERVAL_SECONDS,
+            help=f"Segundos de espera con la cola vacía en --loop (default: {settings.MAIL_WORKER_INTERVAL_SECONDS}).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.MAIL_WORKER_BATCH_SIZE,
+            help=f"Correos por lote (default: {settings.MAIL_WORKER_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--rate",
+            type=int,
+            default=settings.MAIL_WORKER_RATE_PER_MINUTE,
+            help=f"Máximo de correos por minuto, 0 sin límite (default: {settings.MAIL_WORKER_RATE_PER_MINUTE}).",
+        )
+        parser.add_argument(
+            "--burst",
+            type=int,
+            default=settings.MAIL_WORKER_BURST,
+            help=f"Correos que pueden salir seguidos antes de pasar al ritmo de --rate (default: {settings.MAIL_WORKER_BURST}).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.MAIL_WORKER_CONCURRENCY,
+            help=f"Sesiones SMTP enviando en paralelo por cuenta (default: {settings.MAIL_WORKER_CONCURRENCY}).",
+        )
+
+    def handle(self, *args, **options):
+        rate = options["rate"]
+        # El balde se comparte entre lotes: el ritmo se sostiene aunque la cola llegue de a poco.
+        limitador = LimitadorTasa(rate, options["burst"]) if rate > 0 else None
+        # Un lote no dura más de un minuto, muy por debajo de MAIL_SENDING_TIMEOUT_SECONDS.
+        limite = min(options["batch_size"], rate + options["burst"]) if rate > 0 else options["batch_size"]
+
+        try:
+            self._procesar(options, limite, limitador)
+        finally:
+            POOL.cerrar_todas()
+
+    def _procesar(self, options, limite, limitador):
+        while True:
+            liberados = CorreoSalienteService.liberar_colgados()
+            tomados_total = enviados_total = 0
+            while True:
+                tomados, enviados = CorreoSalienteService.procesar_lote(limite, limitador, options["concurrency"])
+                tomados_total += tomados
+                enviados_total += enviados
+                if tomados < limite:
+                    break
+            if tomados_total or liberados or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"[OK] correos: {enviados_total} enviados, {tomados_total - enviados_total} con error, "
+                        f"{liberados} de lotes colgados devueltos a la cola"
+                    )
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
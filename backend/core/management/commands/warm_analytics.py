@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.services.precalentamiento_service import ENDPOINTS_PRECALENTADOS, PrecalentamientoService
+
+
+class Command(BaseCommand):
+    help = (
+        "Precalienta el cache de analytics (dashboard_stats, analytics_* y courses_graph) "
+        "para cada programa, bloque y cohorte activa. Con --loop queda corriendo y "
+        "refresca las entradas antes de que venzan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.ANALYTICS_WARM_WORKERS,
+            help=f"Hilos en paralelo (default: {settings.ANALYTICS_WARM_WORKERS}).",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            choices=ENDPOINTS_PRECALENTADOS,
+            help="Limitar a uno o más endpoints (se puede repetir). Default: todos.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recalcular todas las entradas aunque estén frescas.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Modo programado: repetir cada --interval segundos sin terminar.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=settings.ANALYTICS_WARM_INTERVAL_SECONDS,
+            help=f"Segundos entre pasadas en --loop (default: {settings.ANALYTICS_WARM_INTERVAL_SECONDS}).",
+        )
+        parser.add_argument(
+            "--margin",
+            type=int,
+            default=settings.ANALYTICS_WARM_MARGIN_SECONDS,
+            help=(
+                "Recalcular las entradas que vencen dentro de estos segundos "
+                f"(default: {settings.ANALYTICS_WARM_MARGIN_SECONDS}). Debe superar a --interval."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        endpoints = tuple(options["endpoint"] or ENDPOINTS_PRECALENTADOS)
+        # Una pasada única recalcula lo que falte o venza pronto; --force, todo.
+        margen = float("inf") if options["force"] else options["margin"]
+        if options["loop"] and options["margin"] <= options["interval"]:
+            self.stdout.write(self.style.WARNING("[WARN] --margin <= --interval: algunas entradas vencerán entre pasadas"))
+
+        while True:
+            inicio = time.monotonic()
+            resultado = PrecalentamientoService.precalentar(margen=margen, workers=options["workers"], endpoints=endpoints)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"[OK] analytics precalentado en {time.monotonic() - inicio:.1f}s: "
+                    f"{resultado['recalculadas']} recalculadas, {resultado['vigentes']} vigentes, "
+                    f"{resultado['errores']} con error"
+                )
+            )
+            if not options["loop"]:
+                break
+            # En --loop, --force solo aplica a la primera pasada.
+            margen = options["margin"]
+            time.sleep(options["interval"])
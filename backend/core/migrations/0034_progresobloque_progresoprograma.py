@@ -0,0 +1,49 @@
+# Generated by Django 5.2.17 on 2026-10-17 19:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_alter_asistencia_created_at_alter_bloque_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgresoBloque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('aprobado', models.BooleanField(default=False)),
+                ('fecha_aprobacion', models.DateTimeField(blank=True, null=True)),
+                ('inscripto', models.BooleanField(default=False)),
+                ('bloque', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progreso_bloques', to='core.bloque')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progreso_bloques', to='core.estudiante')),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progreso_bloques', to='core.programa')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bloque', 'aprobado'], name='core_progre_bloque__e4227a_idx'), models.Index(fields=['estudiante', 'programa'], name='core_progre_estudia_ba5d5b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('estudiante', 'bloque'), name='uniq_progreso_estudiante_bloque')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProgresoPrograma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bloques_aprobados', models.PositiveIntegerField(default=0)),
+                ('bloques_requeridos', models.PositiveIntegerField(default=0)),
+                ('completo', models.BooleanField(default=False)),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progreso_programas', to='core.estudiante')),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progreso_programas', to='core.programa')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['programa', 'completo'], name='core_progre_program_7e3287_idx'), models.Index(fields=['completo', 'estudiante'], name='core_progre_complet_d81592_idx')],
+                'constraints': [models.UniqueConstraint(fields=('estudiante', 'programa'), name='uniq_progreso_estudiante_programa')],
+            },
+        ),
+    ]
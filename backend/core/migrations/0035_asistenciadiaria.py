@@ -0,0 +1,31 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_progresobloque_progresoprograma'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsistenciaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fecha', models.DateField()),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('cohorte', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='asistencias_diarias', to='core.cohorte')),
+                ('modulo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencias_diarias', to='core.modulo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['modulo', 'fecha'], name='core_asiste_modulo__d96dad_idx'), models.Index(fields=['cohorte', 'fecha'], name='core_asiste_cohorte_8e8ce9_idx'), models.Index(fields=['fecha'], name='core_asiste_fecha_c799e9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('modulo', 'cohorte', 'fecha'), name='uniq_asistencia_diaria')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_asistenciadiaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuboInscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fecha', models.DateField()),
+                ('mes', models.DateField(help_text='Primer día del mes de alta')),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('estado', models.CharField(choices=[('PREINSCRIPTO', 'Preinscripto'), ('CURSANDO', 'Cursando'), ('INACTIVO', 'Inactivo'), ('LIBRE', 'Libre'), ('PAUSADO', 'Pausado'), ('EGRESADO', 'Egresado'), ('APROBADO', 'Aprobado'), ('DESAPROBADO', 'Desaprobado')], max_length=20)),
+                ('inscripciones', models.PositiveIntegerField(default=0)),
+                ('bloque', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cubo_inscripciones', to='core.bloque')),
+                ('cohorte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cubo_inscripciones', to='core.cohorte')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cubo_inscripciones', to='core.estudiante')),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cubo_inscripciones', to='core.programa')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['mes', 'programa'], name='core_cuboin_mes_6e196c_idx'), models.Index(fields=['anio', 'programa'], name='core_cuboin_anio_331336_idx'), models.Index(fields=['fecha'], name='core_cuboin_fecha_2c744e_idx'), models.Index(fields=['cohorte', 'mes'], name='core_cuboin_cohorte_56978a_idx'), models.Index(fields=['bloque', 'mes'], name='core_cuboin_bloque__9190e6_idx'), models.Index(fields=['estudiante'], name='core_cuboin_estudia_e157a1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_cuboinscripcion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsistenciaSemanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('semana', models.DateField(help_text='Lunes de la semana')),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('ultima_presencia', models.DateField(blank=True, null=True)),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencias_semanales', to='core.estudiante')),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencias_semanales', to='core.programa')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['programa', 'semana'], name='core_asiste_program_67b804_idx')],
+                'constraints': [models.UniqueConstraint(fields=('estudiante', 'programa', 'semana'), name='uniq_asistencia_semanal')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.utils.busqueda import terminos_estudiante
+
+
+def indexar_estudiantes(apps, schema_editor):
+    # Sin este paso la búsqueda no encontraría a nadie hasta correr reconstruir_busqueda_estudiantes.
+    Estudiante = apps.get_model("core", "Estudiante")
+    TerminoBusqueda = apps.get_model("core", "TerminoBusqueda")
+    lote = []
+    campos = ("id", "apellido", "nombre", "email", "dni", "telefono")
+    for est_id, *valores in Estudiante.objects.values_list(*campos).iterator(chunk_size=2000):
+        lote.extend(TerminoBusqueda(estudiante_id=est_id, termino=t) for t in terminos_estudiante(*valores))
+        if len(lote) >= 5000:
+            TerminoBusqueda.objects.bulk_create(lote)
+            lote = []
+    TerminoBusqueda.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_asistenciasemanal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=64)),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos_busqueda', to='core.estudiante')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['termino', 'estudiante'], name='core_termin_termino_20a683_idx')],
+                'constraints': [models.UniqueConstraint(fields=('estudiante', 'termino'), name='uniq_termino_busqueda')],
+            },
+        ),
+        migrations.RunPython(indexar_estudiantes, migrations.RunPython.noop),
+    ]
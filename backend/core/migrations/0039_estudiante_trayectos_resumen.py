@@ -0,0 +1,41 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:28
+
+from django.db import migrations, models
+
+from core.utils.trayectos import CAMPOS_INSCRIPCION, resumir_inscripciones
+
+
+def resumir_trayectos(apps, schema_editor):
+    # Sin este paso los listados mostrarían trayectos vacíos hasta correr reconstruir_trayectos.
+    Estudiante = apps.get_model("core", "Estudiante")
+    Inscripcion = apps.get_model("core", "Inscripcion")
+    ids = list(Estudiante.objects.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(ids), 1000):
+        lote = ids[i:i + 1000]
+        filas = Inscripcion.objects.filter(estudiante_id__in=lote).order_by().values_list(*CAMPOS_INSCRIPCION)
+        estudiantes = [
+            Estudiante(id=est_id, trayectos_resumen=trayectos, fecha_primera_inscripcion=primera)
+            for est_id, (trayectos, primera) in resumir_inscripciones(filas).items()
+        ]
+        Estudiante.objects.bulk_update(estudiantes, ["trayectos_resumen", "fecha_primera_inscripcion"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_terminobusqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estudiante',
+            name='fecha_primera_inscripcion',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='estudiante',
+            name='trayectos_resumen',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Trayectos'),
+        ),
+        migrations.RunPython(resumir_trayectos, migrations.RunPython.noop),
+    ]
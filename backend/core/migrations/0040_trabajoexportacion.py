@@ -0,0 +1,42 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_estudiante_trayectos_resumen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoExportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('estudiantes', 'Estudiantes'), ('historico_cursos', 'Histórico de cursos')], max_length=30)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('clave', models.CharField(db_index=True, max_length=64)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('LISTO', 'Listo'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('procesadas', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='exportaciones/')),
+                ('nombre_archivo', models.CharField(blank=True, max_length=120)),
+                ('error', models.TextField(blank=True)),
+                ('iniciado_at', models.DateTimeField(blank=True, null=True)),
+                ('finalizado_at', models.DateTimeField(blank=True, null=True)),
+                ('expira_at', models.DateTimeField(blank=True, null=True)),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_exportacion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Exportación',
+                'verbose_name_plural': 'Trabajos de Exportación',
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='core_trabaj_estado_4e81fe_idx')],
+            },
+        ),
+    ]
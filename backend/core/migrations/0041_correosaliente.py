@@ -0,0 +1,42 @@
+# Generated by Django 5.2.17 on 2026-10-17 20:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_trabajoexportacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tipo', models.CharField(choices=[('bienvenida', 'Bienvenida al campus'), ('nivelacion', 'Nivelación digital'), ('confirmacion_preinscripcion', 'Confirmación de preinscripción'), ('confirmacion_terciario', 'Confirmación de preinscripción terciaria'), ('bienvenida_terciario', 'Bienvenida terciario (Moodle)'), ('confirmacion_videojuegos', 'Confirmación Videojuegos'), ('aceptacion_videojuegos', 'Aceptación Videojuegos')], max_length=40)),
+                ('cuenta', models.CharField(choices=[('cfp', 'SMTP del CFP (CFP_EMAIL_*)'), ('default', 'Conexión por defecto (EMAIL_*)')], default='cfp', max_length=10)),
+                ('remitente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField(default=list)),
+                ('asunto', models.CharField(max_length=255)),
+                ('cuerpo_html', models.TextField()),
+                ('adjuntos', models.JSONField(blank=True, default=list, help_text='Rutas de los archivos adjuntos, relativas a BASE_DIR')),
+                ('referencia_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIANDO', 'Enviando'), ('ENVIADO', 'Enviado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('lote', models.CharField(blank=True, max_length=32)),
+                ('tomado_at', models.DateTimeField(blank=True, null=True)),
+                ('enviado_at', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Correo Saliente',
+                'verbose_name_plural': 'Correos Salientes',
+                'indexes': [models.Index(fields=['estado', 'proximo_intento_at'], name='core_correo_estado_8757b8_idx'), models.Index(fields=['lote'], name='core_correo_lote_730113_idx')],
+            },
+        ),
+    ]
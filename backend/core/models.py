@@ -264,6 +264,23 @@ class Estudiante(TimeStamped):
     )
     autorizacion_fecha = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Autorización")
 
+    # --- Resumen de inscripciones (desnormalizado, lo mantiene TrayectosService) ---
+    trayectos_resumen = models.JSONField(default=list, blank=True, editable=False, verbose_name="Trayectos")
+    fecha_primera_inscripcion = models.DateTimeField(null=True, blank=True, editable=False)
+    CAMPOS_RESUMEN = ("trayectos_resumen", "fecha_primera_inscripcion")
+
+    def save(self, *args, **kwargs):
+        # El resumen lo escribe TrayectosService con bulk_update al confirmar la
+        # transacción: una instancia leída antes no debe pisarlo con su copia vieja.
+        # Solo se guarda si se lo nombra en update_fields.
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            diferidos = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in diferidos and f.name not in self.CAMPOS_RESUMEN
+            ]
+        super().save(*args, **kwargs)
+
     def get_approved_bloques(self):
         return Bloque.objects.filter(
             examenes__notas__estudiante=self,
@@ -587,6 +604,171 @@ class Asistencia(TimeStamped):
             models.Index(fields=["estudiante", "modulo"]),
         ]
 
+
+class ProgresoBloque(TimeStamped):
+    """
+    Tabla materializada de avance: una fila por (estudiante, programa, bloque).
+    Se mantiene desde las señales de Nota/Inscripcion (ver ProgresoService) y
+    se reconstruye con `python manage.py reconstruir_progreso`.
+    """
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name="progreso_bloques")
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name="progreso_bloques")
+    bloque = models.ForeignKey(Bloque, on_delete=models.CASCADE, related_name="progreso_bloques")
+    aprobado = models.BooleanField(default=False)
+    fecha_aprobacion = models.DateTimeField(null=True, blank=True)
+    inscripto = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["estudiante", "bloque"], name="uniq_progreso_estudiante_bloque"),
+        ]
+        indexes = [
+            models.Index(fields=["bloque", "aprobado"]),
+            models.Index(fields=["estudiante", "programa"]),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.bloque_id} ({'aprobado' if self.aprobado else 'pendiente'})"
+
+
+class ProgresoPrograma(TimeStamped):
+    """
+    Resumen por (estudiante, programa) derivado de ProgresoBloque.
+    `completo` indica que aprobó todos los bloques del programa (egreso automático).
+    """
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name="progreso_programas")
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name="progreso_programas")
+    bloques_aprobados = models.PositiveIntegerField(default=0)
+    bloques_requeridos = models.PositiveIntegerField(default=0)
+    completo = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["estudiante", "programa"], name="uniq_progreso_estudiante_programa"),
+        ]
+        indexes = [
+            models.Index(fields=["programa", "completo"]),
+            models.Index(fields=["completo", "estudiante"]),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.programa_id} ({self.bloques_aprobados}/{self.bloques_requeridos})"
+
+
+class AsistenciaDiaria(TimeStamped):
+    """
+    Resumen diario de asistencia: una fila por (modulo, cohorte, fecha) con
+    presentes y total de registros. La cohorte es la del estudiante en el
+    programa del módulo (ver ResumenAsistenciaService); queda en NULL si no
+    tiene inscripción en ese programa.
+    Se mantiene desde las señales de Asistencia/Inscripcion y se reconstruye
+    con `python manage.py reconstruir_asistencia_diaria`.
+    """
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE, related_name="asistencias_diarias")
+    cohorte = models.ForeignKey(Cohorte, on_delete=models.CASCADE, related_name="asistencias_diarias", null=True, blank=True)
+    fecha = models.DateField()
+    presentes = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["modulo", "cohorte", "fecha"], name="uniq_asistencia_diaria"),
+        ]
+        indexes = [
+            models.Index(fields=["modulo", "fecha"]),
+            models.Index(fields=["cohorte", "fecha"]),
+            models.Index(fields=["fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.modulo_id} - {self.cohorte_id} - {self.fecha} ({self.presentes}/{self.total})"
+
+
+class AsistenciaSemanal(TimeStamped):
+    """
+    Índice de actividad por estudiante: una fila por (estudiante, programa,
+    semana) con presentes, total de registros y el último día presente de la
+    semana. Alimenta el motor de riesgo de abandono (RiesgoAbandonoService).
+    Se mantiene desde las señales de Asistencia y se reconstruye con
+    `python manage.py reconstruir_asistencia_semanal`.
+    """
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name="asistencias_semanales")
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name="asistencias_semanales")
+    semana = models.DateField(help_text="Lunes de la semana")
+    presentes = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    ultima_presencia = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["estudiante", "programa", "semana"], name="uniq_asistencia_semanal"),
+        ]
+        indexes = [
+            models.Index(fields=["programa", "semana"]),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.programa_id} - {self.semana} ({self.presentes}/{self.total})"
+
+
+class CuboInscripcion(TimeStamped):
+    """
+    Cubo de inscripciones: una fila por (fecha, programa, cohorte, bloque,
+    estado, estudiante) con la cantidad de inscripciones. Guarda fecha, mes y
+    año de alta como columnas indexadas, así las series por período no aplican
+    funciones sobre created_at. Como incluye al estudiante, los conteos de
+    estudiantes distintos son exactos para cualquier combinación de filtros.
+    `bloque` es el bloque del módulo inscripto (NULL en inscripciones a la cohorte).
+    Se mantiene desde CuboInscripcionesService y se reconstruye con
+    `python manage.py reconstruir_cubo_inscripciones`.
+    """
+    fecha = models.DateField()
+    mes = models.DateField(help_text="Primer día del mes de alta")
+    anio = models.PositiveSmallIntegerField()
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name="cubo_inscripciones")
+    cohorte = models.ForeignKey(Cohorte, on_delete=models.CASCADE, related_name="cubo_inscripciones")
+    bloque = models.ForeignKey(Bloque, on_delete=models.CASCADE, related_name="cubo_inscripciones", null=True, blank=True)
+    estado = models.CharField(max_length=20, choices=Inscripcion.ESTADOS)
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name="cubo_inscripciones")
+    inscripciones = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["mes", "programa"]),
+            models.Index(fields=["anio", "programa"]),
+            models.Index(fields=["fecha"]),
+            models.Index(fields=["cohorte", "mes"]),
+            models.Index(fields=["bloque", "mes"]),
+            models.Index(fields=["estudiante"]),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.cohorte_id} - {self.estado} - {self.estudiante_id} ({self.inscripciones})"
+
+class TerminoBusqueda(models.Model):
+    """
+    Índice de búsqueda de estudiantes: una fila por (estudiante, término).
+    Los términos son las palabras de apellido, nombre, email, dni y teléfono
+    normalizadas en minúsculas y sin acentos ("Muñoz" -> "munoz"), ver
+    core/utils/busqueda.py. La búsqueda compara por prefijo sobre `termino`,
+    que usa el índice en lugar de recorrer la tabla de estudiantes.
+    Se mantiene desde las señales de Estudiante y se reconstruye con
+    `python manage.py reconstruir_busqueda_estudiantes`.
+    """
+    estudiante = models.ForeignKey(Estudiante, on_delete=models.CASCADE, related_name="terminos_busqueda")
+    termino = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["estudiante", "termino"], name="uniq_termino_busqueda"),
+        ]
+        indexes = [
+            models.Index(fields=["termino", "estudiante"]),
+        ]
+
+    def __str__(self):
+        return f"{self.estudiante_id} - {self.termino}"
+
 # --- Users & Roles helpers ---
 class UserProfile(models.Model):
     """
@@ -801,3 +983,129 @@ class ConfiguracionPreinscripcionVideojuegos(models.Model):
         obj, _ = cls.objects.get_or_create(id=1)
         return obj
 
+
+
+class TrabajoExportacion(TimeStamped):
+    """
+    Exportación generada en segundo plano. El POST crea el trabajo, el
+    comando `procesar_exportaciones` lo toma y escribe el archivo en media
+    protegida, y el cliente consulta el progreso y descarga el archivo.
+    `clave` identifica los parámetros junto con la versión de los datos: un
+    pedido igual a uno vigente reutiliza ese trabajo. Los archivos vencen en
+    `expira_at` y los borra el mismo comando.
+    """
+    ESTUDIANTES = "estudiantes"
+    HISTORICO_CURSOS = "historico_cursos"
+    TIPOS = [
+        (ESTUDIANTES, "Estudiantes"),
+        (HISTORICO_CURSOS, "Histórico de cursos"),
+    ]
+
+    PENDIENTE = "PENDIENTE"
+    EN_PROCESO = "EN_PROCESO"
+    LISTO = "LISTO"
+    ERROR = "ERROR"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (EN_PROCESO, "En proceso"),
+        (LISTO, "Listo"),
+        (ERROR, "Error"),
+    ]
+
+    tipo = models.CharField(max_length=30, choices=TIPOS)
+    parametros = models.JSONField(default=dict, blank=True)
+    clave = models.CharField(max_length=64, db_index=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    procesadas = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    archivo = models.FileField(upload_to="exportaciones/", null=True, blank=True)
+    nombre_archivo = models.CharField(max_length=120, blank=True)
+    error = models.TextField(blank=True)
+    creado_por = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name="trabajos_exportacion"
+    )
+    iniciado_at = models.DateTimeField(null=True, blank=True)
+    finalizado_at = models.DateTimeField(null=True, blank=True)
+    expira_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Trabajo de Exportación"
+        verbose_name_plural = "Trabajos de Exportación"
+        indexes = [
+            models.Index(fields=["estado", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.estado})"
+
+
+class CorreoSaliente(TimeStamped):
+    """
+    Bandeja de salida de correos. Las funciones enviar_correo_* arman el
+    mensaje y lo encolan acá; el comando `run_mail_worker` los envía en lotes
+    (sobre sesiones SMTP reutilizadas), reintenta con espera creciente los que
+    fallan y registra el resultado. `referencia_id` apunta al registro de
+    origen cuando el envío tiene que dejar constancia (p. ej. la
+    preinscripción terciaria en correo_bienvenida_at).
+    """
+    BIENVENIDA = "bienvenida"
+    NIVELACION = "nivelacion"
+    CONFIRMACION_PREINSCRIPCION = "confirmacion_preinscripcion"
+    CONFIRMACION_TERCIARIO = "confirmacion_terciario"
+    BIENVENIDA_TERCIARIO = "bienvenida_terciario"
+    CONFIRMACION_VIDEOJUEGOS = "confirmacion_videojuegos"
+    ACEPTACION_VIDEOJUEGOS = "aceptacion_videojuegos"
+    TIPOS = [
+        (BIENVENIDA, "Bienvenida al campus"),
+        (NIVELACION, "Nivelación digital"),
+        (CONFIRMACION_PREINSCRIPCION, "Confirmación de preinscripción"),
+        (CONFIRMACION_TERCIARIO, "Confirmación de preinscripción terciaria"),
+        (BIENVENIDA_TERCIARIO, "Bienvenida terciario (Moodle)"),
+        (CONFIRMACION_VIDEOJUEGOS, "Confirmación Videojuegos"),
+        (ACEPTACION_VIDEOJUEGOS, "Aceptación Videojuegos"),
+    ]
+
+    CFP = "cfp"
+    DEFAULT = "default"
+    CUENTAS = [
+        (CFP, "SMTP del CFP (CFP_EMAIL_*)"),
+        (DEFAULT, "Conexión por defecto (EMAIL_*)"),
+    ]
+
+    PENDIENTE = "PENDIENTE"
+    ENVIANDO = "ENVIANDO"
+    ENVIADO = "ENVIADO"
+    ERROR = "ERROR"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (ENVIANDO, "Enviando"),
+        (ENVIADO, "Enviado"),
+        (ERROR, "Error"),
+    ]
+
+    tipo = models.CharField(max_length=40, choices=TIPOS)
+    cuenta = models.CharField(max_length=10, choices=CUENTAS, default=CFP)
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField(default=list)
+    asunto = models.CharField(max_length=255)
+    cuerpo_html = models.TextField()
+    adjuntos = models.JSONField(default=list, blank=True, help_text="Rutas de los archivos adjuntos, relativas a BASE_DIR")
+    referencia_id = models.PositiveIntegerField(null=True, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento_at = models.DateTimeField(default=timezone.now)
+    lote = models.CharField(max_length=32, blank=True)
+    tomado_at = models.DateTimeField(null=True, blank=True)
+    enviado_at = models.DateTimeField(null=True, blank=True)
+    ultimo_error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Correo Saliente"
+        verbose_name_plural = "Correos Salientes"
+        indexes = [
+            models.Index(fields=["estado", "proximo_intento_at"]),
+            models.Index(fields=["lote"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} a {', '.join(self.destinatarios)} ({self.estado})"
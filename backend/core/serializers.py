@@ -63,25 +63,8 @@ class EstudianteSerializer(serializers.ModelSerializer):
     trayectos = serializers.SerializerMethodField()
 
     def get_trayectos(self, obj):
-        trayectos = set()
-        
-        is_prefetched = hasattr(obj, '_prefetched_objects_cache') and 'inscripciones' in obj._prefetched_objects_cache
-        if is_prefetched:
-            inscs = obj.inscripciones.all()
-        else:
-            inscs = obj.inscripciones.select_related('cohorte__programa', 'modulo__bloque', 'cohorte__bloque').all()
-
-        for insc in inscs:
-            prog = insc.cohorte.programa.nombre if insc.cohorte and insc.cohorte.programa else "S/P"
-            # Priorizamos el bloque del módulo, luego el de la cohorte
-            bloque = (insc.modulo.bloque.nombre if (insc.modulo and insc.modulo.bloque) 
-                      else (insc.cohorte.bloque.nombre if (insc.cohorte and insc.cohorte.bloque) else None))
-            
-            if bloque:
-                trayectos.add(f"{prog} ({bloque})")
-            else:
-                trayectos.add(prog)
-        return sorted(list(trayectos))
+        # Resumen precalculado por TrayectosService al cambiar las inscripciones.
+        return obj.trayectos_resumen
 
     def validate_email(self, value):
         from core.models import Estudiante, PreinscripcionTerciario
@@ -492,6 +475,14 @@ class NotaSlimSerializer(serializers.ModelSerializer):
         return None
 
 
+# Columnas de baja cardinalidad que ?layout=columns codifica por diccionario.
+NOTA_SLIM_DICCIONARIO = (
+    "examen", "aprobado", "es_equivalencia", "origen_equivalencia", "fecha_ref_equivalencia",
+    "examen_modulo_nombre", "examen_modulo_id", "examen_bloque_nombre", "examen_programa_nombre",
+    "examen_tipo_examen", "examen_fecha", "intento", "es_nota_definitiva",
+)
+
+
 class AsistenciaSlimSerializer(serializers.ModelSerializer):
     estudiante_id = serializers.IntegerField(read_only=True)
     modulo_id = serializers.IntegerField(read_only=True)
@@ -504,6 +495,8 @@ class AsistenciaSlimSerializer(serializers.ModelSerializer):
         )
 
 
+ASISTENCIA_SLIM_DICCIONARIO = ("modulo", "modulo_id", "fecha", "presente", "archivo_origen")
+
 
 class ChangePasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField(required=True)
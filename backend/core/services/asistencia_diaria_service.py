@@ -0,0 +1,140 @@
+# backend/core/services/asistencia_diaria_service.py
+"""
+Servicio para mantener el resumen diario de asistencia (AsistenciaDiaria).
+
+Cada fila agrupa los registros de Asistencia de un (modulo, cohorte, fecha)
+con sus presentes y su total. Asistencia no guarda la cohorte: se toma la
+cohorte del estudiante en el programa del módulo. Si tiene varias, la más
+reciente que ya había empezado en esa fecha (o la más antigua si ninguna
+había empezado); sin inscripción en el programa queda en NULL.
+
+Las señales de Asistencia e Inscripcion (core/signals.py) llaman a este
+servicio: una asistencia recalcula su día; una inscripción, los días del
+estudiante en los módulos del programa de su cohorte. El comando
+`reconstruir_asistencia_diaria` lo regenera desde cero.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.models import Asistencia, AsistenciaDiaria, Inscripcion
+from core.utils.cache_analytics import invalidar_analytics
+
+
+class ResumenAsistenciaService:
+    """
+    Cálculo y mantenimiento de AsistenciaDiaria.
+    """
+
+    @staticmethod
+    def _cohortes_por_estudiante(inscripciones_qs):
+        """{(estudiante_id, programa_id): [(fecha_inicio, cohorte_id), ...]} ordenado por fecha."""
+        cohortes = {}
+        filas = (
+            inscripciones_qs.values_list("estudiante_id", "cohorte__programa_id", "cohorte__fecha_inicio", "cohorte_id")
+            .distinct()
+            .order_by("cohorte__fecha_inicio", "cohorte_id")
+        )
+        for estudiante_id, programa_id, fecha_inicio, cohorte_id in filas.iterator(chunk_size=2000):
+            cohortes.setdefault((estudiante_id, programa_id), []).append((fecha_inicio, cohorte_id))
+        return cohortes
+
+    @staticmethod
+    def _cohorte_para(cohortes, estudiante_id, programa_id, fecha):
+        candidatas = cohortes.get((estudiante_id, programa_id))
+        if not candidatas:
+            return None
+        elegida = candidatas[0][1]
+        for fecha_inicio, cohorte_id in candidatas:
+            if fecha_inicio <= fecha:
+                elegida = cohorte_id
+        return elegida
+
+    @staticmethod
+    def _acumular(asistencias, cohortes):
+        """Agrupa filas (modulo_id, programa_id, estudiante_id, fecha, presente) en AsistenciaDiaria."""
+        resumen = {}
+        for modulo_id, programa_id, estudiante_id, fecha, presente in asistencias:
+            cohorte_id = ResumenAsistenciaService._cohorte_para(cohortes, estudiante_id, programa_id, fecha)
+            key = (modulo_id, cohorte_id, fecha)
+            if key not in resumen:
+                resumen[key] = AsistenciaDiaria(modulo_id=modulo_id, cohorte_id=cohorte_id, fecha=fecha)
+            resumen[key].total += 1
+            if presente:
+                resumen[key].presentes += 1
+        return list(resumen.values())
+
+    @staticmethod
+    def _campos(qs):
+        return qs.values_list("modulo_id", "modulo__bloque__programa_id", "estudiante_id", "fecha", "presente")
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular(claves):
+        """
+        Recalcula las filas de los (modulo_id, fecha) indicados. Son los días
+        de clase tocados por una escritura: unas decenas de registros cada uno.
+
+        Se lee por módulo y rango de fechas (modulo_id IN ... AND fecha BETWEEN,
+        sobre el índice de Asistencia) en lugar de un OR por día, y las filas
+        fuera de `claves` se descartan en Python.
+        """
+        claves = set(claves)
+        if not claves:
+            return
+        fechas = [fecha for _, fecha in claves]
+        rango = Q(modulo_id__in={modulo_id for modulo_id, _ in claves}, fecha__range=(min(fechas), max(fechas)))
+
+        asistencias = [
+            fila for fila in ResumenAsistenciaService._campos(Asistencia.objects.filter(rango))
+            if (fila[0], fila[3]) in claves
+        ]
+        cohortes = ResumenAsistenciaService._cohortes_por_estudiante(
+            Inscripcion.objects.filter(estudiante_id__in={fila[2] for fila in asistencias})
+        )
+        filas = ResumenAsistenciaService._acumular(asistencias, cohortes)
+
+        anteriores = [
+            pk for pk, modulo_id, fecha in AsistenciaDiaria.objects.filter(rango).values_list("id", "modulo_id", "fecha")
+            if (modulo_id, fecha) in claves
+        ]
+        AsistenciaDiaria.objects.filter(id__in=anteriores).delete()
+        AsistenciaDiaria.objects.bulk_create(filas)
+        invalidar_analytics("Asistencia")
+
+    @staticmethod
+    def claves_de_inscripciones(pares):
+        """
+        (modulo_id, fecha) con asistencia de cada estudiante en los módulos de
+        un programa, para pares (estudiante_id, programa_id): los días cuya
+        cohorte puede cambiar cuando cambian sus inscripciones en ese programa.
+        """
+        pares = {(estudiante_id, programa_id) for estudiante_id, programa_id in pares if programa_id is not None}
+        if not pares:
+            return set()
+        filas = (
+            Asistencia.objects.filter(
+                estudiante_id__in={estudiante_id for estudiante_id, _ in pares},
+                modulo__bloque__programa_id__in={programa_id for _, programa_id in pares},
+            )
+            .values_list("estudiante_id", "modulo__bloque__programa_id", "modulo_id", "fecha")
+            .distinct()
+            .order_by()
+        )
+        return {(modulo_id, fecha) for estudiante_id, programa_id, modulo_id, fecha in filas if (estudiante_id, programa_id) in pares}
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(batch_size=1000):
+        """
+        Regenera AsistenciaDiaria completa recorriendo Asistencia en streaming.
+        Devuelve la cantidad de filas generadas.
+        """
+        cohortes = ResumenAsistenciaService._cohortes_por_estudiante(Inscripcion.objects.all())
+        asistencias = ResumenAsistenciaService._campos(Asistencia.objects.order_by()).iterator(chunk_size=batch_size)
+        filas = ResumenAsistenciaService._acumular(asistencias, cohortes)
+
+        AsistenciaDiaria.objects.all().delete()
+        AsistenciaDiaria.objects.bulk_create(filas, batch_size=batch_size)
+        invalidar_analytics("Asistencia")
+        return len(filas)
@@ -0,0 +1,132 @@
+# backend/core/services/busqueda_estudiantes_service.py
+"""
+Búsqueda de estudiantes sobre el índice TerminoBusqueda.
+
+Cada palabra de la consulta se normaliza igual que los términos indexados
+(minúsculas, sin acentos) y se compara por prefijo: "mun" encuentra a
+"Muñoz". Un estudiante aparece si todas las palabras coinciden con alguno
+de sus términos (en cualquier campo), y la relevancia suma 2 por palabra
+exacta y 1 por prefijo. Todo se resuelve en una consulta agrupada sobre el
+índice, sin LIKE '%...%' sobre la tabla de estudiantes.
+
+La única excepción es un DNI parcial: si la consulta es un solo número de
+al menos MIN_DIGITOS_DNI dígitos, también se buscan los DNI que lo contienen
+en cualquier posición ("111222" encuentra "30111222"), con relevancia 0.
+"""
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from core.models import Estudiante, TerminoBusqueda
+from core.utils.busqueda import palabras, terminos_estudiante
+from core.utils.pendientes import acumular_hasta_commit
+
+# Palabras de la consulta que se tienen en cuenta (el resto se ignora).
+MAX_PALABRAS = 5
+CAMPOS_INDEXADOS = ("apellido", "nombre", "email", "dni", "telefono")
+# Dígitos mínimos para buscar un DNI por subcadena (menos coincidiría con casi todos).
+MIN_DIGITOS_DNI = 4
+
+
+class BusquedaEstudiantesService:
+    """
+    Mantenimiento del índice de búsqueda y filtrado por relevancia.
+    """
+
+    # --- Índice ---
+
+    @staticmethod
+    def _filas(estudiantes):
+        for est_id, *valores in estudiantes.values_list("id", *CAMPOS_INDEXADOS).iterator(chunk_size=2000):
+            for termino in terminos_estudiante(*valores):
+                yield TerminoBusqueda(estudiante_id=est_id, termino=termino)
+
+    @staticmethod
+    @transaction.atomic
+    def indexar(estudiante_ids):
+        """Regenera los términos de los estudiantes indicados."""
+        estudiante_ids = set(estudiante_ids)
+        if not estudiante_ids:
+            return
+        filas = list(BusquedaEstudiantesService._filas(Estudiante.objects.filter(id__in=estudiante_ids)))
+        TerminoBusqueda.objects.filter(estudiante_id__in=estudiante_ids).delete()
+        TerminoBusqueda.objects.bulk_create(filas)
+
+    @staticmethod
+    def programar_indexado(estudiante_ids):
+        """Acumula estudiantes y los reindexa juntos al confirmar la transacción."""
+        acumular_hasta_commit("busqueda_estudiantes", estudiante_ids, BusquedaEstudiantesService.indexar)
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(batch_size=1000):
+        """Regenera el índice completo. Devuelve la cantidad de términos generados."""
+        TerminoBusqueda.objects.all().delete()
+        total = 0
+        lote = []
+        for fila in BusquedaEstudiantesService._filas(Estudiante.objects.order_by()):
+            lote.append(fila)
+            if len(lote) >= batch_size:
+                TerminoBusqueda.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+        TerminoBusqueda.objects.bulk_create(lote)
+        return total + len(lote)
+
+    # --- Consulta ---
+
+    @staticmethod
+    def coincidencias(texto):
+        """
+        Consulta agrupada {estudiante_id, relevancia} de los estudiantes que
+        coinciden con todas las palabras de `texto`, o None si no hay palabras.
+        """
+        consulta = palabras(texto)[:MAX_PALABRAS]
+        if not consulta:
+            return None
+        filtro = Q()
+        puntajes = {}
+        for i, palabra in enumerate(consulta):
+            filtro |= Q(termino__startswith=palabra)
+            puntajes[f"p{i}"] = Max(
+                Case(
+                    When(termino=palabra, then=Value(2)),
+                    When(termino__startswith=palabra, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        relevancia = sum((F(f"p{i}") for i in range(1, len(consulta))), F("p0"))
+        return (
+            TerminoBusqueda.objects.filter(filtro)
+            .values("estudiante_id")
+            .annotate(**puntajes)
+            .filter(**{f"p{i}__gt": 0 for i in range(len(consulta))})
+            .annotate(relevancia=relevancia)
+            .order_by()
+        )
+
+    @staticmethod
+    def filtrar(estudiantes_qs, texto):
+        """
+        Restringe `estudiantes_qs` a los que coinciden con `texto` (o cuyo DNI
+        contiene el número buscado) y anota `relevancia` (mayor = mejor). Si
+        `texto` no tiene palabras buscables no devuelve ningún estudiante.
+        """
+        grupos = BusquedaEstudiantesService.coincidencias(texto)
+        if grupos is None:
+            return estudiantes_qs.none().annotate(relevancia=Value(0, output_field=IntegerField()))
+        condicion = Q(id__in=grupos.values("estudiante_id"))
+        consulta = palabras(texto)
+        if len(consulta) == 1 and consulta[0].isdigit() and len(consulta[0]) >= MIN_DIGITOS_DNI:
+            condicion |= Q(dni__contains=consulta[0])
+        return estudiantes_qs.filter(condicion).annotate(
+            relevancia=Coalesce(
+                Subquery(
+                    grupos.filter(estudiante_id=OuterRef("pk")).values("relevancia")[:1],
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            )
+        )
@@ -0,0 +1,266 @@
+# backend/core/services/correo_saliente_service.py
+"""
+Bandeja de salida de correos (CorreoSaliente).
+
+Las funciones enviar_correo_* no hablan con el servidor SMTP: arman el
+mensaje y lo encolan con `encolar`, dentro de la transacción del pedido (si
+el pedido falla, el correo no sale). El comando `run_mail_worker` toma lotes
+de pendientes y los envía sobre sesiones SMTP ya autenticadas del pool del
+proceso (core/utils/smtp_pool.py), varios mensajes por sesión y hasta
+MAIL_WORKER_CONCURRENCY sesiones en paralelo, al ritmo de un token bucket
+(MAIL_WORKER_RATE_PER_MINUTE, con ráfagas de MAIL_WORKER_BURST), así los
+picos de inscripción se vacían tan rápido como permite la cuota del
+proveedor, sin pasarla.
+
+Un envío fallido vuelve a PENDIENTE con espera creciente (MAIL_RETRY_BASE_SECONDS,
+el doble en cada intento, hasta MAIL_RETRY_MAX_SECONDS); al llegar a
+MAIL_MAX_ATTEMPTS, o si el servidor rechaza los destinatarios, queda en ERROR
+con el último error. Los lotes tomados por un worker que se cayó vuelven a la
+cola pasado MAIL_SENDING_TIMEOUT_SECONDS (un correo de ese lote puede llegar
+a salir dos veces, nunca ninguna).
+"""
+
+import logging
+import math
+import os
+import queue
+import secrets
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from core.models import CorreoSaliente, PreinscripcionTerciario
+from core.services.plantillas_correo import adjunto, renderizar
+from core.utils.smtp_pool import POOL
+
+logger = logging.getLogger(__name__)
+
+
+def _registrar_bienvenida_terciario(correo):
+    preinscripcion = PreinscripcionTerciario.objects.filter(pk=correo.referencia_id).first()
+    if preinscripcion:
+        preinscripcion.correo_bienvenida_at = correo.enviado_at
+        preinscripcion.save(update_fields=["correo_bienvenida_at"])
+
+
+# tipo -> constancia que deja el envío en el registro de origen (referencia_id)
+AL_ENVIAR = {
+    CorreoSaliente.CONFIRMACION_TERCIARIO: _registrar_bienvenida_terciario,
+    CorreoSaliente.BIENVENIDA_TERCIARIO: _registrar_bienvenida_terciario,
+}
+
+
+class CorreoSalienteService:
+    """
+    Alta de correos en la bandeja de salida y envío por lotes.
+    """
+
+    @staticmethod
+    def encolar(
+        tipo, destinatarios, asunto, cuerpo_html, remitente=None, cuenta=CorreoSaliente.CFP,
+        adjuntos=(), referencia_id=None, demora_segundos=0,
+    ) -> CorreoSaliente:
+        """
+        Encola un correo HTML.
+        adjuntos: rutas de archivos; los que no existen se omiten
+        demora_segundos: no se envía antes de ese tiempo
+        """
+        if remitente is None:
+            remitente = settings.CFP_FROM_EMAIL if cuenta == CorreoSaliente.CFP else settings.DEFAULT_FROM_EMAIL
+        return CorreoSaliente.objects.create(
+            tipo=tipo,
+            cuenta=cuenta,
+            remitente=remitente,
+            destinatarios=list(destinatarios),
+            asunto=asunto,
+            cuerpo_html=cuerpo_html,
+            adjuntos=[os.path.relpath(ruta, settings.BASE_DIR) for ruta in adjuntos if os.path.exists(ruta)],
+            referencia_id=referencia_id,
+            proximo_intento_at=timezone.now() + timedelta(seconds=demora_segundos),
+        )
+
+    @staticmethod
+    def encolar_plantilla(tipo, destinatarios, contexto, **kwargs) -> CorreoSaliente:
+        """Encola el correo `tipo` armado con su plantilla (core/services/plantillas_correo.py)."""
+        asunto, cuerpo_html = renderizar(tipo, contexto)
+        return CorreoSalienteService.encolar(tipo, destinatarios, asunto, cuerpo_html, **kwargs)
+
+    @staticmethod
+    def conexion(cuenta):
+        """Backend de correo (sin abrir) de la cuenta."""
+        if cuenta == CorreoSaliente.CFP:
+            return get_connection(
+                settings.CFP_EMAIL_BACKEND,
+                host=settings.CFP_EMAIL_HOST,
+                port=settings.CFP_EMAIL_PORT,
+                username=settings.CFP_EMAIL_HOST_USER,
+                password=settings.CFP_EMAIL_HOST_PASSWORD,
+                use_tls=settings.CFP_EMAIL_USE_TLS,
+                use_ssl=settings.CFP_EMAIL_USE_SSL,
+                timeout=settings.EMAIL_TIMEOUT,
+            )
+        return get_connection()
+
+    @staticmethod
+    def mensaje(correo, conexion) -> EmailMessage:
+        email = EmailMessage(
+            subject=correo.asunto,
+            body=correo.cuerpo_html,
+            from_email=correo.remitente,
+            to=correo.destinatarios,
+            connection=conexion,
+        )
+        email.content_subtype = "html"
+        for ruta in correo.adjuntos:
+            email.attach(*adjunto(os.path.join(settings.BASE_DIR, ruta)))
+        return email
+
+    @staticmethod
+    def tomar_lote(limite):
+        """Marca ENVIANDO hasta `limite` correos vencidos y los devuelve en orden de envío."""
+        ahora = timezone.now()
+        ids = list(
+            CorreoSaliente.objects.filter(estado=CorreoSaliente.PENDIENTE, proximo_intento_at__lte=ahora)
+            .order_by("proximo_intento_at", "id")
+            .values_list("id", flat=True)[:limite]
+        )
+        if not ids:
+            return []
+        lote = secrets.token_hex(16)
+        # Otro worker pudo tomar algunos entre la consulta y el UPDATE: quedan los que siguen pendientes.
+        CorreoSaliente.objects.filter(id__in=ids, estado=CorreoSaliente.PENDIENTE).update(
+            estado=CorreoSaliente.ENVIANDO, lote=lote, tomado_at=ahora
+        )
+        return list(CorreoSaliente.objects.filter(lote=lote).order_by("proximo_intento_at", "id"))
+
+    @staticmethod
+    def _registrar(correo, error=None):
+        """Deja el correo ENVIADO, o PENDIENTE para reintentar, o en ERROR."""
+        ahora = timezone.now()
+        correo.intentos += 1
+        if error is None:
+            correo.estado = CorreoSaliente.ENVIADO
+            correo.enviado_at = ahora
+            correo.ultimo_error = ""
+        else:
+            correo.ultimo_error = str(error)[:1000]
+            definitivo = isinstance(error, smtplib.SMTPRecipientsRefused)
+            if definitivo or correo.intentos >= settings.MAIL_MAX_ATTEMPTS:
+                correo.estado = CorreoSaliente.ERROR
+            else:
+                espera = min(settings.MAIL_RETRY_BASE_SECONDS * 2 ** (correo.intentos - 1), settings.MAIL_RETRY_MAX_SECONDS)
+                correo.estado = CorreoSaliente.PENDIENTE
+                correo.proximo_intento_at = ahora + timedelta(seconds=espera)
+            logger.warning(f"Error enviando correo {correo.id} ({correo.tipo}), intento {correo.intentos}: {error}")
+        correo.save(update_fields=["estado", "intentos", "enviado_at", "proximo_intento_at", "ultimo_error", "updated_at"])
+
+        constancia = AL_ENVIAR.get(correo.tipo)
+        if correo.estado == CorreoSaliente.ENVIADO and constancia and correo.referencia_id:
+            try:
+                constancia(correo)
+            except Exception:
+                logger.exception(f"Error registrando el envío del correo {correo.id}")
+
+    @staticmethod
+    def _enviar_grupo(cuenta, grupo, limitador, informar):
+        """
+        Envía `grupo` (correos de una misma cuenta) sobre sesiones del pool,
+        una mientras no falle, tomando una ficha del limitador antes de cada
+        envío. Llama a `informar(correo, error)` una vez por correo. No toca
+        la base: puede correr en un hilo.
+        """
+        sesion = None
+        for indice, correo in enumerate(grupo):
+            if sesion is not None and sesion.agotada:
+                POOL.descartar(sesion)
+                sesion = None
+            if sesion is None:
+                try:
+                    sesion = POOL.tomar(cuenta, CorreoSalienteService.conexion)
+                except Exception as e:
+                    # Sin conexión no tiene sentido probar con el resto del grupo.
+                    for pendiente in grupo[indice:]:
+                        informar(pendiente, e)
+                    return
+            if limitador is not None:
+                limitador.esperar()
+            try:
+                if not sesion.enviar(CorreoSalienteService.mensaje(correo, sesion.backend)):
+                    raise smtplib.SMTPException("El servidor no aceptó el mensaje.")
+            except Exception as e:
+                informar(correo, e)
+                # La sesión puede haber quedado cortada: el próximo correo usa otra.
+                POOL.descartar(sesion)
+                sesion = None
+            else:
+                informar(correo, None)
+        if sesion is not None:
+            POOL.devolver(cuenta, sesion)
+
+    @staticmethod
+    def enviar_lote(correos, limitador=None, concurrencia=1) -> int:
+        """
+        Envía los correos (ya tomados) al ritmo de `limitador` (LimitadorTasa,
+        None sin límite) con hasta `concurrencia` sesiones SMTP por cuenta en
+        paralelo. Los hilos solo hablan con el servidor; el registro de cada
+        resultado en la base lo hace el hilo que llama. Devuelve la cantidad enviada.
+        """
+        por_cuenta = {}
+        for correo in correos:
+            por_cuenta.setdefault(correo.cuenta, []).append(correo)
+        grupos = [
+            (cuenta, grupo[i::concurrencia])
+            for cuenta, grupo in por_cuenta.items()
+            for i in range(min(max(1, concurrencia), len(grupo)))
+        ]
+
+        enviados = 0
+
+        def registrar(correo, error):
+            nonlocal enviados
+            CorreoSalienteService._registrar(correo, error)
+            enviados += error is None
+
+        if len(grupos) == 1:
+            CorreoSalienteService._enviar_grupo(*grupos[0], limitador, registrar)
+            return enviados
+
+        resultados = queue.Queue()
+        with ThreadPoolExecutor(max_workers=len(grupos)) as ejecutor:
+            for cuenta, grupo in grupos:
+                ejecutor.submit(
+                    CorreoSalienteService._enviar_grupo, cuenta, grupo, limitador,
+                    lambda correo, error: resultados.put((correo, error)),
+                )
+            for _ in range(len(correos)):
+                registrar(*resultados.get())
+        return enviados
+
+    @staticmethod
+    def procesar_lote(limite, limitador=None, concurrencia=1):
+        """Toma y envía un lote. Devuelve (tomados, enviados)."""
+        correos = CorreoSalienteService.tomar_lote(limite)
+        if not correos:
+            return 0, 0
+        return len(correos), CorreoSalienteService.enviar_lote(correos, limitador, concurrencia)
+
+    @staticmethod
+    def resumen_cola() -> str:
+        """Correos pendientes y cuánto tarda el worker en vaciar la cola al ritmo configurado."""
+        pendientes = CorreoSaliente.objects.filter(estado__in=[CorreoSaliente.PENDIENTE, CorreoSaliente.ENVIANDO]).count()
+        rate = settings.MAIL_WORKER_RATE_PER_MINUTE
+        if not pendientes or rate <= 0:
+            return f"{pendientes} correos en la bandeja de salida"
+        return f"{pendientes} correos en la bandeja de salida (~{math.ceil(pendientes / rate)} min a {rate} por minuto)"
+
+    @staticmethod
+    def liberar_colgados() -> int:
+        """Devuelve a la cola los lotes tomados hace más de MAIL_SENDING_TIMEOUT_SECONDS (worker caído)."""
+        return CorreoSaliente.objects.filter(
+            estado=CorreoSaliente.ENVIANDO,
+            tomado_at__lt=timezone.now() - timedelta(seconds=settings.MAIL_SENDING_TIMEOUT_SECONDS),
+        ).update(estado=CorreoSaliente.PENDIENTE)
@@ -0,0 +1,98 @@
+# backend/core/services/cubo_inscripciones_service.py
+"""
+Servicio para mantener el cubo de inscripciones (CuboInscripcion).
+
+El cubo agrupa Inscripcion por (día de alta, programa, cohorte, bloque del
+módulo, estado, estudiante). Los endpoints de series (analytics/enrollments,
+tendencia anual del dashboard) filtran y agrupan por las columnas fecha, mes
+y anio, que están indexadas, en lugar de truncar created_at en cada consulta.
+
+Se recalcula por estudiante: las señales de Inscripcion y los .update()
+masivos llaman a programar_recalculo(); el comando
+`reconstruir_cubo_inscripciones` lo regenera desde cero.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractYear, TruncDate, TruncMonth
+
+from core.models import CuboInscripcion, Inscripcion
+from core.utils.cache_analytics import invalidar_analytics
+from core.utils.pendientes import acumular_hasta_commit
+
+class CuboInscripcionesService:
+    """
+    Cálculo y mantenimiento de CuboInscripcion.
+    """
+
+    @staticmethod
+    def _filas(inscripciones_qs):
+        """Una consulta agrupada: las funciones sobre created_at se aplican solo al construir."""
+        grupos = (
+            inscripciones_qs.annotate(
+                fecha_alta=TruncDate("created_at"),
+                mes_alta=TruncMonth("created_at"),
+                anio_alta=ExtractYear("created_at"),
+            )
+            .values(
+                "fecha_alta", "mes_alta", "anio_alta", "cohorte_id", "estado", "estudiante_id",
+                programa=F("cohorte__programa_id"),
+                bloque=F("modulo__bloque_id"),
+            )
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for g in grupos.iterator(chunk_size=2000):
+            mes = g["mes_alta"]
+            yield CuboInscripcion(
+                fecha=g["fecha_alta"],
+                mes=mes.date() if hasattr(mes, "date") else mes,
+                anio=g["anio_alta"],
+                programa_id=g["programa"],
+                cohorte_id=g["cohorte_id"],
+                bloque_id=g["bloque"],
+                estado=g["estado"],
+                estudiante_id=g["estudiante_id"],
+                inscripciones=g["n"],
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular_estudiantes(estudiante_ids):
+        """Regenera las filas del cubo de los estudiantes indicados."""
+        estudiante_ids = set(estudiante_ids)
+        if not estudiante_ids:
+            return
+        filas = list(CuboInscripcionesService._filas(Inscripcion.objects.filter(estudiante_id__in=estudiante_ids)))
+        CuboInscripcion.objects.filter(estudiante_id__in=estudiante_ids).delete()
+        CuboInscripcion.objects.bulk_create(filas)
+        invalidar_analytics("Inscripcion")
+
+    @staticmethod
+    def programar_recalculo(estudiante_ids):
+        """
+        Acumula estudiantes y los recalcula juntos al confirmar la transacción
+        (una importación de 500 inscripciones recalcula una vez). Usar después
+        de cualquier .update() masivo sobre Inscripcion, que no dispara señales.
+        """
+        acumular_hasta_commit("cubo_inscripciones", estudiante_ids, CuboInscripcionesService.recalcular_estudiantes)
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(batch_size=1000):
+        """
+        Regenera el cubo completo. Devuelve la cantidad de filas generadas.
+        """
+        CuboInscripcion.objects.all().delete()
+        total = 0
+        lote = []
+        for fila in CuboInscripcionesService._filas(Inscripcion.objects.all()):
+            lote.append(fila)
+            if len(lote) >= batch_size:
+                CuboInscripcion.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+        CuboInscripcion.objects.bulk_create(lote)
+        total += len(lote)
+        invalidar_analytics("Inscripcion")
+        return total
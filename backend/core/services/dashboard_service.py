@@ -0,0 +1,255 @@
+# backend/core/services/dashboard_service.py
+"""
+Motor del dashboard principal (/dashboard-stats).
+
+Todas las secciones se calculan con un número fijo de consultas agrupadas,
+independiente del volumen de datos:
+
+1. Padrón activo (COUNT).
+2. Activos por programa/cohorte: una fila por (estudiante, programa), deduplicada en SQL.
+3. Pares (estudiante, programa) egresados: UNION de ProgresoPrograma y estado EGRESADO.
+4. Egresados por programa/cohorte (misma deduplicación que 2).
+5. Asistencia (agregado único sobre el resumen diario AsistenciaDiaria).
+6. Notas agrupadas por (programa, bloque): de ahí salen la tasa global y ambos desgloses.
+7. Tendencia anual de inscripciones (CuboInscripcion, columna anio indexada).
+8. Estudiantes por programa.
+"""
+
+from django.db.models import Count, F, Q, Subquery, Sum, Window
+from django.db.models.functions import FirstValue
+
+from core.models import AsistenciaDiaria, Cohorte, CuboInscripcion, Estudiante, Inscripcion, Nota, Programa, ProgresoPrograma
+
+
+class DashboardService:
+    """
+    Cálculo de las métricas del dashboard a partir de los filtros de la vista.
+    """
+
+    @staticmethod
+    def _por_ultima_cohorte(inscripciones_qs):
+        """
+        Una fila por (estudiante, programa) con el nombre de su cohorte más
+        reciente. La deduplicación la resuelve la base (ventana + DISTINCT).
+        """
+        return (
+            inscripciones_qs.annotate(
+                ultima_cohorte=Window(
+                    FirstValue("cohorte__nombre"),
+                    partition_by=[F("estudiante_id"), F("cohorte__programa_id")],
+                    order_by=[F("cohorte__fecha_inicio").desc(), F("cohorte_id").desc()],
+                )
+            )
+            .values("estudiante_id", "cohorte__programa_id", "cohorte__programa__nombre", "ultima_cohorte")
+            .order_by()
+            .distinct()
+        )
+
+    @staticmethod
+    def _filtrar_cubo(programa_id, bloque_id, cohorte_id, fecha_desde, fecha_hasta):
+        """Mismos filtros que las inscripciones del dashboard, sobre CuboInscripcion."""
+        qs = CuboInscripcion.objects.all()
+        if programa_id:
+            qs = qs.filter(programa_id=programa_id)
+        if cohorte_id:
+            qs = qs.filter(cohorte_id=cohorte_id)
+        if bloque_id:
+            qs = qs.filter(bloque_id=bloque_id)
+        if fecha_desde:
+            qs = qs.filter(cohorte__fecha_inicio__gte=fecha_desde)
+        if fecha_hasta:
+            qs = qs.filter(cohorte__fecha_inicio__lte=fecha_hasta)
+        return qs
+
+    @staticmethod
+    def _desglose(filas):
+        """Estructura navegable { name, count, cohorts: [{name, count}] } por programa."""
+        detalle = {}
+        for fila in filas:
+            p_name = fila["cohorte__programa__nombre"]
+            c_name = fila["ultima_cohorte"]
+            prog = detalle.setdefault(p_name, {"name": p_name, "count": 0, "cohorts": {}})
+            prog["count"] += 1
+            prog["cohorts"][c_name] = prog["cohorts"].get(c_name, 0) + 1
+
+        breakdown = []
+        for p_val in detalle.values():
+            p_val["cohorts"] = sorted(
+                [{"name": k, "count": v} for k, v in p_val["cohorts"].items()],
+                key=lambda x: x["count"],
+                reverse=True,
+            )
+            breakdown.append(p_val)
+        return sorted(breakdown, key=lambda x: x["count"], reverse=True)
+
+    @staticmethod
+    def _tasas(grupos, clave):
+        """Agrupa filas (total, aprobados) por `clave` y devuelve [{name, rate, total}] ordenado por tasa."""
+        acumulado = {}
+        for g in grupos:
+            total, aprobados = acumulado.get(g[clave], (0, 0))
+            acumulado[g[clave]] = (total + g["total"], aprobados + g["aprobados"])
+        tasas = [
+            {"name": name, "rate": round(aprobados / total * 100, 1) if total else 0.0, "total": total}
+            for name, (total, aprobados) in acumulado.items()
+        ]
+        return sorted(tasas, key=lambda x: x["rate"], reverse=True)
+
+    @staticmethod
+    def estadisticas(programa_id=None, bloque_id=None, cohorte_id=None, fecha_desde=None, fecha_hasta=None):
+        hay_filtro_academico = bool(programa_id or cohorte_id or bloque_id)
+
+        inscripciones_qs = Inscripcion.objects.all()
+        if programa_id:
+            inscripciones_qs = inscripciones_qs.filter(cohorte__programa_id=programa_id)
+        if cohorte_id:
+            inscripciones_qs = inscripciones_qs.filter(cohorte_id=cohorte_id)
+        if bloque_id:
+            inscripciones_qs = inscripciones_qs.filter(modulo__bloque_id=bloque_id)
+        if fecha_desde:
+            inscripciones_qs = inscripciones_qs.filter(cohorte__fecha_inicio__gte=fecha_desde)
+        if fecha_hasta:
+            inscripciones_qs = inscripciones_qs.filter(cohorte__fecha_inicio__lte=fecha_hasta)
+
+        # Subconsulta NO correlacionada: se reutiliza como IN (...) en cada sección.
+        student_ids_qs = inscripciones_qs.values("estudiante_id")
+
+        # Programa de la cohorte resuelto dentro de la misma consulta (sin ida y vuelta extra).
+        programa_de_cohorte = Subquery(Cohorte.objects.filter(id=cohorte_id).values("programa_id")[:1])
+
+        # 1. Padrón activo: sin filtros, todos los estudiantes no dados de baja.
+        scoped_estudiantes = Estudiante.objects.all()
+        if hay_filtro_academico or fecha_desde or fecha_hasta:
+            scoped_estudiantes = scoped_estudiantes.filter(id__in=student_ids_qs)
+        active_students_count = scoped_estudiantes.exclude(estatus="Baja").count()
+
+        # 2. Activos por programa y cohorte más reciente.
+        active_breakdown = DashboardService._desglose(
+            DashboardService._por_ultima_cohorte(inscripciones_qs.exclude(estudiante__estatus="Baja"))
+        )
+
+        # 3. Egresados: automáticos (ProgresoPrograma) + estado EGRESADO explícito.
+        auto_qs = ProgresoPrograma.objects.filter(completo=True, estudiante_id__in=student_ids_qs)
+        if programa_id:
+            auto_qs = auto_qs.filter(programa_id=programa_id)
+        explicit_qs = inscripciones_qs.filter(estado=Inscripcion.EGRESADO).values_list(
+            "estudiante_id", "cohorte__programa_id"
+        ).order_by()
+        graduated_program_pairs = set(
+            auto_qs.values_list("estudiante_id", "programa_id").order_by().union(explicit_qs)
+        )
+        all_graduated_ids = {pair[0] for pair in graduated_program_pairs}
+
+        # 4. Egresados por programa, atribuidos a su cohorte más reciente en ese programa.
+        grad_filas = DashboardService._por_ultima_cohorte(
+            Inscripcion.objects.filter(
+                estudiante_id__in=all_graduated_ids,
+                cohorte__programa_id__in={pair[1] for pair in graduated_program_pairs},
+            )
+        )
+        graduated_breakdown = DashboardService._desglose(
+            f for f in grad_filas if (f["estudiante_id"], f["cohorte__programa_id"]) in graduated_program_pairs
+        )
+
+        # 5. Asistencia, desde el resumen diario. La cohorte de cada fila es la
+        # del estudiante en el programa del módulo, así que "estudiantes del
+        # filtro" se traduce en filtrar por cohorte.
+        attendance_qs = AsistenciaDiaria.objects.all()
+        if bloque_id:
+            attendance_qs = attendance_qs.filter(modulo__bloque_id=bloque_id)
+        elif programa_id:
+            attendance_qs = attendance_qs.filter(modulo__bloque__programa_id=programa_id)
+        if hay_filtro_academico:
+            attendance_qs = attendance_qs.filter(cohorte__isnull=False)
+            if programa_id:
+                attendance_qs = attendance_qs.filter(cohorte__programa_id=programa_id)
+            if cohorte_id:
+                attendance_qs = attendance_qs.filter(cohorte_id=cohorte_id)
+            if fecha_desde:
+                attendance_qs = attendance_qs.filter(cohorte__fecha_inicio__gte=fecha_desde)
+            if fecha_hasta:
+                attendance_qs = attendance_qs.filter(cohorte__fecha_inicio__lte=fecha_hasta)
+        if fecha_desde:
+            attendance_qs = attendance_qs.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            attendance_qs = attendance_qs.filter(fecha__lte=fecha_hasta)
+
+        attendance_stats = attendance_qs.aggregate(
+            total_asistencias=Sum("total"),
+            presentes=Sum("presentes"),
+        )
+        total_asistencias = attendance_stats["total_asistencias"] or 0
+        presentes = attendance_stats["presentes"] or 0
+        attendance_rate = (presentes / total_asistencias * 100) if total_asistencias else 0
+
+        # 6. Notas: una sola consulta agrupada por (programa, bloque).
+        notas_qs = Nota.objects.all()
+        if bloque_id:
+            notas_qs = notas_qs.filter(Q(examen__bloque_id=bloque_id) | Q(examen__modulo__bloque_id=bloque_id))
+        elif programa_id:
+            notas_qs = notas_qs.filter(
+                Q(examen__bloque__programa_id=programa_id) | Q(examen__modulo__bloque__programa_id=programa_id)
+            )
+        elif cohorte_id:
+            notas_qs = notas_qs.filter(
+                Q(examen__bloque__programa_id=programa_de_cohorte)
+                | Q(examen__modulo__bloque__programa_id=programa_de_cohorte)
+            )
+        if hay_filtro_academico:
+            notas_qs = notas_qs.filter(estudiante_id__in=student_ids_qs)
+        if fecha_desde:
+            notas_qs = notas_qs.filter(examen__fecha__gte=fecha_desde)
+        if fecha_hasta:
+            notas_qs = notas_qs.filter(examen__fecha__lte=fecha_hasta)
+
+        notas_grupos = list(
+            notas_qs.values(programa=F("examen__bloque__programa__nombre"), bloque=F("examen__bloque__nombre"))
+            .annotate(total=Count("id"), aprobados=Count("id", filter=Q(aprobado=True)))
+            .order_by()
+        )
+        total_notas = sum(g["total"] for g in notas_grupos)
+        aprobados = sum(g["aprobados"] for g in notas_grupos)
+        pass_rate = (aprobados / total_notas * 100) if total_notas else 0
+
+        # 7. Tendencia anual.
+        yearly_data = (
+            DashboardService._filtrar_cubo(programa_id, bloque_id, cohorte_id, fecha_desde, fecha_hasta)
+            .values("anio")
+            .annotate(count=Count("estudiante_id", distinct=True))
+            .order_by("anio")
+        )
+        yearly_trend = [{"year": str(item["anio"]), "count": item["count"]} for item in yearly_data]
+
+        # 8. Estudiantes por programa.
+        program_data = (
+            Programa.objects.annotate(
+                student_count=Count(
+                    "cohortes__inscripciones__estudiante",
+                    filter=Q(cohortes__inscripciones__estudiante_id__in=student_ids_qs) if hay_filtro_academico else Q(),
+                    distinct=True,
+                )
+            )
+            .values("nombre", "student_count")
+            .order_by("nombre")
+        )
+        if programa_id:
+            program_data = program_data.filter(id=programa_id)
+        program_data = list(program_data)
+
+        return {
+            "active_students_count": active_students_count,
+            "graduated_students_count": len(all_graduated_ids),
+            "attendance_rate": round(attendance_rate, 2),
+            "pass_rate": round(pass_rate, 2),
+            "active_breakdown": active_breakdown,
+            "graduated_breakdown": graduated_breakdown,
+            "pass_breakdown": {
+                "by_program": DashboardService._tasas(notas_grupos, "programa"),
+                "by_block": DashboardService._tasas(notas_grupos, "bloque")[:15],
+            },
+            "yearly_trend": yearly_trend,
+            "programs_chart": {
+                "labels": [item["nombre"] for item in program_data],
+                "counts": [item["student_count"] for item in program_data],
+            },
+        }
@@ -1,13 +1,11 @@
 import os.path
 import logging
 from django.conf import settings
-from django.template.loader import render_to_string
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-
-from core.models import Estudiante, Inscripcion
+from core.models import CorreoSaliente, Estudiante, Inscripcion
+from core.services.correo_saliente_service import CorreoSalienteService
+from core.services.plantillas_correo import recurso
+from core.utils.gmail_cliente import ClienteGmail
 
 logger = logging.getLogger(__name__)
 
@@ -18,36 +16,23 @@ CREDENTIALS_PATH = os.path.join(settings.BASE_DIR, 'core', 'resources', 'gmail_c
 # Usamos el volumen persistente de media para que el token no se borre en deploys
 TOKEN_PATH = os.path.join(settings.BASE_DIR, 'media', 'tokens', 'gmail_token.json')
 
-def get_gmail_service():
-    os.makedirs(os.path.dirname(TOKEN_PATH), exist_ok=True)
-    creds = None
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-    
-    # Si no hay credenciales válidas disponibles, deje que el usuario inicie sesión.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # En un entorno de producción/servidor, esto fallará si no hay token.json
-            logger.error("No se encontró token.json válido para Gmail API. Se requiere autorización inicial.")
-            return None
-        # Guardar las credenciales para la próxima ejecución
-        with open(TOKEN_PATH, 'w') as token:
-            token.write(creds.to_json())
+# Cliente del proceso: credenciales en memoria, renovadas antes de vencer (core/utils/gmail_cliente.py).
+GMAIL = ClienteGmail(TOKEN_PATH, SCOPES)
 
-    return build('gmail', 'v1', credentials=creds)
+
+def get_gmail_service():
+    """Servicio de la API de Gmail, o None si no hay un token autorizado válido."""
+    service = GMAIL.servicio()
+    if service is None:
+        # En un entorno de producción/servidor, esto fallará si no hay token.json
+        logger.error("No se encontró token.json válido para Gmail API. Se requiere autorización inicial.")
+    return service
 
 def enviar_correo_bienvenida(estudiante_id: int):
     """
-    Envía el correo de bienvenida usando la API de Gmail (OAuth2).
+    Encola el correo de bienvenida al campus (lo envía run_mail_worker).
     """
     try:
-        service = get_gmail_service()
-        if not service:
-            logger.error("No se pudo obtener el servicio de Gmail. Abortando envío.")
-            return False
-
         estudiante = Estudiante.objects.get(id=estudiante_id)
         inscripciones = Inscripcion.objects.filter(
             estudiante=estudiante, 
@@ -114,31 +99,8 @@ def enviar_correo_bienvenida(estudiante_id: int):
             'tutorial_url': 'https://drive.google.com/file/d/1yeBuJ3bHig6-pLYmiqZ0UW1mx9r81Mpe/view'
         }
 
-        html_content = render_to_string('emails/bienvenida_campus.html', context)
-        
-        from django.core.mail import EmailMessage
-        from django.core.mail.backends.smtp import EmailBackend
-        
-        connection = EmailBackend(
-            host=settings.CFP_EMAIL_HOST,
-            port=settings.CFP_EMAIL_PORT,
-            username=settings.CFP_EMAIL_HOST_USER,
-            password=settings.CFP_EMAIL_HOST_PASSWORD,
-            use_tls=settings.CFP_EMAIL_USE_TLS,
-            use_ssl=settings.CFP_EMAIL_USE_SSL,
-        )
-
-        email = EmailMessage(
-            subject='¡Bienvenido/a! Ya puedes comenzar tu cursada virtual en el CFP',
-            body=html_content,
-            from_email=settings.CFP_FROM_EMAIL,
-            to=[estudiante.email],
-            connection=connection,
-        )
-        email.content_subtype = "html"
-        
-        email.send(fail_silently=False)
-        logger.info(f"Correo de bienvenida enviado a {estudiante.email} usando SMTP")
+        CorreoSalienteService.encolar_plantilla(CorreoSaliente.BIENVENIDA, [estudiante.email], context)
+        logger.info(f"Correo de bienvenida encolado para {estudiante.email}")
         return True
 
     except Exception as e:
@@ -147,7 +109,7 @@ def enviar_correo_bienvenida(estudiante_id: int):
 
 def enviar_correo_nivelacion(estudiante_id: int):
     """
-    Genera/actualiza el token de nivelación digital y envía el correo correspondiente al estudiante.
+    Genera/actualiza el token de nivelación digital y encola el correo correspondiente al estudiante.
     """
     try:
         from core.models import NivelacionDigital
@@ -161,130 +123,36 @@ def enviar_correo_nivelacion(estudiante_id: int):
             estudiante=estudiante,
             defaults={'token': token, 'completado': False}
         )
-        
-        service = get_gmail_service()
-        if not service:
-            logger.error("No se pudo obtener el servicio de Gmail. Abortando envío de nivelación.")
-            return False
 
         link = f"https://politecnico.ar/cfp/nivelacion.html?token={token}"
 
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; color: #333333; line-height: 1.6; margin: 0; padding: 0; background-color: #f4f4f5; }}
-                .container {{ max-width: 600px; margin: 0 auto; background-color: #ffffff; overflow: hidden; }}
-                .header {{ background-color: #0b1c3c; color: #ffffff; padding: 25px 20px; text-align: center; border-bottom: 5px solid #f26b21; }}
-                .header h1 {{ margin: 0; font-size: 24px; letter-spacing: 0.5px; }}
-                .header h2 {{ margin: 5px 0 0 0; font-size: 16px; font-weight: normal; color: #cbd5e1; }}
-                .content {{ padding: 30px 25px; }}
-                .btn-box {{ text-align: center; margin: 30px 0; }}
-                .btn {{ background-color: #f26b21; color: #ffffff !important; padding: 12px 30px; font-weight: bold; border-radius: 6px; text-decoration: none; display: inline-block; font-size: 16px; box-shadow: 0 4px 6px rgba(242, 107, 33, 0.2); }}
-                .btn:hover {{ background-color: #d95a16; }}
-                .contacto-box {{ background-color: #f1f5f9; padding: 25px; border-radius: 8px; font-size: 15px; margin-top: 20px; border: 1px solid #e2e8f0; }}
-                .contacto-item {{ margin-bottom: 12px; line-height: 1.5; }}
-                .contacto-item:last-child {{ margin-bottom: 0; }}
-                .footer {{ background-color: #0f172a; color: #94a3b8; text-align: center; padding: 20px; font-size: 12px; }}
-                a {{ color: #0284c7; text-decoration: none; font-weight: 600; }}
-                a:hover {{ text-decoration: underline; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Centro Politécnico Superior</h1>
-                    <h2>Formación Profesional - Malvinas Argentinas</h2>
-                </div>
-                <div class="content">
-                    <p style="font-size: 17px; margin-top: 0;">Hola <strong>{estudiante.nombre}</strong>,</p>
-                    <p>Para determinar cuál es el módulo de <strong>Habilidades Digitales</strong> más adecuado para vos, necesitamos que realices un breve autodiagnóstico de nivelación digital.</p>
-                    <p>Este diagnóstico consta de 10 preguntas sencillas sobre conceptos generales de informática y navegación web. No te preocupes, no es un examen eliminatorio, sino una herramienta para ubicarte en el nivel que mejor te acompañe en tu aprendizaje.</p>
-                    
-                    <div class="btn-box">
-                        <a href="{link}" class="btn" target="_blank">Comenzar Autodiagnóstico</a>
-                    </div>
-
-                    <p style="font-size: 14px; color: #666;">Si el botón no funciona, podés copiar y pegar el siguiente enlace en tu navegador:<br><a href="{link}">{link}</a></p>
-
-                    <p style="font-size: 16px; margin-top: 35px;"><strong>Ante cualquier duda o consulta, recordá que podés comunicarte con nosotros:</strong></p>
-                    
-                    <div class="contacto-box">
-                        <div class="contacto-item">📍 <strong>Dirección:</strong> Monte Independencia 261, Barrio El Mirador (Margen Sur), Río Grande, Tierra del Fuego.</div>
-                        <div class="contacto-item">📱 <strong>WhatsApp:</strong> <a href="https://wa.me/5492964355801">+54 9 2964 35-5801</a></div>
-                        <div class="contacto-item">📞 <strong>Teléfono:</strong> 02964 69-7979</div>
-                        <div class="contacto-item">✉️ <strong>Email:</strong> <a href="mailto:estudiantes.cfp@malvinastdf.edu.ar">estudiantes.cfp@malvinastdf.edu.ar</a></div>
-                        <div class="contacto-item">🌐 <strong>Web:</strong> <a href="https://politecnico.ar">politecnico.ar</a></div>
-                    </div>
-                    
-                    <p style="margin-top: 35px; text-align: center; font-size: 18px; color: #f26b21;"><strong>¡Te deseamos muchos éxitos!</strong></p>
-                </div>
-                <div class="footer">
-                    Este es un mensaje automático del sistema de gestión del CFP.<br>Por favor, no respondas a este correo.
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-
-        from django.core.mail import EmailMessage
-        from django.core.mail.backends.smtp import EmailBackend
-        
-        connection = EmailBackend(
-            host=settings.CFP_EMAIL_HOST,
-            port=settings.CFP_EMAIL_PORT,
-            username=settings.CFP_EMAIL_HOST_USER,
-            password=settings.CFP_EMAIL_HOST_PASSWORD,
-            use_tls=settings.CFP_EMAIL_USE_TLS,
-            use_ssl=settings.CFP_EMAIL_USE_SSL,
-        )
-
-        email = EmailMessage(
-            subject='Autodiagnóstico de Nivelación - Habilidades Digitales - CFP',
-            body=html_content,
-            from_email=settings.CFP_FROM_EMAIL,
-            to=[estudiante.email],
-            connection=connection,
+        CorreoSalienteService.encolar_plantilla(
+            CorreoSaliente.NIVELACION, [estudiante.email], {'nombre': estudiante.nombre, 'link': link},
         )
-        email.content_subtype = "html"
-
-        email.send(fail_silently=False)
-        logger.info(f"Correo de nivelación enviado a {estudiante.email} usando SMTP")
+        logger.info(f"Correo de nivelación encolado para {estudiante.email}")
         return True
     except Exception as e:
         logger.error(f"Error enviando correo de nivelación: {str(e)}")
         return False
 
 
-def enviar_correo_bienvenida_terciario(preinscripcion) -> bool:
+def enviar_correo_bienvenida_terciario(preinscripcion, demora_segundos: int = 0) -> bool:
     """
-    Envía el correo de bienvenida del Terciario (Habilidades Digitales en Moodle).
+    Encola el correo de bienvenida del Terciario (Habilidades Digitales en Moodle).
+    La fecha de envío queda en preinscripcion.correo_bienvenida_at cuando sale.
     """
     try:
-        from django.core.mail import EmailMessage
-        from django.template.loader import render_to_string
-        from django.utils import timezone
-        
         nombre_completo = f"{preinscripcion.nombre} {preinscripcion.apellido}".strip()
-        html_content = render_to_string('emails/bienvenida_terciario_moodle.html', {
-            'nombre': nombre_completo
-        })
-        
-        email = EmailMessage(
-            subject='Acceso al Campus Virtual - Habilidades Digitales',
-            body=html_content,
-            from_email=settings.TERCIARIO_FROM_EMAIL,
-            to=[preinscripcion.email],
+        CorreoSalienteService.encolar_plantilla(
+            CorreoSaliente.BIENVENIDA_TERCIARIO,
+            [preinscripcion.email],
+            {'nombre': nombre_completo},
+            remitente=settings.TERCIARIO_FROM_EMAIL,
+            cuenta=CorreoSaliente.DEFAULT,
+            referencia_id=preinscripcion.id,
+            demora_segundos=demora_segundos,
         )
-        email.content_subtype = "html"
-        email.send(fail_silently=False)
-        
-        # Registrar fecha de envío
-        preinscripcion.correo_bienvenida_at = timezone.now()
-        preinscripcion.save(update_fields=['correo_bienvenida_at'])
-        
-        logger.info(f"Correo de bienvenida Terciario enviado exitosamente a {preinscripcion.email}")
+        logger.info(f"Correo de bienvenida Terciario encolado para {preinscripcion.email}")
         return True
     except Exception as e:
         logger.error(f"Error enviando correo de bienvenida Terciario a {preinscripcion.email}: {str(e)}")
@@ -293,37 +161,14 @@ def enviar_correo_bienvenida_terciario(preinscripcion) -> bool:
 
 def enviar_correo_confirmacion_videojuegos(estudiante_id: int) -> bool:
     """
-    Envía el correo de confirmación de preinscripción de Videojuegos usando SMTP.
+    Encola el correo de confirmación de preinscripción de Videojuegos.
     """
     try:
-        from django.core.mail import EmailMessage
-        from django.core.mail.backends.smtp import EmailBackend
-        
         estudiante = Estudiante.objects.get(id=estudiante_id)
-        html_content = render_to_string('emails/confirmacion_videojuegos.html', {
-            'nombre': estudiante.nombre
-        })
-        
-        connection = EmailBackend(
-            host=settings.CFP_EMAIL_HOST,
-            port=settings.CFP_EMAIL_PORT,
-            username=settings.CFP_EMAIL_HOST_USER,
-            password=settings.CFP_EMAIL_HOST_PASSWORD,
-            use_tls=settings.CFP_EMAIL_USE_TLS,
-            use_ssl=settings.CFP_EMAIL_USE_SSL,
-        )
-        
-        email = EmailMessage(
-            subject='Confirmación de Preinscripción - Desarrollo de Videojuegos',
-            body=html_content,
-            from_email=settings.CFP_FROM_EMAIL,
-            to=[estudiante.email],
-            connection=connection,
+        CorreoSalienteService.encolar_plantilla(
+            CorreoSaliente.CONFIRMACION_VIDEOJUEGOS, [estudiante.email], {'nombre': estudiante.nombre},
         )
-        email.content_subtype = "html"
-        email.send(fail_silently=False)
-
-        logger.info(f"Correo de confirmación de Videojuegos enviado exitosamente a {estudiante.email}")
+        logger.info(f"Correo de confirmación de Videojuegos encolado para {estudiante.email}")
         return True
     except Exception as e:
         logger.error(f"Error enviando correo de confirmación de Videojuegos a estudiante {estudiante_id}: {str(e)}")
@@ -332,12 +177,9 @@ def enviar_correo_confirmacion_videojuegos(estudiante_id: int) -> bool:
 
 def enviar_correo_aceptacion_videojuegos(estudiante_id: int) -> bool:
     """
-    Envía el correo de aceptación/aprobación de preinscripción de Videojuegos.
+    Encola el correo de aceptación/aprobación de preinscripción de Videojuegos.
     """
     try:
-        from django.core.mail import EmailMessage
-        from django.core.mail.backends.smtp import EmailBackend
-
         estudiante = Estudiante.objects.get(id=estudiante_id)
 
         clave_arte = None
@@ -350,41 +192,19 @@ def enviar_correo_aceptacion_videojuegos(estudiante_id: int) -> bool:
             elif "programaci" in b or "entornos" in b:
                 clave_prog = "ProgV#$2026"
 
-        html_content = render_to_string('emails/aceptacion_videojuegos.html', {
-            'nombre': estudiante.nombre,
-            'clave_transversal': 'Diñ.Vjg.&',
-            'clave_arte': clave_arte,
-            'clave_prog': clave_prog,
-            'curso_vj_url': 'https://politecnico.ar/campus/course/index.php?categoryid=31',
-        })
-
-        connection = EmailBackend(
-            host=settings.CFP_EMAIL_HOST,
-            port=settings.CFP_EMAIL_PORT,
-            username=settings.CFP_EMAIL_HOST_USER,
-            password=settings.CFP_EMAIL_HOST_PASSWORD,
-            use_tls=settings.CFP_EMAIL_USE_TLS,
-            use_ssl=settings.CFP_EMAIL_USE_SSL,
+        CorreoSalienteService.encolar_plantilla(
+            CorreoSaliente.ACEPTACION_VIDEOJUEGOS,
+            [estudiante.email],
+            {
+                'nombre': estudiante.nombre,
+                'clave_transversal': 'Diñ.Vjg.&',
+                'clave_arte': clave_arte,
+                'clave_prog': clave_prog,
+                'curso_vj_url': 'https://politecnico.ar/campus/course/index.php?categoryid=31',
+            },
+            adjuntos=[recurso("Normas de Convivencia Digital.pdf"), recurso("VDJ PARA CORREO act.pdf")],
         )
-
-        email = EmailMessage(
-            subject='¡Tu preinscripción fue aprobada! - Desarrollo de Videojuegos',
-            body=html_content,
-            from_email=settings.CFP_FROM_EMAIL,
-            to=[estudiante.email],
-            connection=connection,
-        )
-        email.content_subtype = "html"
-
-        resources_dir = os.path.join(settings.BASE_DIR, "core", "resources", "emails")
-        for pdf_name in ["Normas de Convivencia Digital.pdf", "VDJ PARA CORREO act.pdf"]:
-            pdf_path = os.path.join(resources_dir, pdf_name)
-            if os.path.exists(pdf_path):
-                email.attach_file(pdf_path)
-
-        email.send(fail_silently=False)
-
-        logger.info(f"Correo de aceptación de Videojuegos enviado exitosamente a {estudiante.email}")
+        logger.info(f"Correo de aceptación de Videojuegos encolado para {estudiante.email}")
         return True
     except Exception as e:
         logger.error(f"Error enviando correo de aceptación de Videojuegos a estudiante {estudiante_id}: {str(e)}")
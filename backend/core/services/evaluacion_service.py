@@ -13,6 +13,8 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 from core.models import Nota, Examen, Bloque, Modulo, Cohorte, Inscripcion
+from core.services.cubo_inscripciones_service import CuboInscripcionesService
+from core.utils.cache_analytics import invalidar_analytics
 
 
 class EvaluacionService:
@@ -184,6 +186,7 @@ class EvaluacionService:
                 examen=examen_sinc,
                 es_nota_definitiva=True
             ).exclude(id=nota.id).update(es_nota_definitiva=False)
+            invalidar_analytics("Nota")
             
             # --- LÓGICA DE APROBACIÓN DE BLOQUE Y EGRESO ---
             # Marcar inscripciones activas (CURSANDO o PREINSCRIPTO) de los modulos de este bloque a APROBADO
@@ -193,6 +196,7 @@ class EvaluacionService:
             ).exclude(
                 estado__in=[Inscripcion.EGRESADO, Inscripcion.INACTIVO, Inscripcion.LIBRE, Inscripcion.PAUSADO, Inscripcion.DESAPROBADO]
             ).update(estado=Inscripcion.APROBADO)
+            CuboInscripcionesService.programar_recalculo([estudiante.id])
             
             # Chequear si egresó de todo el programa
             programa = examen_sinc.bloque.programa
@@ -214,6 +218,7 @@ class EvaluacionService:
                     ).exclude(
                         estado__in=[Inscripcion.INACTIVO, Inscripcion.LIBRE]
                     ).update(estado=Inscripcion.EGRESADO)
+                    CuboInscripcionesService.programar_recalculo([estudiante.id])
         
         return nota
     
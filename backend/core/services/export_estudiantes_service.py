@@ -0,0 +1,139 @@
+# backend/core/services/export_estudiantes_service.py
+"""
+Filtros y filas de la exportación de estudiantes. Los usa el endpoint
+`/estudiantes/export/` (descarga directa) y los trabajos de exportación en
+segundo plano (ExportacionesService).
+"""
+
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Estudiante, Inscripcion, Nota
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+from core.utils.paginacion import paginas_keyset
+from core.utils.trayectos import primera_fecha
+
+# Estudiantes por lote al exportar (cada lote agrupa sus módulos en dos consultas).
+EXPORT_CHUNK_SIZE = 500
+
+# Orden de la exportación; el id desempata y hace único el keyset.
+ORDEN_EXPORT = ("apellido", "nombre", "id")
+
+# Columnas de Estudiante que usa la exportación (se leen con values(), sin instanciar modelos).
+CAMPOS_EXPORT = (
+    "id", "apellido", "nombre", "dni", "sexo", "email", "telefono", "ciudad", "estatus",
+    "fecha_nacimiento", "created_at", "fecha_primera_inscripcion",
+)
+
+ETIQUETAS = {
+    "apellido": "Apellido",
+    "nombre": "Nombre",
+    "dni": "DNI",
+    "sexo": "Sexo",
+    "email": "Email",
+    "telefono": "Teléfono",
+    "ciudad": "Ciudad",
+    "estatus": "Estatus",
+    "fecha_nacimiento": "Fecha Nac.",
+    "fecha_inscripcion": "Fecha Inscripción",
+    "materias_aprobadas": "Módulos Aprobados",
+    "materias_cursando": "Módulos Cursando",
+    "materias_pendientes": "Módulos Pendientes",
+}
+
+
+def _modulos_por_estudiante(filas):
+    """{estudiante_id: {"Programa - Módulo"}} a partir de filas (estudiante_id, programa, módulo)."""
+    modulos = {}
+    for est_id, prog_nom, modulo_nom in filas:
+        modulos.setdefault(est_id, set()).add(f"{prog_nom} - {modulo_nom}" if prog_nom else modulo_nom)
+    return modulos
+
+
+class ExportEstudiantesService:
+    """
+    Queryset filtrado y filas de la exportación de estudiantes.
+    """
+
+    @staticmethod
+    def filtrar(parametros: dict):
+        """
+        Estudiantes activos que cumplen los filtros de ExportIn (misma lógica
+        que el listado). `parametros` es el payload como dict.
+        """
+        p = parametros
+        qs = Estudiante.objects.filter(is_active=True)
+        if p.get("dni"):
+            qs = qs.filter(dni__iexact=p["dni"])
+        if p.get("estatus"):
+            qs = qs.filter(estatus=p["estatus"])
+        if p.get("anio"):
+            qs = qs.filter(created_at__year=p["anio"])
+        if p.get("search"):
+            qs = BusquedaEstudiantesService.filtrar(qs, p["search"])
+
+        if p.get("programa_id"):
+            qs = qs.filter(inscripciones__cohorte__programa_id=p["programa_id"]).distinct()
+        if p.get("cohorte_id"):
+            qs = qs.filter(inscripciones__cohorte_id=p["cohorte_id"]).distinct()
+        if p.get("bloque_id"):
+            qs = qs.filter(
+                Q(inscripciones__modulo__bloque_id=p["bloque_id"]) | Q(inscripciones__cohorte__bloque_id=p["bloque_id"])
+            ).distinct()
+        if p.get("modulo_id"):
+            qs = qs.filter(inscripciones__modulo_id=p["modulo_id"]).distinct()
+
+        if p.get("rango_edad"):
+            today = timezone.localdate()
+            date_18 = today.replace(year=today.year - 18)
+            if p["rango_edad"].lower() == "menores":
+                qs = qs.filter(fecha_nacimiento__gt=date_18)
+            elif p["rango_edad"].lower() == "mayores":
+                qs = qs.filter(fecha_nacimiento__lte=date_18)
+        return qs
+
+    @staticmethod
+    def filas(qs):
+        """
+        Filas de la exportación, por páginas de keyset de EXPORT_CHUNK_SIZE
+        estudiantes (qs.iterator() en MySQL traería todo el resultado de una).
+        Por página se hacen dos consultas agrupadas (SELECT DISTINCT estudiante,
+        programa, módulo): módulos aprobados desde Nota y cursando desde
+        Inscripcion. Nunca se cargan las notas ni las inscripciones como objetos.
+        """
+        for lote in paginas_keyset(qs.values(*CAMPOS_EXPORT), ORDEN_EXPORT, EXPORT_CHUNK_SIZE):
+            ids = [est["id"] for est in lote]
+            aprobadas = _modulos_por_estudiante(
+                Nota.objects.filter(estudiante_id__in=ids, aprobado=True, examen__modulo__isnull=False)
+                .order_by()
+                .values_list("estudiante_id", "examen__modulo__bloque__programa__nombre", "examen__modulo__nombre")
+                .distinct()
+            )
+            cursando = _modulos_por_estudiante(
+                Inscripcion.objects.filter(estudiante_id__in=ids, estado=Inscripcion.CURSANDO, modulo__isnull=False)
+                .order_by()
+                .values_list("estudiante_id", "modulo__bloque__programa__nombre", "modulo__nombre")
+                .distinct()
+            )
+            for est in lote:
+                aprobadas_set = aprobadas.get(est["id"], set())
+                cursando_set = cursando.get(est["id"], set())
+                # Fecha de inscripción: la más antigua de sus inscripciones o created_at
+                fecha_insc = primera_fecha(est["created_at"], est["fecha_primera_inscripcion"]).date().isoformat()
+                yield {
+                    "id": est["id"],
+                    "apellido": est["apellido"],
+                    "nombre": est["nombre"],
+                    "dni": est["dni"],
+                    "sexo": est["sexo"] or "",
+                    "email": est["email"],
+                    "telefono": est["telefono"],
+                    "ciudad": est["ciudad"],
+                    "estatus": est["estatus"],
+                    "fecha_nacimiento": est["fecha_nacimiento"].isoformat() if est["fecha_nacimiento"] else "",
+                    "fecha_inscripcion": fecha_insc,
+                    "materias_aprobadas": ", ".join(sorted(aprobadas_set)),
+                    "materias_cursando": ", ".join(sorted(cursando_set)),
+                    # Materias pendientes: módulos cursando que no están aprobados
+                    "materias_pendientes": ", ".join(sorted(cursando_set - aprobadas_set)),
+                }
@@ -1,76 +1,105 @@
+import tempfile
 from io import BytesIO
-import pandas as pd
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from core.utils.informe_pdf import escribir_informe
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 
 class ExportService:
     @staticmethod
-    def generate_excel(data, columns, column_labels):
+    def _valor_excel(valor):
+        if valor is None:
+            return ""
+        if isinstance(valor, list):
+            return ", ".join(str(v) for v in valor)
+        return valor
+
+    @staticmethod
+    def write_excel(data, columns, column_labels, destino, sheet_name="Estudiantes"):
         """
-        Genera un archivo Excel a partir de una lista de diccionarios.
-        data: List[dict]
+        Escribe el Excel en `destino` (archivo binario) con openpyxl en modo
+        write-only: cada fila va al disco al agregarse, así la memoria no
+        depende de la cantidad de filas.
+        data: iterable de diccionarios (puede ser un generador)
         columns: List[str] - Claves en el diccionario
         column_labels: dict - Mapeo de clave a etiqueta legible
         """
-        df = pd.DataFrame(data)
-        if not df.empty:
-            # Filtrar solo columnas solicitadas y renombrar
-            df = df[columns]
-            df.columns = [column_labels.get(c, c) for c in columns]
-        
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_name)
+        encabezado = []
+        for c in columns:
+            celda = WriteOnlyCell(ws, value=column_labels.get(c, c))
+            celda.font = Font(bold=True)
+            encabezado.append(celda)
+        ws.append(encabezado)
+        for row in data:
+            ws.append([ExportService._valor_excel(row.get(c)) for c in columns])
+        wb.save(destino)
+
+    @staticmethod
+    def generate_excel(data, columns, column_labels):
+        """
+        Genera un archivo Excel y devuelve sus bytes (ver write_excel). Para
+        exportaciones grandes usar excel_response, que no arma el archivo en memoria.
+        """
         output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Estudiantes')
-        
+        ExportService.write_excel(data, columns, column_labels, output)
         return output.getvalue()
 
     @staticmethod
-    def generate_pdf(data, columns, column_labels, title="Reporte de Estudiantes"):
+    def excel_response(data, columns, column_labels, filename):
         """
-        Genera un archivo PDF.
+        Respuesta de descarga que escribe el Excel en un archivo temporal y lo
+        envía en bloques (FileResponse lo cierra y el sistema lo borra al terminar).
         """
-        output = BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=landscape(letter))
-        elements = []
-        
-        styles = getSampleStyleSheet()
-        elements.append(Paragraph(title, styles['Title']))
-        elements.append(Paragraph("<br/><br/>", styles['Normal']))
+        archivo = tempfile.TemporaryFile(suffix=".xlsx")
+        try:
+            ExportService.write_excel(data, columns, column_labels, archivo)
+        except Exception:
+            archivo.close()
+            raise
+        archivo.seek(0)
+        return FileResponse(archivo, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
 
-        # Preparar datos para la tabla
-        header = [column_labels.get(c, c) for c in columns]
-        table_data = [header]
-        
-        for row in data:
-            table_row = []
-            for col in columns:
-                val = row.get(col, "")
-                if val is None: val = ""
-                # Si es una lista, la unimos con comas
-                if isinstance(val, list):
-                    val = ", ".join([str(v) for v in val])
-                table_row.append(str(val))
-            table_data.append(table_row)
+    @staticmethod
+    def _texto_pdf(valor):
+        return str(ExportService._valor_excel(valor))
+
+    @staticmethod
+    def write_pdf(data, columns, column_labels, destino, title="Reporte de Estudiantes"):
+        """
+        Escribe el PDF en `destino` (archivo binario) con el motor de
+        core/utils/informe_pdf.py: tablas por bloques que se maquetan a medida
+        que llegan las filas, así tiempo y memoria crecen en forma lineal.
+        data: iterable de diccionarios (puede ser un generador)
+        """
+        filas = ([ExportService._texto_pdf(row.get(c)) for c in columns] for row in data)
+        escribir_informe(filas, [column_labels.get(c, c) for c in columns], destino, title)
 
-        # Crear tabla
-        # Ajustar ancho de columnas proporcionalmente (aproximado)
-        t = Table(table_data, repeatRows=1)
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.indigo),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        elements.append(t)
-        doc.build(elements)
-        
+    @staticmethod
+    def generate_pdf(data, columns, column_labels, title="Reporte de Estudiantes"):
+        """
+        Genera un archivo PDF y devuelve sus bytes (ver write_pdf). Para
+        informes grandes usar pdf_response, que no arma el archivo en memoria.
+        """
+        output = BytesIO()
+        ExportService.write_pdf(data, columns, column_labels, output, title)
         return output.getvalue()
+
+    @staticmethod
+    def pdf_response(data, columns, column_labels, filename, title="Reporte de Estudiantes"):
+        """Como excel_response, para el PDF."""
+        archivo = tempfile.TemporaryFile(suffix=".pdf")
+        try:
+            ExportService.write_pdf(data, columns, column_labels, archivo, title)
+        except Exception:
+            archivo.close()
+            raise
+        archivo.seek(0)
+        return FileResponse(archivo, as_attachment=True, filename=filename, content_type="application/pdf")
@@ -0,0 +1,220 @@
+# backend/core/services/exportaciones_service.py
+"""
+Exportaciones en segundo plano (TrabajoExportacion).
+
+Las exportaciones grandes no entran en el timeout de Gunicorn: el POST a
+/api/v2/exportaciones crea el trabajo y responde enseguida, el comando
+`procesar_exportaciones` lo toma, escribe el archivo en media protegida
+(MEDIA_ROOT/exportaciones/) actualizando el progreso, y el cliente descarga
+el archivo cuando el trabajo queda LISTO.
+
+La cola es la propia tabla: un worker toma un trabajo con un UPDATE
+condicional sobre el estado, así dos workers nunca procesan el mismo.
+
+Un pedido con los mismos parámetros que un trabajo vigente reutiliza ese
+trabajo. La clave incluye los contadores de generación de las tablas de las
+que depende la exportación (core/utils/cache_analytics.py): si los datos
+cambiaron, el pedido genera un archivo nuevo.
+"""
+
+import hashlib
+import json
+import logging
+import secrets
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import TrabajoExportacion
+from core.services.export_estudiantes_service import ETIQUETAS, ExportEstudiantesService
+from core.services.export_service import ExportService
+from core.utils.cache_analytics import obtener_generaciones
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántas filas se guarda el progreso del trabajo.
+PROGRESO_CADA = 500
+
+
+def _exportacion_estudiantes(parametros):
+    qs = ExportEstudiantesService.filtrar(parametros)
+    formato = "pdf" if parametros.get("format", "excel").lower() == "pdf" else "excel"
+    return {
+        "total": qs.count(),
+        "filas": ExportEstudiantesService.filas(qs),
+        "columnas": parametros["columns"],
+        "etiquetas": ETIQUETAS,
+        "formato": formato,
+        "nombre": "estudiantes.pdf" if formato == "pdf" else "estudiantes.xlsx",
+    }
+
+
+def _exportacion_historico_cursos(parametros):
+    from core.api.historicos import historico_cursos_filas
+
+    tipo_dato = (parametros.get("tipo_dato") or "notas").lower()
+    headers, filas = historico_cursos_filas(
+        tipo_dato, parametros.get("programa_id"), parametros.get("bloque_id"), parametros.get("cohorte_id"),
+    )
+    return {
+        "total": None,
+        "filas": filas,
+        "columnas": headers,
+        "etiquetas": {},
+        "formato": "excel",
+        "nombre": f"historico_{tipo_dato}.xlsx",
+    }
+
+
+# tipo -> (tablas de las que dependen los datos, función que arma la exportación)
+EXPORTACIONES = {
+    TrabajoExportacion.ESTUDIANTES: (
+        ("Estudiante", "Inscripcion", "Nota", "Examen", "Cohorte", "Programa", "Bloque", "Modulo"),
+        _exportacion_estudiantes,
+    ),
+    TrabajoExportacion.HISTORICO_CURSOS: (
+        ("Estudiante", "Inscripcion", "Nota", "Asistencia", "Examen", "Cohorte", "Programa", "Bloque", "Modulo"),
+        _exportacion_historico_cursos,
+    ),
+}
+
+
+class ExportacionesService:
+    """
+    Alta, procesamiento y vencimiento de los trabajos de exportación.
+    """
+
+    @staticmethod
+    def clave(tipo, parametros) -> str:
+        """Hash de tipo, parámetros y generación de las tablas de las que depende."""
+        tablas, _ = EXPORTACIONES[tipo]
+        generaciones = obtener_generaciones(tablas)
+        base = json.dumps([tipo, parametros, generaciones], sort_keys=True, default=str)
+        return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def crear(tipo, parametros, usuario=None):
+        """
+        Devuelve (trabajo, creado). Si hay un trabajo vigente (pendiente, en
+        proceso o listo sin vencer) con la misma clave se reutiliza.
+        """
+        clave = ExportacionesService.clave(tipo, parametros)
+        vigente = (
+            TrabajoExportacion.objects.filter(clave=clave)
+            .exclude(estado=TrabajoExportacion.ERROR)
+            .filter(Q(expira_at__isnull=True) | Q(expira_at__gt=timezone.now()))
+            .order_by("-created_at")
+            .first()
+        )
+        if vigente:
+            return vigente, False
+        trabajo = TrabajoExportacion.objects.create(
+            tipo=tipo,
+            parametros=parametros,
+            clave=clave,
+            creado_por=usuario if usuario and usuario.is_authenticated else None,
+        )
+        return trabajo, True
+
+    @staticmethod
+    def tomar_siguiente():
+        """Marca EN_PROCESO el pendiente más antiguo y lo devuelve (None si no hay)."""
+        pendientes = (
+            TrabajoExportacion.objects.filter(estado=TrabajoExportacion.PENDIENTE)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)[:10]
+        )
+        for trabajo_id in pendientes:
+            # Otro worker pudo tomarlo entre la consulta y el UPDATE.
+            tomado = TrabajoExportacion.objects.filter(id=trabajo_id, estado=TrabajoExportacion.PENDIENTE).update(
+                estado=TrabajoExportacion.EN_PROCESO, iniciado_at=timezone.now()
+            )
+            if tomado:
+                return TrabajoExportacion.objects.get(id=trabajo_id)
+        return None
+
+    @staticmethod
+    def _con_progreso(trabajo, filas):
+        """Itera las filas guardando trabajo.procesadas cada PROGRESO_CADA filas."""
+        procesadas = 0
+        for fila in filas:
+            yield fila
+            procesadas += 1
+            if procesadas % PROGRESO_CADA == 0:
+                TrabajoExportacion.objects.filter(id=trabajo.id).update(procesadas=procesadas)
+        trabajo.procesadas = procesadas
+
+    @staticmethod
+    def procesar(trabajo):
+        """Genera el archivo del trabajo (ya tomado) y lo deja LISTO o en ERROR."""
+        _, armar = EXPORTACIONES[trabajo.tipo]
+        try:
+            datos = armar(trabajo.parametros)
+            trabajo.total = datos["total"]
+            TrabajoExportacion.objects.filter(id=trabajo.id).update(total=trabajo.total)
+
+            filas = ExportacionesService._con_progreso(trabajo, datos["filas"])
+            with tempfile.TemporaryFile() as destino:
+                if datos["formato"] == "pdf":
+                    ExportService.write_pdf(filas, datos["columnas"], datos["etiquetas"], destino)
+                else:
+                    ExportService.write_excel(filas, datos["columnas"], datos["etiquetas"], destino)
+                destino.seek(0)
+                extension = datos["nombre"].rsplit(".", 1)[-1]
+                # Nombre no adivinable: el archivo solo se sirve desde la descarga del trabajo.
+                trabajo.archivo.save(f"{trabajo.id}-{secrets.token_hex(8)}.{extension}", File(destino), save=False)
+            trabajo.nombre_archivo = datos["nombre"]
+            trabajo.estado = TrabajoExportacion.LISTO
+        except Exception as e:
+            logger.exception(f"Error procesando la exportación {trabajo.id}")
+            trabajo.estado = TrabajoExportacion.ERROR
+            trabajo.error = str(e)[:1000]
+        trabajo.finalizado_at = timezone.now()
+        trabajo.expira_at = trabajo.finalizado_at + timedelta(seconds=settings.EXPORT_JOB_TTL_SECONDS)
+        trabajo.save(update_fields=[
+            "archivo", "nombre_archivo", "estado", "error", "procesadas", "total",
+            "finalizado_at", "expira_at", "updated_at",
+        ])
+        return trabajo
+
+    @staticmethod
+    def limpiar_vencidos():
+        """
+        Borra los trabajos vencidos junto con su archivo y pasa a ERROR los que
+        llevan más de EXPORT_JOB_TIMEOUT_SECONDS en proceso (worker caído).
+        Devuelve la cantidad de trabajos borrados.
+        """
+        ahora = timezone.now()
+        TrabajoExportacion.objects.filter(
+            estado=TrabajoExportacion.EN_PROCESO,
+            iniciado_at__lt=ahora - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT_SECONDS),
+        ).update(
+            estado=TrabajoExportacion.ERROR,
+            error="Tiempo de procesamiento agotado.",
+            finalizado_at=ahora,
+            expira_at=ahora + timedelta(seconds=settings.EXPORT_JOB_TTL_SECONDS),
+        )
+
+        borrados = 0
+        for trabajo in TrabajoExportacion.objects.filter(expira_at__lte=ahora):
+            if trabajo.archivo:
+                trabajo.archivo.delete(save=False)
+            trabajo.delete()
+            borrados += 1
+        return borrados
+
+    @staticmethod
+    def procesar_pendientes(limite=None):
+        """Procesa pendientes hasta vaciar la cola (o `limite`). Devuelve la cantidad procesada."""
+        procesados = 0
+        while limite is None or procesados < limite:
+            trabajo = ExportacionesService.tomar_siguiente()
+            if trabajo is None:
+                break
+            ExportacionesService.procesar(trabajo)
+            procesados += 1
+        return procesados
@@ -0,0 +1,189 @@
+# backend/core/services/grafico_cursos_service.py
+"""
+Constructor del gráfico de cursos (/analytics/courses-graph).
+
+Seis consultas por programa, sin importar cuántos bloques, módulos o
+cohortes tenga:
+
+1. Cohortes con su plantilla de fechas (select_related).
+2. Semanas de esas plantillas (prefetch ordenado por `orden`).
+3. Conteos por cohorte: un único agregado sobre Inscripcion agrupado por cohorte.
+4. Bloques del programa.
+5. Módulos de esos bloques (prefetch ordenado por id).
+6. Finales de esos bloques (prefetch ordenado por fecha, id).
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, Prefetch, Q
+
+from core.models import Bloque, Cohorte, Examen, Inscripcion, Modulo, SemanaConfig
+
+TIPOS_FINAL = [Examen.FINAL_VIRTUAL, Examen.FINAL_SINC, Examen.EQUIVALENCIA]
+
+# Conteos por cohorte. Los de estatus/estado son estudiantes distintos (un
+# estudiante tiene una inscripción por módulo); inscriptos y activos cuentan
+# inscripciones.
+CONTEOS_COHORTE = {
+    "estudiantes_total": Count("estudiante_id", distinct=True),
+    "estatus_regular": Count("estudiante_id", filter=Q(estudiante__estatus="Regular"), distinct=True),
+    "estatus_libre": Count("estudiante_id", filter=Q(estudiante__estatus="Libre"), distinct=True),
+    "estatus_baja": Count("estudiante_id", filter=Q(estudiante__estatus="Baja"), distinct=True),
+    "estado_inscripto": Count("id", filter=Q(estado=Inscripcion.PREINSCRIPTO)),
+    "estado_activo": Count("id", filter=Q(estado=Inscripcion.CURSANDO)),
+    "estado_pausado": Count("estudiante_id", filter=Q(estado=Inscripcion.PAUSADO), distinct=True),
+    "estado_egresado": Count("estudiante_id", filter=Q(estado=Inscripcion.EGRESADO), distinct=True),
+}
+
+
+class GraficoCursosService:
+    """
+    Árbol bloque/módulo/final y cohortes de un programa para el gráfico de cursos.
+    """
+
+    @staticmethod
+    def _conteos_por_cohorte(cohortes_qs):
+        """{cohorte_id: {conteo: valor}} en una sola consulta agrupada."""
+        filas = (
+            Inscripcion.objects.filter(cohorte__in=cohortes_qs.values("id"))
+            .values("cohorte_id")
+            .annotate(**CONTEOS_COHORTE)
+            .order_by()
+        )
+        return {fila.pop("cohorte_id"): fila for fila in filas}
+
+    @staticmethod
+    def _cohortes(programa, bloque_id, anio):
+        cohortes_qs = (
+            Cohorte.objects.filter(programa=programa)
+            .select_related("bloque_fechas")
+            .prefetch_related(
+                Prefetch("bloque_fechas__semanas_config", queryset=SemanaConfig.objects.order_by("orden"))
+            )
+            .order_by("fecha_inicio", "id")
+        )
+        if bloque_id:
+            cohortes_qs = cohortes_qs.filter(bloque_id=bloque_id)
+        if anio:
+            cohortes_qs = cohortes_qs.filter(fecha_inicio__year=anio)
+        return list(cohortes_qs), GraficoCursosService._conteos_por_cohorte(cohortes_qs)
+
+    @staticmethod
+    def _cohorte_data(coh, conteos):
+        semanas = coh.bloque_fechas.semanas_config.all()
+        tipos = {}
+        for s in semanas:
+            tipos[s.tipo] = tipos.get(s.tipo, 0) + 1
+        stats = conteos.get(coh.id) or dict.fromkeys(CONTEOS_COHORTE, 0)
+        return {
+            "id": coh.id,
+            "nombre": coh.nombre,
+            "fecha_inicio": coh.fecha_inicio.isoformat() if coh.fecha_inicio else None,
+            "fecha_fin": coh.fecha_fin.isoformat() if coh.fecha_fin else None,
+            "bloque_fechas_id": coh.bloque_fechas_id,
+            "bloque_fechas_nombre": coh.bloque_fechas.nombre,
+            "bloque_fechas_descripcion": coh.bloque_fechas.descripcion,
+            "total_semanas": len(semanas),
+            "tipos_semana": tipos,
+            **stats,
+        }
+
+    @staticmethod
+    def _secuencia(coh):
+        secuencia = []
+        for semana in coh.bloque_fechas.semanas_config.all():
+            fecha_semana = None
+            if coh.fecha_inicio:
+                fecha_semana = (coh.fecha_inicio + timedelta(days=(semana.orden - 1) * 7)).isoformat()
+            secuencia.append(
+                {
+                    "orden": semana.orden,
+                    "tipo": semana.tipo,
+                    "tipo_label": semana.get_tipo_display(),
+                    "fecha": fecha_semana,
+                }
+            )
+        return secuencia
+
+    @staticmethod
+    def _arbol(programa, bloque_id):
+        bloques_qs = Bloque.objects.filter(programa=programa)
+        if bloque_id:
+            bloques_qs = bloques_qs.filter(id=bloque_id)
+        bloques = bloques_qs.order_by("id").prefetch_related(
+            Prefetch("modulos", queryset=Modulo.objects.order_by("id")),
+            Prefetch(
+                "examenes",
+                queryset=Examen.objects.filter(tipo_examen__in=TIPOS_FINAL).order_by("fecha", "id"),
+                to_attr="finales",
+            ),
+        )
+        tree = []
+        for blo in bloques:
+            tree.append(
+                {
+                    "type": "bloque",
+                    "id": blo.id,
+                    "nombre": blo.nombre,
+                    "children": [
+                        {
+                            "type": "modulo",
+                            "id": mod.id,
+                            "nombre": mod.nombre,
+                            "es_practica": mod.es_practica,
+                            "fecha_inicio": mod.fecha_inicio.isoformat() if mod.fecha_inicio else None,
+                            "fecha_fin": mod.fecha_fin.isoformat() if mod.fecha_fin else None,
+                        }
+                        for mod in blo.modulos.all()
+                    ],
+                    "finales": [
+                        {
+                            "id": ex.id,
+                            "tipo_examen": ex.tipo_examen,
+                            "fecha": ex.fecha.isoformat() if ex.fecha else None,
+                            "peso": float(ex.peso),
+                        }
+                        for ex in blo.finales
+                    ],
+                }
+            )
+        return tree
+
+    @staticmethod
+    def construir(programa, bloque_id=None, cohorte_id=None, anio=None):
+        """
+        Arma la respuesta del gráfico. Lanza Cohorte.DoesNotExist si se pide
+        un `cohorte_id` que no está entre las cohortes filtradas.
+        """
+        cohortes, conteos = GraficoCursosService._cohortes(programa, bloque_id, anio)
+        cohortes_data = [GraficoCursosService._cohorte_data(coh, conteos) for coh in cohortes]
+
+        cohorte_data = None
+        if cohorte_id:
+            # La cohorte pedida ya está entre las cargadas (mismos filtros): no se vuelve a consultar.
+            indice = next((i for i, coh in enumerate(cohortes) if coh.id == cohorte_id), None)
+            if indice is None:
+                raise Cohorte.DoesNotExist
+            coh = cohortes[indice]
+            cohorte_data = {
+                "id": coh.id,
+                "nombre": coh.nombre,
+                "programa_id": coh.programa_id,
+                "fecha_inicio": coh.fecha_inicio.isoformat() if coh.fecha_inicio else None,
+                "fecha_fin": coh.fecha_fin.isoformat() if coh.fecha_fin else None,
+                "bloque_fechas_id": coh.bloque_fechas_id,
+                "bloque_fechas_nombre": coh.bloque_fechas.nombre,
+                "bloque_fechas_descripcion": coh.bloque_fechas.descripcion,
+                "secuencia": GraficoCursosService._secuencia(coh),
+                "stats": cohortes_data[indice],
+            }
+
+        return {
+            "programa": {"id": programa.id, "codigo": programa.codigo, "nombre": programa.nombre},
+            "bloque_id": bloque_id,
+            "cohorte_id": cohorte_id,
+            "anio": anio,
+            "cohortes": cohortes_data,
+            "cohorte": cohorte_data,
+            "tree": GraficoCursosService._arbol(programa, bloque_id),
+        }
@@ -0,0 +1,274 @@
+# backend/core/services/lookup_estudiantes_service.py
+"""
+Índice en memoria para el autocompletado de estudiantes (/estudiantes/lookup).
+
+Cada worker guarda una lista ordenada de claves normalizadas (palabras de
+apellido y nombre, y el DNI) y resuelve los prefijos con bisect, sin ir a la
+base. Se construye en un hilo de fondo que arranca con el worker
+(academia/wsgi.py); hasta que está listo, las consultas se responden desde la
+base con el índice de búsqueda (BusquedaEstudiantesService).
+
+Para que todos los workers vean las escrituras, las señales de Estudiante
+publican los cambios en un registro en el cache compartido (Redis): un
+contador de versión y una entrada por versión con los datos nuevos de cada
+estudiante (o None si se borró o archivó). En cada consulta el worker lee la
+versión (una lectura de cache) y aplica lo que le falte. Si el registro tiene
+huecos (flush, evicción o demasiado atraso) le pide al hilo de fondo que lo
+reconstruya desde la base y, mientras tanto, sigue respondiendo con el índice
+que tiene.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+from core.models import Estudiante
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+from core.utils.busqueda import normalizar, palabras
+from core.utils.pendientes import acumular_hasta_commit
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "estudiantes:lookup:version"
+CAMBIO_KEY = "estudiantes:lookup:cambio:{}"
+# Tiempo que se conservan los cambios y atraso máximo que se aplica en forma incremental.
+CAMBIOS_TTL = 24 * 3600
+MAX_ATRASO = 500
+LIMITE_MAXIMO = 50
+
+
+class IndicePrefijos:
+    """
+    Claves normalizadas ordenadas: todas las claves que empiezan con un
+    prefijo forman un rango contiguo que se ubica con bisect.
+    """
+
+    def __init__(self):
+        self._claves = []  # [(clave, estudiante_id)] ordenada
+        self._estudiantes = {}  # id -> (apellido, nombre, dni, claves)
+
+    def __len__(self):
+        return len(self._estudiantes)
+
+    @staticmethod
+    def _claves_de(apellido, nombre, dni):
+        return set(palabras(apellido)) | set(palabras(nombre)) | set(palabras(dni))
+
+    def poner(self, est_id, apellido, nombre, dni):
+        self.quitar(est_id)
+        claves = self._claves_de(apellido, nombre, dni)
+        self._estudiantes[est_id] = (apellido, nombre, dni, claves)
+        for clave in claves:
+            insort(self._claves, (clave, est_id))
+
+    def quitar(self, est_id):
+        datos = self._estudiantes.pop(est_id, None)
+        if datos is None:
+            return
+        for clave in datos[3]:
+            i = bisect_left(self._claves, (clave, est_id))
+            if i < len(self._claves) and self._claves[i] == (clave, est_id):
+                del self._claves[i]
+
+    def cargar(self, filas):
+        """Carga masiva de (id, apellido, nombre, dni): ordena una sola vez."""
+        self._estudiantes = {}
+        claves = []
+        for est_id, apellido, nombre, dni in filas:
+            propias = self._claves_de(apellido, nombre, dni)
+            self._estudiantes[est_id] = (apellido, nombre, dni, propias)
+            claves.extend((clave, est_id) for clave in propias)
+        claves.sort()
+        self._claves = claves
+
+    def _con_prefijo(self, prefijo):
+        i = bisect_left(self._claves, (prefijo,))
+        while i < len(self._claves) and self._claves[i][0].startswith(prefijo):
+            yield self._claves[i]
+            i += 1
+
+    def buscar(self, texto, limite):
+        """
+        Estudiantes cuyas claves cubren todas las palabras de `texto` (por
+        prefijo). Primero los de más coincidencias exactas, luego por apellido y nombre.
+        """
+        consulta = palabras(texto)
+        if not consulta:
+            return []
+        # El rango se recorre con la palabra más larga (la más selectiva).
+        guia = max(consulta, key=len)
+        candidatos = {est_id for _, est_id in self._con_prefijo(guia)}
+        resultados = []
+        for est_id in candidatos:
+            apellido, nombre, dni, claves = self._estudiantes[est_id]
+            puntaje = 0
+            for palabra in consulta:
+                if palabra in claves:
+                    puntaje += 2
+                elif any(clave.startswith(palabra) for clave in claves):
+                    puntaje += 1
+                else:
+                    break
+            else:
+                resultados.append((-puntaje, normalizar(apellido), normalizar(nombre), est_id))
+        resultados.sort()
+        return [
+            {"id": est_id, "apellido": self._estudiantes[est_id][0], "nombre": self._estudiantes[est_id][1], "dni": self._estudiantes[est_id][2]}
+            for *_, est_id in resultados[:limite]
+        ]
+
+
+_indice = None
+_version = None
+_lock = threading.RLock()
+# Hilo de fondo que (re)construye el índice cuando se activa _pedido.
+_pedido = threading.Event()
+_hilo = None
+
+
+class LookupEstudiantesService:
+    """
+    Índice por worker y su sincronización a través del cache.
+    """
+
+    @staticmethod
+    def _version_remota():
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Igual que los contadores de analytics: tras un flush arranca de un
+            # valor nuevo, así ningún worker confunde la versión vieja con la nueva.
+            cache.add(VERSION_KEY, time.time_ns(), None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    @staticmethod
+    def construir():
+        """Reconstruye el índice de este worker desde la base (estudiantes activos)."""
+        global _indice, _version
+        # La versión se lee antes de cargar: lo publicado durante la carga se aplica después.
+        version = LookupEstudiantesService._version_remota()
+        # Se carga fuera del lock: mientras tanto las consultas usan el índice anterior.
+        indice = IndicePrefijos()
+        indice.cargar(
+            Estudiante.objects.filter(is_active=True)
+            .order_by()
+            .values_list("id", "apellido", "nombre", "dni")
+            .iterator(chunk_size=5000)
+        )
+        with _lock:
+            _indice, _version = indice, version
+        return indice
+
+    @staticmethod
+    def _reconstruir_a_pedido():
+        from django.db import connections
+
+        while True:
+            _pedido.wait()
+            _pedido.clear()
+            try:
+                LookupEstudiantesService.construir()
+            except Exception as e:
+                logger.warning(f"lookup estudiantes: no se pudo construir el índice: {e}")
+            finally:
+                connections.close_all()
+
+    @staticmethod
+    def solicitar_reconstruccion():
+        """
+        Pide al hilo de fondo del worker que reconstruya el índice (lo arranca
+        la primera vez). Varios pedidos seguidos se resuelven con una carga.
+        """
+        global _hilo
+        with _lock:
+            if _hilo is None:
+                _hilo = threading.Thread(
+                    target=LookupEstudiantesService._reconstruir_a_pedido, name="lookup-estudiantes", daemon=True,
+                )
+                _hilo.start()
+        _pedido.set()
+
+    @staticmethod
+    def sincronizar():
+        """
+        Aplica los cambios publicados por cualquier worker desde la última
+        consulta. Devuelve el índice (puede estar atrasado si se pidió una
+        reconstrucción) o None si este worker todavía no tiene uno.
+        """
+        global _version
+        try:
+            remota = LookupEstudiantesService._version_remota()
+        except Exception as e:
+            logger.warning(f"lookup estudiantes: no se pudo leer la versión: {e}")
+            return _indice
+        with _lock:
+            if _indice is None:
+                LookupEstudiantesService.solicitar_reconstruccion()
+                return None
+            if remota == _version:
+                return _indice
+            if not (0 < remota - _version <= MAX_ATRASO):
+                LookupEstudiantesService.solicitar_reconstruccion()
+                return _indice
+            keys = [CAMBIO_KEY.format(v) for v in range(_version + 1, remota + 1)]
+            cambios = cache.get_many(keys)
+            if len(cambios) != len(keys):
+                LookupEstudiantesService.solicitar_reconstruccion()
+                return _indice
+            for key in keys:
+                for est_id, datos in cambios[key]:
+                    if datos is None:
+                        _indice.quitar(est_id)
+                    else:
+                        _indice.poner(est_id, *datos)
+            _version = remota
+            return _indice
+
+    @staticmethod
+    def _buscar_en_base(texto, limite):
+        """Mismo resultado que IndicePrefijos.buscar, desde el índice de búsqueda en la base."""
+        return list(
+            BusquedaEstudiantesService.filtrar(Estudiante.objects.filter(is_active=True), texto)
+            .order_by("-relevancia", "apellido", "nombre", "id")
+            .values("id", "apellido", "nombre", "dni")[:limite]
+        )
+
+    @staticmethod
+    def buscar(texto, limite=10):
+        limite = min(max(limite, 1), LIMITE_MAXIMO)
+        indice = LookupEstudiantesService.sincronizar()
+        if indice is None:
+            return LookupEstudiantesService._buscar_en_base(texto, limite)
+        with _lock:
+            return indice.buscar(texto, limite)
+
+    @staticmethod
+    def publicar_estudiantes(estudiante_ids):
+        """
+        Publica en el registro compartido el estado actual de los estudiantes
+        indicados: sus datos si están activos, None si se borraron o archivaron.
+        """
+        estudiante_ids = set(estudiante_ids)
+        if not estudiante_ids:
+            return
+        activos = {
+            est_id: datos
+            for est_id, *datos in Estudiante.objects.filter(id__in=estudiante_ids, is_active=True)
+            .values_list("id", "apellido", "nombre", "dni")
+        }
+        cambios = [(est_id, tuple(activos[est_id]) if est_id in activos else None) for est_id in sorted(estudiante_ids)]
+        try:
+            LookupEstudiantesService._version_remota()
+            version = cache.incr(VERSION_KEY)
+            cache.set(CAMBIO_KEY.format(version), cambios, CAMBIOS_TTL)
+        except Exception as e:
+            # Sin registro los demás workers reconstruyen al detectar el hueco.
+            logger.warning(f"lookup estudiantes: no se pudo publicar el cambio: {e}")
+
+    @staticmethod
+    def programar_publicacion(estudiante_ids):
+        """Acumula estudiantes y publica sus cambios juntos al confirmar la transacción."""
+        acumular_hasta_commit("lookup_estudiantes", estudiante_ids, LookupEstudiantesService.publicar_estudiantes)
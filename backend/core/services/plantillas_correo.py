@@ -0,0 +1,125 @@
+# backend/core/services/plantillas_correo.py
+"""
+Plantillas de los correos del sistema.
+
+Cada tipo de CorreoSaliente tiene su plantilla en templates/emails/ y su
+asunto (también una plantilla, p. ej. para el caso de menores de edad).
+`renderizar(tipo, contexto)` arma asunto y cuerpo a partir de un contexto
+chico. Las plantillas se cargan y compilan una sola vez por proceso.
+
+Los adjuntos (PDF de core/resources/emails) son siempre los mismos pocos
+archivos: `adjunto(ruta)` los lee de disco una vez y guarda los bytes en un
+cache acotado a MAIL_ATTACHMENT_CACHE_BYTES (se descartan los menos usados).
+Si el archivo cambia en disco, se vuelve a leer.
+"""
+
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template
+
+from core.models import CorreoSaliente
+
+# tipo -> (plantilla del cuerpo, plantilla del asunto)
+PLANTILLAS = {
+    CorreoSaliente.BIENVENIDA: (
+        "emails/bienvenida_campus.html",
+        "¡Bienvenido/a! Ya puedes comenzar tu cursada virtual en el CFP",
+    ),
+    CorreoSaliente.NIVELACION: (
+        "emails/nivelacion.html",
+        "Autodiagnóstico de Nivelación - Habilidades Digitales - CFP",
+    ),
+    CorreoSaliente.CONFIRMACION_PREINSCRIPCION: (
+        "emails/confirmacion_preinscripcion.html",
+        "{% if es_menor %}Preinscripcion Programador de Nivel III para menor de edad"
+        "{% else %}Confirmación de Preinscripción - CFP Malvinas Argentinas{% endif %}",
+    ),
+    CorreoSaliente.CONFIRMACION_TERCIARIO: (
+        "emails/confirmacion_terciario.html",
+        "Bienvenidos/as a la Tecnicatura — Todo lo que necesitás saber para comenzar",
+    ),
+    CorreoSaliente.BIENVENIDA_TERCIARIO: (
+        "emails/bienvenida_terciario_moodle.html",
+        "Acceso al Campus Virtual - Habilidades Digitales",
+    ),
+    CorreoSaliente.CONFIRMACION_VIDEOJUEGOS: (
+        "emails/confirmacion_videojuegos.html",
+        "Confirmación de Preinscripción - Desarrollo de Videojuegos",
+    ),
+    CorreoSaliente.ACEPTACION_VIDEOJUEGOS: (
+        "emails/aceptacion_videojuegos.html",
+        "¡Tu preinscripción fue aprobada! - Desarrollo de Videojuegos",
+    ),
+}
+
+RECURSOS_CORREO = os.path.join(settings.BASE_DIR, "core", "resources", "emails")
+
+
+@lru_cache(maxsize=None)
+def _compiladas(tipo):
+    cuerpo, asunto = PLANTILLAS[tipo]
+    return get_template(cuerpo), engines["django"].from_string(asunto)
+
+
+def renderizar(tipo, contexto) -> tuple:
+    """Devuelve (asunto, cuerpo_html) del correo `tipo` con `contexto`."""
+    cuerpo, asunto = _compiladas(tipo)
+    return " ".join(asunto.render(contexto).split()), cuerpo.render(contexto)
+
+
+def recurso(nombre) -> str:
+    """Ruta de un archivo de core/resources/emails."""
+    return os.path.join(RECURSOS_CORREO, nombre)
+
+
+class _CacheAdjuntos:
+    """Bytes de archivos por ruta, LRU acotado por tamaño total."""
+
+    def __init__(self):
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, ruta) -> bytes:
+        modificado = os.path.getmtime(ruta)
+        with self._lock:
+            entrada = self._datos.get(ruta)
+            if entrada and entrada[0] == modificado:
+                self._datos.move_to_end(ruta)
+                return entrada[1]
+
+        with open(ruta, "rb") as archivo:
+            contenido = archivo.read()
+
+        limite = settings.MAIL_ATTACHMENT_CACHE_BYTES
+        if len(contenido) <= limite:
+            with self._lock:
+                anterior = self._datos.pop(ruta, None)
+                if anterior:
+                    self._bytes -= len(anterior[1])
+                self._datos[ruta] = (modificado, contenido)
+                self._bytes += len(contenido)
+                while self._bytes > limite:
+                    _, (_, descartado) = self._datos.popitem(last=False)
+                    self._bytes -= len(descartado)
+        return contenido
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+
+ADJUNTOS = _CacheAdjuntos()
+
+
+def adjunto(ruta) -> tuple:
+    """(nombre, contenido, mimetype) para EmailMessage.attach, con los bytes desde el cache."""
+    mimetype, _ = mimetypes.guess_type(ruta)
+    return os.path.basename(ruta), ADJUNTOS.obtener(ruta), mimetype or "application/octet-stream"
@@ -0,0 +1,112 @@
+# backend/core/services/precalentamiento_service.py
+"""
+Precalentamiento del cache de analytics (comando `warm_analytics`).
+
+Tras un deploy o un flush de Redis, los primeros usuarios pagaban el costo
+completo de cada endpoint. Este servicio enumera las combinaciones de filtros
+habituales (sin filtro, cada programa, cada bloque y cada cohorte activa) y
+recalcula dashboard_stats, analytics_* y courses_graph en las mismas claves
+que usa @cache_analytics.
+
+Con `margen` solo se recalculan las entradas que faltan (clave fría o
+invalidada por una escritura) o que dejan de estar frescas dentro de ese
+plazo; el resto se deja como está.
+"""
+
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Bloque, Cohorte, Programa
+from core.utils.cache_analytics import endpoint_analytics
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS_PRECALENTADOS = (
+    "dashboard_stats",
+    "analytics_enrollments",
+    "analytics_attendance",
+    "analytics_grades",
+    "analytics_dropout",
+    "analytics_graduates",
+    "courses_graph",
+)
+
+
+class PrecalentamientoService:
+    """
+    Enumeración de filtros y recálculo de las entradas del cache de analytics.
+    """
+
+    @staticmethod
+    def combinaciones():
+        """Filtros a precalentar: global, por programa, por bloque y por cohorte activa."""
+        hoy = timezone.localdate()
+        combinaciones = [{}]
+        combinaciones += [{"programa_id": p} for p in Programa.objects.order_by("id").values_list("id", flat=True)]
+        combinaciones += [
+            {"programa_id": p, "bloque_id": b}
+            for p, b in Bloque.objects.order_by("programa_id", "id").values_list("programa_id", "id")
+        ]
+        activas = Cohorte.objects.filter(Q(fecha_fin__isnull=True) | Q(fecha_fin__gte=hoy), fecha_inicio__lte=hoy)
+        combinaciones += [
+            {"programa_id": p, "cohorte_id": c}
+            for p, c in activas.order_by("programa_id", "id").values_list("programa_id", "id")
+        ]
+        return combinaciones
+
+    @staticmethod
+    def tareas(endpoints=ENDPOINTS_PRECALENTADOS):
+        """(endpoint, filtros) de cada combinación que el endpoint acepta."""
+        # Los endpoints se registran en el cache al importar sus módulos.
+        import core.api.analytics  # noqa: F401
+        import core.api.dashboard  # noqa: F401
+
+        combinaciones = PrecalentamientoService.combinaciones()
+        tareas = []
+        for nombre in endpoints:
+            parametros = endpoint_analytics(nombre).parametros
+            requeridos = {p for p, default in parametros.items() if default is inspect.Parameter.empty}
+            for filtros in combinaciones:
+                if set(filtros) <= set(parametros) and requeridos <= set(filtros):
+                    tareas.append((nombre, filtros))
+        return tareas
+
+    @staticmethod
+    def _precalentar_una(nombre, filtros, margen):
+        """True/False según se haya recalculado; None si el endpoint falló."""
+        try:
+            return endpoint_analytics(nombre).precalentar(margen=margen, **filtros)
+        except Exception as e:
+            logger.warning(f"warm_analytics: {nombre} {filtros} falló: {e}")
+            return None
+
+    @staticmethod
+    def _en_hilo(nombre, filtros, margen):
+        try:
+            return PrecalentamientoService._precalentar_una(nombre, filtros, margen)
+        finally:
+            # Cada hilo abre su propia conexión: se cierra al terminar la tarea.
+            connections.close_all()
+
+    @staticmethod
+    def precalentar(margen=0, workers=1, endpoints=ENDPOINTS_PRECALENTADOS):
+        """
+        Recorre todas las tareas con `workers` hilos en paralelo.
+        Devuelve {"recalculadas", "vigentes", "errores"}.
+        """
+        tareas = PrecalentamientoService.tareas(endpoints)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                resultados = list(pool.map(lambda t: PrecalentamientoService._en_hilo(*t, margen), tareas))
+        else:
+            resultados = [PrecalentamientoService._precalentar_una(*t, margen) for t in tareas]
+        return {
+            "recalculadas": sum(1 for r in resultados if r is True),
+            "vigentes": sum(1 for r in resultados if r is False),
+            "errores": sum(1 for r in resultados if r is None),
+        }
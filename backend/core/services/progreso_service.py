@@ -0,0 +1,173 @@
+# backend/core/services/progreso_service.py
+"""
+Servicio para mantener la tabla materializada de progreso académico.
+
+- ProgresoBloque: una fila por (estudiante, programa, bloque) con el flag de
+  aprobación (nota aprobada de FINAL_VIRTUAL, FINAL_SINC o EQUIVALENCIA) y si
+  el estudiante tiene alguna inscripción en ese bloque.
+- ProgresoPrograma: resumen por (estudiante, programa) con bloques aprobados
+  vs. requeridos. "Egresado automático" pasa a ser un filtro indexado.
+
+Las señales de Nota, Inscripcion, Examen y Bloque (core/signals.py) llaman a
+este servicio; los estudiantes tocados en una transacción se recalculan juntos
+al confirmarla. El comando `reconstruir_progreso` lo regenera desde cero.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Bloque, Examen, Inscripcion, Nota, ProgresoBloque, ProgresoPrograma
+from core.utils.pendientes import acumular_hasta_commit
+
+TIPOS_FINAL = [Examen.FINAL_VIRTUAL, Examen.FINAL_SINC, Examen.EQUIVALENCIA]
+
+
+class ProgresoService:
+    """
+    Cálculo y mantenimiento de ProgresoBloque / ProgresoPrograma.
+    """
+
+    @staticmethod
+    def _construir_filas(notas_qs, inscripciones_qs):
+        """
+        Arma las filas de ProgresoBloque a partir de notas e inscripciones
+        usando consultas agrupadas (sin recorrer notas en Python).
+        """
+        filas = {}
+
+        aprobados = (
+            notas_qs.filter(
+                aprobado=True,
+                examen__tipo_examen__in=TIPOS_FINAL,
+                examen__bloque__isnull=False,
+            )
+            .values("estudiante_id", "examen__bloque", "examen__bloque__programa")
+            .annotate(fecha=Min("fecha_calificacion"))
+            .order_by()
+        )
+        for r in aprobados:
+            filas[(r["estudiante_id"], r["examen__bloque"])] = ProgresoBloque(
+                estudiante_id=r["estudiante_id"],
+                programa_id=r["examen__bloque__programa"],
+                bloque_id=r["examen__bloque"],
+                aprobado=True,
+                fecha_aprobacion=r["fecha"],
+            )
+
+        # El bloque de una inscripción sale del módulo o, si no tiene, de la cohorte.
+        for campo in ("modulo__bloque", "cohorte__bloque"):
+            inscriptos = (
+                inscripciones_qs.filter(**{f"{campo}__isnull": False})
+                .values("estudiante_id", campo, f"{campo}__programa")
+                .distinct()
+                .order_by()
+            )
+            for r in inscriptos:
+                key = (r["estudiante_id"], r[campo])
+                if key not in filas:
+                    filas[key] = ProgresoBloque(
+                        estudiante_id=r["estudiante_id"],
+                        programa_id=r[f"{campo}__programa"],
+                        bloque_id=r[campo],
+                    )
+                filas[key].inscripto = True
+
+        return list(filas.values())
+
+    @staticmethod
+    def _resumir(filas):
+        """Agrega las filas de bloque en filas de ProgresoPrograma."""
+        programas = {f.programa_id for f in filas}
+        requeridos = dict(
+            Bloque.objects.filter(programa_id__in=programas)
+            .values("programa_id")
+            .annotate(total=Count("id"))
+            .order_by()
+            .values_list("programa_id", "total")
+        )
+
+        resumen = {}
+        for f in filas:
+            key = (f.estudiante_id, f.programa_id)
+            if key not in resumen:
+                resumen[key] = ProgresoPrograma(
+                    estudiante_id=f.estudiante_id,
+                    programa_id=f.programa_id,
+                    bloques_requeridos=requeridos.get(f.programa_id, 0),
+                )
+            if f.aprobado:
+                resumen[key].bloques_aprobados += 1
+
+        for pp in resumen.values():
+            pp.completo = pp.bloques_requeridos > 0 and pp.bloques_aprobados >= pp.bloques_requeridos
+        return list(resumen.values())
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular_estudiantes(estudiante_ids):
+        """
+        Recalcula todas las filas de progreso de los estudiantes indicados.
+        Son unas pocas consultas agrupadas acotadas a sus notas e inscripciones.
+        """
+        estudiante_ids = set(estudiante_ids)
+        if not estudiante_ids:
+            return
+        filas = ProgresoService._construir_filas(
+            Nota.objects.filter(estudiante_id__in=estudiante_ids),
+            Inscripcion.objects.filter(estudiante_id__in=estudiante_ids),
+        )
+        resumen = ProgresoService._resumir(filas)
+
+        ProgresoPrograma.objects.filter(estudiante_id__in=estudiante_ids).delete()
+        ProgresoBloque.objects.filter(estudiante_id__in=estudiante_ids).delete()
+        ProgresoBloque.objects.bulk_create(filas, batch_size=1000)
+        ProgresoPrograma.objects.bulk_create(resumen, batch_size=1000)
+
+    @staticmethod
+    def programar_recalculo(estudiante_ids):
+        """Acumula estudiantes y los recalcula juntos al confirmar la transacción."""
+        acumular_hasta_commit("progreso", estudiante_ids, ProgresoService.recalcular_estudiantes)
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular_programa(programa_id):
+        """
+        Actualiza bloques requeridos/aprobados de un programa cuando cambia su
+        cantidad de bloques (alta o baja de Bloque).
+        """
+        total = Bloque.objects.filter(programa_id=programa_id).count()
+        aprobados = (
+            ProgresoBloque.objects.filter(
+                estudiante_id=OuterRef("estudiante_id"),
+                programa_id=programa_id,
+                aprobado=True,
+            )
+            .values("estudiante_id")
+            .annotate(c=Count("id"))
+            .values("c")
+        )
+        qs = ProgresoPrograma.objects.filter(programa_id=programa_id)
+        qs.update(
+            bloques_requeridos=total,
+            bloques_aprobados=Coalesce(Subquery(aprobados), Value(0)),
+            completo=False,
+        )
+        if total:
+            qs.filter(bloques_aprobados__gte=total).update(completo=True)
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(batch_size=1000):
+        """
+        Regenera ProgresoBloque y ProgresoPrograma completos.
+        Devuelve (filas_bloque, filas_programa).
+        """
+        filas = ProgresoService._construir_filas(Nota.objects.all(), Inscripcion.objects.all())
+        resumen = ProgresoService._resumir(filas)
+
+        ProgresoPrograma.objects.all().delete()
+        ProgresoBloque.objects.all().delete()
+        ProgresoBloque.objects.bulk_create(filas, batch_size=batch_size)
+        ProgresoPrograma.objects.bulk_create(resumen, batch_size=batch_size)
+        return len(filas), len(resumen)
@@ -0,0 +1,190 @@
+# backend/core/services/riesgo_abandono_service.py
+"""
+Motor de riesgo de abandono (regla B de /analytics/dropout).
+
+Se apoya en AsistenciaSemanal, un índice por (estudiante, programa, semana)
+con presentes, total y último día presente. Para un conjunto de inscripciones:
+
+1. Una consulta agrupada trae, por estudiante, su última presencia y los
+   presentes/registros de las últimas N semanas.
+2. El puntaje se calcula en una sola pasada vectorizada con NumPy sobre
+   todos los estudiantes (sin recorrerlos uno por uno en Python).
+
+Puntaje (0 a 1, mayor = más riesgo):
+    0.5 * min(días sin asistir / (2 * días de la ventana), 1) + 0.5 * (1 - asistencia de la ventana)
+Un estudiante está en riesgo si no tuvo ninguna presencia dentro de la ventana.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncWeek
+
+from core.models import Asistencia, AsistenciaSemanal, Estudiante
+from core.utils.cache_analytics import invalidar_analytics
+from core.utils.pendientes import acumular_hasta_commit
+
+PESO_INACTIVIDAD = 0.5
+PESO_AUSENTISMO = 0.5
+# La inactividad satura (vale 1) al doble de la ventana sin presencias.
+HORIZONTE_INACTIVIDAD = 2
+
+
+class RiesgoAbandonoService:
+    """
+    Mantenimiento de AsistenciaSemanal y cálculo del riesgo de abandono.
+    """
+
+    # --- Índice semanal ---
+
+    @staticmethod
+    def _filas(asistencias_qs):
+        grupos = (
+            asistencias_qs.annotate(semana=TruncWeek("fecha"))
+            .values("estudiante_id", "semana", programa=F("modulo__bloque__programa_id"))
+            .annotate(
+                presentes=Count("id", filter=Q(presente=True)),
+                total=Count("id"),
+                ultima_presencia=Max("fecha", filter=Q(presente=True)),
+            )
+            .order_by()
+        )
+        for g in grupos.iterator(chunk_size=2000):
+            semana = g["semana"]
+            yield AsistenciaSemanal(
+                estudiante_id=g["estudiante_id"],
+                programa_id=g["programa"],
+                semana=semana.date() if hasattr(semana, "date") else semana,
+                presentes=g["presentes"],
+                total=g["total"],
+                ultima_presencia=g["ultima_presencia"],
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular_estudiantes(estudiante_ids):
+        """Regenera las semanas de los estudiantes indicados."""
+        estudiante_ids = set(estudiante_ids)
+        if not estudiante_ids:
+            return
+        filas = list(RiesgoAbandonoService._filas(Asistencia.objects.filter(estudiante_id__in=estudiante_ids)))
+        AsistenciaSemanal.objects.filter(estudiante_id__in=estudiante_ids).delete()
+        AsistenciaSemanal.objects.bulk_create(filas)
+        invalidar_analytics("Asistencia")
+
+    @staticmethod
+    def programar_recalculo(estudiante_ids):
+        """Acumula estudiantes y los recalcula juntos al confirmar la transacción."""
+        acumular_hasta_commit("asistencia_semanal", estudiante_ids, RiesgoAbandonoService.recalcular_estudiantes)
+
+    @staticmethod
+    @transaction.atomic
+    def reconstruir(batch_size=1000):
+        """Regenera AsistenciaSemanal completa. Devuelve la cantidad de filas generadas."""
+        AsistenciaSemanal.objects.all().delete()
+        total = 0
+        lote = []
+        for fila in RiesgoAbandonoService._filas(Asistencia.objects.all()):
+            lote.append(fila)
+            if len(lote) >= batch_size:
+                AsistenciaSemanal.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+        AsistenciaSemanal.objects.bulk_create(lote)
+        total += len(lote)
+        invalidar_analytics("Asistencia")
+        return total
+
+    # --- Motor de riesgo ---
+
+    @staticmethod
+    def puntajes(inscripciones_qs, referencia, semanas, programa_id=None):
+        """
+        Calcula el riesgo de todos los estudiantes de `inscripciones_qs` en una pasada.
+
+        Devuelve un dict de arrays NumPy alineados: ids, puntaje, en_riesgo,
+        dias_sin_asistir (-1 si nunca asistió) y asistencia_reciente (0 a 1).
+        """
+        estudiantes = inscripciones_qs.values("estudiante_id")
+        ids = np.unique(np.fromiter(estudiantes.values_list("estudiante_id", flat=True), dtype=np.int64))
+        umbral = referencia - timedelta(weeks=semanas)
+        ventana = (referencia - umbral).days
+        # El índice es semanal: la ventana arranca el lunes de la semana del umbral.
+        desde_semana = umbral - timedelta(days=umbral.weekday())
+
+        indice = AsistenciaSemanal.objects.filter(estudiante_id__in=estudiantes, semana__lte=referencia)
+        if programa_id:
+            indice = indice.filter(programa_id=programa_id)
+        filas = list(
+            indice.values("estudiante_id")
+            .annotate(
+                ultima=Max("ultima_presencia"),
+                presentes=Sum("presentes", filter=Q(semana__gte=desde_semana)),
+                total=Sum("total", filter=Q(semana__gte=desde_semana)),
+            )
+            .order_by()
+            .values_list("estudiante_id", "ultima", "presentes", "total")
+        )
+
+        # Vectores densos alineados con `ids` (estudiantes sin filas = nunca asistieron).
+        dias = np.full(ids.shape, -1, dtype=np.int64)
+        presentes = np.zeros(ids.shape, dtype=np.float64)
+        total = np.zeros(ids.shape, dtype=np.float64)
+        if filas:
+            f_ids, f_ultima, f_presentes, f_total = zip(*filas)
+            pos = np.searchsorted(ids, np.asarray(f_ids, dtype=np.int64))
+            ordinal_ref = referencia.toordinal()
+            # Una presencia posterior a la referencia (misma semana) cuenta como día 0.
+            dias[pos] = [max(ordinal_ref - u.toordinal(), 0) if u else -1 for u in f_ultima]
+            presentes[pos] = np.asarray([p or 0 for p in f_presentes], dtype=np.float64)
+            total[pos] = np.asarray([t or 0 for t in f_total], dtype=np.float64)
+
+        nunca = dias < 0
+        inactividad = np.where(nunca, 1.0, np.minimum(dias / max(ventana * HORIZONTE_INACTIVIDAD, 1), 1.0))
+        asistencia = np.divide(presentes, total, out=np.zeros_like(presentes), where=total > 0)
+        puntaje = PESO_INACTIVIDAD * inactividad + PESO_AUSENTISMO * (1.0 - asistencia)
+        en_riesgo = nunca | (dias > ventana)
+
+        return {
+            "ids": ids,
+            "puntaje": np.round(puntaje, 4),
+            "en_riesgo": en_riesgo,
+            "dias_sin_asistir": dias,
+            "asistencia_reciente": np.round(asistencia, 4),
+        }
+
+    @staticmethod
+    def pagina_en_riesgo(resultado, page, page_size, descendente=True):
+        """
+        Estudiantes en riesgo ordenados por puntaje (y luego id), con sus
+        datos básicos. Devuelve (total_en_riesgo, filas_de_la_página).
+        """
+        mask = resultado["en_riesgo"]
+        ids = resultado["ids"][mask]
+        puntaje = resultado["puntaje"][mask]
+        orden = np.lexsort((ids, -puntaje if descendente else puntaje))
+        inicio = (page - 1) * page_size
+        pagina = orden[inicio:inicio + page_size]
+
+        idx = np.flatnonzero(mask)[pagina]
+        datos = Estudiante.objects.only("id", "apellido", "nombre", "dni").in_bulk(resultado["ids"][idx].tolist())
+        filas = []
+        for i in idx:
+            est = datos.get(int(resultado["ids"][i]))
+            if est is None:
+                continue
+            dias = int(resultado["dias_sin_asistir"][i])
+            filas.append(
+                {
+                    "id": est.id,
+                    "apellido": est.apellido,
+                    "nombre": est.nombre,
+                    "dni": est.dni,
+                    "riesgo": float(resultado["puntaje"][i]),
+                    "dias_sin_asistir": dias if dias >= 0 else None,
+                    "asistencia_reciente": float(resultado["asistencia_reciente"][i]),
+                }
+            )
+        return int(mask.sum()), filas
@@ -0,0 +1,64 @@
+# backend/core/services/trayectos_service.py
+"""
+Resumen de inscripciones guardado en Estudiante (trayectos_resumen y
+fecha_primera_inscripcion).
+
+Los listados mostraban "Programa (Bloque)" armándolo por estudiante con tres
+cadenas de prefetch sobre inscripciones; con el resumen precalculado el
+listado es una consulta sobre la tabla de estudiantes.
+
+Se recalcula por estudiante al confirmar la transacción: las señales de
+Inscripcion y los cambios de nombre de Programa y Bloque, o de programa/bloque
+de una Cohorte o un Modulo, llaman a programar_recalculo(); el comando
+`reconstruir_trayectos` lo regenera para todos.
+"""
+
+from django.db import transaction
+
+from core.models import Estudiante, Inscripcion
+from core.utils.pendientes import acumular_hasta_commit
+from core.utils.trayectos import CAMPOS_INSCRIPCION, resumir_inscripciones
+
+CAMPOS_RESUMEN = list(Estudiante.CAMPOS_RESUMEN)
+
+
+class TrayectosService:
+    """
+    Cálculo y mantenimiento del resumen de trayectos de cada estudiante.
+    """
+
+    @staticmethod
+    @transaction.atomic
+    def recalcular_estudiantes(estudiante_ids):
+        """Regenera el resumen de los estudiantes indicados (una consulta más el bulk_update)."""
+        estudiante_ids = set(estudiante_ids)
+        if not estudiante_ids:
+            return
+        filas = Inscripcion.objects.filter(estudiante_id__in=estudiante_ids).order_by().values_list(*CAMPOS_INSCRIPCION)
+        resumen = resumir_inscripciones(filas)
+        estudiantes = []
+        for est_id in estudiante_ids:
+            trayectos, primera = resumen.get(est_id, ([], None))
+            estudiantes.append(Estudiante(id=est_id, trayectos_resumen=trayectos, fecha_primera_inscripcion=primera))
+        # bulk_update no dispara señales ni toca updated_at: el resumen no es una edición del estudiante.
+        Estudiante.objects.bulk_update(estudiantes, CAMPOS_RESUMEN, batch_size=500)
+
+    @staticmethod
+    def programar_recalculo(estudiante_ids):
+        """Acumula estudiantes y los recalcula juntos al confirmar la transacción."""
+        acumular_hasta_commit("trayectos", estudiante_ids, TrayectosService.recalcular_estudiantes)
+
+    @staticmethod
+    def programar_por_inscripciones(filtro):
+        """Programa el recálculo de los estudiantes con inscripciones que cumplen `filtro` (un Q)."""
+        TrayectosService.programar_recalculo(
+            Inscripcion.objects.filter(filtro).order_by().values_list("estudiante_id", flat=True).distinct()
+        )
+
+    @staticmethod
+    def reconstruir(batch_size=1000):
+        """Regenera el resumen de todos los estudiantes. Devuelve la cantidad procesada."""
+        ids = list(Estudiante.objects.order_by("id").values_list("id", flat=True))
+        for i in range(0, len(ids), batch_size):
+            TrayectosService.recalcular_estudiantes(ids[i:i + batch_size])
+        return len(ids)
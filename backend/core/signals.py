@@ -1,9 +1,11 @@
 import os
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from .models import UserProfile, Estudiante, Bloque, Cohorte
+from .models import UserProfile, Estudiante, Bloque, Cohorte, Nota, Inscripcion, Asistencia, Modulo, Programa, Examen, ProgresoBloque
 
 
 @receiver(post_save, sender=User)
@@ -51,6 +53,9 @@ def activate_inscripciones_on_regular(sender, instance, created, **kwargs):
             estudiante=instance,
             estado=Inscripcion.PREINSCRIPTO
         ).update(estado=Inscripcion.CURSANDO)
+        # .update() no dispara señales: recalculamos el cubo (e invalidamos analytics) a mano.
+        from .services.cubo_inscripciones_service import CuboInscripcionesService
+        CuboInscripcionesService.programar_recalculo([instance.id])
 
 
 @receiver(post_save, sender=Cohorte)
@@ -63,7 +68,7 @@ def create_exams_from_template(sender, instance, created, **kwargs):
     if not created:
         return
 
-    from .models import Examen, SemanaConfig
+    from .models import SemanaConfig
     
     if not instance.bloque_fechas:
         return
@@ -115,3 +120,310 @@ def validate_bloque_correlativas(sender, instance, action, pk_set, **kwargs):
                         cola.extend(actual_block.correlativas.values_list('id', flat=True))
                     except Bloque.DoesNotExist:
                         pass
+
+
+# --- Progreso materializado (ProgresoBloque / ProgresoPrograma) ---
+# El recálculo se difiere a on_commit: así las cascadas (borrar un Bloque,
+# un Examen, etc.) terminan antes de releer notas e inscripciones. Los
+# estudiantes se acumulan y se recalculan juntos: cargar las notas de un
+# examen recalcula una vez por transacción y no una vez por nota.
+
+
+def _borrado_en_cascada_de_estudiante(kwargs):
+    # Si se borra el estudiante, sus filas de progreso caen por CASCADE.
+    origin = kwargs.get("origin")
+    model = getattr(origin, "model", None) or type(origin)
+    return model is Estudiante
+
+
+def _programar_progreso(estudiante_ids):
+    from .services.progreso_service import ProgresoService
+    ProgresoService.programar_recalculo(estudiante_ids)
+
+
+def _examen_cuenta_para_progreso(tipo_examen, bloque_id):
+    from .services.progreso_service import TIPOS_FINAL
+    return tipo_examen in TIPOS_FINAL and bloque_id is not None
+
+
+def _nota_afecta_progreso(nota):
+    if Nota.examen.is_cached(nota):
+        examen = (nota.examen.tipo_examen, nota.examen.bloque_id)
+    else:
+        examen = Examen.objects.filter(pk=nota.examen_id).values_list("tipo_examen", "bloque_id").first()
+    # Si el examen ya no existe (borrado en cascada) recalculamos igual.
+    return examen is None or _examen_cuenta_para_progreso(*examen)
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def actualizar_progreso_por_nota(sender, instance, **kwargs):
+    if _borrado_en_cascada_de_estudiante(kwargs):
+        return
+    if _nota_afecta_progreso(instance):
+        _programar_progreso([instance.estudiante_id])
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def actualizar_progreso_por_inscripcion(sender, instance, **kwargs):
+    if _borrado_en_cascada_de_estudiante(kwargs):
+        return
+    _programar_progreso([instance.estudiante_id])
+
+
+@receiver(pre_save, sender=Examen)
+def actualizar_progreso_por_examen(sender, instance, **kwargs):
+    # Un examen que pasa a ser final (o deja de serlo) o cambia de bloque
+    # cambia los bloques aprobados de quienes tienen nota en él.
+    if not instance.pk:
+        return
+    anterior = Examen.objects.filter(pk=instance.pk).values_list("tipo_examen", "bloque_id").first()
+    actual = (instance.tipo_examen, instance.bloque_id)
+    if anterior is None or anterior == actual:
+        return
+    if _examen_cuenta_para_progreso(*anterior) or _examen_cuenta_para_progreso(*actual):
+        _programar_progreso(Nota.objects.filter(examen_id=instance.pk).values_list("estudiante_id", flat=True))
+
+
+@receiver(pre_save, sender=Bloque)
+def actualizar_progreso_por_cambio_de_programa(sender, instance, **kwargs):
+    # Un bloque que pasa a otro programa: sus filas de progreso cambian de
+    # programa y ambos programas cambian la cantidad de bloques requeridos.
+    if not instance.pk:
+        return
+    anterior = Bloque.objects.filter(pk=instance.pk).values_list("programa_id", flat=True).first()
+    if anterior is None or anterior == instance.programa_id:
+        return
+    from .services.progreso_service import ProgresoService
+    _programar_progreso(ProgresoBloque.objects.filter(bloque_id=instance.pk).values_list("estudiante_id", flat=True))
+
+    def recalcular_programas(programas=(anterior, instance.programa_id)):
+        for programa_id in programas:
+            ProgresoService.recalcular_programa(programa_id)
+
+    transaction.on_commit(recalcular_programas)
+
+
+@receiver(post_save, sender=Bloque)
+@receiver(post_delete, sender=Bloque)
+def actualizar_progreso_por_bloque(sender, instance, created=False, **kwargs):
+    # Solo cambia la cantidad de bloques requeridos en altas y bajas.
+    if kwargs.get("signal") is post_save and not created:
+        return
+    from .services.progreso_service import ProgresoService
+    programa_id = instance.programa_id
+    transaction.on_commit(lambda: ProgresoService.recalcular_programa(programa_id))
+
+
+
+# --- Resumen diario de asistencia (AsistenciaDiaria) ---
+# Las claves (modulo, fecha) tocadas se acumulan y se recalculan juntas al
+# confirmar: una carga de 30 asistencias de un mismo día recalcula una vez.
+
+
+def _recalcular_dias(claves):
+    from .services.asistencia_diaria_service import ResumenAsistenciaService
+    ResumenAsistenciaService.recalcular(claves)
+
+
+def _recalcular_dias_de_inscripciones(pares):
+    from .services.asistencia_diaria_service import ResumenAsistenciaService
+    ResumenAsistenciaService.recalcular(ResumenAsistenciaService.claves_de_inscripciones(pares))
+
+
+def _programar_resumen_asistencia(claves=(), inscripciones=()):
+    from .utils.pendientes import acumular_hasta_commit
+    if claves:
+        acumular_hasta_commit("asistencia_diaria", claves, _recalcular_dias)
+    if inscripciones:
+        acumular_hasta_commit("asistencia_diaria_inscripciones", inscripciones, _recalcular_dias_de_inscripciones)
+
+
+def _estudiante_y_programa(estudiante_id, cohorte_id):
+    programa_id = Cohorte.objects.filter(pk=cohorte_id).values_list("programa_id", flat=True).first()
+    return (estudiante_id, programa_id)
+
+
+@receiver(pre_save, sender=Asistencia)
+def resumen_asistencia_cambio_de_dia(sender, instance, **kwargs):
+    # Si una asistencia cambia de módulo o fecha, el día anterior también se recalcula.
+    if instance.pk:
+        anterior = Asistencia.objects.filter(pk=instance.pk).values_list("modulo_id", "fecha").first()
+        if anterior and anterior != (instance.modulo_id, instance.fecha):
+            _programar_resumen_asistencia(claves=[anterior])
+
+
+@receiver(post_save, sender=Asistencia)
+@receiver(post_delete, sender=Asistencia)
+def actualizar_resumen_asistencia(sender, instance, **kwargs):
+    # También en borrados en cascada de Estudiante: el total del día cambia.
+    _programar_resumen_asistencia(claves=[(instance.modulo_id, instance.fecha)])
+    if not _borrado_en_cascada_de_estudiante(kwargs):
+        from .services.riesgo_abandono_service import RiesgoAbandonoService
+        RiesgoAbandonoService.programar_recalculo([instance.estudiante_id])
+
+
+@receiver(pre_save, sender=Inscripcion)
+def resumen_asistencia_cambio_de_cohorte(sender, instance, **kwargs):
+    # Si la inscripción pasa a otra cohorte (u otro estudiante), también se recalcula la anterior.
+    if instance.pk:
+        anterior = Inscripcion.objects.filter(pk=instance.pk).values_list("estudiante_id", "cohorte_id").first()
+        if anterior and anterior != (instance.estudiante_id, instance.cohorte_id):
+            _programar_resumen_asistencia(inscripciones=[_estudiante_y_programa(*anterior)])
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def resumen_asistencia_por_inscripcion(sender, instance, **kwargs):
+    # La cohorte asignada a una asistencia depende de las inscripciones del
+    # estudiante en el programa del módulo: solo cambian sus días en ese programa.
+    if _borrado_en_cascada_de_estudiante(kwargs):
+        return
+    if Inscripcion.cohorte.is_cached(instance):
+        par = (instance.estudiante_id, instance.cohorte.programa_id)
+    else:
+        par = _estudiante_y_programa(instance.estudiante_id, instance.cohorte_id)
+    _programar_resumen_asistencia(inscripciones=[par])
+
+
+# --- Cubo de inscripciones (CuboInscripcion) ---
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def actualizar_cubo_inscripciones(sender, instance, **kwargs):
+    if _borrado_en_cascada_de_estudiante(kwargs):
+        return
+    from .services.cubo_inscripciones_service import CuboInscripcionesService
+    CuboInscripcionesService.programar_recalculo([instance.estudiante_id])
+
+# --- Resumen de trayectos (Estudiante.trayectos_resumen) ---
+# Como en el cambio de día de una asistencia, el pre_save compara con la fila
+# guardada: solo un cambio de nombre (o de programa/bloque) recalcula a los inscriptos.
+
+
+def _cambio(modelo, instance, campos):
+    if not instance.pk:
+        return False
+    anterior = modelo.objects.filter(pk=instance.pk).values_list(*campos).first()
+    return anterior is not None and anterior != tuple(getattr(instance, campo) for campo in campos)
+
+
+def _programar_trayectos(filtro):
+    from .services.trayectos_service import TrayectosService
+    TrayectosService.programar_por_inscripciones(filtro)
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def actualizar_trayectos_por_inscripcion(sender, instance, **kwargs):
+    if _borrado_en_cascada_de_estudiante(kwargs):
+        return
+    from .services.trayectos_service import TrayectosService
+    TrayectosService.programar_recalculo([instance.estudiante_id])
+
+
+@receiver(pre_save, sender=Programa)
+def trayectos_por_programa(sender, instance, **kwargs):
+    if _cambio(Programa, instance, ("nombre",)):
+        _programar_trayectos(Q(cohorte__programa_id=instance.pk))
+
+
+@receiver(pre_save, sender=Bloque)
+def trayectos_por_bloque(sender, instance, **kwargs):
+    if _cambio(Bloque, instance, ("nombre",)):
+        _programar_trayectos(Q(modulo__bloque_id=instance.pk) | Q(cohorte__bloque_id=instance.pk))
+
+
+@receiver(pre_save, sender=Cohorte)
+def trayectos_por_cohorte(sender, instance, **kwargs):
+    if _cambio(Cohorte, instance, ("programa_id", "bloque_id")):
+        _programar_trayectos(Q(cohorte_id=instance.pk))
+
+
+@receiver(pre_save, sender=Modulo)
+def trayectos_por_modulo(sender, instance, **kwargs):
+    if _cambio(Modulo, instance, ("bloque_id",)):
+        _programar_trayectos(Q(modulo_id=instance.pk))
+
+# --- Índice de búsqueda de estudiantes (TerminoBusqueda) ---
+
+
+@receiver(post_save, sender=Estudiante)
+def actualizar_busqueda_estudiante(sender, instance, update_fields=None, **kwargs):
+    from .services.busqueda_estudiantes_service import CAMPOS_INDEXADOS, BusquedaEstudiantesService
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_INDEXADOS):
+        return
+    BusquedaEstudiantesService.programar_indexado([instance.id])
+
+# --- Autocompletado de estudiantes (índice en memoria por worker) ---
+
+
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+def publicar_lookup_estudiante(sender, instance, update_fields=None, **kwargs):
+    from .services.lookup_estudiantes_service import LookupEstudiantesService
+    if update_fields is not None and not set(update_fields) & {"apellido", "nombre", "dni", "is_active"}:
+        return
+    LookupEstudiantesService.programar_publicacion([instance.id])
+
+# --- Versiones para respuestas condicionales (ETag) ---
+# Tablas que no tienen contador de analytics pero que aparecen en endpoints
+# con respuesta_condicional (configuraciones, docentes, preinscripciones terciarias).
+
+
+def _invalidar_version_por_escritura(sender, update_fields=None, **kwargs):
+    from .utils.condicional import invalidar_versiones
+    # El login solo toca last_login: no cambia nada de lo que muestran los endpoints.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidar_versiones(sender.__name__)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def version_por_grupos_de_usuario(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        from .utils.condicional import invalidar_versiones
+        invalidar_versiones("User")
+
+
+def _conectar_versiones():
+    from django.apps import apps
+    from .utils.condicional import TABLAS_VERSIONADAS
+    for tabla in TABLAS_VERSIONADAS:
+        model = User if tabla == "User" else apps.get_model("core", tabla)
+        for signal in (post_save, post_delete):
+            signal.connect(
+                _invalidar_version_por_escritura,
+                sender=model,
+                dispatch_uid=f"invalidar_version_{tabla}_{signal is post_save}",
+            )
+
+
+_conectar_versiones()
+
+# --- Invalidación de cache de analytics (contadores de generación) ---
+# Se conecta después de los receivers de progreso para que su on_commit corra
+# antes: al invalidar, ProgresoBloque/ProgresoPrograma ya están al día.
+
+
+def _invalidar_analytics_por_escritura(sender, **kwargs):
+    from .utils.cache_analytics import invalidar_analytics
+    invalidar_analytics(sender.__name__)
+
+
+def _conectar_invalidacion_analytics():
+    from django.apps import apps
+    from .utils.cache_analytics import TABLAS_ANALYTICS
+    for tabla in TABLAS_ANALYTICS:
+        model = apps.get_model("core", tabla)
+        for signal in (post_save, post_delete):
+            signal.connect(
+                _invalidar_analytics_por_escritura,
+                sender=model,
+                dispatch_uid=f"invalidar_analytics_{tabla}_{signal is post_save}",
+            )
+
+
+_conectar_invalidacion_analytics()
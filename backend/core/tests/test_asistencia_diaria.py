@@ -0,0 +1,144 @@
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import (
+    Asistencia,
+    AsistenciaDiaria,
+    Bloque,
+    BloqueDeFechas,
+    Cohorte,
+    Estudiante,
+    Inscripcion,
+    Modulo,
+    Programa,
+)
+from core.services.asistencia_diaria_service import ResumenAsistenciaService
+
+
+class AsistenciaDiariaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        self.bloque = Bloque.objects.create(programa=self.programa, nombre="Bloque 1")
+        self.modulo = Modulo.objects.create(bloque=self.bloque, nombre="Modulo 1")
+        calendario = BloqueDeFechas.objects.create(nombre="Calendario")
+        self.cohorte_2024 = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario,
+            nombre="Cohorte 2024", fecha_inicio=date(2024, 3, 1),
+        )
+        self.cohorte_2025 = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario,
+            nombre="Cohorte 2025", fecha_inicio=date(2025, 3, 1),
+        )
+        self.estudiantes = [
+            Estudiante.objects.create(email=f"a{i}@example.com", apellido=f"Ap{i}", nombre="N", dni=f"3100000{i}")
+            for i in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for est in self.estudiantes:
+                Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte_2024)
+
+    def _asistencia(self, est, fecha, presente):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Asistencia.objects.create(estudiante=est, modulo=self.modulo, fecha=fecha, presente=presente)
+
+    def _fila(self, fecha, cohorte=None):
+        return AsistenciaDiaria.objects.get(modulo=self.modulo, fecha=fecha, cohorte=cohorte or self.cohorte_2024)
+
+    def test_escrituras_mantienen_el_resumen(self):
+        dia = date(2024, 4, 1)
+        a0 = self._asistencia(self.estudiantes[0], dia, True)
+        self._asistencia(self.estudiantes[1], dia, False)
+        self.assertEqual((self._fila(dia).presentes, self._fila(dia).total), (1, 2))
+
+        a0.presente = False
+        with self.captureOnCommitCallbacks(execute=True):
+            a0.save()
+        self.assertEqual((self._fila(dia).presentes, self._fila(dia).total), (0, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a0.delete()
+        self.assertEqual(self._fila(dia).total, 1)
+
+    def test_cambio_de_fecha_recalcula_ambos_dias(self):
+        a0 = self._asistencia(self.estudiantes[0], date(2024, 4, 1), True)
+        a0.fecha = date(2024, 4, 8)
+        with self.captureOnCommitCallbacks(execute=True):
+            a0.save()
+
+        self.assertFalse(AsistenciaDiaria.objects.filter(fecha=date(2024, 4, 1)).exists())
+        self.assertEqual(self._fila(date(2024, 4, 8)).presentes, 1)
+
+    def test_cohorte_segun_fecha_e_inscripciones(self):
+        est = self.estudiantes[0]
+        self._asistencia(est, date(2025, 4, 1), True)
+        self.assertEqual(self._fila(date(2025, 4, 1)).total, 1)
+
+        # Se reinscribe en la cohorte 2025: sus asistencias de 2025 pasan a esa cohorte.
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte_2025)
+        self.assertEqual(self._fila(date(2025, 4, 1), cohorte=self.cohorte_2025).total, 1)
+        self.assertFalse(AsistenciaDiaria.objects.filter(cohorte=self.cohorte_2024).exists())
+
+    def test_inscripcion_recalcula_solo_su_programa(self):
+        est = self.estudiantes[0]
+        self._asistencia(est, date(2024, 4, 1), True)
+        otro = Programa.objects.create(codigo="OTR", nombre="Otro")
+        cohorte_otro = Cohorte.objects.create(
+            programa=otro, bloque=Bloque.objects.create(programa=otro, nombre="B"),
+            bloque_fechas=self.cohorte_2024.bloque_fechas, nombre="Otra",
+        )
+        with patch.object(ResumenAsistenciaService, "recalcular") as recalcular:
+            with self.captureOnCommitCallbacks(execute=True):
+                Inscripcion.objects.create(estudiante=est, cohorte=cohorte_otro)
+        recalcular.assert_called_once_with(set())
+
+        # Pasarla a la cohorte 2025 del programa recalcula sus días en él.
+        inscripcion = Inscripcion.objects.get(estudiante=est, cohorte=cohorte_otro)
+        with patch.object(ResumenAsistenciaService, "recalcular") as recalcular:
+            with self.captureOnCommitCallbacks(execute=True):
+                inscripcion.cohorte = self.cohorte_2025
+                inscripcion.save()
+        recalcular.assert_called_once_with({(self.modulo.id, date(2024, 4, 1))})
+
+    def test_recalcular_solo_toca_las_claves(self):
+        dias = [date(2024, 4, 1), date(2024, 4, 8), date(2024, 4, 15)]
+        for dia in dias:
+            self._asistencia(self.estudiantes[0], dia, True)
+        # El día del medio queda dentro del rango de fechas pero no se recalcula.
+        AsistenciaDiaria.objects.filter(fecha=dias[1]).update(total=99)
+        ResumenAsistenciaService.recalcular({(self.modulo.id, dias[0]), (self.modulo.id, dias[2])})
+        self.assertEqual([self._fila(dia).total for dia in dias], [1, 99, 1])
+
+    def test_comando_reconstruir(self):
+        # Registros cargados sin ejecutar los callbacks: el resumen queda desactualizado.
+        for est in self.estudiantes:
+            Asistencia.objects.create(estudiante=est, modulo=self.modulo, fecha=date(2024, 5, 1), presente=True)
+        self.assertFalse(AsistenciaDiaria.objects.exists())
+
+        call_command("reconstruir_asistencia_diaria", stdout=StringIO())
+
+        self.assertEqual((self._fila(date(2024, 5, 1)).presentes, self._fila(date(2024, 5, 1)).total), (3, 3))
+
+    def test_endpoint_attendance_lee_el_resumen(self):
+        for i, est in enumerate(self.estudiantes):
+            self._asistencia(est, date(2024, 4, 1), i != 0)
+            self._asistencia(est, date(2024, 4, 9), True)
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        with self.assertNumQueries(3):  # sesión/usuario + 2 agregados sobre AsistenciaDiaria
+            data = client.get(f"/api/v2/analytics/attendance?programa_id={self.programa.id}&group_by=week").json()
+
+        self.assertEqual(data["overall"], {"total": 6, "presentes": 5, "rate": 5 / 6})
+        self.assertEqual([s["total"] for s in data["series"]], [3, 3])
+        self.assertEqual(data["series"][0]["period"], "2024-04-01")
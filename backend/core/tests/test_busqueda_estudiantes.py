@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Estudiante, TerminoBusqueda
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+from core.utils.busqueda import palabras, terminos_estudiante
+
+
+class NormalizacionBusquedaTests(TestCase):
+    def test_sin_acentos_y_digitos_unidos(self):
+        self.assertEqual(palabras("Muñoz  PÉREZ"), ["munoz", "perez"])
+        self.assertEqual(palabras("30.123.456"), ["30123456"])
+
+    def test_terminos_de_email_y_telefono(self):
+        terminos = terminos_estudiante("Núñez", "José", "jose.nunez@mail.com", "30123456", "3434567890")
+        self.assertTrue({"nunez", "jose", "mail", "com", "30123456", "3434567890", "4567890"} <= terminos)
+
+
+class BusquedaEstudiantesTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.munoz = self._crear("Muñoz", "Ana", "30111222")
+            self.munozes = self._crear("Munozes", "Luis", "30111333")
+            self.garcia = self._crear("García", "Munir", "30111444")
+
+    def _crear(self, apellido, nombre, dni):
+        return Estudiante.objects.create(
+            email=f"{dni}@example.com", apellido=apellido, nombre=nombre, dni=dni, telefono="3434" + dni[-6:],
+        )
+
+    def _buscar(self, texto, **params):
+        resp = self.client.get("/api/v2/estudiantes", {"search": texto, **params})
+        self.assertEqual(resp.status_code, 200)
+        return [e["id"] for e in resp.json()]
+
+    def test_ignora_acentos(self):
+        self.assertEqual(self._buscar("munoz")[0], self.munoz.id)
+        self.assertIn(self.munoz.id, self._buscar("MUÑOZ"))
+
+    def test_ordena_por_relevancia(self):
+        # "munoz" exacto antes que el prefijo "munozes"; "munir" no empieza con "munoz".
+        self.assertEqual(self._buscar("munoz"), [self.munoz.id, self.munozes.id])
+        # Empatados en relevancia: el desempate es el orden alfabético de la base.
+        self.assertCountEqual(self._buscar("mun"), [self.munoz.id, self.munozes.id, self.garcia.id])
+
+    def test_todas_las_palabras_en_cualquier_campo(self):
+        self.assertEqual(self._buscar("ana munoz"), [self.munoz.id])
+        self.assertEqual(self._buscar("30.111.444"), [self.garcia.id])
+        self.assertEqual(self._buscar("unoz"), [])  # por prefijo de palabra, no por subcadena
+        self.assertEqual(self._buscar("4111333"), [self.munozes.id])  # teléfono sin característica
+        self.assertEqual(self._buscar("@@"), [])
+
+    def test_dni_parcial(self):
+        # Un número solo también se busca dentro del DNI; las coincidencias del índice van primero.
+        self.assertEqual(self._buscar("111333"), [self.munozes.id])
+        self.assertCountEqual(self._buscar("0111"), [self.munoz.id, self.munozes.id, self.garcia.id])
+        self.assertEqual(self._buscar("30111444")[0], self.garcia.id)
+        self.assertEqual(self._buscar("222"), [])  # menos de MIN_DIGITOS_DNI dígitos: solo por prefijo
+
+    def test_paginado_por_relevancia(self):
+        ids, cursor = [], None
+        while True:
+            resp = self.client.get("/api/v2/estudiantes", {"search": "mun", "limit": 1, **({"cursor": cursor} if cursor else {})})
+            ids += [e["id"] for e in resp.json()]
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertEqual(ids, self._buscar("mun"))
+
+    def test_edicion_reindexa(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.munoz.apellido = "Ibáñez"
+            self.munoz.save()
+        self.assertEqual(self._buscar("ibanez"), [self.munoz.id])
+        self.assertNotIn(self.munoz.id, self._buscar("munoz"))
+
+    def test_reconstruir(self):
+        TerminoBusqueda.objects.all().delete()
+        out = StringIO()
+        call_command("reconstruir_busqueda_estudiantes", stdout=out)
+        self.assertIn("[OK]", out.getvalue())
+        self.assertEqual(
+            list(BusquedaEstudiantesService.filtrar(Estudiante.objects.all(), "garcia").values_list("id", flat=True)),
+            [self.garcia.id],
+        )
@@ -0,0 +1,208 @@
+import threading
+import time
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Bloque, BloqueDeFechas, Cohorte, Estudiante, Examen, Modulo, Nota, Programa
+from core.services.precalentamiento_service import PrecalentamientoService
+from core.utils.cache_analytics import (
+    cache_analytics,
+    clave_analytics,
+    endpoint_analytics,
+    invalidar_analytics,
+    metricas_cache,
+    obtener_generaciones,
+)
+
+
+class CacheAnalyticsGeneracionesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.llamadas = 0
+
+        @cache_analytics(depends_on=("Nota",))
+        def endpoint(request, programa_id=None):
+            self.llamadas += 1
+            return {"llamada": self.llamadas}
+
+        self.endpoint = endpoint
+
+    def test_cachea_hasta_que_cambia_la_tabla(self):
+        self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": 1})
+        self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar_analytics("Nota")
+
+        self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": 2})
+
+    def test_otras_tablas_no_invalidan(self):
+        self.endpoint(None)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar_analytics("Asistencia")
+        self.endpoint(None)
+        self.assertEqual(self.llamadas, 1)
+
+    def test_escritura_de_nota_incrementa_generacion(self):
+        programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        modulo = Modulo.objects.create(bloque=Bloque.objects.create(programa=programa, nombre="B1"), nombre="M1")
+        examen = Examen.objects.create(modulo=modulo, tipo_examen=Examen.PARCIAL)
+        estudiante = Estudiante.objects.create(email="c@example.com", apellido="Cache", nombre="Ana", dni="30999888")
+        antes = obtener_generaciones(["Nota", "Asistencia"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.create(examen=examen, estudiante=estudiante, calificacion=7)
+
+        despues = obtener_generaciones(["Nota", "Asistencia"])
+        self.assertEqual(despues["Nota"], antes["Nota"] + 1)
+        self.assertEqual(despues["Asistencia"], antes["Asistencia"])
+
+    def test_sin_commit_no_invalida(self):
+        self.endpoint(None)
+        invalidar_analytics("Nota")  # el callback queda pendiente: la transacción no confirmó
+        self.endpoint(None)
+        self.assertEqual(self.llamadas, 1)
+
+    def test_tabla_desconocida(self):
+        with self.assertRaises(ValueError):
+            cache_analytics(depends_on=("Usuario",))
+
+
+class CacheAnalyticsEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_alta_de_estudiante_se_refleja_en_dashboard(self):
+        self.assertEqual(self.client.get("/api/v2/dashboard-stats").json()["active_students_count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Estudiante.objects.create(email="n@example.com", apellido="Nuevo", nombre="Ana", dni="30777666")
+
+        self.assertEqual(self.client.get("/api/v2/dashboard-stats").json()["active_students_count"], 1)
+
+
+class CacheAnalyticsEstampidaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.llamadas = 0
+
+        @cache_analytics(timeout=60, grace=60)
+        def endpoint_swr(request, programa_id=None):
+            self.llamadas += 1
+            return {"llamada": self.llamadas}
+
+        self.endpoint = endpoint_swr
+        self.key = clave_analytics("endpoint_swr", {"programa_id": 1})
+
+    def _vencer(self):
+        entrada = cache.get(self.key)
+        entrada["fresco_hasta"] = time.time() - 1
+        cache.set(self.key, entrada, 60)
+
+    def test_vencida_con_lock_ajeno_sirve_stale(self):
+        self.endpoint(None, programa_id=1)
+        self._vencer()
+        cache.add(f"{self.key}:lock", 1, 60)  # otro worker está recalculando
+
+        self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": 1})
+        self.assertEqual(self.llamadas, 1)
+        self.assertEqual(metricas_cache()["endpoint_swr"]["stale"], 1)
+
+    def test_vencida_sin_lock_recalcula(self):
+        self.endpoint(None, programa_id=1)
+        self._vencer()
+
+        self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": 2})
+        self.assertIsNone(cache.get(f"{self.key}:lock"))
+        self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": 2})
+        self.assertEqual(metricas_cache()["endpoint_swr"], {"hit": 1, "miss": 2, "stale": 0, "lock_wait": 0})
+
+    def test_clave_fria_espera_al_worker_con_lock(self):
+        cache.add(f"{self.key}:lock", 1, 60)
+
+        def otro_worker():
+            cache.set(self.key, {"valor": {"llamada": "otro"}, "fresco_hasta": time.time() + 60}, 60)
+            cache.delete(f"{self.key}:lock")
+
+        timer = threading.Timer(0.1, otro_worker)
+        timer.start()
+        try:
+            self.assertEqual(self.endpoint(None, programa_id=1), {"llamada": "otro"})
+        finally:
+            timer.join()
+        self.assertEqual(self.llamadas, 0)
+        self.assertEqual(metricas_cache()["endpoint_swr"]["lock_wait"], 1)
+
+    def test_error_del_endpoint_libera_el_lock(self):
+        @cache_analytics()
+        def endpoint_roto(request):
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            endpoint_roto(None)
+        self.assertIsNone(cache.get(f"{clave_analytics('endpoint_roto', {})}:lock"))
+
+
+class CacheAnalyticsPrecalentamientoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        self.bloque = Bloque.objects.create(programa=self.programa, nombre="B1")
+        calendario = BloqueDeFechas.objects.create(nombre="Calendario")
+        self.activa = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario, nombre="Activa", fecha_inicio=date(2025, 3, 1),
+        )
+        Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario, nombre="Cerrada",
+            fecha_inicio=date(2020, 3, 1), fecha_fin=date(2020, 12, 1),
+        )
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_combinaciones_por_endpoint(self):
+        tareas = PrecalentamientoService.tareas()
+        graph = [f for nombre, f in tareas if nombre == "courses_graph"]
+        # courses_graph exige programa_id; la cohorte cerrada no se precalienta.
+        self.assertEqual(graph, [
+            {"programa_id": self.programa.id},
+            {"programa_id": self.programa.id, "bloque_id": self.bloque.id},
+            {"programa_id": self.programa.id, "cohorte_id": self.activa.id},
+        ])
+        # analytics_attendance no acepta bloque_id.
+        attendance = [f for nombre, f in tareas if nombre == "analytics_attendance"]
+        self.assertNotIn({"programa_id": self.programa.id, "bloque_id": self.bloque.id}, attendance)
+        self.assertIn({}, attendance)
+
+    def test_request_usa_la_clave_precalentada(self):
+        out = StringIO()
+        call_command("warm_analytics", workers=1, endpoint=["dashboard_stats", "courses_graph"], stdout=out)
+        self.assertIn("[OK]", out.getvalue())
+        self.assertIn("0 con error", out.getvalue())
+
+        self.client.get("/api/v2/dashboard-stats", {"programa_id": self.programa.id})
+        self.client.get("/api/v2/analytics/courses-graph", {"programa_id": self.programa.id, "cohorte_id": self.activa.id})
+        metricas = metricas_cache()
+        self.assertEqual((metricas["dashboard_stats"]["hit"], metricas["dashboard_stats"]["miss"]), (1, 0))
+        self.assertEqual((metricas["courses_graph"]["hit"], metricas["courses_graph"]["miss"]), (1, 0))
+
+    def test_margen_solo_recalcula_lo_que_vence_o_cambio(self):
+        precalentar = endpoint_analytics("dashboard_stats").precalentar
+        self.assertTrue(precalentar(margen=900, programa_id=self.programa.id))
+        self.assertFalse(precalentar(margen=900, programa_id=self.programa.id))
+        # Vence dentro del margen: se refresca antes de que expire.
+        self.assertTrue(precalentar(margen=10**6, programa_id=self.programa.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Estudiante.objects.create(email="w@example.com", apellido="Warm", nombre="Ana", dni="30555444")
+        self.assertTrue(precalentar(margen=900, programa_id=self.programa.id))
@@ -0,0 +1,299 @@
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import CorreoSaliente, Estudiante, PreinscripcionTerciario
+from core.services.correo_saliente_service import CorreoSalienteService
+from core.services.email_service import (
+    enviar_correo_bienvenida_terciario,
+    enviar_correo_confirmacion_videojuegos,
+    enviar_correo_nivelacion,
+)
+from core.services.plantillas_correo import ADJUNTOS, adjunto, renderizar
+from core.utils.limitador_tasa import LimitadorTasa
+from core.utils.smtp_pool import POOL, PoolSMTP
+
+
+class BackendDePrueba(EmailBackend):
+    """locmem que cuenta las conexiones abiertas y falla para las direcciones de `rechazar`."""
+
+    aperturas = 0
+    rechazar = set()
+
+    def open(self):
+        BackendDePrueba.aperturas += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.rechazar:
+                raise ConnectionError("servidor no disponible")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    CFP_EMAIL_BACKEND="core.tests.test_correo_saliente.BackendDePrueba",
+    MAIL_MAX_ATTEMPTS=3,
+    MAIL_RETRY_BASE_SECONDS=60,
+    MAIL_WORKER_CONCURRENCY=1,
+)
+class CorreoSalienteTests(TestCase):
+    def setUp(self):
+        BackendDePrueba.aperturas = 0
+        BackendDePrueba.rechazar = set()
+        self.addCleanup(POOL.cerrar_todas)
+
+    def _encolar(self, email, **kwargs):
+        return CorreoSalienteService.encolar(CorreoSaliente.NIVELACION, [email], "Asunto", "<p>Hola</p>", **kwargs)
+
+    def test_enviar_correo_encola_y_el_worker_envia_en_una_conexion(self):
+        est = Estudiante.objects.create(email="vj@example.com", apellido="Pérez", nombre="Ana", dni="40000001")
+        self.assertTrue(enviar_correo_confirmacion_videojuegos(est.id))
+        adjunto = os.path.join(settings.BASE_DIR, "core", "resources", "emails", "Normas de Convivencia Digital.pdf")
+        self._encolar("otro@example.com", adjuntos=[adjunto, "/no/existe.pdf"])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(CorreoSaliente.objects.filter(estado=CorreoSaliente.PENDIENTE).count(), 2)
+
+        out = StringIO()
+        call_command("run_mail_worker", "--rate", "0", stdout=out)
+
+        self.assertIn("2 enviados, 0 con error", out.getvalue())
+        self.assertEqual(BackendDePrueba.aperturas, 1)
+        self.assertEqual([m.to for m in mail.outbox], [["vj@example.com"], ["otro@example.com"]])
+        self.assertEqual(mail.outbox[0].from_email, settings.CFP_FROM_EMAIL)
+        self.assertEqual(len(mail.outbox[1].attachments), 1)
+        self.assertFalse(CorreoSaliente.objects.exclude(estado=CorreoSaliente.ENVIADO).exists())
+
+    def test_encolar_no_consulta_gmail(self):
+        est = Estudiante.objects.create(email="niv@example.com", apellido="Sosa", nombre="Eva", dni="40000003")
+        with patch("core.services.email_service.GMAIL.servicio", side_effect=AssertionError("Gmail en el pedido")):
+            self.assertTrue(enviar_correo_nivelacion(est.id))
+        self.assertTrue(CorreoSaliente.objects.filter(tipo=CorreoSaliente.NIVELACION, destinatarios=["niv@example.com"]).exists())
+
+    def test_reintentos_con_espera_creciente(self):
+        BackendDePrueba.rechazar = {"falla@example.com"}
+        fallido = self._encolar("falla@example.com")
+        self._encolar("ok@example.com")
+
+        self.assertEqual(CorreoSalienteService.procesar_lote(10), (2, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        fallido.refresh_from_db()
+        self.assertEqual((fallido.estado, fallido.intentos), (CorreoSaliente.PENDIENTE, 1))
+        self.assertIn("servidor no disponible", fallido.ultimo_error)
+        espera = fallido.proximo_intento_at - timezone.now()
+        self.assertTrue(timedelta(seconds=50) < espera <= timedelta(seconds=60))
+
+        # Todavía no le toca: no se toma.
+        self.assertEqual(CorreoSalienteService.procesar_lote(10), (0, 0))
+
+        CorreoSaliente.objects.filter(pk=fallido.pk).update(proximo_intento_at=timezone.now())
+        CorreoSalienteService.procesar_lote(10)
+        fallido.refresh_from_db()
+        espera = fallido.proximo_intento_at - timezone.now()
+        self.assertTrue(timedelta(seconds=110) < espera <= timedelta(seconds=120))
+
+        CorreoSaliente.objects.filter(pk=fallido.pk).update(proximo_intento_at=timezone.now())
+        CorreoSalienteService.procesar_lote(10)
+        fallido.refresh_from_db()
+        self.assertEqual((fallido.estado, fallido.intentos), (CorreoSaliente.ERROR, 3))
+
+    def test_demora_constancia_y_lotes_colgados(self):
+        preinscripcion = PreinscripcionTerciario.objects.create(
+            email="ter@example.com", apellido="Gómez", nombre="Luz", dni="40000002", fecha_nacimiento=date(2000, 1, 1),
+            posee_pc=True, posee_internet=True,
+        )
+        self.assertTrue(enviar_correo_bienvenida_terciario(preinscripcion, demora_segundos=30))
+        correo = CorreoSaliente.objects.get(tipo=CorreoSaliente.BIENVENIDA_TERCIARIO)
+        self.assertEqual((correo.cuenta, correo.referencia_id), (CorreoSaliente.DEFAULT, preinscripcion.id))
+        self.assertEqual(CorreoSalienteService.procesar_lote(10), (0, 0))
+
+        CorreoSaliente.objects.filter(pk=correo.pk).update(proximo_intento_at=timezone.now())
+        self.assertEqual(CorreoSalienteService.procesar_lote(10), (1, 1))
+        self.assertEqual(mail.outbox[0].from_email, settings.TERCIARIO_FROM_EMAIL)
+        preinscripcion.refresh_from_db()
+        correo.refresh_from_db()
+        self.assertEqual(preinscripcion.correo_bienvenida_at, correo.enviado_at)
+
+        colgado = self._encolar("colgado@example.com")
+        CorreoSaliente.objects.filter(pk=colgado.pk).update(
+            estado=CorreoSaliente.ENVIANDO, tomado_at=timezone.now() - timedelta(days=1),
+        )
+        self.assertEqual(CorreoSalienteService.liberar_colgados(), 1)
+        self.assertEqual(CorreoSalienteService.procesar_lote(10), (1, 1))
+
+    def test_aprobacion_masiva_deshace_solo_las_filas_que_fallan(self):
+        for i in range(3):
+            PreinscripcionTerciario.objects.create(
+                email=f"ter{i}@example.com", apellido="Gómez", nombre="Luz", dni=f"4100000{i}",
+                fecha_nacimiento=date(2000, 1, 1), posee_pc=True, posee_internet=True,
+            )
+
+        def inscribir(preinscripcion):
+            Estudiante.objects.create(email=preinscripcion.email, apellido="Gómez", nombre="Luz", dni=preinscripcion.dni)
+            if preinscripcion.dni == "41000001":
+                raise RuntimeError("Moodle no responde")
+            return preinscripcion.dni != "41000002"  # sin cohorte de HD
+
+        out = StringIO()
+        with patch("core.management.commands.aprobar_y_enviar_terciario._inscribir_hd", side_effect=inscribir):
+            call_command("aprobar_y_enviar_terciario", stdout=out)
+        estados = dict(PreinscripcionTerciario.objects.values_list("dni", "estado"))
+        self.assertEqual(estados["41000000"], "aprobada")
+        self.assertNotEqual(estados["41000001"], "aprobada")
+        self.assertNotEqual(estados["41000002"], "aprobada")
+        # Lo que escribió la fila fallida se deshizo con su savepoint.
+        self.assertEqual(list(Estudiante.objects.values_list("dni", flat=True)), ["41000000"])
+        self.assertIn("[OK] 1 preinscripciones aprobadas, 2 con error", out.getvalue())
+        self.assertIn("Moodle no responde", out.getvalue())
+
+    def test_envio_concurrente_registra_todos_los_resultados(self):
+        BackendDePrueba.rechazar = {"falla@example.com"}
+        for i in range(5):
+            self._encolar(f"p{i}@example.com")
+        self._encolar("falla@example.com")
+
+        self.assertEqual(CorreoSalienteService.procesar_lote(10, concurrencia=3), (6, 5))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CorreoSaliente.objects.filter(estado=CorreoSaliente.ENVIADO).count(), 5)
+        self.assertEqual(CorreoSaliente.objects.get(destinatarios=["falla@example.com"]).intentos, 1)
+
+
+class LimitadorTasaTests(TestCase):
+    def test_rafaga_y_despues_el_ritmo(self):
+        reloj = [0.0]
+        esperas = []
+
+        def dormir(segundos):
+            esperas.append(segundos)
+            reloj[0] += segundos
+
+        limitador = LimitadorTasa(60, rafaga=3, reloj=lambda: reloj[0], dormir=dormir)
+        for _ in range(3):
+            self.assertEqual(limitador.esperar(), 0)
+        # Balde vacío: una ficha por segundo.
+        self.assertAlmostEqual(limitador.esperar(), 1.0)
+        # El tiempo que pasó (p. ej. lo que tardó el servidor) ya cuenta para la ficha siguiente.
+        reloj[0] += 0.75
+        self.assertAlmostEqual(limitador.esperar(), 0.25)
+        # Tras un rato sin envíos se recupera la ráfaga, no más.
+        reloj[0] += 10
+        for _ in range(3):
+            self.assertEqual(limitador.esperar(), 0)
+        self.assertAlmostEqual(limitador.esperar(), 1.0)
+        self.assertEqual(len(esperas), 3)
+
+
+class _SMTPFalso:
+    def __init__(self):
+        self.codigo_noop = 250
+
+    def noop(self):
+        return self.codigo_noop, b"OK"
+
+
+class _BackendSMTPFalso:
+    def __init__(self, cuenta):
+        self.connection = None
+
+    def open(self):
+        self.connection = _SMTPFalso()
+
+    def close(self):
+        self.connection = None
+
+
+@override_settings(
+    CFP_EMAIL_BACKEND="core.tests.test_correo_saliente.BackendDePrueba",
+    MAIL_SMTP_POOL_SIZE=2,
+    MAIL_SMTP_IDLE_SECONDS=120,
+    MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION=2,
+)
+class PoolSMTPTests(TestCase):
+    def setUp(self):
+        BackendDePrueba.aperturas = 0
+        BackendDePrueba.rechazar = set()
+        self.addCleanup(POOL.cerrar_todas)
+
+    def test_sesiones_reutilizadas_entre_lotes_y_renovadas_al_agotarse(self):
+        for i in range(3):
+            CorreoSalienteService.encolar(CorreoSaliente.NIVELACION, [f"p{i}@example.com"], "Asunto", "<p>Hola</p>")
+        self.assertEqual(CorreoSalienteService.procesar_lote(1), (1, 1))
+        self.assertEqual(CorreoSalienteService.procesar_lote(1), (1, 1))
+        self.assertEqual(BackendDePrueba.aperturas, 1)
+        # La sesión ya mandó MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION mensajes: el tercero abre otra.
+        self.assertEqual(CorreoSalienteService.procesar_lote(1), (1, 1))
+        self.assertEqual(BackendDePrueba.aperturas, 2)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_no_presta_sesiones_cortadas_ni_ociosas(self):
+        pool = PoolSMTP()
+        sesion = pool.tomar("cfp", _BackendSMTPFalso)
+        pool.devolver("cfp", sesion)
+        self.assertIs(pool.tomar("cfp", _BackendSMTPFalso), sesion)
+
+        pool.devolver("cfp", sesion)
+        sesion.backend.connection.codigo_noop = 421
+        self.assertIsNot(pool.tomar("cfp", _BackendSMTPFalso), sesion)
+        self.assertIsNone(sesion.backend.connection)
+
+        otra = pool.tomar("cfp", _BackendSMTPFalso)
+        pool.devolver("cfp", otra)
+        otra.usada_at -= 121
+        self.assertIsNot(pool.tomar("cfp", _BackendSMTPFalso), otra)
+
+
+class PlantillasCorreoTests(TestCase):
+    def setUp(self):
+        self.addCleanup(ADJUNTOS.limpiar)
+
+    def test_renderizar_con_contexto(self):
+        contexto = {
+            "nombre": "<Ana>",
+            "es_menor": True,
+            "tutor_nombre": "Luis",
+            "trayectos": [{"programa": "Programador de Nivel III", "bloque": "Bloque 1"}],
+        }
+        asunto, cuerpo = renderizar(CorreoSaliente.CONFIRMACION_PREINSCRIPCION, contexto)
+        self.assertEqual(asunto, "Preinscripcion Programador de Nivel III para menor de edad")
+        self.assertIn("&lt;Ana&gt;", cuerpo)
+        self.assertIn("<li><strong>Programador de Nivel III</strong> (Bloque 1)</li>", cuerpo)
+        self.assertIn("número de Luis", cuerpo)
+
+        asunto, cuerpo = renderizar(CorreoSaliente.CONFIRMACION_PREINSCRIPCION, {**contexto, "es_menor": False})
+        self.assertEqual(asunto, "Confirmación de Preinscripción - CFP Malvinas Argentinas")
+        self.assertIn("revisar el PDF adjunto", cuerpo)
+        for tipo, _ in CorreoSaliente.TIPOS:
+            self.assertTrue(renderizar(tipo, {"nombre": "Ana"})[0])
+
+    def test_adjuntos_desde_cache_acotado(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        rutas = []
+        for nombre in ("a.pdf", "b.pdf"):
+            rutas.append(os.path.join(directorio, nombre))
+            with open(rutas[-1], "wb") as archivo:
+                archivo.write(b"%PDF" + nombre.encode() * 100)
+
+        nombre, contenido, mimetype = adjunto(rutas[0])
+        self.assertEqual((nombre, mimetype), ("a.pdf", "application/pdf"))
+        self.assertIs(adjunto(rutas[0])[1], contenido)
+
+        with override_settings(MAIL_ATTACHMENT_CACHE_BYTES=len(contenido) + 10):
+            adjunto(rutas[1])
+            # No entran los dos: se descartó el menos usado.
+            self.assertIsNot(adjunto(rutas[0])[1], contenido)
+
+        with open(rutas[0], "wb") as archivo:
+            archivo.write(b"%PDF nuevo")
+        os.utime(rutas[0], (0, 0))
+        self.assertEqual(adjunto(rutas[0])[1], b"%PDF nuevo")
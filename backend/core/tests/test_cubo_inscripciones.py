@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import (
+    Bloque,
+    BloqueDeFechas,
+    Cohorte,
+    CuboInscripcion,
+    Estudiante,
+    Inscripcion,
+    Modulo,
+    Programa,
+)
+from core.services.cubo_inscripciones_service import CuboInscripcionesService
+from core.services.dashboard_service import DashboardService
+
+
+class CuboInscripcionesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        self.bloque = Bloque.objects.create(programa=self.programa, nombre="Bloque 1")
+        self.modulos = [Modulo.objects.create(bloque=self.bloque, nombre=f"Modulo {i}") for i in range(3)]
+        calendario = BloqueDeFechas.objects.create(nombre="Calendario")
+        self.cohorte = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario,
+            nombre="Cohorte 1", fecha_inicio=date(2024, 3, 1),
+        )
+        self.n = 0
+
+    def _inscribir(self, cuando, modulos=3):
+        """Estudiante inscripto en `modulos` módulos, con alta en la fecha indicada."""
+        self.n += 1
+        est = Estudiante.objects.create(email=f"c{self.n}@example.com", apellido=f"Ap{self.n}", nombre="N", dni=f"3200000{self.n}")
+        with self.captureOnCommitCallbacks(execute=True):
+            for modulo in self.modulos[:modulos]:
+                Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte, modulo=modulo)
+            Inscripcion.objects.filter(estudiante=est).update(
+                created_at=timezone.make_aware(datetime.combine(cuando, datetime.min.time()).replace(hour=12))
+            )
+            CuboInscripcionesService.programar_recalculo([est.id])
+        return est
+
+    def test_agrupa_inscripciones_del_mismo_estudiante(self):
+        est = self._inscribir(date(2024, 3, 5))
+        fila = CuboInscripcion.objects.get(estudiante=est)
+        self.assertEqual(fila.inscripciones, 3)
+        self.assertEqual((fila.fecha, fila.mes, fila.anio), (date(2024, 3, 5), date(2024, 3, 1), 2024))
+        self.assertEqual((fila.programa_id, fila.bloque_id, fila.estado), (self.programa.id, self.bloque.id, Inscripcion.PREINSCRIPTO))
+
+    def test_update_masivo_de_estado_se_refleja(self):
+        est = self._inscribir(date(2024, 3, 5))
+        est.estatus = "Regular"
+        with self.captureOnCommitCallbacks(execute=True):
+            est.save()  # activate_inscripciones_on_regular pasa a CURSANDO con .update()
+        self.assertEqual(
+            list(CuboInscripcion.objects.filter(estudiante=est).values_list("estado", "inscripciones")),
+            [(Inscripcion.CURSANDO, 3)],
+        )
+
+    def test_series_y_tendencia_anual(self):
+        self._inscribir(date(2024, 3, 5))
+        self._inscribir(date(2024, 4, 20), modulos=2)
+        self._inscribir(date(2025, 3, 2), modulos=1)
+
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        data = client.get(f"/api/v2/analytics/enrollments?programa_id={self.programa.id}&date_from=2024-03-06").json()
+        self.assertEqual(data["total"], 3)
+        self.assertEqual(data["series"], [{"period": "2024-04-01", "count": 2}, {"period": "2025-03-01", "count": 1}])
+
+        stats = DashboardService.estadisticas(bloque_id=self.bloque.id)
+        self.assertEqual(stats["yearly_trend"], [{"year": "2024", "count": 2}, {"year": "2025", "count": 1}])
+
+    def test_comando_reconstruir(self):
+        est = self._inscribir(date(2024, 3, 5))
+        CuboInscripcion.objects.all().delete()
+
+        call_command("reconstruir_cubo_inscripciones", "--batch-size", "1", stdout=StringIO())
+
+        self.assertEqual(CuboInscripcion.objects.get(estudiante=est).inscripciones, 3)
@@ -0,0 +1,98 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import (
+    Asistencia,
+    Bloque,
+    BloqueDeFechas,
+    Cohorte,
+    Estudiante,
+    Examen,
+    Inscripcion,
+    Modulo,
+    Nota,
+    Programa,
+)
+from core.services.dashboard_service import DashboardService
+
+# Presupuesto de consultas de DashboardService.estadisticas (ver docstring del servicio).
+QUERY_BUDGET = 8
+
+
+class DashboardServiceTests(TestCase):
+    def setUp(self):
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        self.bloque = Bloque.objects.create(programa=self.programa, nombre="Bloque 1")
+        self.modulo = Modulo.objects.create(bloque=self.bloque, nombre="Modulo 1")
+        self.parcial = Examen.objects.create(modulo=self.modulo, tipo_examen=Examen.PARCIAL)
+        self.final = Examen.objects.create(bloque=self.bloque, tipo_examen=Examen.FINAL_SINC)
+        calendario = BloqueDeFechas.objects.create(nombre="Calendario")
+        self.cohorte_vieja = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario,
+            nombre="Cohorte 2024", fecha_inicio=date(2024, 3, 1),
+        )
+        self.cohorte_nueva = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=calendario,
+            nombre="Cohorte 2025", fecha_inicio=date(2025, 3, 1),
+        )
+        self.n = 0
+
+    def _poblar(self, cantidad):
+        for _ in range(cantidad):
+            self.n += 1
+            with self.captureOnCommitCallbacks(execute=True):
+                est = Estudiante.objects.create(
+                    email=f"est{self.n}@example.com", apellido=f"Apellido{self.n}", nombre="Nombre", dni=f"4000{self.n:04d}",
+                )
+                Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte_vieja, modulo=self.modulo)
+                Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte_nueva)
+                Asistencia.objects.create(estudiante=est, modulo=self.modulo, fecha=date(2025, 4, 1), presente=self.n % 2 == 0)
+                Nota.objects.create(examen=self.parcial, estudiante=est, calificacion=7)
+                Nota.objects.create(examen=self.final, estudiante=est, calificacion=8 if self.n % 2 else 3)
+
+    def test_cantidad_fija_de_consultas(self):
+        filtros = [{}, {"programa_id": self.programa.id}, {"cohorte_id": self.cohorte_nueva.id}]
+        for volumen in (2, 20):
+            self._poblar(volumen)
+            for kwargs in filtros:
+                with self.subTest(volumen=volumen, **kwargs), self.assertNumQueries(QUERY_BUDGET):
+                    DashboardService.estadisticas(**kwargs)
+
+    def test_deduplica_estudiantes_por_programa(self):
+        self._poblar(4)
+        stats = DashboardService.estadisticas()
+
+        self.assertEqual(stats["active_students_count"], 4)
+        # Cada estudiante tiene dos inscripciones, pero cuenta una vez en su cohorte más reciente.
+        self.assertEqual(
+            stats["active_breakdown"],
+            [{"name": "Programa", "count": 4, "cohorts": [{"name": "Cohorte 2025", "count": 4}]}],
+        )
+        # Aprobaron el final los estudiantes impares (egreso automático por ProgresoPrograma).
+        self.assertEqual(stats["graduated_students_count"], 2)
+        self.assertEqual(stats["graduated_breakdown"][0]["count"], 2)
+        self.assertEqual(stats["attendance_rate"], 50.0)
+        self.assertEqual(stats["pass_rate"], 75.0)
+
+    def test_egresado_explicito(self):
+        self._poblar(1)
+        est = Estudiante.objects.create(email="egr@example.com", apellido="Egresada", nombre="Ana", dni="49999999")
+        Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte_vieja, estado=Inscripcion.EGRESADO)
+
+        stats = DashboardService.estadisticas(cohorte_id=self.cohorte_vieja.id)
+        self.assertEqual(stats["graduated_students_count"], 2)
+
+
+class DashboardEndpointTests(TestCase):
+    def test_dashboard_stats_responde(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        resp = client.get("/api/v2/dashboard-stats")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["active_students_count"], 0)
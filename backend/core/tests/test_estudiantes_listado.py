@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Bloque, BloqueDeFechas, Cohorte, Estudiante, Inscripcion, Modulo, Programa
+
+
+class ListadoEstudiantesTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        bloque = Bloque.objects.create(programa=programa, nombre="Bloque 1")
+        self.modulo = Modulo.objects.create(bloque=bloque, nombre="Modulo 1")
+        self.cohorte = Cohorte.objects.create(
+            programa=programa, bloque=bloque, bloque_fechas=BloqueDeFechas.objects.create(nombre="Cal"), nombre="C1",
+        )
+        # Apellidos y nombres repetidos: el id desempata el orden.
+        nombres = [("Gómez", "Ana"), ("Álvarez", "Luis"), ("Gómez", "Ana"), ("Pérez", "Eva"), ("Gómez", "Bruno")]
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, (apellido, nombre) in enumerate(nombres):
+                est = Estudiante.objects.create(email=f"l{i}@example.com", apellido=apellido, nombre=nombre, dni=f"3400000{i}")
+                Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte, modulo=self.modulo)
+        # El orden de referencia es el del listado completo (depende de la collation de la base).
+        self.orden = [e["id"] for e in self.client.get("/api/v2/estudiantes").json()]
+
+    def _recorrer(self, **params):
+        ids, cursor, paginas = [], None, 0
+        while True:
+            resp = self.client.get("/api/v2/estudiantes", {**params, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(resp.status_code, 200)
+            ids += [e["id"] for e in resp.json()]
+            paginas += 1
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                return ids, paginas
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        ids, paginas = self._recorrer(limit=2)
+        self.assertEqual(ids, self.orden)
+        self.assertEqual(paginas, 3)
+
+    def test_paginas_con_filtro_de_inscripcion(self):
+        ids, _ = self._recorrer(limit=2, cohorte_id=self.cohorte.id)
+        self.assertEqual(ids, self.orden)
+
+    def test_sin_limit_devuelve_todo(self):
+        resp = self.client.get("/api/v2/estudiantes")
+        self.assertEqual(len(resp.json()), 5)
+        self.assertNotIn("X-Next-Cursor", resp.headers)
+        gomez = [e["id"] for e in resp.json() if e["apellido"] == "Gómez" and e["nombre"] == "Ana"]
+        self.assertEqual(gomez, sorted(gomez))
+        self.assertEqual(resp.json()[0]["trayectos"], ["Programa (Bloque 1)"])
+
+    def test_conteo_exacto_y_estimado(self):
+        resp = self.client.get("/api/v2/estudiantes", {"limit": 2, "count": "exact"})
+        self.assertEqual((resp.headers["X-Total-Count"], resp.headers["X-Total-Count-Estimated"]), ("5", "false"))
+
+        with mock.patch("core.api.estudiantes.TOPE_CONTEO_ESTIMADO", 3):
+            resp = self.client.get("/api/v2/estudiantes", {"limit": 2, "count": "estimate"})
+        self.assertEqual((resp.headers["X-Total-Count"], resp.headers["X-Total-Count-Estimated"]), ("3", "true"))
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get("/api/v2/estudiantes", {"cursor": "no-es-un-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/v2/estudiantes", {"limit": 2, "count": "todos"}).status_code, 400)
@@ -0,0 +1,119 @@
+import base64
+import re
+import zlib
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Bloque, BloqueDeFechas, Cohorte, Estudiante, Examen, Inscripcion, Modulo, Nota, Programa
+from core.services.export_estudiantes_service import ExportEstudiantesService
+from core.services.export_service import ExportService
+from core.utils.informe_pdf import anchos_columnas
+
+
+class ExportExcelTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        for i in range(3):
+            Estudiante.objects.create(email=f"x{i}@example.com", apellido=f"Apellido{i}", nombre="Ana", dni=f"3700000{i}")
+
+    def test_generate_excel_desde_generador(self):
+        filas = ({"apellido": f"A{i}", "dni": str(i), "extra": "x"} for i in range(1000))
+        contenido = ExportService.generate_excel(filas, ["apellido", "dni"], {"apellido": "Apellido"})
+        ws = load_workbook(BytesIO(contenido), read_only=True).active
+        valores = list(ws.values)
+        self.assertEqual(valores[0], ("Apellido", "dni"))
+        self.assertEqual(len(valores), 1001)
+        self.assertEqual(valores[-1], ("A999", "999"))
+
+    def test_endpoint_descarga_streaming(self):
+        resp = self.client.post(
+            "/api/v2/estudiantes/export/",
+            {"columns": ["apellido", "dni", "fecha_inscripcion"], "format": "excel"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertIn('filename="estudiantes.xlsx"', resp["Content-Disposition"])
+        ws = load_workbook(BytesIO(b"".join(resp.streaming_content)), read_only=True).active
+        valores = list(ws.values)
+        self.assertEqual(valores[0], ("Apellido", "DNI", "Fecha Inscripción"))
+        self.assertEqual(sorted(v[1] for v in valores[1:]), ["37000000", "37000001", "37000002"])
+
+    def test_modulos_aprobados_cursando_y_pendientes(self):
+        programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        bloque = Bloque.objects.create(programa=programa, nombre="Bloque 1")
+        cohorte = Cohorte.objects.create(
+            programa=programa, bloque=bloque, bloque_fechas=BloqueDeFechas.objects.create(nombre="Cal"), nombre="C1",
+        )
+        m1 = Modulo.objects.create(bloque=bloque, nombre="Algebra")
+        m2 = Modulo.objects.create(bloque=bloque, nombre="Redes")
+        est = Estudiante.objects.get(dni="37000001")
+        for modulo in (m1, m2):
+            Inscripcion.objects.create(estudiante=est, cohorte=cohorte, modulo=modulo, estado=Inscripcion.CURSANDO)
+        examen = Examen.objects.create(modulo=m1, tipo_examen=Examen.PARCIAL)
+        # Dos notas aprobadas del mismo módulo: aparece una sola vez.
+        Nota.objects.create(examen=examen, estudiante=est, calificacion=8, aprobado=True)
+        Nota.objects.create(examen=examen, estudiante=est, calificacion=9, aprobado=True, intento=2)
+
+        resp = self.client.post(
+            "/api/v2/estudiantes/export/",
+            {"dni": "37000001", "columns": ["materias_aprobadas", "materias_cursando", "materias_pendientes"]},
+            format="json",
+        )
+        ws = load_workbook(BytesIO(b"".join(resp.streaming_content)), read_only=True).active
+        self.assertEqual(
+            list(ws.values)[1],
+            ("Programa - Algebra", "Programa - Algebra, Programa - Redes", "Programa - Redes"),
+        )
+
+    def test_filas_por_paginas_de_keyset(self):
+        # Apellidos y nombres repetidos: el id desempata entre páginas.
+        for i in range(3, 8):
+            Estudiante.objects.create(email=f"x{i}@example.com", apellido="Apellido1", nombre="Ana", dni=f"3700000{i}")
+        esperado = list(Estudiante.objects.order_by("apellido", "nombre", "id").values_list("dni", flat=True))
+        with patch("core.services.export_estudiantes_service.EXPORT_CHUNK_SIZE", 2):
+            # 4 páginas de 2 (estudiantes + aprobados + cursando) y la consulta vacía que cierra.
+            with self.assertNumQueries(4 * 3 + 1):
+                filas = list(ExportEstudiantesService.filas(Estudiante.objects.filter(is_active=True)))
+        self.assertEqual([f["dni"] for f in filas], esperado)
+
+    def test_generate_pdf_por_bloques(self):
+        filas = ({"apellido": f"Apellido{i}", "dni": str(i), "email": "x" * (i % 200)} for i in range(300))
+        contenido = ExportService.generate_pdf(filas, ["apellido", "dni", "email"], {"apellido": "Apellido"})
+        self.assertTrue(contenido.startswith(b"%PDF"))
+        self.assertGreater(len(re.findall(rb"/Type /Page\b(?!s)", contenido)), 5)
+        # Cada fila se dibuja una sola vez, en orden, a lo largo de todas las páginas.
+        textos = b"".join(
+            zlib.decompress(base64.a85decode(stream.strip().removesuffix(b"~>")))
+            for stream in re.findall(rb"stream\r?\n(.*?)endstream", contenido, re.S)
+        )
+        self.assertEqual([int(n) for n in re.findall(rb"\(Apellido(\d+)\) Tj", textos)], list(range(300)))
+        vacio = ExportService.generate_pdf(iter(()), ["apellido"], {})
+        self.assertEqual(len(re.findall(rb"/Type /Page\b(?!s)", vacio)), 1)
+
+    def test_anchos_columnas_recorta_solo_las_anchas(self):
+        muestra = [["123", "x" * 400], ["45678", "corto"]]
+        angosta, ancha = anchos_columnas(["DNI", "Módulos"], muestra, 500)
+        self.assertAlmostEqual(angosta + ancha, 500)
+        self.assertEqual(angosta, 40)
+        self.assertEqual(ancha, 460)
+        # Si todo entra, el sobrante se reparte.
+        self.assertAlmostEqual(sum(anchos_columnas(["A", "B"], [["1", "2"]], 500)), 500)
+
+    def test_endpoint_pdf_streaming(self):
+        resp = self.client.post(
+            "/api/v2/estudiantes/export/", {"columns": ["apellido", "dni"], "format": "pdf"}, format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        self.assertIn('filename="estudiantes.pdf"', resp["Content-Disposition"])
+        self.assertTrue(b"".join(resp.streaming_content).startswith(b"%PDF"))
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Estudiante, TrabajoExportacion
+from core.services.exportaciones_service import ExportacionesService
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
+class ExportacionesTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        for i in range(3):
+            Estudiante.objects.create(email=f"x{i}@example.com", apellido=f"Apellido{i}", nombre="Ana", dni=f"3800000{i}")
+
+    def _pedir(self, tipo="estudiantes", **parametros):
+        parametros.setdefault("columns", ["apellido", "dni"])
+        return self.client.post("/api/v2/exportaciones", {"tipo": tipo, "parametros": parametros}, format="json")
+
+    def test_crear_reutiliza_el_trabajo_vigente(self):
+        resp = self._pedir()
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()["estado"], TrabajoExportacion.PENDIENTE)
+        self.assertIsNone(resp.json()["descarga_url"])
+
+        repetido = self._pedir()
+        self.assertEqual(repetido.status_code, 200)
+        self.assertEqual(repetido.json()["id"], resp.json()["id"])
+        self.assertEqual(self._pedir(dni="38000001").status_code, 201)
+
+        self.assertEqual(self._pedir(tipo="otro").status_code, 400)
+        self.assertEqual(self._pedir(anio="no-es-un-numero").status_code, 400)
+
+    def test_worker_genera_el_archivo_y_se_descarga(self):
+        trabajo_id = self._pedir(format="excel").json()["id"]
+        self.assertEqual(self.client.get(f"/api/v2/exportaciones/{trabajo_id}/descarga").status_code, 409)
+
+        call_command("procesar_exportaciones", stdout=StringIO())
+
+        estado = self.client.get(f"/api/v2/exportaciones/{trabajo_id}").json()
+        self.assertEqual(estado["estado"], TrabajoExportacion.LISTO)
+        self.assertEqual((estado["procesadas"], estado["total"]), (3, 3))
+        self.assertEqual(estado["descarga_url"], f"/api/v2/exportaciones/{trabajo_id}/descarga")
+
+        trabajo = TrabajoExportacion.objects.get(pk=trabajo_id)
+        ws = load_workbook(trabajo.archivo.path, read_only=True).active
+        valores = list(ws.values)
+        self.assertEqual(valores[0], ("Apellido", "DNI"))
+        self.assertEqual(len(valores), 4)
+
+        resp = self.client.get(estado["descarga_url"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["X-Accel-Redirect"], f"/protected_media/{trabajo.archivo.name}")
+        self.assertEqual(resp["Content-Disposition"], 'attachment; filename="estudiantes.xlsx"')
+
+    def test_cambio_de_datos_genera_otro_trabajo(self):
+        primero = self._pedir().json()["id"]
+        ExportacionesService.procesar_pendientes()
+        with self.captureOnCommitCallbacks(execute=True):
+            Estudiante.objects.create(email="n@example.com", apellido="Nuevo", nombre="Eva", dni="38000009")
+        resp = self._pedir()
+        self.assertEqual(resp.status_code, 201)
+        self.assertNotEqual(resp.json()["id"], primero)
+
+    def test_historico_cursos(self):
+        trabajo_id = self._pedir(tipo="historico_cursos", tipo_dato="asistencia").json()["id"]
+        ExportacionesService.procesar_pendientes()
+        trabajo = TrabajoExportacion.objects.get(pk=trabajo_id)
+        self.assertEqual(trabajo.estado, TrabajoExportacion.LISTO)
+        self.assertEqual(trabajo.nombre_archivo, "historico_asistencia.xlsx")
+        encabezado = next(load_workbook(trabajo.archivo.path, read_only=True).active.values)
+        self.assertEqual(encabezado[-1], "Presente")
+
+    def test_vencidos_y_colgados(self):
+        self._pedir()
+        ExportacionesService.procesar_pendientes()
+        vencido = TrabajoExportacion.objects.get()
+        ruta = vencido.archivo.path
+        TrabajoExportacion.objects.filter(pk=vencido.pk).update(expira_at=timezone.now() - timedelta(seconds=1))
+        colgado = TrabajoExportacion.objects.create(
+            tipo=TrabajoExportacion.ESTUDIANTES, clave="x", estado=TrabajoExportacion.EN_PROCESO,
+            iniciado_at=timezone.now() - timedelta(days=1),
+        )
+
+        self.assertEqual(ExportacionesService.limpiar_vencidos(), 1)
+        self.assertFalse(os.path.exists(ruta))
+        self.assertFalse(TrabajoExportacion.objects.filter(pk=vencido.pk).exists())
+        colgado.refresh_from_db()
+        self.assertEqual(colgado.estado, TrabajoExportacion.ERROR)
+        self.assertIsNotNone(colgado.expira_at)
@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import httplib2
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, override_settings
+
+from core.backends import GmailOAuth2Backend
+from core.utils.gmail_cliente import ClienteGmail
+
+SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
+
+
+class _HttpFalso:
+    """Stand-in local de httplib2.Http: registra los pedidos y responde 200."""
+
+    def __init__(self):
+        self.pedidos = []
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        self.pedidos.append((method, uri, headers or {}))
+        return httplib2.Response({"status": 200}), b'{"id": "1"}'
+
+
+class _RespuestaToken:
+    status = 200
+    headers = {}
+
+    def __init__(self, token):
+        self.data = json.dumps({"access_token": token, "expires_in": 3600}).encode()
+
+
+class _TransporteFalso:
+    """Endpoint de tokens de Google falso: cuenta las renovaciones."""
+
+    renovaciones = 0
+
+    def __call__(self, url, method="GET", body=None, headers=None, **kwargs):
+        _TransporteFalso.renovaciones += 1
+        return _RespuestaToken(f"token-{_TransporteFalso.renovaciones}")
+
+
+@override_settings(GMAIL_TOKEN_REFRESH_MARGIN_SECONDS=300)
+class ClienteGmailTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        self.ruta = os.path.join(directorio, "gmail_token.json")
+        self.http = _HttpFalso()
+        _TransporteFalso.renovaciones = 0
+
+    def _token(self, token, vence_en):
+        expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=vence_en)
+        with open(self.ruta, "w") as archivo:
+            json.dump({
+                "token": token,
+                "refresh_token": "refresh",
+                "client_id": "id",
+                "client_secret": "secreto",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "scopes": SCOPES,
+                "expiry": expiry.isoformat() + "Z",
+            }, archivo)
+
+    def _cliente(self):
+        return ClienteGmail(self.ruta, SCOPES, fabrica_http=lambda: self.http, transporte=_TransporteFalso)
+
+    def test_servicio_cacheado_sin_descubrimiento_por_red(self):
+        self._token("vigente", 3600)
+        cliente = self._cliente()
+        servicio = cliente.servicio()
+        self.assertIs(cliente.servicio(), servicio)
+
+        servicio.users().messages().send(userId="me", body={"raw": "eA"}).execute()
+        servicio.users().messages().send(userId="me", body={"raw": "eQ"}).execute()
+        # Solo los dos envíos: ni el documento de descubrimiento ni renovaciones.
+        self.assertEqual([p[0] for p in self.http.pedidos], ["POST", "POST"])
+        self.assertIn("/gmail/v1/users/me/messages/send", self.http.pedidos[0][1])
+        self.assertEqual(self.http.pedidos[0][2]["authorization"], "Bearer vigente")
+        self.assertEqual(_TransporteFalso.renovaciones, 0)
+
+    def test_renueva_antes_de_vencer_y_guarda_con_lock(self):
+        self._token("viejo", 120)
+        cliente = self._cliente()
+        servicio = cliente.servicio()
+        self.assertEqual(_TransporteFalso.renovaciones, 1)
+        self.assertTrue(os.path.exists(f"{self.ruta}.lock"))
+        with open(self.ruta) as archivo:
+            self.assertEqual(json.load(archivo)["token"], "token-1")
+
+        self.assertIs(cliente.servicio(), servicio)
+        self.assertEqual(_TransporteFalso.renovaciones, 1)
+        servicio.users().messages().send(userId="me", body={"raw": "eA"}).execute()
+        self.assertEqual(self.http.pedidos[-1][2]["authorization"], "Bearer token-1")
+
+    def test_usa_el_token_que_renovo_otro_proceso(self):
+        self._token("viejo", 120)
+        cliente = self._cliente()
+        cliente.credenciales()
+        self._token("de-otro-proceso", 3600)
+        os.utime(self.ruta, (0, 0))
+        self.assertEqual(cliente.credenciales().token, "de-otro-proceso")
+        self.assertEqual(_TransporteFalso.renovaciones, 1)
+
+    def test_sin_token(self):
+        self.assertIsNone(self._cliente().servicio())
+
+    def test_backend_reutiliza_el_servicio(self):
+        self._token("vigente", 3600)
+        with patch("core.services.email_service.GMAIL", self._cliente()):
+            mensajes = [EmailMessage("Asunto", "Hola", "cfp@example.com", [f"p{i}@example.com"]) for i in range(2)]
+            self.assertEqual(GmailOAuth2Backend().send_messages(mensajes), 2)
+            self.assertEqual(GmailOAuth2Backend().send_messages(mensajes[:1]), 1)
+        self.assertEqual(len(self.http.pedidos), 3)
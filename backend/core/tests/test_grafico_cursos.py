@@ -0,0 +1,117 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import (
+    Bloque,
+    BloqueDeFechas,
+    Cohorte,
+    Estudiante,
+    Examen,
+    Inscripcion,
+    Modulo,
+    Programa,
+    SemanaConfig,
+)
+from core.services.grafico_cursos_service import GraficoCursosService
+
+
+class GraficoCursosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        self.calendario = BloqueDeFechas.objects.create(nombre="Calendario")
+        SemanaConfig.objects.create(bloque=self.calendario, tipo=SemanaConfig.PARCIAL, orden=2)
+        SemanaConfig.objects.create(bloque=self.calendario, tipo=SemanaConfig.CLASE, orden=1)
+        self.bloque = self._bloque("Bloque 1")
+        self.cohorte = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque, bloque_fechas=self.calendario,
+            nombre="Cohorte 1", fecha_inicio=date(2025, 3, 3),
+        )
+        self.n = 0
+
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def _bloque(self, nombre, modulos=2):
+        bloque = Bloque.objects.create(programa=self.programa, nombre=nombre)
+        for i in range(modulos):
+            Modulo.objects.create(bloque=bloque, nombre=f"{nombre} M{i}")
+        Examen.objects.create(bloque=bloque, tipo_examen=Examen.FINAL_SINC, fecha=date(2025, 7, 1))
+        Examen.objects.create(bloque=bloque, tipo_examen=Examen.FINAL_VIRTUAL, fecha=date(2025, 6, 1))
+        return bloque
+
+    def _estudiante(self, estatus, estado, cohorte=None):
+        """Estudiante inscripto en todos los módulos del bloque con el estado indicado."""
+        self.n += 1
+        est = Estudiante.objects.create(
+            email=f"g{self.n}@example.com", apellido=f"Ap{self.n}", nombre="N", dni=f"3300000{self.n}", estatus=estatus,
+        )
+        for modulo in self.bloque.modulos.all():
+            Inscripcion.objects.create(estudiante=est, cohorte=cohorte or self.cohorte, modulo=modulo, estado=estado)
+        return est
+
+    def test_conteos_por_cohorte(self):
+        self._estudiante("Regular", Inscripcion.CURSANDO)
+        self._estudiante("Regular", Inscripcion.PREINSCRIPTO)
+        self._estudiante("Libre", Inscripcion.PAUSADO)
+        self._estudiante("Baja", Inscripcion.EGRESADO)
+
+        stats = GraficoCursosService.construir(self.programa)["cohortes"][0]
+        self.assertEqual(stats["estudiantes_total"], 4)
+        self.assertEqual((stats["estatus_regular"], stats["estatus_libre"], stats["estatus_baja"]), (2, 1, 1))
+        # Inscriptos y activos cuentan inscripciones (dos módulos por estudiante).
+        self.assertEqual((stats["estado_inscripto"], stats["estado_activo"]), (2, 2))
+        self.assertEqual((stats["estado_pausado"], stats["estado_egresado"]), (1, 1))
+        self.assertEqual((stats["total_semanas"], stats["tipos_semana"]), (2, {"CLASE": 1, "PARCIAL": 1}))
+
+    def test_cohorte_sin_inscripciones_tiene_conteos_en_cero(self):
+        stats = GraficoCursosService.construir(self.programa)["cohortes"][0]
+        self.assertEqual(stats["estudiantes_total"], 0)
+        self.assertEqual(stats["estado_activo"], 0)
+
+    def test_consultas_no_crecen_con_bloques_ni_cohortes(self):
+        self._estudiante("Regular", Inscripcion.CURSANDO)
+        with self.assertNumQueries(6):
+            GraficoCursosService.construir(self.programa)
+
+        for i in range(2, 6):
+            bloque = self._bloque(f"Bloque {i}", modulos=3)
+            Cohorte.objects.create(
+                programa=self.programa, bloque=bloque, bloque_fechas=self.calendario,
+                nombre=f"Cohorte {i}", fecha_inicio=date(2025, i, 1),
+            )
+        with self.assertNumQueries(6):
+            data = GraficoCursosService.construir(self.programa)
+        self.assertEqual(len(data["tree"]), 5)
+        self.assertEqual(len(data["cohortes"]), 5)
+
+    def test_endpoint_mantiene_el_contrato(self):
+        self._estudiante("Regular", Inscripcion.CURSANDO)
+        resp = self.client.get(
+            "/api/v2/analytics/courses-graph",
+            {"programa_id": self.programa.id, "cohorte_id": self.cohorte.id},
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+
+        nodo = data["tree"][0]
+        self.assertEqual([m["nombre"] for m in nodo["children"]], ["Bloque 1 M0", "Bloque 1 M1"])
+        self.assertEqual([f["tipo_examen"] for f in nodo["finales"]], [Examen.FINAL_VIRTUAL, Examen.FINAL_SINC])
+        self.assertEqual(data["cohorte"]["stats"], data["cohortes"][0])
+        self.assertEqual(
+            [(s["orden"], s["fecha"]) for s in data["cohorte"]["secuencia"]],
+            [(1, "2025-03-03"), (2, "2025-03-10")],
+        )
+
+    def test_cohorte_fuera_de_filtro_da_404(self):
+        resp = self.client.get(
+            "/api/v2/analytics/courses-graph",
+            {"programa_id": self.programa.id, "cohorte_id": self.cohorte.id, "anio": 2020},
+        )
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,107 @@
+import csv
+import json
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Asistencia, Bloque, BloqueDeFechas, Cohorte, Estudiante, Examen, Inscripcion, Modulo, Nota, Programa
+from core.utils.columnar import codificar_columnas
+
+
+def _filas(columnar):
+    """Decodifica una respuesta columnar a la lista de filas."""
+    columnas = [
+        [columnar["dictionaries"][h][v] for v in col] if h in columnar["dictionaries"] else col
+        for h, col in zip(columnar["headers"], columnar["columns"])
+    ]
+    return [dict(zip(columnar["headers"], valores)) for valores in zip(*columnas)]
+
+
+class HistoricoCursosTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        programa = Programa.objects.create(codigo="PRG", nombre="Programación")
+        bloque = Bloque.objects.create(programa=programa, nombre="Bloque 1")
+        cohorte = Cohorte.objects.create(
+            programa=programa, bloque=bloque, bloque_fechas=BloqueDeFechas.objects.create(nombre="Cal"), nombre="Cohorte A",
+        )
+        modulo = Modulo.objects.create(bloque=bloque, nombre="Módulo Redes")
+        examen = Examen.objects.create(modulo=modulo, tipo_examen=Examen.PARCIAL)
+        for i in range(3):
+            est = Estudiante.objects.create(email=f"h{i}@example.com", apellido=f"Núñez{i}", nombre="Ana", dni=f"3900000{i}")
+            Inscripcion.objects.create(estudiante=est, cohorte=cohorte, modulo=modulo, estado=Inscripcion.CURSANDO)
+            Nota.objects.create(examen=examen, estudiante=est, calificacion=7 + i, aprobado=True)
+            Asistencia.objects.create(estudiante=est, modulo=modulo, fecha=date(2026, 3, 2), presente=bool(i % 2))
+        self.url = f"/api/v2/historico-cursos?programa_id={programa.id}"
+
+    def test_ndjson_igual_al_json(self):
+        for tipo in ("notas", "asistencia"):
+            esperado = self.client.get(f"{self.url}&tipo_dato={tipo}").json()
+            resp = self.client.get(f"{self.url}&tipo_dato={tipo}&format=ndjson")
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(resp.streaming)
+            self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+            contenido = b"".join(resp.streaming_content).decode("utf-8")
+            filas = [json.loads(linea) for linea in contenido.splitlines()]
+            self.assertEqual(filas, esperado["rows"])
+            self.assertEqual(filas[0]["Cohorte"], "Coh. A")
+
+    def test_csv(self):
+        esperado = self.client.get(f"{self.url}&tipo_dato=asistencia").json()
+        resp = self.client.get(f"{self.url}&tipo_dato=asistencia&format=csv")
+        self.assertTrue(resp.streaming)
+        self.assertIn('filename="historico_asistencia.csv"', resp["Content-Disposition"])
+        contenido = b"".join(resp.streaming_content).decode("utf-8-sig")
+        filas = list(csv.reader(StringIO(contenido)))
+        self.assertEqual(filas[0], esperado["headers"])
+        self.assertEqual(len(filas), 4)
+        self.assertEqual(filas[1][1], "Núñez0, Ana")
+        self.assertEqual(self.client.get(f"{self.url}&format=xml").status_code, 400)
+
+    def test_paginas_de_keyset_mantienen_el_orden(self):
+        examen = Examen.objects.first()
+        # Mismo apellido y nombre que otro estudiante, y una nota sin fecha: los desempates del keyset.
+        est = Estudiante.objects.create(email="h9@example.com", apellido="Núñez1", nombre="Ana", dni="39000009")
+        Inscripcion.objects.create(estudiante=est, cohorte=Cohorte.objects.first(), modulo=examen.modulo, estado=Inscripcion.CURSANDO)
+        for intento in (1, 2):
+            Nota.objects.create(examen=examen, estudiante=est, calificacion=5, aprobado=False, intento=intento)
+        Nota.objects.filter(estudiante=est, intento=2).update(fecha_calificacion=None)
+
+        esperado = self.client.get(f"{self.url}&tipo_dato=notas").json()["rows"]
+        with patch("core.api.historicos.HISTORICO_CHUNK_SIZE", 2):
+            resp = self.client.get(f"{self.url}&tipo_dato=notas&format=ndjson")
+            filas = [json.loads(linea) for linea in b"".join(resp.streaming_content).decode("utf-8").splitlines()]
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas, esperado)
+        # La nota sin fecha va primero entre los homónimos; después, por fecha.
+        self.assertEqual([f["DNI"] for f in filas][1:4], ["39000009", "39000001", "39000009"])
+
+    def test_historico_en_columnas(self):
+        filas = self.client.get(f"{self.url}&tipo_dato=asistencia").json()
+        resp = self.client.get(f"{self.url}&tipo_dato=asistencia&layout=columns")
+        self.assertEqual(resp.status_code, 200)
+        columnar = resp.json()
+        self.assertEqual(columnar["headers"], filas["headers"])
+        self.assertEqual(columnar["length"], 3)
+        self.assertEqual(columnar["dictionaries"]["Presente"], ["No", "Sí"])
+        self.assertEqual(_filas(columnar), filas["rows"])
+        self.assertEqual(self.client.get(f"{self.url}&layout=tabla").status_code, 400)
+
+    def test_listados_slim_en_columnas(self):
+        for url in ("/api/v2/examenes/notas", "/api/v2/examenes/asistencias"):
+            filas = self.client.get(url).json()
+            columnar = self.client.get(url, {"layout": "columns"}).json()
+            self.assertEqual(_filas(columnar), filas)
+
+    def test_reduce_el_tamanio(self):
+        filas = [{"ID": i, "Programa": "Prog. N III", "Cohorte": f"Coh. {i % 3}", "Presente": "Sí"} for i in range(1000)]
+        columnar = codificar_columnas(filas, ["ID", "Programa", "Cohorte", "Presente"], ("Programa", "Cohorte", "Presente"))
+        self.assertEqual(columnar["dictionaries"]["Cohorte"], ["Coh. 0", "Coh. 1", "Coh. 2"])
+        self.assertLess(len(json.dumps(columnar)) * 3, len(json.dumps(filas)))
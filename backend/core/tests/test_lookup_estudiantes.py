@@ -0,0 +1,102 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Estudiante
+from core.services import lookup_estudiantes_service
+from core.services.busqueda_estudiantes_service import BusquedaEstudiantesService
+from core.services.lookup_estudiantes_service import CAMBIO_KEY, VERSION_KEY, IndicePrefijos, LookupEstudiantesService
+
+
+class IndicePrefijosTests(TestCase):
+    def test_prefijos_sin_acentos_y_exactos_primero(self):
+        indice = IndicePrefijos()
+        indice.cargar([
+            (1, "Muñoz", "Ana", "30111222"),
+            (2, "Munozes", "Luis", "30111333"),
+            (3, "García", "Munir", "30111444"),
+        ])
+        self.assertEqual([e["id"] for e in indice.buscar("munoz", 10)], [1, 2])
+        self.assertEqual([e["id"] for e in indice.buscar("MUÑO", 10)], [1, 2])
+        self.assertEqual([e["id"] for e in indice.buscar("mun ana", 10)], [1])
+        self.assertEqual([e["id"] for e in indice.buscar("30.111.4", 10)], [3])
+        self.assertEqual(len(indice.buscar("mun", 2)), 2)
+
+        indice.quitar(1)
+        indice.poner(2, "Ibáñez", "Luis", "30111333")
+        self.assertEqual([e["id"] for e in indice.buscar("mun", 10)], [3])
+        self.assertEqual(indice.buscar("iba", 10)[0]["apellido"], "Ibáñez")
+
+
+class LookupEstudiantesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        self.munoz = self._crear("Muñoz", "Ana", "30111222")
+        self.garcia = self._crear("García", "Munir", "30111444")
+        LookupEstudiantesService.construir()
+
+    def tearDown(self):
+        lookup_estudiantes_service._indice = None
+
+    def _crear(self, apellido, nombre, dni):
+        return Estudiante.objects.create(email=f"{dni}@example.com", apellido=apellido, nombre=nombre, dni=dni)
+
+    def _lookup(self, texto, **params):
+        resp = self.client.get("/api/v2/estudiantes/lookup", {"q": texto, **params})
+        self.assertEqual(resp.status_code, 200)
+        return [e["id"] for e in resp.json()]
+
+    def test_endpoint(self):
+        resp = self.client.get("/api/v2/estudiantes/lookup", {"q": "garc"})
+        self.assertEqual(resp.json(), [{"id": self.garcia.id, "apellido": "García", "nombre": "Munir", "dni": "30111444"}])
+        self.assertEqual(len(self._lookup("mun", limit=1)), 1)
+        self.assertEqual(self._lookup(""), [])
+
+    def test_sin_consultas_a_la_base(self):
+        with self.assertNumQueries(0):
+            self.assertCountEqual([e["id"] for e in LookupEstudiantesService.buscar("mun")], [self.munoz.id, self.garcia.id])
+
+    def test_cambios_se_propagan_por_el_registro(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = self._crear("Munárriz", "Pedro", "30111555")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.munoz.apellido = "Ibáñez"
+            self.munoz.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/v2/estudiantes/bulk_archive/", {"ids": [self.garcia.id]}, format="json")
+        self.assertEqual(self._lookup("mun"), [nuevo.id])
+        self.assertEqual(self._lookup("ibanez"), [self.munoz.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo.delete()
+        self.assertEqual(self._lookup("mun"), [])
+
+    def test_hueco_en_el_registro_reconstruye_en_segundo_plano(self):
+        Estudiante.objects.filter(id=self.garcia.id).update(apellido="Ibarra")
+        cache.incr(VERSION_KEY)  # cambio sin entrada (p. ej. evicción)
+        with patch.object(LookupEstudiantesService, "solicitar_reconstruccion") as solicitar:
+            # Mientras se reconstruye se sigue respondiendo con el índice anterior.
+            self.assertEqual(self._lookup("ibarra"), [])
+            self.assertEqual(self._lookup("garc"), [self.garcia.id])
+        solicitar.assert_called()
+        version = cache.get(VERSION_KEY)
+        self.assertIsNone(cache.get(CAMBIO_KEY.format(version)))
+
+        LookupEstudiantesService.construir()  # lo que hace el hilo de fondo
+        self.assertEqual(self._lookup("ibarra"), [self.garcia.id])
+
+    def test_sin_indice_responde_desde_la_base(self):
+        lookup_estudiantes_service._indice = None
+        BusquedaEstudiantesService.reconstruir()
+        with patch.object(LookupEstudiantesService, "solicitar_reconstruccion") as solicitar:
+            self.assertEqual(self._lookup("mun"), [self.garcia.id, self.munoz.id])
+            self.assertEqual(self._lookup("muñoz"), [self.munoz.id])
+        solicitar.assert_called()
@@ -1,11 +1,23 @@
 import io
+import shutil
+import tempfile
 from unittest.mock import patch
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from core.models import Cohorte, Programa, Bloque, BloqueDeFechas, Estudiante, Modulo
 
+# Los documentos subidos en las preinscripciones van a un directorio temporal, no a backend/media.
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
 class PreinscripcionesPublicasTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
     def setUp(self):
         from django.core.cache import cache
         cache.clear()
@@ -0,0 +1,129 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import (
+    Bloque,
+    BloqueDeFechas,
+    Cohorte,
+    Estudiante,
+    Examen,
+    Inscripcion,
+    Nota,
+    Programa,
+    ProgresoBloque,
+    ProgresoPrograma,
+)
+from core.services.progreso_service import ProgresoService
+
+
+class ProgresoMaterializadoTests(TestCase):
+    def setUp(self):
+        self.estudiante = Estudiante.objects.create(
+            email="progreso@example.com", apellido="Gomez", nombre="Ana", dni="30111222"
+        )
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bloque1 = Bloque.objects.create(programa=self.programa, nombre="Bloque 1")
+            self.bloque2 = Bloque.objects.create(programa=self.programa, nombre="Bloque 2")
+        self.final1 = Examen.objects.create(bloque=self.bloque1, tipo_examen=Examen.FINAL_SINC)
+        self.final2 = Examen.objects.create(bloque=self.bloque2, tipo_examen=Examen.EQUIVALENCIA)
+        calendario = BloqueDeFechas.objects.create(nombre="Calendario")
+        self.cohorte = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque1, bloque_fechas=calendario, nombre="Cohorte 1"
+        )
+
+    def _aprobar(self, examen, calificacion=8):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Nota.objects.create(examen=examen, estudiante=self.estudiante, calificacion=calificacion)
+
+    def test_inscripcion_crea_fila_de_progreso(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.create(estudiante=self.estudiante, cohorte=self.cohorte)
+
+        fila = ProgresoBloque.objects.get(estudiante=self.estudiante, bloque=self.bloque1)
+        self.assertTrue(fila.inscripto)
+        self.assertFalse(fila.aprobado)
+        resumen = ProgresoPrograma.objects.get(estudiante=self.estudiante, programa=self.programa)
+        self.assertEqual((resumen.bloques_aprobados, resumen.bloques_requeridos), (0, 2))
+
+    def test_egreso_al_aprobar_todos_los_bloques(self):
+        self._aprobar(self.final1)
+        resumen = ProgresoPrograma.objects.get(estudiante=self.estudiante, programa=self.programa)
+        self.assertEqual(resumen.bloques_aprobados, 1)
+        self.assertFalse(resumen.completo)
+
+        self._aprobar(self.final2)
+        resumen = ProgresoPrograma.objects.get(estudiante=self.estudiante, programa=self.programa)
+        self.assertTrue(resumen.completo)
+
+    def test_nota_desaprobada_no_aprueba_bloque(self):
+        self._aprobar(self.final1, calificacion=4)
+        self.assertFalse(ProgresoBloque.objects.filter(bloque=self.bloque1, aprobado=True).exists())
+
+    def test_borrar_nota_revierte_aprobacion(self):
+        nota = self._aprobar(self.final1)
+        with self.captureOnCommitCallbacks(execute=True):
+            nota.delete()
+        self.assertFalse(ProgresoBloque.objects.filter(estudiante=self.estudiante).exists())
+
+    def test_nuevo_bloque_actualiza_requeridos(self):
+        self._aprobar(self.final1)
+        self._aprobar(self.final2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Bloque.objects.create(programa=self.programa, nombre="Bloque 3")
+
+        resumen = ProgresoPrograma.objects.get(estudiante=self.estudiante, programa=self.programa)
+        self.assertEqual(resumen.bloques_requeridos, 3)
+        self.assertFalse(resumen.completo)
+
+    def test_notas_de_una_transaccion_recalculan_una_vez(self):
+        otro = Estudiante.objects.create(email="otro@example.com", apellido="Paz", nombre="Luis", dni="30111333")
+        with patch.object(ProgresoService, "recalcular_estudiantes", wraps=ProgresoService.recalcular_estudiantes) as recalcular:
+            with self.captureOnCommitCallbacks(execute=True):
+                for estudiante in (self.estudiante, otro):
+                    Nota.objects.create(examen=self.final1, estudiante=estudiante, calificacion=8)
+                    Nota.objects.create(examen=self.final2, estudiante=estudiante, calificacion=8)
+        recalcular.assert_called_once_with({self.estudiante.id, otro.id})
+        self.assertEqual(ProgresoPrograma.objects.filter(completo=True).count(), 2)
+
+    def test_examen_que_pasa_a_final(self):
+        examen = Examen.objects.create(bloque=self.bloque1, tipo_examen=Examen.PARCIAL)
+        self._aprobar(examen)
+        self.assertFalse(ProgresoBloque.objects.filter(aprobado=True).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            examen.tipo_examen = Examen.FINAL_VIRTUAL
+            examen.save()
+        self.assertTrue(ProgresoBloque.objects.get(bloque=self.bloque1).aprobado)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            examen.bloque = self.bloque2
+            examen.save()
+        self.assertEqual(list(ProgresoBloque.objects.filter(aprobado=True).values_list("bloque", flat=True)), [self.bloque2.id])
+
+    def test_bloque_que_cambia_de_programa(self):
+        self._aprobar(self.final1)
+        otro_programa = Programa.objects.create(codigo="OTR", nombre="Otro")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bloque1.programa = otro_programa
+            self.bloque1.save()
+
+        self.assertEqual(ProgresoBloque.objects.get(bloque=self.bloque1).programa, otro_programa)
+        resumen = ProgresoPrograma.objects.get(estudiante=self.estudiante, programa=otro_programa)
+        self.assertEqual((resumen.bloques_aprobados, resumen.bloques_requeridos, resumen.completo), (1, 1, True))
+        self.assertEqual(Bloque.objects.filter(programa=self.programa).count(), 1)
+        self.assertFalse(ProgresoPrograma.objects.filter(programa=self.programa).exists())
+
+    def test_comando_reconstruir(self):
+        # Notas cargadas sin ejecutar los callbacks: la tabla queda desactualizada.
+        Nota.objects.create(examen=self.final1, estudiante=self.estudiante, calificacion=9)
+        Nota.objects.create(examen=self.final2, estudiante=self.estudiante, calificacion=7)
+        self.assertFalse(ProgresoPrograma.objects.exists())
+
+        call_command("reconstruir_progreso", stdout=StringIO())
+
+        self.assertEqual(ProgresoBloque.objects.filter(aprobado=True).count(), 2)
+        self.assertTrue(ProgresoPrograma.objects.get(estudiante=self.estudiante).completo)
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import ConfiguracionPreinscripcionVideojuegos, Estudiante, Programa
+
+
+class RespuestaCondicionalTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        Estudiante.objects.create(email="e@example.com", apellido="Paz", nombre="Ana", dni="36000000")
+        Programa.objects.create(codigo="PRG", nombre="Programa")
+
+    def _etag(self, url, **params):
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers["Cache-Control"], "private, no-cache")
+        return resp.headers["ETag"]
+
+    def test_304_sin_consultar_la_tabla(self):
+        etag = self._etag("/api/v2/estudiantes")
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.get("/api/v2/estudiantes", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+        self.assertEqual(resp.headers["ETag"], etag)
+        self.assertFalse([q for q in consultas.captured_queries if "core_estudiante" in q["sql"]])
+
+    def test_etag_cambia_con_los_datos_y_los_parametros(self):
+        etag = self._etag("/api/v2/estudiantes")
+        self.assertNotEqual(self._etag("/api/v2/estudiantes", search="paz"), etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Estudiante.objects.create(email="f@example.com", apellido="Sosa", nombre="Eva", dni="36000001")
+        resp = self.client.get("/api/v2/estudiantes", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()), 2)
+
+    def test_vista_sin_parametro_response(self):
+        etag = self._etag("/api/v2/programas")
+        self.assertEqual(self.client.get("/api/v2/programas", HTTP_IF_NONE_MATCH=f'"x", {etag}').status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Programa.objects.filter(codigo="PRG").first().save()
+        self.assertEqual(self.client.get("/api/v2/programas", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_metadata_depende_de_docentes(self):
+        etag = self._etag("/api/v2/horarios-cursada/metadata")
+        self.assertEqual(self.client.get("/api/v2/horarios-cursada/metadata", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        docente = User.objects.create_user(username="doc", password="pass1234")
+        with self.captureOnCommitCallbacks(execute=True):
+            docente.groups.add(Group.objects.get_or_create(name="Docente")[0])
+        self.assertNotEqual(self._etag("/api/v2/horarios-cursada/metadata"), etag)
+
+    def test_config_publica_versionada(self):
+        cliente = APIClient()
+        etag = self._etag("/api/v2/videojuegos/config")
+        self.assertEqual(cliente.get("/api/v2/videojuegos/config", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            cfg = ConfiguracionPreinscripcionVideojuegos.get()
+            cfg.preinscripcion_abierta = not cfg.preinscripcion_abierta
+            cfg.save()
+        self.assertEqual(cliente.get("/api/v2/videojuegos/config", HTTP_IF_NONE_MATCH=etag).status_code, 200)
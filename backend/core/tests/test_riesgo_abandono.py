@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import (
+    Asistencia,
+    AsistenciaSemanal,
+    Bloque,
+    BloqueDeFechas,
+    Cohorte,
+    Estudiante,
+    Inscripcion,
+    Modulo,
+    Programa,
+)
+
+REFERENCIA = date(2025, 5, 30)  # viernes
+
+
+class RiesgoAbandonoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        bloque = Bloque.objects.create(programa=self.programa, nombre="Bloque 1")
+        self.modulo = Modulo.objects.create(bloque=bloque, nombre="Modulo 1")
+        self.cohorte = Cohorte.objects.create(
+            programa=self.programa, bloque=bloque, bloque_fechas=BloqueDeFechas.objects.create(nombre="Cal"),
+            nombre="Cohorte 1", fecha_inicio=date(2025, 3, 1),
+        )
+        # regular: viene siempre | ausente: registros pero sin presencias recientes
+        # abandono: dejó de venir hace 6 semanas | nunca: no tiene asistencias
+        self.est = {}
+        for i, nombre in enumerate(["regular", "ausente", "abandono", "nunca"]):
+            est = Estudiante.objects.create(email=f"{nombre}@example.com", apellido=nombre.title(), nombre="N", dni=f"3300000{i}")
+            Inscripcion.objects.create(estudiante=est, cohorte=self.cohorte)
+            self.est[nombre] = est
+        Inscripcion.objects.update(created_at=datetime(2025, 3, 1, tzinfo=dt_timezone.utc))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for semana in range(8):
+                dia = REFERENCIA - timedelta(weeks=semana)
+                self._asistencia("regular", dia, True)
+                self._asistencia("ausente", dia, semana >= 4)
+                if semana >= 6:
+                    self._asistencia("abandono", dia, True)
+
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def _asistencia(self, nombre, fecha, presente):
+        Asistencia.objects.create(estudiante=self.est[nombre], modulo=self.modulo, fecha=fecha, presente=presente)
+
+    def _dropout(self, **params):
+        params = {"rule": "B", "date_to": REFERENCIA.isoformat(), "lookback_weeks": 3, **params}
+        resp = self.client.get("/api/v2/analytics/dropout", params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_indice_semanal(self):
+        fila = AsistenciaSemanal.objects.get(estudiante=self.est["abandono"], semana=date(2025, 4, 14))
+        self.assertEqual((fila.presentes, fila.total, fila.ultima_presencia), (1, 1, date(2025, 4, 18)))
+
+    def test_ranking_por_riesgo(self):
+        data = self._dropout()
+        self.assertEqual(data["overall"]["dropout"], 3)
+        # Empates de puntaje se ordenan por id.
+        self.assertEqual([e["apellido"] for e in data["at_risk"]], ["Abandono", "Nunca", "Ausente"])
+        self.assertEqual([e["riesgo"] for e in data["at_risk"]], [1.0, 1.0, 0.8333])
+        self.assertEqual(data["at_risk"][0]["dias_sin_asistir"], 42)
+        self.assertIsNone(data["at_risk"][1]["dias_sin_asistir"])
+
+    def test_paginacion_y_orden_ascendente(self):
+        data = self._dropout(page=2, page_size=2, sort="risk")
+        self.assertEqual(data["pagination"], {"page": 2, "page_size": 2, "total": 3})
+        self.assertEqual([e["apellido"] for e in data["at_risk"]], ["Nunca"])  # Ausente, Abandono, Nunca
+
+    def test_sort_invalido(self):
+        resp = self.client.get("/api/v2/analytics/dropout", {"rule": "B", "sort": "apellido"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_comando_reconstruir(self):
+        AsistenciaSemanal.objects.all().delete()
+        call_command("reconstruir_asistencia_semanal", stdout=StringIO())
+        self.assertEqual(AsistenciaSemanal.objects.filter(estudiante=self.est["regular"]).count(), 8)
@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Bloque, BloqueDeFechas, Cohorte, Estudiante, Inscripcion, Modulo, Programa
+
+
+class TrayectosResumenTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser(username="admin", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+        self.programa = Programa.objects.create(codigo="PRG", nombre="Programa")
+        self.bloque = Bloque.objects.create(programa=self.programa, nombre="Bloque 1")
+        self.bloque2 = Bloque.objects.create(programa=self.programa, nombre="Bloque 2")
+        self.modulo = Modulo.objects.create(bloque=self.bloque, nombre="Modulo 1")
+        self.cohorte = Cohorte.objects.create(
+            programa=self.programa, bloque=self.bloque2, bloque_fechas=BloqueDeFechas.objects.create(nombre="Cal"), nombre="C1",
+        )
+        self.est = Estudiante.objects.create(email="t@example.com", apellido="Paz", nombre="Ana", dni="35000000")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.con_modulo = Inscripcion.objects.create(estudiante=self.est, cohorte=self.cohorte, modulo=self.modulo)
+            self.sin_modulo = Inscripcion.objects.create(estudiante=self.est, cohorte=self.cohorte)
+
+    def _resumen(self):
+        self.est.refresh_from_db()
+        return self.est.trayectos_resumen
+
+    def test_alta_y_baja_de_inscripciones(self):
+        # El bloque del módulo tiene prioridad sobre el de la cohorte.
+        self.assertEqual(self._resumen(), ["Programa (Bloque 1)", "Programa (Bloque 2)"])
+        self.assertEqual(self.est.fecha_primera_inscripcion, self.con_modulo.created_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.con_modulo.delete()
+            self.sin_modulo.delete()
+        self.assertEqual(self._resumen(), [])
+        self.assertIsNone(self.est.fecha_primera_inscripcion)
+
+    def test_cambios_de_nombre(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bloque.nombre = "Bloque Uno"
+            self.bloque.save()
+            self.programa.nombre = "Programa Nuevo"
+            self.programa.save()
+        self.assertEqual(self._resumen(), ["Programa Nuevo (Bloque 2)", "Programa Nuevo (Bloque Uno)"])
+
+    def test_cohorte_cambia_de_bloque(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cohorte.bloque = self.bloque
+            self.cohorte.save()
+        self.assertEqual(self._resumen(), ["Programa (Bloque 1)"])
+
+    def test_listado_sin_consultar_inscripciones(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.get("/api/v2/estudiantes")
+        self.assertEqual(resp.json()[0]["trayectos"], ["Programa (Bloque 1)", "Programa (Bloque 2)"])
+        self.assertFalse([q for q in consultas.captured_queries if "core_inscripcion" in q["sql"]])
+
+    def test_guardar_instancia_vieja_no_pisa_el_resumen(self):
+        vieja = Estudiante.objects.get(pk=self.est.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.con_modulo.delete()
+        vieja.telefono = "2901123456"
+        vieja.save()
+        self.assertEqual(self._resumen(), ["Programa (Bloque 2)"])
+        self.assertEqual(self.est.telefono, "2901123456")
+
+    def test_reconstruir(self):
+        Estudiante.objects.update(trayectos_resumen=[], fecha_primera_inscripcion=None)
+        out = StringIO()
+        call_command("reconstruir_trayectos", stdout=out)
+        self.assertIn("[OK]", out.getvalue())
+        self.assertEqual(self._resumen(), ["Programa (Bloque 1)", "Programa (Bloque 2)"])
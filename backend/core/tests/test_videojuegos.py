@@ -1,12 +1,24 @@
+import shutil
+import tempfile
 from unittest.mock import patch
 from django.contrib.auth.models import User, Group
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.management import call_command
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from core.models import BloqueDeFechas, Programa, Bloque, Modulo, Cohorte, Estudiante, Inscripcion, ConfiguracionPreinscripcionVideojuegos
 
+# Los documentos subidos en las preinscripciones van a un directorio temporal, no a backend/media.
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL)
 class VideojuegosTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
     def setUp(self):
         from django.core.cache import cache
         cache.clear()
@@ -582,3 +594,42 @@ class VideojuegosTests(TestCase):
         # Try DELETE CFP grade -> should fail (403)
         resp = self.client.delete(f"/api/v2/videojuegos/notas/{cfp_grade.id}")
         self.assertEqual(resp.status_code, 403)
+
+    def test_aprobar_y_enviar_por_lotes(self):
+        """The bulk command approves pending VJ students in chunks and only enqueues their emails."""
+        from io import StringIO
+        from core.models import CorreoSaliente
+        vj_prog = Programa.objects.get(codigo="VJ")
+        cohorte = Cohorte.objects.filter(programa=vj_prog).first()
+        modulo = Modulo.objects.filter(bloque=cohorte.bloque).first()
+        estudiantes = []
+        for i, estado in enumerate(["PREINSCRIPTO", "PREINSCRIPTO", "PREINSCRIPTO", "CURSANDO", "LIBRE"]):
+            est = Estudiante.objects.create(
+                apellido=f"VJLote{i}", nombre="Test", dni=f"5555550{i}", email=f"vjlote{i}@example.com", estatus="Preinscripto"
+            )
+            Inscripcion.objects.create(estudiante=est, cohorte=cohorte, modulo=modulo, estado=estado)
+            estudiantes.append(est)
+        # A pending CFP inscription of an approved student is activated too (as the Regular signal does).
+        Inscripcion.objects.create(estudiante=estudiantes[0], cohorte=self.cfp_cohorte, modulo=self.cfp_modulo, estado="PREINSCRIPTO")
+
+        out = StringIO()
+        call_command('aprobar_y_enviar_videojuegos', '--chunk-size', '2', stdout=out)
+
+        self.assertIn("[2/3] Lote aprobado", out.getvalue())
+        self.assertIn("[OK] 3 estudiantes aprobados, 3 correos encolados", out.getvalue())
+        for est in estudiantes[:3]:
+            est.refresh_from_db()
+            self.assertEqual(est.estatus, "Regular")
+            self.assertFalse(est.inscripciones.filter(estado="PREINSCRIPTO").exists())
+        self.assertEqual(
+            sorted(CorreoSaliente.objects.filter(tipo=CorreoSaliente.ACEPTACION_VIDEOJUEGOS).values_list("destinatarios", flat=True)),
+            [[f"vjlote{i}@example.com"] for i in range(3)],
+        )
+        estudiantes[4].refresh_from_db()
+        self.assertEqual(estudiantes[4].estatus, "Preinscripto")
+
+        # Resumable: a second run finds nothing left and enqueues nothing.
+        out = StringIO()
+        call_command('aprobar_y_enviar_videojuegos', stdout=out)
+        self.assertIn("0 preinscripciones de Videojuegos pendientes", out.getvalue())
+        self.assertEqual(CorreoSaliente.objects.count(), 3)
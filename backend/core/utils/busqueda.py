@@ -0,0 +1,43 @@
+import re
+import unicodedata
+
+# Largo máximo de un término indexado (columna TerminoBusqueda.termino).
+LONGITUD_TERMINO = 64
+# Sufijos del teléfono que se indexan: permiten buscar el número sin característica.
+SUFIJOS_TELEFONO = (6, 7, 8)
+
+_SEPARADOR_DE_DIGITOS = re.compile(r"(?<=\d)[.\-\s](?=\d)")
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto) -> str:
+    """
+    Minúsculas, sin acentos ni diacríticos ("Muñoz" -> "munoz") y con los
+    grupos de dígitos unidos ("30.123.456" -> "30123456").
+    """
+    if not texto:
+        return ""
+    sin_acentos = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return _SEPARADOR_DE_DIGITOS.sub("", sin_acentos.lower())
+
+
+def palabras(texto) -> list:
+    """Palabras normalizadas de `texto`, en orden y sin repetir."""
+    vistas = []
+    for palabra in _PALABRA.findall(normalizar(texto)):
+        palabra = palabra[:LONGITUD_TERMINO]
+        if palabra not in vistas:
+            vistas.append(palabra)
+    return vistas
+
+
+def terminos_estudiante(apellido, nombre, email, dni, telefono) -> set:
+    """Términos del índice de búsqueda de un estudiante."""
+    terminos = set()
+    for valor in (apellido, nombre, email, dni):
+        terminos.update(palabras(valor))
+    digitos = re.sub(r"\D", "", telefono or "")
+    if digitos:
+        terminos.add(digitos[:LONGITUD_TERMINO])
+        terminos.update(digitos[-n:] for n in SUFIJOS_TELEFONO if len(digitos) > n)
+    return terminos
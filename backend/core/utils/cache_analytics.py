@@ -1,13 +1,165 @@
 import hashlib
+import inspect
 import logging
+import time
 from functools import wraps
 from django.core.cache import cache
 from django.conf import settings
+from django.db import transaction
 
 logger = logging.getLogger(__name__)
 
+# Tablas con contador de generación. Cada escritura (señales post_save /
+# post_delete en core/signals.py, o invalidar_analytics() tras un .update()
+# masivo) incrementa el contador y deja obsoletas las claves que dependen de él.
+# Además de las tablas de hechos se siguen las de estructura académica
+# (programas, bloques, calendarios), que aparecen como nombres en las respuestas.
+TABLAS_ANALYTICS = (
+    "Nota", "Asistencia", "Inscripcion", "Estudiante", "Cohorte",
+    "Programa", "Bloque", "Modulo", "Examen", "BloqueDeFechas", "SemanaConfig",
+)
 
-def cache_analytics(timeout: int = None):
+GEN_KEY_PREFIX = "analytics:gen:"
+
+
+def _gen_key(tabla: str) -> str:
+    return f"{GEN_KEY_PREFIX}{tabla}"
+
+
+def _generacion_inicial() -> int:
+    # Si Redis pierde el contador (flush/evicción) arrancamos de un valor nuevo,
+    # de modo que nunca se reutilice una generación que ya tenga claves cacheadas.
+    return time.time_ns()
+
+
+def obtener_generaciones(tablas) -> dict:
+    """Devuelve {tabla: generación} creando los contadores que falten."""
+    keys = {tabla: _gen_key(tabla) for tabla in tablas}
+    actuales = cache.get_many(list(keys.values()))
+    generaciones = {}
+    for tabla, key in keys.items():
+        gen = actuales.get(key)
+        if gen is None:
+            cache.add(key, _generacion_inicial(), None)
+            gen = cache.get(key)
+        generaciones[tabla] = gen
+    return generaciones
+
+
+def incrementar_generaciones(tablas):
+    for tabla in tablas:
+        key = _gen_key(tabla)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # El contador no existe todavía: se crea con un valor nuevo.
+            cache.add(key, _generacion_inicial(), None)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar analytics para {tabla}: {e}")
+
+
+def invalidar_analytics(*tablas):
+    """
+    Incrementa la generación de las tablas indicadas.
+
+    Se difiere a on_commit para que ningún request recalcule (y cachee con la
+    generación nueva) datos que todavía no están confirmados. Fuera de una
+    transacción se ejecuta en el acto.
+    """
+    for tabla in tablas:
+        if tabla not in TABLAS_ANALYTICS:
+            raise ValueError(f"Tabla sin contador de analytics: {tabla}")
+    transaction.on_commit(lambda: incrementar_generaciones(tablas))
+
+
+def clave_analytics(nombre: str, params: dict, tablas=()) -> str:
+    """
+    Clave de cache de un endpoint: nombre de la función + hash de sus
+    parámetros + hash de las generaciones actuales de las tablas de las que depende.
+    """
+    param_repr = repr(sorted(params.items()))
+    cache_key = f"analytics:{nombre}:{hashlib.md5(param_repr.encode('utf-8')).hexdigest()}"
+    if tablas:
+        generaciones = obtener_generaciones(tablas)
+        gen_repr = ":".join(f"{t}={generaciones[t]}" for t in sorted(tablas))
+        cache_key = f"{cache_key}:{hashlib.md5(gen_repr.encode('utf-8')).hexdigest()}"
+    return cache_key
+
+
+# --- Métricas del cache (hit / miss / stale / lock_wait) ---
+# Contadores en el propio cache, por endpoint, para poder ajustar TTL y gracia.
+
+TIPOS_METRICA = ("hit", "miss", "stale", "lock_wait")
+# {nombre: wrapper} de los endpoints cacheados (métricas y precalentamiento).
+_ENDPOINTS = {}
+
+
+def _registrar(nombre: str, tipo: str):
+    key = f"analytics:stats:{nombre}:{tipo}"
+    try:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+    except Exception as e:
+        logger.warning(f"No se pudo registrar métrica {key}: {e}")
+
+
+def endpoint_analytics(nombre: str):
+    """Wrapper cacheado de un endpoint por nombre de función (KeyError si no existe)."""
+    return _ENDPOINTS[nombre]
+
+
+def metricas_cache() -> dict:
+    """Devuelve {endpoint: {hit, miss, stale, lock_wait}} de los endpoints cacheados."""
+    keys = {
+        (nombre, tipo): f"analytics:stats:{nombre}:{tipo}"
+        for nombre in sorted(_ENDPOINTS)
+        for tipo in TIPOS_METRICA
+    }
+    valores = cache.get_many(list(keys.values()))
+    resultado = {}
+    for (nombre, tipo), key in keys.items():
+        resultado.setdefault(nombre, {})[tipo] = valores.get(key, 0)
+    return resultado
+
+
+def _tomar_lock(cache_key) -> bool:
+    """Lock de recálculo de `cache_key` (cache.add es atómico). Fail-open: ante error, calcula."""
+    lock_ttl = getattr(settings, "ANALYTICS_CACHE_LOCK_SECONDS", 60)
+    try:
+        return cache.add(f"{cache_key}:lock", 1, lock_ttl)
+    except Exception as e:
+        logger.warning(f"Cache lock falló para {cache_key}: {e}")
+        return True
+
+
+def _liberar_lock(cache_key):
+    try:
+        cache.delete(f"{cache_key}:lock")
+    except Exception as e:
+        logger.warning(f"No se pudo liberar el lock de {cache_key}: {e}")
+
+
+def _esperar_valor(cache_key):
+    """Espera a que el worker con el lock publique el valor (o se agote la espera)."""
+    espera = getattr(settings, "ANALYTICS_CACHE_LOCK_WAIT_SECONDS", 15)
+    intervalo = 0.05
+    limite = time.monotonic() + espera
+    try:
+        while time.monotonic() < limite:
+            time.sleep(intervalo)
+            entrada = cache.get(cache_key)
+            if entrada is not None:
+                return entrada
+            if cache.get(f"{cache_key}:lock") is None:
+                # El otro worker terminó (o falló) sin dejar valor.
+                return None
+            intervalo = min(intervalo * 2, 0.5)
+    except Exception as e:
+        logger.warning(f"Cache get falló esperando {cache_key}: {e}")
+    return None
+
+
+def cache_analytics(timeout: int = None, depends_on=None, grace: int = None):
     """
     Decorator para cachear el resultado de un endpoint de analytics en Redis.
 
@@ -15,46 +167,134 @@ def cache_analytics(timeout: int = None):
     (kwargs), de modo que distintas combinaciones de filtros se cacheen por
     separado. El timeout por defecto es settings.ANALYTICS_CACHE_SECONDS.
 
+    Con `depends_on` el endpoint declara de qué tablas depende (ver
+    TABLAS_ANALYTICS). Sus generaciones actuales forman parte de la clave, así
+    que cualquier escritura en esas tablas invalida el resultado al instante y
+    el TTL puede ser largo (settings.ANALYTICS_CACHE_TRACKED_SECONDS).
+
+    Protección contra estampidas:
+    - Vencido el TTL, la entrada se sigue sirviendo durante `grace` segundos
+      (settings.ANALYTICS_CACHE_GRACE_SECONDS) mientras un único worker, el que
+      obtiene el lock en el cache, la recalcula.
+    - Con la clave fría, el primero calcula y el resto espera su resultado en
+      lugar de lanzar las mismas consultas en paralelo.
+    Los contadores hit/miss/stale/lock_wait se consultan con metricas_cache().
+
+    El wrapper expone `precalentar(margen=0, **filtros)`, que recalcula la
+    entrada en la misma clave que usaría un request (ver el comando
+    `warm_analytics`).
+
     Uso:
         @router.get("/enrollments", response=dict)
         @require_authenticated_group
-        @cache_analytics()
+        @cache_analytics(depends_on=("Inscripcion",))
         def analytics_enrollments(request, programa_id=None, ...):
             ...
 
     Nota: aplicar DEBAJO de @require_authenticated_group para no cachear
     la verificación de permisos (que debe correr siempre).
     """
+    tablas = tuple(sorted(depends_on or ()))
+    for tabla in tablas:
+        if tabla not in TABLAS_ANALYTICS:
+            raise ValueError(f"Tabla sin contador de analytics: {tabla}")
+
     def decorator(func):
+        nombre = func.__name__
+        # Parámetros con su default: Ninja llama a la vista con todos ellos,
+        # así que el precalentamiento debe armar la misma clave.
+        defaults = {
+            p.name: p.default
+            for p in list(inspect.signature(func).parameters.values())[1:]
+            if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+        }
+
+        def tiempos():
+            if timeout is not None:
+                ttl = timeout
+            elif tablas:
+                ttl = getattr(settings, "ANALYTICS_CACHE_TRACKED_SECONDS", 21600)
+            else:
+                ttl = getattr(settings, "ANALYTICS_CACHE_SECONDS", 300)
+            gracia = grace if grace is not None else getattr(settings, "ANALYTICS_CACHE_GRACE_SECONDS", 300)
+            return ttl, gracia
+
+        def guardar(cache_key, result):
+            # Se guarda junto con su vencimiento "lógico"; en el cache vive ttl + gracia.
+            ttl, gracia = tiempos()
+            try:
+                cache.set(cache_key, {"valor": result, "fresco_hasta": time.time() + ttl}, ttl + gracia)
+            except Exception as e:
+                logger.warning(f"Cache set falló para {cache_key}: {e}")
+
         @wraps(func)
         def wrapper(request, *args, **kwargs):
-            ttl = timeout if timeout is not None else getattr(
-                settings, "ANALYTICS_CACHE_SECONDS", 300
-            )
-
-            # Construir clave a partir del nombre de la función + parámetros.
             # Se ignora `request` (no es serializable ni relevante para la clave).
-            param_repr = repr(sorted(kwargs.items()))
-            param_hash = hashlib.md5(param_repr.encode("utf-8")).hexdigest()
-            cache_key = f"analytics:{func.__name__}:{param_hash}"
+            cache_key = f"analytics:{nombre}"  # valor provisorio para el log si falla el cache
 
             try:
-                cached = cache.get(cache_key)
-                if cached is not None:
-                    return cached
+                cache_key = clave_analytics(nombre, kwargs, tablas)
+                entrada = cache.get(cache_key)
             except Exception as e:
                 # Si el cache falla (Redis caído, etc.), no romper el endpoint:
                 # se calcula igual. Fail-open es correcto para CACHE de lectura.
                 logger.warning(f"Cache get falló para {cache_key}: {e}")
                 return func(request, *args, **kwargs)
 
-            result = func(request, *args, **kwargs)
+            def calcular(con_lock=True):
+                try:
+                    result = func(request, *args, **kwargs)
+                    guardar(cache_key, result)
+                    return result
+                finally:
+                    # Se libera después del set: quien espera encuentra el valor, no un hueco.
+                    if con_lock:
+                        _liberar_lock(cache_key)
+
+            if entrada is not None:
+                if entrada["fresco_hasta"] > time.time():
+                    _registrar(nombre, "hit")
+                    return entrada["valor"]
+                # Vencida pero dentro de la gracia: un solo worker recalcula,
+                # el resto sigue sirviendo la versión anterior.
+                if _tomar_lock(cache_key):
+                    _registrar(nombre, "miss")
+                    return calcular()
+                _registrar(nombre, "stale")
+                return entrada["valor"]
 
+            # Clave fría: el primero calcula y el resto espera su resultado.
+            if _tomar_lock(cache_key):
+                _registrar(nombre, "miss")
+                return calcular()
+            _registrar(nombre, "lock_wait")
+            entrada = _esperar_valor(cache_key)
+            if entrada is not None:
+                return entrada["valor"]
+            # Se agotó la espera (o el otro worker falló): calculamos nosotros.
+            return calcular(con_lock=False)
+
+        def precalentar(margen=0, **filtros):
+            """
+            Calcula y guarda la entrada de `filtros` si falta o deja de estar
+            fresca dentro de `margen` segundos. Devuelve True si la recalculó.
+            Si otro worker tiene el lock no hace nada: ya la está recalculando.
+            """
+            params = {**defaults, **filtros}
+            cache_key = clave_analytics(nombre, params, tablas)
+            entrada = cache.get(cache_key)
+            if entrada is not None and entrada["fresco_hasta"] - time.time() > margen:
+                return False
+            if not _tomar_lock(cache_key):
+                return False
             try:
-                cache.set(cache_key, result, ttl)
-            except Exception as e:
-                logger.warning(f"Cache set falló para {cache_key}: {e}")
+                guardar(cache_key, func(None, **params))
+            finally:
+                _liberar_lock(cache_key)
+            return True
 
-            return result
+        wrapper.precalentar = precalentar
+        wrapper.parametros = defaults
+        _ENDPOINTS[nombre] = wrapper
         return wrapper
     return decorator
@@ -0,0 +1,69 @@
+"""
+Codificación columnar opcional (?layout=columns) para endpoints tabulares.
+
+En lugar de una lista de objetos que repite las claves en cada fila:
+
+    {"layout": "columns", "headers": ["ID", "Programa"], "length": 3,
+     "columns": [[1, 2, 3], [0, 0, 1]],
+     "dictionaries": {"Programa": ["Prog. N III", "Videojuegos"]}}
+
+`columns` trae un array por encabezado, en el orden de `headers`. Las columnas
+de `dictionaries` (baja cardinalidad: programa, cohorte, presente...) traen el
+índice del valor en su diccionario en lugar del valor repetido.
+"""
+
+from django.http import JsonResponse
+from ninja.errors import HttpError
+
+LAYOUTS = ("rows", "columns")
+
+
+def es_columnar(layout: str) -> bool:
+    """True si se pidió layout=columns; 400 si el layout no existe."""
+    layout = (layout or "rows").lower()
+    if layout not in LAYOUTS:
+        raise HttpError(400, "layout debe ser rows o columns.")
+    return layout == "columns"
+
+
+def codificar_columnas(filas, headers, diccionario=()) -> dict:
+    """
+    filas: iterable de diccionarios con las claves de `headers` (puede ser un generador)
+    diccionario: encabezados que se codifican por diccionario
+    """
+    headers = list(headers)
+    columnas = [[] for _ in headers]
+    indices = {h: {} for h in headers if h in diccionario}
+    destinos = [(h, columnas[i], indices.get(h)) for i, h in enumerate(headers)]
+    cantidad = 0
+    for fila in filas:
+        cantidad += 1
+        for h, columna, indice in destinos:
+            valor = fila[h]
+            if indice is not None:
+                valor = indice.setdefault(valor, len(indice))
+            columna.append(valor)
+    return {
+        "layout": "columns",
+        "headers": headers,
+        "length": cantidad,
+        "columns": columnas,
+        "dictionaries": {h: list(indice) for h, indice in indices.items()},
+    }
+
+
+def respuesta_columnar(filas, headers, diccionario=()) -> JsonResponse:
+    # JsonResponse directo: el formato columnar no pasa por el schema de filas del endpoint.
+    return JsonResponse(codificar_columnas(filas, headers, diccionario), json_dumps_params={"ensure_ascii": False})
+
+
+def serializar_filas(serializer_class, qs, layout="rows", diccionario=()):
+    """
+    serializer_class(qs, many=True).data tal cual o, con layout=columns, como
+    respuesta columnar con los campos de serializer_class.Meta.fields.
+    """
+    columnar = es_columnar(layout)
+    data = serializer_class(qs, many=True).data
+    if columnar:
+        return respuesta_columnar(data, serializer_class.Meta.fields, diccionario)
+    return data
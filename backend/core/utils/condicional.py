@@ -0,0 +1,106 @@
+import hashlib
+import inspect
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+
+from core.utils.cache_analytics import TABLAS_ANALYTICS, incrementar_generaciones, obtener_generaciones
+
+# Tablas versionadas solo para las respuestas condicionales (sus señales están
+# en core/signals.py). Las de TABLAS_ANALYTICS ya tienen contador.
+TABLAS_VERSIONADAS = (
+    "ConfiguracionPreinscripcionTerciario",
+    "ConfiguracionPreinscripcionVideojuegos",
+    "PreinscripcionTerciario",
+    "User",
+)
+
+
+def invalidar_versiones(*tablas):
+    """Incrementa el contador de las tablas versionadas al confirmar la transacción."""
+    for tabla in tablas:
+        if tabla not in TABLAS_VERSIONADAS:
+            raise ValueError(f"Tabla sin contador de versión: {tabla}")
+    transaction.on_commit(lambda: incrementar_generaciones(tablas))
+
+
+def validador_modelos(*modelos) -> tuple:
+    """
+    (max updated_at, cantidad de filas) de cada modelo, una consulta agregada
+    por modelo sobre la tabla completa. Detecta altas, bajas y ediciones con
+    save(); no detecta un .update() que no toque updated_at.
+    """
+    resultado = []
+    for modelo in modelos:
+        agregado = modelo.objects.order_by().aggregate(ultimo=Max("updated_at"), filas=Count("pk"))
+        resultado.append((modelo.__name__, str(agregado["ultimo"]), agregado["filas"]))
+    return tuple(resultado)
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    # Comparación débil (RFC 9110): W/"x" y "x" son equivalentes.
+    if if_none_match.strip() == "*":
+        return True
+    opaco = etag.removeprefix("W/")
+    return any(valor.strip().removeprefix("W/") == opaco for valor in if_none_match.split(","))
+
+
+def respuesta_condicional(tablas=(), modelos=(), extra=None):
+    """
+    Decorator para endpoints GET de Ninja: agrega un ETag débil y responde
+    304 Not Modified si coincide con If-None-Match, sin ejecutar la vista (ni
+    su consulta principal ni la serialización).
+
+    El ETag se deriva de la ruta con sus parámetros y de un validador barato:
+      - tablas: contadores de generación (TABLAS_ANALYTICS o TABLAS_VERSIONADAS),
+        una lectura del cache;
+      - modelos: max(updated_at) y cantidad de filas de cada modelo (validador_modelos);
+      - extra(request): valores adicionales de los que depende la respuesta (p. ej. la fecha).
+
+    Va debajo de los decorators de permisos: el 304 solo se responde a quien
+    puede ver el recurso.
+    """
+    for tabla in tablas:
+        if tabla not in TABLAS_ANALYTICS and tabla not in TABLAS_VERSIONADAS:
+            raise ValueError(f"Tabla sin contador: {tabla}")
+
+    def decorator(func):
+        firma = inspect.signature(func)
+        propio = "response" in firma.parameters
+
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            response = kwargs["response"] if propio else kwargs.pop("response")
+            generaciones = obtener_generaciones(tablas) if tablas else {}
+            validador = repr((
+                request.get_full_path(),
+                sorted(generaciones.items()),
+                validador_modelos(*modelos),
+                extra(request) if extra else None,
+            ))
+            etag = f'W/"{hashlib.md5(validador.encode("utf-8")).hexdigest()}"'
+            # El cliente siempre revalida; la respuesta no se comparte entre usuarios.
+            cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+            if _coincide(request.headers.get("If-None-Match", ""), etag):
+                no_modificado = HttpResponse(status=304)
+                for nombre, valor in cabeceras.items():
+                    no_modificado[nombre] = valor
+                return no_modificado
+
+            resultado = func(request, *args, **kwargs)
+            destino = resultado if isinstance(resultado, HttpResponse) else response
+            for nombre, valor in cabeceras.items():
+                destino[nombre] = valor
+            return resultado
+
+        if not propio:
+            # Ninja inyecta la respuesta temporal si la firma tiene un parámetro HttpResponse.
+            parametros = list(firma.parameters.values())
+            parametros.insert(1, inspect.Parameter("response", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=HttpResponse))
+            wrapper.__signature__ = firma.replace(parameters=parametros)
+        return wrapper
+
+    return decorator
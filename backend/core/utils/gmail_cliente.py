@@ -0,0 +1,125 @@
+"""
+Cliente de la API de Gmail, uno por proceso.
+
+Leer gmail_token.json y armar el servicio con `discovery.build` en cada
+envío cuesta más que el envío mismo. El cliente hace ese trabajo una vez:
+
+- el documento de descubrimiento es el que trae la librería (sin pedirlo a
+  Google) y se parsea una sola vez por proceso;
+- las credenciales quedan en memoria y se renuevan antes de vencer (faltando
+  menos de GMAIL_TOKEN_REFRESH_MARGIN_SECONDS), no en medio de un envío;
+- el token renovado se escribe con un lock de archivo (gmail_token.json.lock)
+  y reemplazando el archivo entero; si otro proceso lo renovó mientras se
+  esperaba el lock, se usa el suyo en lugar de renovar de nuevo. Si el
+  archivo cambia en disco (nueva autorización), se vuelve a leer;
+- el servicio se arma una vez por hilo (httplib2 no es seguro entre hilos) y
+  se reutiliza mientras las credenciales no cambien.
+
+`fabrica_http` y `transporte` permiten usar un HTTP local falso en los tests.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import httplib2
+from django.conf import settings
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _documento(api, version) -> dict:
+    return json.loads(get_static_doc(api, version))
+
+
+class ClienteGmail:
+    def __init__(self, ruta_token, scopes, fabrica_http=None, transporte=Request):
+        self.ruta_token = ruta_token
+        self.scopes = scopes
+        self._fabrica_http = fabrica_http or (lambda: httplib2.Http(timeout=settings.EMAIL_TIMEOUT))
+        self._transporte = transporte
+        self._creds = None
+        self._leido = None  # mtime del archivo que dio origen a _creds
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _modificado(self):
+        try:
+            return os.path.getmtime(self.ruta_token)
+        except OSError:
+            return None
+
+    def _cargar(self):
+        self._leido = self._modificado()
+        self._creds = Credentials.from_authorized_user_file(self.ruta_token, self.scopes)
+
+    def _por_vencer(self) -> bool:
+        if not self._creds.valid:
+            return True
+        if self._creds.expiry is None:
+            return False
+        # google-auth guarda expiry como UTC sin zona.
+        restante = self._creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None)
+        return restante < timedelta(seconds=settings.GMAIL_TOKEN_REFRESH_MARGIN_SECONDS)
+
+    def _guardar(self):
+        directorio = os.path.dirname(self.ruta_token)
+        with tempfile.NamedTemporaryFile("w", dir=directorio, delete=False) as temporal:
+            temporal.write(self._creds.to_json())
+        os.replace(temporal.name, self.ruta_token)
+        self._leido = self._modificado()
+
+    def _renovar(self):
+        os.makedirs(os.path.dirname(self.ruta_token), exist_ok=True)
+        with open(f"{self.ruta_token}.lock", "a") as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            try:
+                # Otro proceso pudo renovarlo mientras se esperaba el lock.
+                if self._modificado() != self._leido:
+                    self._cargar()
+                if self._por_vencer() and self._creds.refresh_token:
+                    self._creds.refresh(self._transporte())
+                    self._guardar()
+            finally:
+                fcntl.flock(candado, fcntl.LOCK_UN)
+
+    def credenciales(self):
+        """Credenciales vigentes, renovadas antes de vencer. None si no hay token autorizado."""
+        with self._lock:
+            modificado = self._modificado()
+            if modificado is None:
+                self._creds = None
+                return None
+            if self._creds is None or modificado != self._leido:
+                self._cargar()
+            if self._por_vencer():
+                try:
+                    self._renovar()
+                except Exception as e:
+                    # Si todavía no venció se sigue usando; si venció, no hay servicio.
+                    logger.error(f"No se pudo renovar el token de Gmail: {e}")
+            return self._creds if self._creds.valid else None
+
+    def servicio(self):
+        """Servicio de la API de Gmail para este hilo, o None si no hay credenciales válidas."""
+        creds = self.credenciales()
+        if creds is None:
+            return None
+        if getattr(self._local, "creds", None) is not creds:
+            self._local.servicio = build_from_document(
+                _documento("gmail", "v1"), http=AuthorizedHttp(creds, http=self._fabrica_http())
+            )
+            self._local.creds = creds
+        return self._local.servicio
+
@@ -0,0 +1,189 @@
+"""
+Informes PDF tabulares de cualquier tamaño (planillas institucionales completas).
+
+En lugar de una sola Table con todas las filas, que reportlab maqueta de una
+vez (tiempo y memoria crecen mucho más que la cantidad de filas), las filas se
+parten en LongTable de FILAS_POR_BLOQUE filas que un flowable propio arma a
+medida que doc.build le pide espacio (split): en memoria solo hay un bloque
+por vez más las páginas ya escritas, comprimidas.
+
+El encabezado de la tabla se dibuja en cada página desde la plantilla (no es
+parte de los bloques), así los bloques se apilan como una sola tabla y el
+encabezado aparece una vez por página. Los anchos de columna se calculan sobre
+una muestra de las primeras filas; las celdas que no entran en su columna se
+parten en varias líneas.
+"""
+
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import BaseDocTemplate, Flowable, Frame, LongTable, PageTemplate, Paragraph, Table, TableStyle
+
+# Filas por LongTable: alrededor de una página apaisada con celdas de una línea.
+FILAS_POR_BLOQUE = 40
+# Filas que se miden para calcular los anchos de columna.
+MUESTRA_ANCHOS = 200
+
+FUENTE = "Helvetica"
+FUENTE_NEGRITA = "Helvetica-Bold"
+TAMANIO_CELDA = 8
+TAMANIO_ENCABEZADO = 10
+# Padding horizontal de cada celda (izquierdo + derecho, el default de TableStyle).
+RELLENO = 12
+ANCHO_MINIMO = 40
+
+ESTILO_CELDA = ParagraphStyle("celda", fontName=FUENTE, fontSize=TAMANIO_CELDA, leading=TAMANIO_CELDA + 2, alignment=TA_CENTER)
+ESTILO_TITULO_COLUMNA = ParagraphStyle(
+    "titulo_columna", fontName=FUENTE_NEGRITA, fontSize=TAMANIO_ENCABEZADO, leading=TAMANIO_ENCABEZADO + 2,
+    alignment=TA_CENTER, textColor=colors.whitesmoke,
+)
+
+ESTILO_ENCABEZADO = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, -1), colors.indigo),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 12),
+    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+ESTILO_FILAS = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, -1), colors.beige),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("FONTNAME", (0, 0), (-1, -1), FUENTE),
+    ("FONTSIZE", (0, 0), (-1, -1), TAMANIO_CELDA),
+    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+
+def anchos_columnas(encabezado, muestra, ancho_disponible) -> list:
+    """
+    Anchos que suman `ancho_disponible`. Cada columna pide el ancho de su
+    texto más largo en la muestra (el título puede partirse por palabras). Si
+    todo entra, el sobrante se reparte en proporción; si no, se recortan solo
+    las columnas más anchas hasta un tope común, y esas celdas se parten en
+    varias líneas.
+    """
+    pedidos = [
+        max((stringWidth(p, FUENTE_NEGRITA, TAMANIO_ENCABEZADO) for p in titulo.split()), default=0)
+        for titulo in encabezado
+    ]
+    for fila in muestra:
+        for i, texto in enumerate(fila):
+            pedidos[i] = max(pedidos[i], stringWidth(texto, FUENTE, TAMANIO_CELDA))
+    pedidos = [max(p + RELLENO, ANCHO_MINIMO) for p in pedidos]
+
+    total = sum(pedidos)
+    if total <= ancho_disponible:
+        return [p * ancho_disponible / total for p in pedidos]
+
+    # Tope común para las columnas anchas: las angostas conservan su ancho.
+    restantes = sorted(pedidos)
+    disponible = ancho_disponible
+    while restantes and restantes[0] * len(restantes) <= disponible:
+        disponible -= restantes.pop(0)
+    tope = disponible / len(restantes)
+    return [min(p, tope) for p in pedidos]
+
+
+def _celda(texto, ancho):
+    # Texto plano si entra en una línea; Paragraph (que se parte) si no.
+    if stringWidth(texto, FUENTE, TAMANIO_CELDA) <= ancho - RELLENO:
+        return texto
+    return Paragraph(escape(texto), ESTILO_CELDA)
+
+
+class _TablaPorBloques(Flowable):
+    """
+    Tabla de filas que llegan de un iterador, para doc.build. Se ubica solo
+    partiéndose (split, la API de reportlab para flowables de varias páginas):
+    en cada split arma la LongTable del bloque siguiente de FILAS_POR_BLOQUE
+    filas, devuelve lo que entra en el espacio disponible y otra _TablaPorBloques
+    con el resto. Así el documento pide las filas a medida que las
+    necesita y nunca hay más de un bloque armado.
+    """
+
+    def __init__(self, filas, anchos, pendiente=None):
+        super().__init__()
+        self._filas = filas
+        self._anchos = anchos
+        self._pendiente = pendiente  # LongTable armada y todavía no ubicada
+
+    def _siguiente(self):
+        if self._pendiente is None:
+            lote = list(islice(self._filas, FILAS_POR_BLOQUE))
+            if lote:
+                self._pendiente = LongTable(
+                    [[_celda(t, a) for t, a in zip(fila, self._anchos)] for fila in lote],
+                    colWidths=self._anchos, style=ESTILO_FILAS, hAlign="LEFT",
+                )
+        return self._pendiente
+
+    def wrap(self, availWidth, availHeight):
+        # Nunca entra entera: el frame la parte con split en lo que cabe.
+        return availWidth, availHeight + 1
+
+    def split(self, availWidth, availHeight):
+        tabla = self._siguiente()
+        if tabla is None:
+            return []
+        _, alto = tabla.wrap(availWidth, availHeight)
+        if alto <= availHeight:
+            partes, resto = [tabla], None
+        else:
+            partes = tabla.split(availWidth, availHeight)
+            if not partes:
+                # No entra ni una fila: el documento pasa a la página siguiente.
+                return []
+            resto = partes.pop()
+        self._pendiente = resto
+        if self._siguiente() is not None:
+            partes.append(_TablaPorBloques(self._filas, self._anchos, self._pendiente))
+        return partes
+
+
+def escribir_informe(filas, encabezado, destino, titulo):
+    """
+    Escribe el informe en `destino` (ruta o archivo binario).
+    filas: iterable de listas de textos en el orden de `encabezado` (puede ser un generador)
+    """
+    filas = iter(filas)
+    muestra = list(islice(filas, MUESTRA_ANCHOS))
+
+    doc = BaseDocTemplate(destino, pagesize=landscape(letter), title=titulo)
+    anchos = anchos_columnas(encabezado, muestra, doc.width)
+
+    tabla_encabezado = Table(
+        [[Paragraph(escape(t), ESTILO_TITULO_COLUMNA) for t in encabezado]],
+        colWidths=anchos, style=ESTILO_ENCABEZADO, hAlign="LEFT",
+    )
+    _, alto_encabezado = tabla_encabezado.wrap(doc.width, doc.height)
+    parrafo_titulo = Paragraph(escape(titulo), getSampleStyleSheet()["Title"])
+    _, alto_titulo = parrafo_titulo.wrap(doc.width, doc.height)
+    alto_titulo += parrafo_titulo.getSpaceAfter()
+    tope = doc.bottomMargin + doc.height
+
+    def primera_pagina(canv, doc):
+        parrafo_titulo.drawOn(canv, doc.leftMargin, tope - alto_titulo)
+        tabla_encabezado.drawOn(canv, doc.leftMargin, tope - alto_titulo - alto_encabezado)
+
+    def otras_paginas(canv, doc):
+        tabla_encabezado.drawOn(canv, doc.leftMargin, tope - alto_encabezado)
+
+    def marco(alto):
+        return Frame(
+            doc.leftMargin, doc.bottomMargin, doc.width, alto,
+            leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0,
+        )
+
+    doc.addPageTemplates([
+        PageTemplate("primera", [marco(doc.height - alto_titulo - alto_encabezado)], onPage=primera_pagina, autoNextPageTemplate="resto"),
+        PageTemplate("resto", [marco(doc.height - alto_encabezado)], onPage=otras_paginas),
+    ])
+    if muestra:
+        doc.build([_TablaPorBloques(chain(muestra, filas), anchos)])
+    else:
+        doc.build([Paragraph("Sin registros.", getSampleStyleSheet()["Normal"])])
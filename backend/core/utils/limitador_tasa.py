@@ -0,0 +1,44 @@
+"""
+Limitador de ritmo (token bucket) para el envío de correos.
+
+El balde se llena a `por_minuto / 60` fichas por segundo hasta `rafaga`
+fichas; cada envío toma una. Con el balde lleno salen `rafaga` correos de
+inmediato y después el ritmo queda en `por_minuto`, sin una pausa fija entre
+mensajes: si el servidor tarda, el tiempo que tardó ya cuenta para la ficha
+siguiente. Es seguro entre hilos (los envíos concurrentes comparten el balde).
+
+    limitador = LimitadorTasa(settings.MAIL_WORKER_RATE_PER_MINUTE, settings.MAIL_WORKER_BURST)
+    limitador.esperar()   # bloquea lo justo hasta tener una ficha
+"""
+
+import threading
+import time
+
+
+class LimitadorTasa:
+    def __init__(self, por_minuto, rafaga=1, reloj=time.monotonic, dormir=time.sleep):
+        self.tasa = por_minuto / 60
+        self.capacidad = max(1, rafaga)
+        self.fichas = float(self.capacidad)
+        self._reloj = reloj
+        self._dormir = dormir
+        self._ultimo = reloj()
+        self._lock = threading.Lock()
+
+    def _recargar(self):
+        ahora = self._reloj()
+        self.fichas = min(self.capacidad, self.fichas + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def esperar(self) -> float:
+        """Toma una ficha, esperando lo necesario. Devuelve los segundos esperados."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                self._recargar()
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return esperado
+                falta = (1 - self.fichas) / self.tasa
+            self._dormir(falta)
+            esperado += falta
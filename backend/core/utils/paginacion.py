@@ -0,0 +1,101 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(valores) -> str:
+    """Cursor opaco (base64 url-safe de un JSON) con los valores de la última fila."""
+    return base64.urlsafe_b64encode(json.dumps(list(valores)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> list:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido("Cursor inválido") from e
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise CursorInvalido("Cursor inválido")
+    return valores
+
+
+def despues_de(campos, valores) -> Q:
+    """
+    Filas estrictamente posteriores a `valores` en el orden de `campos`
+    ("-campo" = descendente): (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z)...
+    """
+    nombres = [campo.lstrip("-") for campo in campos]
+    condicion = Q()
+    for i, campo in enumerate(campos):
+        iguales = {c: v for c, v in zip(nombres[:i], valores[:i])}
+        operador = "lt" if campo.startswith("-") else "gt"
+        condicion |= Q(**iguales, **{f"{nombres[i]}__{operador}": valores[i]})
+    return condicion
+
+
+def pagina_keyset(qs, campos, limit, cursor=None):
+    """
+    Paginación por keyset (seek) sobre `campos`, que deben identificar la fila
+    (el último suele ser el id); "-campo" ordena en forma descendente. El costo
+    de cada página no depende de cuántas la preceden, a diferencia de OFFSET.
+
+    Devuelve (filas, siguiente_cursor); siguiente_cursor es None en la última página.
+    Lanza CursorInvalido si el cursor no se puede decodificar.
+    """
+    qs = qs.order_by(*campos)
+    if cursor:
+        qs = qs.filter(despues_de(campos, decodificar_cursor(cursor, len(campos))))
+    # Se pide una fila de más para saber si hay otra página sin contar.
+    filas = list(qs[: limit + 1])
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(getattr(ultima, campo.lstrip("-")) for campo in campos)
+    return filas, siguiente
+
+
+def contar(qs, estimado=False, tope=1000):
+    """
+    Total de filas de `qs`. Con `estimado` se cuenta a lo sumo `tope` + 1
+    filas (consulta acotada): devuelve (cantidad, True) si lo superó, en cuyo
+    caso la cantidad es una cota inferior.
+    """
+    if not estimado:
+        return qs.count(), False
+    cantidad = qs.order_by()[: tope + 1].count()
+    return min(cantidad, tope), cantidad > tope
+
+
+def paginas_keyset(qs, campos, tamanio):
+    """
+    Recorre `qs` completo en el orden de `campos` (como en pagina_keyset) y
+    devuelve listas de a lo sumo `tamanio` filas, una consulta por página. A
+    diferencia de qs.iterator(), que con mysqlclient trae todo el resultado
+    al cliente antes de la primera fila, en memoria hay a lo sumo una página.
+    Sirve tanto para modelos como para values(). Los campos pueden ser
+    anotaciones y no deben ser NULL (la comparación con NULL excluye la fila).
+    """
+    qs = qs.order_by(*campos)
+    pagina = qs
+    while filas := list(pagina[:tamanio]):
+        yield filas
+        if len(filas) < tamanio:
+            return
+        ultima = filas[-1]
+        valores = [
+            ultima[nombre] if isinstance(ultima, dict) else getattr(ultima, nombre)
+            for nombre in (campo.lstrip("-") for campo in campos)
+        ]
+        pagina = qs.filter(despues_de(campos, valores))
+
+
+def recorrer_keyset(qs, campos, tamanio):
+    """Las filas de paginas_keyset, una por una."""
+    for filas in paginas_keyset(qs, campos, tamanio):
+        yield from filas
@@ -0,0 +1,28 @@
+import threading
+
+from django.db import transaction
+
+_locales = threading.local()
+
+
+def acumular_hasta_commit(nombre: str, items, procesar):
+    """
+    Acumula `items` en un set por hilo bajo `nombre` y llama `procesar(items)`
+    una sola vez en el próximo on_commit, con todo lo acumulado hasta entonces.
+
+    Pensado para tablas derivadas: una importación de 500 filas dentro de una
+    transacción recalcula una vez y no 500. Si la transacción se revierte, lo
+    acumulado queda para el próximo commit (los recálculos son idempotentes).
+    """
+    pendientes = _locales.__dict__.setdefault(nombre, set())
+    pendientes.update(items)
+    transaction.on_commit(lambda: _vaciar(nombre, procesar))
+
+
+def _vaciar(nombre, procesar):
+    pendientes = _locales.__dict__.get(nombre)
+    if not pendientes:
+        return
+    items = set(pendientes)
+    pendientes.clear()
+    procesar(items)
@@ -0,0 +1,109 @@
+"""
+Pool de conexiones SMTP por proceso.
+
+Cada conexión nueva al servidor paga TCP + TLS + AUTH. El pool guarda las
+sesiones ya autenticadas, por cuenta, y las presta para mandar varios
+mensajes sobre la misma sesión. Una sesión ociosa más de MAIL_SMTP_IDLE_SECONDS
+o que ya mandó MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION mensajes (los proveedores
+cortan las sesiones largas) se cierra en lugar de reutilizarse, y antes de
+prestar una sesión guardada se comprueba con NOOP que el servidor no la haya
+cortado. Quedan guardadas como máximo MAIL_SMTP_POOL_SIZE sesiones por cuenta.
+
+    sesion = POOL.tomar(cuenta, fabrica)
+    sesion.enviar(mensaje)
+    POOL.devolver(cuenta, sesion)   # o POOL.descartar(sesion) si falló
+
+`fabrica(cuenta)` devuelve el backend de correo sin abrir. Los backends que
+no son SMTP (locmem, consola) se tratan igual, sin el NOOP.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Sesion:
+    """Backend de correo abierto y cuánto se usó."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.enviados = 0
+        self.usada_at = time.monotonic()
+
+    @property
+    def agotada(self) -> bool:
+        return self.enviados >= settings.MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION
+
+    def enviar(self, mensaje) -> int:
+        enviados = self.backend.send_messages([mensaje])
+        self.enviados += 1
+        self.usada_at = time.monotonic()
+        return enviados
+
+    def responde(self) -> bool:
+        """False si la sesión estuvo ociosa demasiado tiempo o el servidor la cortó."""
+        if time.monotonic() - self.usada_at > settings.MAIL_SMTP_IDLE_SECONDS:
+            return False
+        if not hasattr(self.backend, "connection"):
+            return True
+        if self.backend.connection is None:
+            return False
+        try:
+            return self.backend.connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    def cerrar(self):
+        try:
+            self.backend.close()
+        except Exception:
+            pass
+
+
+class PoolSMTP:
+    def __init__(self):
+        self._libres = {}
+        self._lock = threading.Lock()
+
+    def tomar(self, cuenta, fabrica) -> Sesion:
+        """Sesión abierta de la cuenta: una guardada que responda o una nueva."""
+        while True:
+            with self._lock:
+                libres = self._libres.get(cuenta)
+                sesion = libres.pop() if libres else None
+            if sesion is None:
+                break
+            if not sesion.agotada and sesion.responde():
+                return sesion
+            sesion.cerrar()
+        backend = fabrica(cuenta)
+        backend.open()
+        return Sesion(backend)
+
+    def devolver(self, cuenta, sesion):
+        """Guarda la sesión para reutilizarla (o la cierra si está agotada o el pool lleno)."""
+        if not sesion.agotada:
+            with self._lock:
+                libres = self._libres.setdefault(cuenta, [])
+                if len(libres) < settings.MAIL_SMTP_POOL_SIZE:
+                    libres.append(sesion)
+                    return
+        sesion.cerrar()
+
+    def descartar(self, sesion):
+        """Cierra una sesión que falló: puede haber quedado a mitad de un comando."""
+        sesion.cerrar()
+
+    def cerrar_todas(self):
+        with self._lock:
+            sesiones = [s for libres in self._libres.values() for s in libres]
+            self._libres = {}
+        for sesion in sesiones:
+            sesion.cerrar()
+
+
+POOL = PoolSMTP()
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+# Columnas de Inscripcion que alcanzan para armar el resumen (una sola consulta con joins).
+CAMPOS_INSCRIPCION = (
+    "estudiante_id",
+    "cohorte__programa__nombre",
+    "modulo__bloque__nombre",
+    "cohorte__bloque__nombre",
+    "created_at",
+)
+
+
+def trayecto(programa, bloque_modulo, bloque_cohorte) -> str:
+    """
+    "Programa (Bloque)" de una inscripción. Se prioriza el bloque del módulo y
+    luego el de la cohorte; sin bloque queda solo el programa.
+    """
+    prog = (programa or "S/P").strip()
+    bloque = (bloque_modulo or bloque_cohorte or "").strip()
+    return f"{prog} ({bloque})" if bloque else prog
+
+
+def resumir_inscripciones(filas) -> dict:
+    """
+    Agrupa filas con CAMPOS_INSCRIPCION por estudiante:
+    {estudiante_id: (trayectos ordenados, fecha de la primera inscripción)}.
+    """
+    resumen = {}
+    for est_id, programa, bloque_modulo, bloque_cohorte, creada in filas:
+        trayectos, primera = resumen.get(est_id, (set(), None))
+        trayectos.add(trayecto(programa, bloque_modulo, bloque_cohorte))
+        if creada is not None and (primera is None or creada < primera):
+            primera = creada
+        resumen[est_id] = (trayectos, primera)
+    return {est_id: (sorted(trayectos), primera) for est_id, (trayectos, primera) in resumen.items()}
+
+
+def primera_fecha(*fechas) -> datetime | None:
+    """La más antigua de las fechas indicadas, ignorando las vacías."""
+    fechas = [f for f in fechas if f is not None]
+    return min(fechas) if fechas else None
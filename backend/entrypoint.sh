@@ -16,6 +16,24 @@ python manage.py migrate
 echo "Verificando superusuario..."
 python init_su.py
 
+# Precalentar el cache de analytics y mantenerlo fresco en segundo plano
+if [ "${ANALYTICS_WARMUP:-True}" = "True" ]; then
+  echo "Iniciando precalentamiento de analytics..."
+  python manage.py warm_analytics --loop >> /app/logs/warm_analytics.log 2>&1 &
+fi
+
+# Worker de exportaciones en segundo plano (genera los archivos pedidos a /api/v2/exportaciones)
+if [ "${EXPORT_WORKER:-True}" = "True" ]; then
+  echo "Iniciando worker de exportaciones..."
+  python manage.py procesar_exportaciones --loop >> /app/logs/exportaciones.log 2>&1 &
+fi
+
+# Worker de correos (envía la bandeja de salida CorreoSaliente con reintentos y ritmo limitado)
+if [ "${MAIL_WORKER:-True}" = "True" ]; then
+  echo "Iniciando worker de correos..."
+  python manage.py run_mail_worker --loop >> /app/logs/mail_worker.log 2>&1 &
+fi
+
 # Recolectar estáticos (opcional, si usas whitenoise o nginx para estáticos de django admin)
 # python manage.py collectstatic --noinput
 